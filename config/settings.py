@@ -8,14 +8,45 @@ DATA_EXTERNAL_PATH = "data/external/"
 # Arquivos principais
 IPCA_RAW_FILE = "br_ibge_ipca_mes_brasil.csv.gz"
 IPCA_PROCESSED_FILE = "ipca_processado.csv"
+VENDAS_RAW_FILE = "vendas_confeitaria.csv"
+VENDAS_PROCESSED_FILE = "vendas_confeitaria_tratadas.csv"
+GOLD_FILE = "tabela_gold_ipca_vendas.csv"
 
 # URLs para feriados
 FERIADOS_BASE_URL = "https://raw.githubusercontent.com/gabriel-milan/feriados-brasileiros/main/"
 FERIADOS_ANOS = [2024, 2025]
 FERIADOS_TIPOS = ["nacional", "estadual", "municipal", "facultativo"]
 
+# Feriados baixados e consolidados (feriados_completo.csv)
+FERIADOS_PATH = "data/processed/feriados/"
+
 # Configurações de encoding
 DEFAULT_ENCODING = "utf-8"
 
 # Estados de interesse (pode ser expandido)
-ESTADOS_FOCO = ["SP", "RJ", "MG", "RS"]
\ No newline at end of file
+ESTADOS_FOCO = ["SP", "RJ", "MG", "RS"]
+
+# Cache em disco dos carregamentos (memoização)
+CACHE_PATH = "data/cache/"
+CACHE_MAX_MB = 512
+CACHE_MAX_ENTRADAS = 64
+
+# Banco SQLite com as camadas processadas e gold para consultas ad hoc
+CONSULTAS_DB_FILE = "data/processed/consultas.sqlite"
+
+# Arrays mensais mapeados em memória (IPCA e gold) para workers paralelos
+ARRAYS_PATH = "data/processed/arrays/"
+
+# Serviço HTTP somente leitura das camadas processada e gold
+SERVICO_HOST = "127.0.0.1"
+SERVICO_PORTA = 8050
+
+# Orçamento de memória dos carregamentos em chunks (ex: "512MB"); None usa
+# MAX_MEMORY, o tamanho da Lambda, o limite do cgroup ou a RAM física
+MAX_MEMORY = None
+
+# Vendas brutas convertidas uma vez para Parquet particionado por Ano_Mes
+VENDAS_PARQUET_PATH = "data/processed/vendas_parquet/"
+
+# Repositório de indicadores mensais (IPCA, INPC, IPCA-15, IGP-M) com releases só de acréscimo
+INDICADORES_PATH = "data/processed/indicadores/"
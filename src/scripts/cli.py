@@ -0,0 +1,349 @@
+"""
+CLI unificada e ponto de entrada Lambda do pipeline
+
+Só importa bibliotecas padrão no carregamento do módulo; pandas, boto3 e os
+scripts de cada etapa são importados apenas quando a etapa realmente roda.
+Assim `--help`, `verificar` e execuções sem mudanças (nada a fazer) saem
+sem pagar o custo de importação.
+
+Uso:
+    python src/scripts/cli.py verificar
+    python src/scripts/cli.py ipca [--forcar]
+    python src/scripts/cli.py gold [--forcar]
+    python src/scripts/cli.py --max-memory 512MB vendas
+    python src/scripts/cli.py parquet [--forcar]
+    python src/scripts/cli.py gold-lojas [--lojas 001 002]
+    python src/scripts/cli.py indicadores [--fontes ipca inpc] [--forcar]
+    python src/scripts/cli.py consulta "SELECT * FROM gold WHERE variacao_mensal > 0.5"
+    python src/scripts/cli.py carga --objetos 8 64 --linhas 1000 --latencia-s3 0.02
+    python src/scripts/cli.py tempo-importacao src.scripts.vendas_ipca_gold
+"""
+
+import argparse
+import importlib
+import json
+import os
+import re
+import runpy
+import subprocess
+import sys
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+SCRIPTS_DIR = os.path.join(BASE_DIR, 'src', 'scripts')
+RAW_DIR = os.path.join(BASE_DIR, 'data', 'raw')
+PROCESSED_DIR = os.path.join(BASE_DIR, 'data', 'processed')
+
+if BASE_DIR not in sys.path:
+    sys.path.insert(0, BASE_DIR)
+
+from config.settings import (FERIADOS_PATH, GOLD_FILE, IPCA_PROCESSED_FILE, IPCA_RAW_FILE,
+                             VENDAS_PROCESSED_FILE, VENDAS_RAW_FILE)
+
+# Mesmos caminhos (e variáveis de ambiente) que os scripts de cada etapa usam
+ARQUIVO_VENDAS = os.environ.get('VENDAS_ARQUIVO') or os.path.join(RAW_DIR, VENDAS_RAW_FILE)
+VENDAS_SAIDA_DIR = os.environ.get('VENDAS_SAIDA_DIR') or PROCESSED_DIR
+FERIADOS_DIR = os.environ.get('FERIADOS_DIR') or os.path.join(BASE_DIR, FERIADOS_PATH)
+
+# Entradas e saídas de cada etapa local, usadas para decidir se há algo a fazer
+ETAPAS = {
+    'ipca': {
+        'entradas': [os.path.join(RAW_DIR, IPCA_RAW_FILE)],
+        'saidas': [os.path.join(PROCESSED_DIR, IPCA_PROCESSED_FILE)]
+    },
+    'vendas': {
+        'entradas': [ARQUIVO_VENDAS],
+        'saidas': [os.path.join(VENDAS_SAIDA_DIR, VENDAS_PROCESSED_FILE)]
+    },
+    'gold': {
+        'entradas': [os.path.join(PROCESSED_DIR, IPCA_PROCESSED_FILE),
+                     os.path.join(PROCESSED_DIR, VENDAS_PROCESSED_FILE)],
+        'saidas': [os.path.join(PROCESSED_DIR, GOLD_FILE)]
+    },
+    'feriados': {
+        'entradas': [],
+        'saidas': [os.path.join(FERIADOS_DIR, 'feriados_completo.csv')]
+    }
+}
+
+# Variáveis de ambiente exigidas pelas etapas que rodam como Lambda
+VARIAVEIS_LAMBDA = {
+    'download': ['S3_BUCKET_NAME'],
+    'transferir': ['S3_BUCKET_ORIGEM', 'S3_BUCKET_DESTINO']
+}
+
+
+def situacao_etapa(nome):
+    """
+    Verifica se uma etapa local precisa rodar comparando mtimes
+
+    Retorna:
+    dict: {'etapa', 'atualizada', 'motivo'}
+    """
+    etapa = ETAPAS[nome]
+    faltando = [c for c in etapa['entradas'] if not os.path.exists(c)]
+    if faltando:
+        return {'etapa': nome, 'atualizada': False, 'motivo': f"entrada ausente: {faltando[0]}"}
+
+    saidas = [c for c in etapa['saidas'] if os.path.exists(c)]
+    if len(saidas) < len(etapa['saidas']):
+        return {'etapa': nome, 'atualizada': False, 'motivo': 'saída ainda não gerada'}
+    if not etapa['entradas']:
+        return {'etapa': nome, 'atualizada': True, 'motivo': 'saída existente (fonte remota)'}
+
+    entrada_mais_nova = max(os.path.getmtime(c) for c in etapa['entradas'])
+    saida_mais_antiga = min(os.path.getmtime(c) for c in saidas)
+    if entrada_mais_nova > saida_mais_antiga:
+        return {'etapa': nome, 'atualizada': False, 'motivo': 'entrada mais nova que a saída'}
+    return {'etapa': nome, 'atualizada': True, 'motivo': 'nada mudou'}
+
+
+def verificar_configuracao():
+    """
+    Valida a configuração das etapas Lambda sem importar dependências pesadas
+    """
+    return {
+        etapa: [v for v in variaveis if not os.environ.get(v)]
+        for etapa, variaveis in VARIAVEIS_LAMBDA.items()
+    }
+
+
+def executar_etapa(nome):
+    """
+    Executa uma etapa local, importando o script correspondente sob demanda
+    """
+    if nome == 'ipca':
+        return importlib.import_module('src.scripts.tratamento_ipca').main()
+    if nome == 'gold':
+        return importlib.import_module('src.scripts.vendas_ipca_gold').criar_base_gold()
+    if nome == 'vendas':
+        return runpy.run_path(os.path.join(SCRIPTS_DIR, 'tratamento_vendas.py'), run_name='__main__')
+    if nome == 'feriados':
+        return runpy.run_path(os.path.join(SCRIPTS_DIR, 'feriados.py'), run_name='__main__')
+    raise ValueError(f"Etapa desconhecida: {nome}")
+
+
+def etapa_concluida(nome, resultado):
+    """
+    Interpreta o retorno de executar_etapa
+
+    As funções das etapas retornam None quando falham; os scripts
+    executados via runpy deixam o resultado nas próprias globais.
+    """
+    if nome == 'vendas':
+        if (resultado.get('resultado') or {}).get('sem_novidades'):
+            return True
+        return all(resultado.get(variavel) for variavel in ('arquivo_salvo', 'cubo_salvo', 'sketch_salvo'))
+    if nome == 'feriados':
+        return bool(resultado.get('arquivo_final'))
+    return resultado is not None
+
+
+def medir_tempo_importacao(modulo, top=10):
+    """
+    Mede o tempo de importação de um módulo com `python -X importtime`
+
+    Parâmetros:
+    modulo (str): módulo a importar (ex: 'src.scripts.tratamento_ipca')
+    top (int): número de módulos mais caros a listar
+
+    Retorna:
+    dict: tempo total (ms) e lista dos módulos mais caros (tempo acumulado)
+    """
+    processo = subprocess.run(
+        [sys.executable, '-X', 'importtime', '-c', f'import {modulo}'],
+        cwd=BASE_DIR, capture_output=True, text=True
+    )
+    if processo.returncode != 0:
+        ultima_linha = processo.stderr.strip().splitlines()[-1:] or ['']
+        raise RuntimeError(f"Falha ao importar {modulo}: {ultima_linha[0]}")
+
+    padrao = re.compile(r'import time:\s+(\d+)\s+\|\s+(\d+)\s+\|(\s*)(\S+)')
+    medidas = []
+    for linha in processo.stderr.splitlines():
+        encontrado = padrao.match(linha)
+        if encontrado:
+            proprio, acumulado, recuo, nome = encontrado.groups()
+            medidas.append({'modulo': nome, 'proprio_ms': int(proprio) / 1000,
+                            'acumulado_ms': int(acumulado) / 1000, 'nivel': len(recuo) // 2})
+
+    total = sum(m['acumulado_ms'] for m in medidas if m['nivel'] == 0)
+    mais_caros = sorted(medidas, key=lambda m: m['acumulado_ms'], reverse=True)[:top]
+    return {'modulo': modulo, 'total_ms': round(total, 1), 'mais_caros': mais_caros}
+
+
+def lambda_handler(event, context):
+    """
+    Ponto de entrada Lambda único
+
+    A etapa vem de event['etapa'] ou da variável PIPELINE_ETAPA:
+    'verificar' responde sem importar pandas/boto3; 'download' e
+    'transferir' delegam para os handlers dos scripts 1 e 2.
+    """
+    event = event or {}
+    etapa = event.get('etapa') or os.environ.get('PIPELINE_ETAPA', 'verificar')
+
+    if etapa == 'verificar':
+        return {'statusCode': 200, 'body': json.dumps({'faltando': verificar_configuracao()})}
+
+    faltando = verificar_configuracao().get(etapa)
+    if faltando is None:
+        return {'statusCode': 400, 'body': json.dumps({'error': f'Etapa desconhecida: {etapa}'})}
+    if faltando:
+        return {'statusCode': 400, 'body': json.dumps({'error': f'Variáveis ausentes: {faltando}'})}
+
+    modulo = {
+        'download': 'src.scripts.script1_download_to_s3',
+        'transferir': 'src.scripts.script2_transfer_s3_to_s3'
+    }[etapa]
+    return importlib.import_module(modulo).lambda_handler(event, context)
+
+
+def criar_parser():
+    parser = argparse.ArgumentParser(description='Pipeline IPCA, vendas e feriados')
+    parser.add_argument('--max-memory', dest='max_memoria', default=None,
+                        help='orçamento de memória dos carregamentos em chunks (ex: 512MB)')
+    subparsers = parser.add_subparsers(dest='comando', required=True)
+
+    subparsers.add_parser('verificar', help='valida configuração e mostra etapas desatualizadas')
+
+    for nome in ETAPAS:
+        sub = subparsers.add_parser(nome, help=f'executa a etapa {nome}')
+        sub.add_argument('--forcar', action='store_true', help='executa mesmo sem mudanças')
+
+    sub = subparsers.add_parser('consulta', help='consulta SQL sobre as camadas processada e gold')
+    sub.add_argument('sql')
+
+    sub = subparsers.add_parser('arrays', help='exporta IPCA e gold como arrays mapeados em memória')
+    sub.add_argument('--forcar', action='store_true', help='exporta mesmo sem mudanças')
+
+    sub = subparsers.add_parser('parquet', help='converte as vendas brutas em Parquet particionado por Ano_Mes')
+    sub.add_argument('--forcar', action='store_true', help='converte mesmo sem mudanças no CSV')
+
+    sub = subparsers.add_parser('gold-lojas', help='tabela gold por loja (vendas com coluna de loja)')
+    sub.add_argument('--lojas', nargs='+', default=None, help='só estas lojas (as demais partições ficam)')
+
+    sub = subparsers.add_parser('indicadores', help='atualiza o repositório de indicadores mensais')
+    sub.add_argument('--fontes', nargs='+', default=None, help='indicadores do registro (padrão: todos)')
+    sub.add_argument('--processos', type=int, default=None)
+    sub.add_argument('--forcar', action='store_true', help='relê as fontes mesmo sem mudanças')
+
+    sub = subparsers.add_parser('servir', help='serviço HTTP somente leitura de gold, IPCA e vendas')
+    sub.add_argument('--host', default=None)
+    sub.add_argument('--porta', type=int, default=None)
+
+    sub = subparsers.add_parser('carga', help='teste de carga local dos handlers Lambda')
+    sub.add_argument('--handler', nargs='+', choices=['download', 'transferir'],
+                     default=['download', 'transferir'])
+    sub.add_argument('--objetos', nargs='+', type=int, default=[8])
+    sub.add_argument('--linhas', nargs='+', type=int, default=[1000])
+    sub.add_argument('--latencia-http', type=float, default=0.0, help='segundos por requisição')
+    sub.add_argument('--latencia-s3', type=float, default=0.0, help='segundos por requisição')
+    sub.add_argument('--repeticoes', type=int, default=3, help='invocações por processo (1ª a frio)')
+    sub.add_argument('--modo', choices=['completo', 'incremental'], default='completo')
+
+    sub = subparsers.add_parser('tempo-importacao', help='relatório de tempo de importação')
+    sub.add_argument('modulos', nargs='*', default=['src.scripts.cli'])
+    sub.add_argument('--top', type=int, default=10)
+
+    return parser
+
+
+def main(argv=None):
+    args = criar_parser().parse_args(argv)
+    if args.max_memoria:
+        # Repassado pelo ambiente para as etapas (inclusive as executadas via runpy)
+        os.environ['MAX_MEMORY'] = args.max_memoria
+
+    if args.comando == 'verificar':
+        desatualizadas = 0
+        for nome in ETAPAS:
+            situacao = situacao_etapa(nome)
+            simbolo = '✅' if situacao['atualizada'] else '🔄'
+            desatualizadas += not situacao['atualizada']
+            print(f"{simbolo} {nome}: {situacao['motivo']}")
+        for etapa, faltando in verificar_configuracao().items():
+            if faltando:
+                print(f"⚠️ Lambda {etapa}: variáveis ausentes {faltando}")
+        return 3 if desatualizadas else 0
+
+    if args.comando == 'tempo-importacao':
+        for modulo in args.modulos:
+            relatorio = medir_tempo_importacao(modulo, args.top)
+            print(f"\n⏱️ {modulo}: {relatorio['total_ms']:.1f} ms")
+            for medida in relatorio['mais_caros']:
+                print(f"   {medida['acumulado_ms']:>9.1f} ms  {medida['modulo']}")
+        return 0
+
+    if args.comando == 'consulta':
+        consultas = importlib.import_module('src.utils.consultas')
+        print(consultas.consultar(args.sql).to_string(index=False))
+        return 0
+
+    if args.comando == 'arrays':
+        arrays = importlib.import_module('src.utils.arrays_mensais')
+        exportadas = arrays.exportar_tabelas(forcar=args.forcar)
+        print(f"✅ Arrays atualizados: {', '.join(exportadas) or 'nenhuma tabela encontrada'}")
+        return 0
+
+    if args.comando == 'parquet':
+        particoes = importlib.import_module('src.utils.particoes_vendas')
+        manifesto = particoes.converter_vendas_parquet(
+            ETAPAS['vendas']['entradas'][0], max_memoria=args.max_memoria, forcar=args.forcar)
+        if not manifesto['convertido']:
+            print("✅ parquet: CSV de vendas sem mudanças, nada a fazer")
+            return 0
+        print(f"🗂️ Vendas em Parquet: {manifesto['linhas']:,} linhas em {len(manifesto['meses'])} "
+              f"partições Ano_Mes ({manifesto['arquivos']} arquivos, "
+              f"{manifesto['datas_invalidas']} datas inválidas descartadas)")
+        return 0
+
+    if args.comando == 'gold-lojas':
+        gold = importlib.import_module('src.scripts.vendas_ipca_gold')
+        gold.criar_base_gold_por_loja(lojas=args.lojas)
+        return 0
+
+    if args.comando == 'indicadores':
+        indicadores = importlib.import_module('src.utils.indicadores')
+        resumo = indicadores.atualizar_indicadores(args.fontes, processos=args.processos,
+                                                   forcar=args.forcar)
+        if resumo['ausentes']:
+            print(f"⚠️ Fontes sem arquivo em data/raw: {', '.join(resumo['ausentes'])}")
+        if resumo['release'] is None:
+            print(f"✅ indicadores: nenhuma célula nova (inalteradas: {', '.join(resumo['inalteradas']) or '-'})")
+        else:
+            print(f"📈 Release {resumo['release']}: {resumo['celulas']:,} células novas ou revistas "
+                  f"({', '.join(resumo['lidas'])})")
+        return 0
+
+    if args.comando == 'servir':
+        servico = importlib.import_module('src.utils.servico_dados')
+        servico.executar(args.host or servico.SERVICO_HOST, args.porta or servico.SERVICO_PORTA)
+        return 0
+
+    if args.comando == 'carga':
+        carga = importlib.import_module('src.utils.carga_lambdas')
+        resultados = carga.executar_matriz(
+            args.handler, args.objetos, args.linhas, latencia_http=args.latencia_http,
+            latencia_s3=args.latencia_s3, repeticoes=args.repeticoes, modo=args.modo)
+        for r in resultados:
+            print(f"⏱️ {r['handler']} ({r['modo']}) {r['objetos']} arquivos x {r['linhas']} linhas: "
+                  f"frio {r['frio_s']:.3f} s | quente {r['quente_s'] or 0:.3f} s | "
+                  f"pico {r['pico_mb']} MB | HTTP {r['requisicoes_http']} | S3 {r['requisicoes_s3']} "
+                  f"| status {r['status']}")
+            print(f"   💡 sugestão: {r.get('memoria_sugerida_mb', '?')} MB, "
+                  f"timeout {r['timeout_sugerido_s']} s")
+        return 0
+
+    situacao = situacao_etapa(args.comando)
+    if situacao['atualizada'] and not args.forcar:
+        print(f"✅ {args.comando}: {situacao['motivo']}, nada a fazer")
+        return 0
+
+    if not etapa_concluida(args.comando, executar_etapa(args.comando)):
+        print(f"❌ {args.comando}: a etapa falhou")
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -1,8 +1,18 @@
 import os
+import sys
 import requests
 import pandas as pd
 from io import StringIO
 
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
+from config.settings import FERIADOS_PATH
+from src.utils.data_utils import salvar_atomico
+from src.utils.datas import converter_datas
+from src.utils.memoria import ler_em_chunks
+from src.utils.esquemas import (ESQUEMA_FERIADOS, aplicar_esquema, garantir_esquema,
+                                resolver_colunas, salvar_esquema)
+
 # URLs dos diretórios raw no GitHub (terminam em /)
 base_urls = {
     'nacional': 'https://github.com/joaopbini/feriados-brasil/raw/master/dados/feriados/nacional/csv/',
@@ -12,8 +22,12 @@ base_urls = {
 }
 anos = ['2024', '2025']
 
-pasta_destino = os.path.dirname(__file__)
-pasta_feriados = os.path.join(pasta_destino, 'feriados')
+# Coluna de origem preferida quando o arquivo traz mais de um candidato
+# (prioridade histórica do script, antes do ESQUEMA_FERIADOS)
+colunas_preferidas = {'Nome_Feriado': 'nome', 'Sigla_Estado': 'uf'}
+
+# Mesma pasta lida por src/utils/consultas.py e pela CLI (config/settings.py)
+pasta_feriados = os.environ.get('FERIADOS_DIR') or os.path.join(BASE_DIR, FERIADOS_PATH)
 os.makedirs(pasta_feriados, exist_ok=True)
 
 todos_feriados_sp = []
@@ -54,17 +68,24 @@ for ano in anos:
 
             df_padronizado = pd.DataFrame()
 
+            # Colunas de origem resolvidas uma vez pelo esquema de feriados
+            colunas_origem = resolver_colunas(df.columns, ESQUEMA_FERIADOS, exigir=False)
+            for canonica, preferida in colunas_preferidas.items():
+                if preferida in df.columns:
+                    colunas_origem[canonica] = preferida
+
             # Data
-            date_candidates = ['data', 'date']
-            date_col = next((c for c in date_candidates if c in df.columns), None)
+            date_col = colunas_origem.get('Data')
             if date_col:
-                df_padronizado['Data'] = pd.to_datetime(df[date_col], errors='coerce').dt.strftime('%Y-%m-%d')
+                datas, nao_convertidas = converter_datas(df[date_col], dayfirst=True)
+                if nao_convertidas:
+                    print(f'{nao_convertidas} datas inválidas em {categoria} {ano}')
+                df_padronizado['Data'] = datas.dt.strftime('%Y-%m-%d')
             else:
                 df_padronizado['Data'] = [''] * len(df)
 
             # Nome do feriado
-            nome_candidates = ['nome', 'nome_feriado', 'holiday']
-            nome_col = next((c for c in nome_candidates if c in df.columns), None)
+            nome_col = colunas_origem.get('Nome_Feriado')
             if nome_col:
                 nome_series = df[nome_col].fillna('').astype(str).str.strip()
             else:
@@ -72,8 +93,7 @@ for ano in anos:
             df_padronizado['Nome_Feriado'] = nome_series
 
             # Título: usa coluna de título se existir; senão usa Nome_Feriado
-            titulo_candidates = ['titulo', 'title']
-            titulo_col = next((c for c in titulo_candidates if c in df.columns), None)
+            titulo_col = colunas_origem.get('Titulo')
             if titulo_col:
                 titulo_series = df[titulo_col].fillna('').astype(str).str.strip()
             else:
@@ -88,15 +108,13 @@ for ano in anos:
             df_padronizado['Tipo_Feriado'] = [categoria] * len(df)
 
             # Descrição
-            descricao_candidates = ['descricao', 'description']
-            descricao_col = next((c for c in descricao_candidates if c in df.columns), None)
+            descricao_col = colunas_origem.get('Descricao')
             df_padronizado['Descrição'] = df[descricao_col].fillna('') if descricao_col else [''] * len(df)
 
             # Sigla do estado
-            if 'uf' in df.columns:
-                df_padronizado['Sigla_Estado'] = df['uf'].fillna('')
-            elif 'sigla_estado' in df.columns:
-                df_padronizado['Sigla_Estado'] = df['sigla_estado'].fillna('')
+            uf_col = colunas_origem.get('Sigla_Estado')
+            if uf_col:
+                df_padronizado['Sigla_Estado'] = df[uf_col].fillna('')
             else:
                 df_padronizado['Sigla_Estado'] = [''] * len(df)
 
@@ -142,9 +160,21 @@ for ano in anos:
         except Exception as e:
             print(f'Erro ao processar {url}: {e}')
 
-# Consolidar arquivo final removendo duplicatas
+# Consolidar arquivo final removendo duplicatas (arquivo_final fica None se nada for publicado)
+arquivo_final = None
 if os.path.exists(os.path.join(pasta_feriados, 'todos_feriados.csv')):
-    df_final = pd.read_csv(os.path.join(pasta_feriados, 'todos_feriados.csv'))
+    # Leitura em chunks pelo orçamento de memória, descartando duplicatas em cada chunk
+    chunks = ler_em_chunks(os.path.join(pasta_feriados, 'todos_feriados.csv'))
+    df_final = pd.concat([chunk.drop_duplicates() for chunk in chunks], ignore_index=True)
     df_final.drop_duplicates(inplace=True)
-    df_final.to_csv(os.path.join(pasta_feriados, 'feriados_completo.csv'), index=False)
-    print(f'Arquivo final consolidado: {len(df_final)} feriados únicos salvos em feriados_completo.csv')
+    try:
+        # Contrato da camada de feriados: nada é publicado se for violado
+        garantir_esquema(aplicar_esquema(df_final, ESQUEMA_FERIADOS), ESQUEMA_FERIADOS)
+    except (KeyError, ValueError) as e:
+        print(f'Erro ao validar feriados consolidados, feriados_completo.csv não foi atualizado: {e}')
+    else:
+        # Escrita atômica: quem lê feriados_completo.csv nunca vê um arquivo pela metade
+        if salvar_atomico(df_final, os.path.join(pasta_feriados, 'feriados_completo.csv')):
+            arquivo_final = os.path.join(pasta_feriados, 'feriados_completo.csv')
+            salvar_esquema(arquivo_final, ESQUEMA_FERIADOS, df_final)
+            print(f'Arquivo final consolidado: {len(df_final)} feriados únicos salvos em feriados_completo.csv')
@@ -1,12 +1,45 @@
+import csv
+import io
 import json
-import pandas as pd
-import boto3
 import os
+import re
+import tempfile
 import logging
+from operator import itemgetter
+from urllib.request import urlopen
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+# Valores que o pd.read_csv lê como NaN por padrão (viram '' após fillna)
+VALORES_NA_PANDAS = frozenset([
+    '', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND',
+    '1.#QNAN', '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null'
+])
+
+# Valores que o pandas converteria para número/booleano, mudando a escrita
+_VALOR_NAO_TEXTO = re.compile(
+    r'^\s*([-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?|[-+]?(inf|infinity)|true|false)\s*$',
+    re.IGNORECASE
+)
+
+# Acima deste tamanho o corpo do upload vai para /tmp em vez da memória
+LIMITE_MEMORIA_UPLOAD = 8 * 1024 * 1024
+
+# Origem dos CSVs: <FERIADOS_BASE_URL><categoria>/csv/<ano>.csv
+URL_BASE_FERIADOS = 'https://github.com/joaopbini/feriados-brasil/raw/master/dados/feriados/'
+CATEGORIAS = ('nacional', 'estadual', 'municipal', 'facultativo')
+ANOS_PADRAO = '2024,2025'
+
+
+def cliente_s3():
+    """
+    Cliente S3 (S3_ENDPOINT_URL aponta para um emulador local, ex: MinIO)
+    """
+    import boto3
+    return boto3.client('s3', endpoint_url=os.environ.get('S3_ENDPOINT_URL') or None)
+
+
 def lambda_handler(event, context):
     """
     Função handler principal para AWS Lambda
@@ -30,23 +63,107 @@ def lambda_handler(event, context):
             })
         }
 
+def projetar_linhas(leitor, colunas_padrao, estado):
+    """
+    Projeta as linhas de um csv.reader nas colunas padrão (iterador)
+
+    Reproduz o que pd.read_csv + fillna('') faz com colunas de texto:
+    colunas ausentes e valores NA viram '', linhas vazias são ignoradas e
+    linhas curtas são completadas. Em `estado` registra se alguma coluna
+    teria sido convertida pelo pandas (toda numérica/booleana) ou se há
+    linhas com campos a mais ou só com espaços, casos em que a saída do
+    pandas difere ou não pode ser decidida pelos campos.
+    """
+    cabecalho = next(leitor, None)
+    if cabecalho is None:
+        estado['compativel'] = False
+        return
+    posicoes = {}
+    for posicao, nome in enumerate(cabecalho):
+        posicoes.setdefault(nome, posicao)
+    # Colunas ausentes apontam para um campo vazio acrescentado ao fim da linha
+    largura = len(cabecalho)
+    indices = [posicoes.get(coluna, largura) for coluna in colunas_padrao]
+    projetar = itemgetter(*indices) if len(indices) > 1 else (lambda linha: (linha[indices[0]],))
+    completar = [''] * (largura + 1)
+    # Colunas que até agora só têm valores numéricos/booleanos (ou NA)
+    pendentes = set(range(len(colunas_padrao)))
+    preenchidas = set()
+
+    yield list(colunas_padrao)
+    for linha in leitor:
+        # Linhas vazias são ignoradas pelo pandas; ',,' e '""' não
+        if not linha:
+            continue
+        # Só espaços/tabs: o pandas ignora a linha crua, mas mantém '" "' (o csv.reader não distingue)
+        if len(linha) == 1 and linha[0] and not linha[0].strip():
+            estado['compativel'] = False
+        if len(linha) > largura:
+            estado['compativel'] = False
+            linha = linha[:largura]
+        valores = projetar(linha + completar[len(linha):])
+        saida = ['' if valor in VALORES_NA_PANDAS else valor for valor in valores]
+        for i in tuple(pendentes):
+            if saida[i]:
+                preenchidas.add(i)
+                if not _VALOR_NAO_TEXTO.match(saida[i]):
+                    pendentes.discard(i)
+        estado['registros'] += 1
+        yield saida
+
+    if pendentes & preenchidas:
+        estado['compativel'] = False
+
+
+def transformar_csv(origem, destino, colunas_padrao):
+    """
+    Lê o CSV de `origem` (texto) e grava a projeção em `destino` (binário)
+
+    A escrita usa os mesmos parâmetros do DataFrame.to_csv (QUOTE_MINIMAL,
+    terminador os.linesep, UTF-8), produzindo os mesmos bytes.
+
+    Returns:
+        Dict com 'registros' e 'compativel' (False: usar o caminho pandas)
+    """
+    estado = {'registros': 0, 'compativel': True}
+    saida = io.TextIOWrapper(destino, encoding='utf-8', newline='')
+    escritor = csv.writer(saida, lineterminator=os.linesep, quoting=csv.QUOTE_MINIMAL)
+    escritor.writerows(projetar_linhas(csv.reader(origem), colunas_padrao, estado))
+    saida.detach()
+    return estado
+
+
+def csv_via_pandas(url, colunas_padrao):
+    """
+    Caminho original (pandas), usado quando a projeção direta não é equivalente
+    """
+    import pandas as pd
+
+    df = pd.read_csv(url)
+    for coluna in colunas_padrao:
+        if coluna not in df.columns:
+            df[coluna] = ''
+    df_limpo = df[colunas_padrao].fillna('')
+    return df_limpo.to_csv(index=False).encode('utf-8'), len(df_limpo)
+
+
 def baixar_feriados_brasileiros():
     bucket_name = os.environ.get('S3_BUCKET_NAME')
     
     if not bucket_name:
         raise ValueError("Variável de ambiente S3_BUCKET_NAME não encontrada")
+
+    # Origem configurável (ex: servidor local nos testes de carga)
+    url_base = os.environ.get('FERIADOS_BASE_URL') or URL_BASE_FERIADOS
+    if not url_base.endswith('/'):
+        url_base += '/'
+    categorias = {categoria: f'{url_base}{categoria}/csv/' for categoria in CATEGORIAS}
     
-    categorias = {
-        'nacional': 'https://github.com/joaopbini/feriados-brasil/raw/master/dados/feriados/nacional/csv/',
-        'estadual': 'https://github.com/joaopbini/feriados-brasil/raw/master/dados/feriados/estadual/csv/',
-        'municipal': 'https://github.com/joaopbini/feriados-brasil/raw/master/dados/feriados/municipal/csv/',
-        'facultativo': 'https://github.com/joaopbini/feriados-brasil/raw/master/dados/feriados/facultativo/csv/'
-    }
-    
-    anos = ['2024', '2025']
+    anos = [ano.strip() for ano in os.environ.get('FERIADOS_ANOS', ANOS_PADRAO).split(',') if ano.strip()]
     colunas_padrao = ['Data', 'Nome_Feriado', 'Tipo_Feriado', 'Descricao', 'Sigla_Estado', 'Municipio']
     
-    s3 = boto3.client('s3')
+    # Importações pesadas só depois da validação da configuração (cold start)
+    s3 = cliente_s3()
     sucessos = 0
     erros = 0
     
@@ -58,25 +175,32 @@ def baixar_feriados_brasileiros():
                 url = f'{url_base}{ano}.csv'
                 logger.info(f"Baixando feriados {categoria} de {ano}...")
                 
-                df = pd.read_csv(url)
-                
-                for coluna in colunas_padrao:
-                    if coluna not in df.columns:
-                        df[coluna] = ''
-                
-                df_limpo = df[colunas_padrao].fillna('')
-                csv_content = df_limpo.to_csv(index=False)
                 nome_arquivo = f"feriados-raw/{categoria}_{ano}.csv"
                 
-                s3.put_object(
-                    Bucket=bucket_name,
-                    Key=nome_arquivo,
-                    Body=csv_content,
-                    ContentType='text/csv'
-                )
+                # Projeção direta das colunas, linha a linha, no corpo do upload
+                with tempfile.SpooledTemporaryFile(max_size=LIMITE_MEMORIA_UPLOAD) as corpo:
+                    with urlopen(url) as resposta:
+                        origem = io.TextIOWrapper(resposta, encoding='utf-8-sig', newline='')
+                        estado = transformar_csv(origem, corpo, colunas_padrao)
+                    
+                    registros = estado['registros']
+                    if not estado['compativel']:
+                        logger.info(f"{categoria} {ano}: usando pandas (colunas não textuais)")
+                        conteudo, registros = csv_via_pandas(url, colunas_padrao)
+                        corpo.seek(0)
+                        corpo.truncate()
+                        corpo.write(conteudo)
+                    
+                    corpo.seek(0)
+                    s3.put_object(
+                        Bucket=bucket_name,
+                        Key=nome_arquivo,
+                        Body=corpo,
+                        ContentType='text/csv'
+                    )
                 
                 sucessos += 1
-                logger.info(f"{categoria} {ano}: {len(df_limpo)} feriados salvos com sucesso!")
+                logger.info(f"{categoria} {ano}: {registros} feriados salvos com sucesso!")
                 
             except Exception as e:
                 erros += 1
@@ -1,23 +1,223 @@
 import json
 import os
-import boto3
-import pandas as pd
+import random
+import time
 from io import StringIO
 from datetime import datetime
+from urllib.parse import unquote_plus
 import logging
 
 logger = logging.getLogger()
 logger.setLevel(logging.INFO)
 
+PREFIXO_ORIGEM = 'feriados-raw/'
+PREFIXO_DESTINO = 'feriados-processados/'
+CHAVE_CONSOLIDADO = PREFIXO_DESTINO + 'feriados_completo.csv'
+# Escrita condicional do consolidado: novas tentativas quando outra execução o alterou
+TENTATIVAS_CONSOLIDADO = 8
+ESPERA_CONFLITO_S = 0.1
+
+
+def cliente_s3():
+    """
+    Cliente S3 (S3_ENDPOINT_URL aponta para um emulador local, ex: MinIO)
+    """
+    import boto3
+    return boto3.client('s3', endpoint_url=os.environ.get('S3_ENDPOINT_URL') or None)
+
+
+def chaves_do_evento(event):
+    """
+    Extrai (ação, chave) dos registros de notificação S3 do evento
+
+    Retorna None quando o evento não traz registros S3 (invocação manual).
+    As chaves chegam codificadas na notificação (espaço como '+').
+    """
+    registros = (event or {}).get('Records') or []
+    registros = [r for r in registros if 's3' in r]
+    if not registros:
+        return None
+
+    alteracoes = {}
+    for registro in registros:
+        chave = unquote_plus(registro['s3']['object']['key'])
+        if not chave.startswith(PREFIXO_ORIGEM) or not chave.lower().endswith('.csv'):
+            continue
+        acao = 'remover' if registro.get('eventName', '').startswith('ObjectRemoved') else 'processar'
+        # A última notificação de cada chave prevalece
+        alteracoes[chave] = acao
+    return list(alteracoes.items())
+
+
+def listar_chaves(s3_client, bucket, prefixo=PREFIXO_ORIGEM):
+    """
+    Lista todas as chaves CSV do prefixo (com paginação)
+    """
+    chaves = []
+    paginador = s3_client.get_paginator('list_objects_v2')
+    for pagina in paginador.paginate(Bucket=bucket, Prefix=prefixo):
+        for obj in pagina.get('Contents', []):
+            if obj['Key'].lower().endswith('.csv'):
+                chaves.append(obj['Key'])
+    return chaves
+
+
+def processar_arquivo(s3_client, bucket_origem, bucket_destino, chave_origem):
+    """
+    Filtra um arquivo de feriados (SP e Nacional) e grava a versão processada
+
+    Returns:
+        Tupla (DataFrame filtrado com Arquivo_Origem, item do relatório)
+    """
+    import pandas as pd
+
+    response_obj = s3_client.get_object(Bucket=bucket_origem, Key=chave_origem)
+    df = pd.read_csv(StringIO(response_obj['Body'].read().decode('utf-8')))
+
+    # Filtrar dados (SP e Nacional)
+    df_filtrado = df[
+        (df['Sigla_Estado'] == 'SP') |
+        (df['Tipo_Feriado'].str.contains('NACIONAL', na=False, case=False))
+    ]
+
+    # Salvar arquivo individual no bucket destino
+    nome_arquivo = chave_origem.replace(PREFIXO_ORIGEM, PREFIXO_DESTINO, 1)
+    s3_client.put_object(
+        Bucket=bucket_destino,
+        Key=nome_arquivo,
+        Body=df_filtrado.to_csv(index=False),
+        ContentType='text/csv',
+        Metadata={
+            'origem': bucket_origem,
+            'processado_em': datetime.now().isoformat(),
+            'registros_originais': str(len(df)),
+            'registros_filtrados': str(len(df_filtrado))
+        }
+    )
+
+    item = {
+        'origem': chave_origem,
+        'destino': nome_arquivo,
+        'registros_originais': len(df),
+        'registros_filtrados': len(df_filtrado)
+    }
+    return df_filtrado.assign(Arquivo_Origem=chave_origem), item
+
+
+def ler_consolidado(s3_client, bucket):
+    """
+    Lê o consolidado atual do bucket destino
+
+    Returns:
+        Tupla (DataFrame, ETag); (None, None) se ainda não existe
+    """
+    import pandas as pd
+
+    try:
+        response_obj = s3_client.get_object(Bucket=bucket, Key=CHAVE_CONSOLIDADO)
+    except s3_client.exceptions.NoSuchKey:
+        return None, None
+    df = pd.read_csv(StringIO(response_obj['Body'].read().decode('utf-8')))
+    return df, response_obj.get('ETag')
+
+
+def salvar_consolidado(s3_client, bucket, df_consolidado, modo, etag=None):
+    """
+    Grava o consolidado na chave estável do bucket destino
+
+    A escrita é condicional: só substitui a versão lida (IfMatch com o
+    ETag) ou, se não havia consolidado, só cria se ainda não existir
+    (IfNoneMatch). Se outra execução gravou no meio tempo, o S3 responde
+    412 (ou 409) e nada é sobrescrito.
+    """
+    condicao = {'IfMatch': etag} if etag else {'IfNoneMatch': '*'}
+    s3_client.put_object(
+        Bucket=bucket,
+        Key=CHAVE_CONSOLIDADO,
+        Body=df_consolidado.to_csv(index=False),
+        ContentType='text/csv',
+        Metadata={
+            'tipo': 'consolidado',
+            'modo': modo,
+            'total_registros': str(len(df_consolidado)),
+            'arquivos': str(df_consolidado['Arquivo_Origem'].nunique()),
+            'processado_em': datetime.now().isoformat()
+        },
+        **condicao
+    )
+
+
+def conflito_escrita(erro):
+    """
+    Indica se o erro é de escrita condicional recusada (consolidado alterado por outra execução)
+    """
+    resposta = getattr(erro, 'response', None) or {}
+    codigo = resposta.get('Error', {}).get('Code')
+    status = resposta.get('ResponseMetadata', {}).get('HTTPStatusCode')
+    return codigo in ('PreconditionFailed', 'ConditionalRequestConflict') or status in (409, 412)
+
+
+def atualizar_consolidado(s3_client, bucket, substituidos, contribuicoes, modo, atual=(None, None)):
+    """
+    Troca no consolidado só as linhas dos arquivos alterados, sem perder gravações concorrentes
+
+    Mantém as linhas do consolidado lido cuja coluna Arquivo_Origem não
+    está em `substituidos` e acrescenta as contribuições novas. Se a
+    escrita condicional for recusada, relê o consolidado e refaz a junção
+    sobre a versão da outra execução (com espera crescente e aleatória).
+
+    Args:
+        substituidos: Arquivos de origem cujas linhas saem (processados ou removidos)
+        contribuicoes: DataFrames filtrados dos arquivos processados
+        atual: (DataFrame, ETag) já lidos; DataFrame None reconstrói do zero
+            na primeira tentativa (varredura completa)
+
+    Returns:
+        DataFrame gravado (None se não havia nada a gravar)
+    """
+    import pandas as pd
+
+    df_atual, etag = atual
+    for tentativa in range(TENTATIVAS_CONSOLIDADO):
+        partes = []
+        if df_atual is not None and 'Arquivo_Origem' in df_atual.columns:
+            partes.append(df_atual[~df_atual['Arquivo_Origem'].isin(substituidos)])
+        partes.extend(contribuicoes)
+        if not partes:
+            return None
+        df_consolidado = pd.concat(partes, ignore_index=True)
+        try:
+            salvar_consolidado(s3_client, bucket, df_consolidado, modo, etag)
+            return df_consolidado
+        except Exception as e:
+            if not conflito_escrita(e):
+                raise
+        logger.info(f"Consolidado alterado por outra execução, refazendo (tentativa {tentativa + 2})")
+        time.sleep(ESPERA_CONFLITO_S * 2 ** tentativa * random.random())
+        df_atual, etag = ler_consolidado(s3_client, bucket)
+    raise RuntimeError(f"Consolidado alterado por outras execuções em {TENTATIVAS_CONSOLIDADO} tentativas")
+
+
 def lambda_handler(event, context):
     """
     Script 2: Pega arquivos de um bucket S3 e transfere para outro bucket
+
+    Quando disparado por notificações S3 (event['Records']) processa só as
+    chaves recém-gravadas (ou removidas) em feriados-raw/ e atualiza o
+    consolidado substituindo apenas as linhas desses arquivos (coluna
+    Arquivo_Origem). Em invocação manual, ou se o consolidado ainda não
+    existe, varre o prefixo inteiro e reconstrói o consolidado.
+
+    Invocações concorrentes (uma por lote de notificações) não perdem
+    arquivos: o consolidado é gravado com escrita condicional pelo ETag
+    lido e, se outra invocação gravou antes, a junção é refeita sobre a
+    versão nova (atualizar_consolidado).
     """
-    
+
     # Configuração dos buckets
     BUCKET_ORIGEM = os.environ.get('S3_BUCKET_ORIGEM')
     BUCKET_DESTINO = os.environ.get('S3_BUCKET_DESTINO')
-    
+
     if not BUCKET_ORIGEM or not BUCKET_DESTINO:
         return {
             'statusCode': 400,
@@ -25,126 +225,97 @@ def lambda_handler(event, context):
                 'error': 'Variáveis S3_BUCKET_ORIGEM e S3_BUCKET_DESTINO devem ser configuradas'
             })
         }
-    
+
     # Cliente S3
-    s3_client = boto3.client('s3')
-    
+    s3_client = cliente_s3()
+
+    alteracoes = chaves_do_evento(event)
+
     relatorio = {
+        'modo': 'incremental' if alteracoes is not None else 'completo',
         'transferidos': 0,
+        'removidos': 0,
         'erros': 0,
         'arquivos_processados': [],
         'bucket_origem': BUCKET_ORIGEM,
         'bucket_destino': BUCKET_DESTINO,
         'timestamp': datetime.now().isoformat()
     }
-    
-    logger.info(f"🔄 Transferindo de {BUCKET_ORIGEM} para {BUCKET_DESTINO}")
-    
+
     try:
-        # Listar arquivos no bucket origem
-        response = s3_client.list_objects_v2(
-            Bucket=BUCKET_ORIGEM,
-            Prefix='feriados-raw/'
-        )
-        
-        if 'Contents' not in response:
+        if alteracoes is not None and not alteracoes:
+            logger.info("Nenhuma chave de feriados-raw/ no evento, nada a fazer")
             return {
-                'statusCode': 404,
-                'body': json.dumps({'message': 'Nenhum arquivo encontrado no bucket origem'})
+                'statusCode': 200,
+                'body': json.dumps({'message': 'Nenhum arquivo a processar', 'relatorio': relatorio})
             }
-        
-        # Lista para consolidação
-        todos_dataframes = []
-        
-        # Processar cada arquivo
-        for obj in response['Contents']:
-            chave_origem = obj['Key']
-            
+
+        # Versão do consolidado sobre a qual a escrita condicional é feita
+        df_atual, etag = ler_consolidado(s3_client, BUCKET_DESTINO)
+        if alteracoes is not None and (df_atual is None or 'Arquivo_Origem' not in df_atual.columns):
+            # Sem consolidado para atualizar: reconstrói a partir de tudo
+            logger.info("Consolidado inexistente, fazendo varredura completa")
+            relatorio['modo'] = 'completo'
+        if relatorio['modo'] == 'completo':
+            # A varredura reconstrói o consolidado (o ETag lido ainda condiciona a escrita)
+            df_atual = None
+            logger.info(f"🔄 Varredura completa de {BUCKET_ORIGEM}/{PREFIXO_ORIGEM} para {BUCKET_DESTINO}")
+            alteracoes = [(chave, 'processar') for chave in listar_chaves(s3_client, BUCKET_ORIGEM)]
+            if not alteracoes:
+                return {
+                    'statusCode': 404,
+                    'body': json.dumps({'message': 'Nenhum arquivo encontrado no bucket origem'})
+                }
+        else:
+            logger.info(f"🔄 Processando {len(alteracoes)} chave(s) do evento")
+
+        # Contribuições novas e arquivos cujas linhas saem do consolidado
+        contribuicoes = []
+        substituidos = set()
+
+        for chave_origem, acao in alteracoes:
             try:
+                if acao == 'remover':
+                    s3_client.delete_object(
+                        Bucket=BUCKET_DESTINO,
+                        Key=chave_origem.replace(PREFIXO_ORIGEM, PREFIXO_DESTINO, 1)
+                    )
+                    substituidos.add(chave_origem)
+                    relatorio['removidos'] += 1
+                    logger.info(f"🗑️ Removido do consolidado: {chave_origem}")
+                    continue
+
                 logger.info(f"Processando: {chave_origem}")
-                
-                # Baixar arquivo do bucket origem
-                response_obj = s3_client.get_object(
-                    Bucket=BUCKET_ORIGEM,
-                    Key=chave_origem
-                )
-                
-                # Ler dados
-                df = pd.read_csv(StringIO(response_obj['Body'].read().decode('utf-8')))
-                
-                # Filtrar dados (SP e Nacional)
-                df_filtrado = df[
-                    (df['Sigla_Estado'] == 'SP') | 
-                    (df['Tipo_Feriado'].str.contains('NACIONAL', na=False, case=False))
-                ]
-                
-                # Salvar arquivo individual no bucket destino
-                nome_arquivo = chave_origem.replace('feriados-raw/', 'feriados-processados/')
-                csv_content = df_filtrado.to_csv(index=False)
-                
-                s3_client.put_object(
-                    Bucket=BUCKET_DESTINO,
-                    Key=nome_arquivo,
-                    Body=csv_content,
-                    ContentType='text/csv',
-                    Metadata={
-                        'origem': BUCKET_ORIGEM,
-                        'processado_em': datetime.now().isoformat(),
-                        'registros_originais': str(len(df)),
-                        'registros_filtrados': str(len(df_filtrado))
-                    }
-                )
-                
-                # Adicionar à consolidação
-                todos_dataframes.append(df_filtrado)
-                
-                relatorio['arquivos_processados'].append({
-                    'origem': chave_origem,
-                    'destino': nome_arquivo,
-                    'registros_originais': len(df),
-                    'registros_filtrados': len(df_filtrado)
-                })
+                df_filtrado, item = processar_arquivo(s3_client, BUCKET_ORIGEM, BUCKET_DESTINO, chave_origem)
+                contribuicoes.append(df_filtrado)
+                substituidos.add(chave_origem)
+                relatorio['arquivos_processados'].append(item)
                 relatorio['transferidos'] += 1
-                
-                logger.info(f"✅ Transferido: {nome_arquivo} ({len(df)} → {len(df_filtrado)} registros)")
-                
+
+                logger.info(f"✅ Transferido: {item['destino']} "
+                            f"({item['registros_originais']} → {item['registros_filtrados']} registros)")
+
             except Exception as e:
                 logger.error(f"❌ Erro processando {chave_origem}: {str(e)}")
                 relatorio['erros'] += 1
-        
-        # Criar arquivo consolidado
-        if todos_dataframes:
-            logger.info("📋 Criando arquivo consolidado")
-            df_consolidado = pd.concat(todos_dataframes, ignore_index=True)
-            
-            # Salvar consolidado
-            chave_consolidado = f"feriados-processados/feriados_completo_{datetime.now().strftime('%Y%m%d_%H%M%S')}.csv"
-            csv_consolidado = df_consolidado.to_csv(index=False)
-            
-            s3_client.put_object(
-                Bucket=BUCKET_DESTINO,
-                Key=chave_consolidado,
-                Body=csv_consolidado,
-                ContentType='text/csv',
-                Metadata={
-                    'tipo': 'consolidado',
-                    'total_registros': str(len(df_consolidado)),
-                    'processado_em': datetime.now().isoformat()
-                }
-            )
-            
-            relatorio['arquivo_consolidado'] = chave_consolidado
-            relatorio['total_registros_consolidado'] = len(df_consolidado)
-            
-            logger.info(f"✅ Consolidado criado: {chave_consolidado} ({len(df_consolidado)} registros)")
-    
+
+        # Atualizar o consolidado só com a contribuição dos arquivos alterados
+        if substituidos:
+            df_consolidado = atualizar_consolidado(s3_client, BUCKET_DESTINO, substituidos, contribuicoes,
+                                                   relatorio['modo'], (df_atual, etag))
+            if df_consolidado is not None:
+                relatorio['arquivo_consolidado'] = CHAVE_CONSOLIDADO
+                relatorio['total_registros_consolidado'] = len(df_consolidado)
+
+                logger.info(f"✅ Consolidado atualizado: {CHAVE_CONSOLIDADO} ({len(df_consolidado)} registros)")
+
     except Exception as e:
         logger.error(f"❌ Erro geral: {str(e)}")
         return {
             'statusCode': 500,
             'body': json.dumps({'error': str(e)})
         }
-    
+
     # Resposta
     return {
         'statusCode': 200,
@@ -152,4 +323,4 @@ def lambda_handler(event, context):
             'message': 'Transferência concluída',
             'relatorio': relatorio
         }, indent=2)
-    }
\ No newline at end of file
+    }
@@ -9,11 +9,18 @@ Data: 2025-10-09
 """
 
 import pandas as pd
-import gzip
-from io import StringIO
 import os
+import sys
 from datetime import datetime
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.utils.cache import memoizar_em_disco
+from src.utils.data_utils import salvar_atomico
+from src.utils.esquemas import ESQUEMA_IPCA, garantir_esquema, salvar_esquema
+from src.utils.estatisticas import (atualizar_estatisticas, carregar_estatisticas, descrever,
+                                    nulos_por_coluna, salvar_estatisticas)
+from src.utils.memoria import ler_em_chunks
+
 
 def setup_directories():
     """
@@ -60,9 +67,21 @@ def verificar_arquivo_origem(directories):
         return None
 
 
+def _tratar_nulos_ibge(chunk):
+    """
+    Substitui os valores ausentes do IBGE ('..') por '0'
+    """
+    return chunk.replace('..', '0')
+
+
+@memoizar_em_disco(argumentos_arquivo=('nome_arquivo_comprimido',),
+                   dependencias=(_tratar_nulos_ibge, ler_em_chunks))
 def carregar_e_tratar(nome_arquivo_comprimido):
     """
     Carrega e trata os dados do IPCA a partir de um arquivo .csv.gz
+
+    O resultado fica em cache em disco enquanto o arquivo de origem e o
+    código desta função não mudarem.
     
     Parâmetros:
     nome_arquivo_comprimido (str): caminho do arquivo comprimido
@@ -73,15 +92,11 @@ def carregar_e_tratar(nome_arquivo_comprimido):
     print(f"🔄 Carregando dados de: {nome_arquivo_comprimido}")
     
     try:
-        # Lendo o arquivo comprimido
-        with gzip.open(nome_arquivo_comprimido, 'rt', encoding='utf-8') as arquivo:
-            conteudo = arquivo.read()
-        
-        # Tratando valores nulos
-        conteudo = conteudo.replace('..', '0')
-        
-        # Convertendo para DataFrame
-        df = pd.read_csv(StringIO(conteudo))
+        # Lendo o arquivo comprimido em chunks dimensionados pelo orçamento de
+        # memória, tratando os valores nulos do IBGE ('..') em cada chunk
+        df = pd.concat(ler_em_chunks(nome_arquivo_comprimido, tipar=_tratar_nulos_ibge,
+                                     compression='gzip', encoding='utf-8'),
+                       ignore_index=True)
         
         # Limpeza e formatação dos dados
         df = df.dropna(how='all')  # Remove linhas completamente vazias
@@ -150,12 +165,19 @@ def carregar_e_tratar(nome_arquivo_comprimido):
         return None
 
 
-def analise_exploratoria(df):
+def analise_exploratoria(df, arquivo_estatisticas=None):
     """
     Realiza análise exploratória dos dados IPCA
     
+    Nulos e estatísticas descritivas vêm de um estado incremental
+    (src.utils.estatisticas): com arquivo_estatisticas, o estado da execução
+    anterior é reaproveitado e só os meses acrescentados desde então são
+    resumidos. Os quantis são interpolados como em describe(), mas sobre os
+    buckets do sketch: cada ponto interpolado tem erro relativo de até 1%.
+    
     Parâmetros:
     df (pandas.DataFrame): DataFrame com dados do IPCA
+    arquivo_estatisticas (str): JSON com o estado persistido entre execuções
     """
     print("\n📊 ANÁLISE EXPLORATÓRIA DOS DADOS IPCA")
     print("=" * 60)
@@ -165,9 +187,18 @@ def analise_exploratoria(df):
     print(f"📋 Número de colunas: {len(df.columns)}")
     print(f"🏷️  Colunas: {list(df.columns)}")
     
+    # Estado das estatísticas, atualizado só com as linhas novas
+    colunas_numericas = df.select_dtypes(include=['int64', 'float64']).columns
+    anterior = carregar_estatisticas(arquivo_estatisticas) if arquivo_estatisticas else None
+    estado = atualizar_estatisticas(anterior, df)
+    if arquivo_estatisticas:
+        salvar_estatisticas(estado, arquivo_estatisticas)
+        if estado['novas'] < len(df):
+            print(f"♻️ Estatísticas reaproveitadas: {estado['novas']:,} linha(s) nova(s) resumida(s)")
+    
     # Verificando valores nulos
     print(f"\n🔍 Valores nulos por coluna:")
-    nulos = df.isnull().sum()
+    nulos = nulos_por_coluna(estado)
     for col, count in nulos.items():
         if count > 0:
             print(f"   {col}: {count:,} ({count/len(df)*100:.1f}%)")
@@ -180,10 +211,9 @@ def analise_exploratoria(df):
         print(f"   {col}: {dtype}")
     
     # Estatísticas descritivas para colunas numéricas
-    colunas_numericas = df.select_dtypes(include=['int64', 'float64']).columns
     if len(colunas_numericas) > 0:
         print(f"\n📊 Estatísticas descritivas:")
-        stats = df[colunas_numericas].describe()
+        stats = descrever(estado)[list(colunas_numericas)]
         print(stats)
         
         # Informações sobre o período dos dados
@@ -195,18 +225,24 @@ def analise_exploratoria(df):
     return nulos, stats if len(colunas_numericas) > 0 else None
 
 
-def salvar_dados_tratados(df, directories):
+def salvar_dados_tratados(df, directories, versoes=0):
     """
     Salva os dados tratados em arquivo CSV
     
     Parâmetros:
     df (pandas.DataFrame): DataFrame com dados tratados
     directories (dict): Dicionário com caminhos dos diretórios
+    versoes (int): quantos snapshots anteriores manter em processed/.versoes
     """
     arquivo_tratado = os.path.join(directories['processed'], 'ipca_processado.csv')
     try:
-        # Salvar apenas o arquivo principal (sem criar backups automáticos)
-        df.to_csv(arquivo_tratado, index=False, encoding='utf-8')
+        # Contrato da camada IPCA (Ano_Mes único e válido, variações numéricas)
+        garantir_esquema(df, ESQUEMA_IPCA)
+
+        # Escrita atômica: leitores nunca veem o arquivo parcial
+        if not salvar_atomico(df, arquivo_tratado, versoes=versoes):
+            return None, None
+        salvar_esquema(arquivo_tratado, ESQUEMA_IPCA, df)
         print(f"✅ Dados salvos em: {arquivo_tratado}")
 
         # Verificar tamanho do arquivo salvo
@@ -251,7 +287,8 @@ def main():
         return None
     
     # 4. Análise exploratória
-    nulos, stats = analise_exploratoria(df_ipca)
+    nulos, stats = analise_exploratoria(
+        df_ipca, os.path.join(directories['processed'], 'ipca_estatisticas.json'))
     
     # 5. Salvar dados tratados
     arquivo_principal, arquivo_backup = salvar_dados_tratados(df_ipca, directories)
@@ -265,6 +302,7 @@ def main():
         print("🎯 Dados prontos para análise!")
     else:
         print("❌ Falha na finalização do processamento.")
+        return None
     
     return df_ipca
 
@@ -1,5 +1,43 @@
+import argparse
 import pandas as pd
 import os
+import sys
+import time
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, BASE_DIR)
+from config.settings import DATA_PROCESSED_PATH, DATA_RAW_PATH, VENDAS_PROCESSED_FILE, VENDAS_RAW_FILE
+from src.utils.cache import impressao_digital_arquivo
+from src.utils.checkpoints import carregar_checkpoint, limpar_checkpoint, salvar_checkpoint
+from src.utils.data_utils import salvar_atomico
+from src.utils.cubo_vendas import (DIAS_SEMANA, adicionar_dimensoes_calendario, agregar_cubo,
+                                   carregar_cubo, construir_cubo, mesclar_cubos,
+                                   tabela_mensal_do_cubo)
+from src.utils.datas import converter_datas
+from src.utils.memoria import avancar_registros, ler_em_chunks, planejar_chunks
+from src.utils.particoes_vendas import (COLUNA_CHAVE, COLUNA_PARTICAO, abrir_vendas_parquet,
+                                        diretorio_parquet_padrao, ler_lotes_parquet,
+                                        ler_manifesto, planejar_lotes_parquet)
+from src.utils.deduplicacao import (chaves_transacoes, consolidar_segmentos, contem,
+                                    descartar_segmentos, filtrar_novas, incorporar_segmentos,
+                                    limpar_indice, listar_segmentos, registrar_chaves)
+from src.utils.sketches import construir_sketch, mesclar_sketches, quantis_sketch
+from src.utils.esquemas import (ESQUEMA_VENDAS_MENSAL, ESQUEMA_VENDAS_TRANSACOES,
+                                aplicar_esquema, garantir_esquema, resolver_colunas,
+                                salvar_esquema)
+
+# Caminhos de config/settings.py (relativos à raiz do projeto), sobrescrevíveis pelo ambiente
+ARQUIVO_VENDAS = os.environ.get('VENDAS_ARQUIVO') or os.path.join(BASE_DIR, DATA_RAW_PATH, VENDAS_RAW_FILE)
+DIRETORIO_SAIDA = os.environ.get('VENDAS_SAIDA_DIR') or os.path.join(BASE_DIR, DATA_PROCESSED_PATH)
+ARQUIVO_CUBO = "cubo_vendas.csv"
+ARQUIVO_SKETCH = "vendas_ticket_sketch.csv"
+DIRETORIO_INDICE = os.path.join(DIRETORIO_SAIDA, "indice_vendas")
+# Chaves da carga em andamento (segmentos em disco, incorporados ao índice no fim)
+DIRETORIO_CARGA = os.path.join(DIRETORIO_SAIDA, "indice_vendas_carga")
+DIRETORIO_CHECKPOINT = os.path.join(DIRETORIO_SAIDA, "checkpoint_vendas")
+# Intervalo mínimo entre checkpoints de uma carga longa
+CHECKPOINT_SEGUNDOS = 60
+
 
 def ler_CSV(arquivo):
     """
@@ -20,201 +58,550 @@ def ler_CSV(arquivo):
         raise ValueError(f"Erro ao ler o arquivo {arquivo}: {e}")
 
 
-def tratar_vendas_confeitaria():
+def processar_lote(df_vendas, colunas):
+    """
+    Tipa um lote de transações e calcula seu cubo e sketch de ticket
+
+    Parâmetros:
+    df_vendas (DataFrame): transações brutas (texto)
+    colunas (dict): colunas resolvidas pelo ESQUEMA_VENDAS_TRANSACOES
+
+    Retorna:
+    dict: {'cubo', 'sketch', 'transacoes', 'datas_invalidas', 'valores_invalidos'}
+    """
+    coluna_data = colunas.get('data')
+    coluna_valor = colunas.get('valor_unitario')
+    coluna_quantidade = colunas.get('quantidade')
+    coluna_produto = colunas.get('produto')
+    coluna_loja = colunas.get('loja')
+    df_vendas = df_vendas.copy()
+
+    # Converte apenas os valores únicos, com formato detectado uma vez (dd/mm/aaaa primeiro)
+    df_vendas[coluna_data], _ = converter_datas(df_vendas[coluna_data])
+    datas_invalidas = int(df_vendas[coluna_data].isna().sum())
+    df_vendas = df_vendas.dropna(subset=[coluna_data])
+
+    df_vendas[coluna_valor] = pd.to_numeric(df_vendas[coluna_valor], errors='coerce')
+    valores_invalidos = int(df_vendas[coluna_valor].isna().sum())
+    df_vendas = df_vendas.dropna(subset=[coluna_valor])
+
+    # Dimensões de calendário: Data (dia), Ano, Mes, Ano_Mes (YYYYMM) e Dia_Semana
+    df_vendas = adicionar_dimensoes_calendario(df_vendas, coluna_data)
+
+    # Valor total por venda (valor_unitario * quantidade, ou só o valor unitário)
+    if coluna_quantidade:
+        df_vendas[coluna_quantidade] = pd.to_numeric(df_vendas[coluna_quantidade], errors='coerce')
+        df_vendas['Valor_Total_Venda'] = df_vendas[coluna_valor] * df_vendas[coluna_quantidade]
+    else:
+        df_vendas['Valor_Total_Venda'] = df_vendas[coluna_valor]
+
+    # Cubo na granularidade mais fina (dia x produto, e loja em extratos com várias filiais)
+    dimensoes = ['Data', 'Ano', 'Mes', 'Ano_Mes', 'Dia_Semana']
+    if coluna_produto:
+        df_vendas['Produto'] = df_vendas[coluna_produto].fillna('')
+        dimensoes.append('Produto')
+    if coluna_loja:
+        df_vendas['Loja'] = df_vendas[coluna_loja].fillna('').astype(str).str.strip()
+        dimensoes.append('Loja')
+
+    metricas = {'valor_total': 'Valor_Total_Venda', 'valor_unitario': coluna_valor}
+    if coluna_quantidade:
+        metricas['quantidade'] = coluna_quantidade
+
+    return {
+        'cubo': construir_cubo(df_vendas, dimensoes, metricas),
+        # Sketch mergeável de quantis do ticket por mês (erro relativo de 1%)
+        'sketch': construir_sketch(df_vendas['Ano_Mes'], df_vendas['Valor_Total_Venda']),
+        'transacoes': len(df_vendas),
+        'datas_invalidas': datas_invalidas,
+        'valores_invalidos': valores_invalidos
+    }
+
+
+def acumular_lote(acumulados, lote):
+    """
+    Acrescenta cubo e sketch de um lote aos acumulados da carga
+
+    Os parciais ficam pendentes e só são mesclados quando somam tantas
+    linhas quanto o acumulado: o custo das mesclagens não cresce com o
+    quadrado do número de chunks e a memória fica em até o dobro do cubo.
+    """
+    for nome, mesclar in (('cubo', mesclar_cubos), ('sketch', mesclar_sketches)):
+        pendentes = acumulados.setdefault(f"{nome}_pendentes", [])
+        pendentes.append(lote[nome])
+        atual = acumulados.get(nome)
+        if atual is None or sum(len(p) for p in pendentes) >= len(atual):
+            partes = pendentes if atual is None else [atual] + pendentes
+            acumulados[nome] = mesclar(partes)
+            pendentes.clear()
+
+
+def finalizar_acumulados(acumulados):
+    """
+    Mescla os parciais pendentes e retorna (cubo, sketch)
+    """
+    resultado = []
+    for nome, mesclar in (('cubo', mesclar_cubos), ('sketch', mesclar_sketches)):
+        partes = [acumulados[nome]] if acumulados.get(nome) is not None else []
+        partes += acumulados.get(f"{nome}_pendentes", [])
+        resultado.append(mesclar(partes) if partes else None)
+    return tuple(resultado)
+
+
+def identidade_execucao(arquivo_vendas, parquet, incremental, inicio, fim):
+    """
+    O que precisa coincidir para um checkpoint ser retomado
+
+    A fonte (caminho e impressão digital), os parâmetros da carga e, no
+    modo incremental, os segmentos do índice de chaves.
+    """
+    if parquet:
+        manifesto = ler_manifesto(arquivo_vendas) or {}
+        origem = {'origem': manifesto.get('origem'), 'gerado_em': manifesto.get('gerado_em')}
+    else:
+        origem = impressao_digital_arquivo(arquivo_vendas)
+    indice = [os.path.basename(c) for c in listar_segmentos(DIRETORIO_INDICE)] if incremental else None
+    return {'fonte': os.path.abspath(arquivo_vendas), 'origem': origem, 'incremental': incremental,
+            'inicio': inicio, 'fim': fim, 'indice': indice}
+
+
+def salvar_progresso(diretorio, identidade, progresso, acumulados, arquivo_csv=None):
+    """
+    Grava um checkpoint com os acumulados mesclados e a posição alcançada
+
+    Para um CSV, a posição também é guardada em bytes (depois do cabeçalho
+    e dos registros já processados), para a retomada não reler o início. Se
+    o arquivo tem aspas que impedem contar os registros como o pandas, a
+    retomada passa a reler o início descartando as linhas já processadas.
+    As chaves da carga já estão em disco (DIRETORIO_CARGA): o checkpoint
+    guarda só o número do último segmento gravado.
+    """
+    if arquivo_csv is not None and not progresso['pular_linhas']:
+        if progresso['deslocamento'] is None:
+            # Cabeçalho + registros processados
+            deslocamento = avancar_registros(arquivo_csv, 0, progresso['linhas'] + 1)
+        else:
+            deslocamento = avancar_registros(arquivo_csv, progresso['deslocamento'],
+                                             progresso['linhas'] - progresso['linhas_deslocamento'])
+        progresso['pular_linhas'] = deslocamento is None
+        progresso['deslocamento'] = deslocamento
+        progresso['linhas_deslocamento'] = progresso['linhas']
+    progresso['segmento_carga'] = consolidar_segmentos(DIRETORIO_CARGA)
+    cubo, sketch = finalizar_acumulados(acumulados)
+    acumulados.clear()
+    acumulados.update(cubo=cubo, sketch=sketch)
+    salvar_checkpoint(diretorio, identidade, progresso, {'cubo': cubo, 'sketch': sketch})
+
+
+def planejar_fonte(arquivo_vendas, max_memoria=None, inicio=None, fim=None):
+    """
+    Identifica a fonte (CSV ou diretório Parquet) e planeja a leitura em lotes
+
+    Retorna:
+    dict: {'caminho', 'parquet', 'colunas_lidas', 'plano'}
+    """
+    parquet = os.path.isdir(arquivo_vendas)
+    colunas_lidas = None
+    if parquet:
+        # Só as colunas da agregação e da deduplicação (id_venda já virou chave)
+        colunas_lidas = [c for c in abrir_vendas_parquet(arquivo_vendas).schema.names
+                         if c not in ('id_venda', COLUNA_PARTICAO)]
+        plano = planejar_lotes_parquet(arquivo_vendas, colunas_lidas, max_memoria)
+        print(f"🗂️ Fonte Parquet: {arquivo_vendas} (Ano_Mes {inicio or 'início'} a {fim or 'fim'})")
+    elif inicio is not None or fim is not None:
+        raise ValueError("a faixa de meses requer a fonte Parquet (converta com a etapa parquet)")
+    elif not os.path.isfile(arquivo_vendas):
+        raise FileNotFoundError(f"O arquivo {arquivo_vendas} não foi encontrado.")
+    else:
+        plano = planejar_chunks(arquivo_vendas, max_memoria, dtype=str)
+    print(f"🧮 Orçamento de memória: {plano['orcamento'] / 1024**2:,.0f} MB "
+          f"→ {plano['linhas_por_chunk']:,} linhas por chunk")
+    return {'caminho': arquivo_vendas, 'parquet': parquet, 'colunas_lidas': colunas_lidas, 'plano': plano}
+
+
+def iniciar_progresso(checkpoint, identidade):
+    """
+    Retoma o checkpoint da mesma fonte e dos mesmos parâmetros, ou começa do zero
+
+    Retorna:
+    tuple: (progresso, acumulados)
+    """
+    retomado = carregar_checkpoint(checkpoint, identidade) if checkpoint else None
+    if retomado:
+        progresso, acumulados = retomado
+        print(f"♻️ Retomando do checkpoint: {progresso['linhas']:,} linhas já processadas "
+              f"em {progresso['chunks']} chunk(s)")
+        # Chaves gravadas depois do checkpoint pertencem a chunks que serão relidos
+        descartar_segmentos(DIRETORIO_CARGA, progresso['segmento_carga'])
+        return progresso, acumulados
+    limpar_indice(DIRETORIO_CARGA)
+    progresso = {'linhas': 0, 'chunks': 0, 'deslocamento': None, 'linhas_deslocamento': 0,
+                 'pular_linhas': False, 'colunas': None, 'concluido': False, 'segmento_carga': 0,
+                 'totais': {'lidas': 0, 'ja_vistas': 0, 'repetidas_na_carga': 0, 'novas': 0,
+                            'transacoes': 0, 'datas_invalidas': 0, 'valores_invalidos': 0}}
+    return progresso, {}
+
+
+def ler_fonte(fonte, progresso, inicio=None, fim=None):
+    """
+    Lotes da fonte a partir da posição alcançada no progresso
+    """
+    if progresso['concluido']:
+        return iter(())
+    if fonte['parquet']:
+        return ler_lotes_parquet(fonte['caminho'], fonte['colunas_lidas'], inicio, fim,
+                                 plano=fonte['plano'], pular=progresso['linhas'])
+    # Todo checkpoint gravado traz o deslocamento em bytes ou pede para pular as linhas lidas
+    pular = progresso['linhas'] if progresso['pular_linhas'] else 0
+    return ler_em_chunks(fonte['caminho'], plano=fonte['plano'], deslocamento=progresso['deslocamento'] or 0,
+                         pular=pular, dtype=str)
+
+
+def identificar_colunas(df_vendas):
+    """
+    Resolve as colunas do primeiro lote pelo ESQUEMA_VENDAS_TRANSACOES
+
+    Retorna None quando as colunas de data e valor não são encontradas.
+    """
+    # Mostrar dados brutos do primeiro chunk
+    print(f"\n📖 Primeiras 10 linhas dos dados brutos:")
+    print(df_vendas.head(10))
+    
+    # Identificar colunas de data, valor e quantidade (resolvidas uma vez pelo esquema)
+    print(f"\n2. ANÁLISE DAS COLUNAS:")
+    print("-" * 30)
+    print(f"Colunas disponíveis: {list(df_vendas.columns)}")
+    colunas = resolver_colunas(df_vendas.columns, ESQUEMA_VENDAS_TRANSACOES, exigir=False)
+    print(f"🗓️ Coluna de data identificada: {colunas.get('data')}")
+    print(f"💰 Coluna de valor identificada: {colunas.get('valor_unitario')}")
+    if colunas.get('quantidade'):
+        print(f"📦 Coluna de quantidade identificada: {colunas.get('quantidade')}")
+    if colunas.get('produto'):
+        print(f"🧁 Coluna de produto identificada: {colunas.get('produto')}")
+    if colunas.get('loja'):
+        print(f"🏪 Coluna de loja identificada: {colunas.get('loja')}")
+    
+    if not colunas.get('data') or not colunas.get('valor_unitario'):
+        print("❌ Erro: Não foi possível identificar as colunas de data e valor automaticamente")
+        print("Colunas disponíveis:", list(df_vendas.columns))
+        return None
+    
+    print(f"\n3. PROCESSAMENTO DOS DADOS:")
+    print("-" * 30)
+    return colunas
+
+
+def filtrar_lote(df_vendas, colunas, chaves_lote, totais):
+    """
+    Descarta do lote as transações já vistas no índice ou em lotes anteriores da carga
+
+    Retorna:
+    tuple: (df_vendas, chaves_lote) só com as transações novas
+    """
+    df_vendas, chaves_lote, estatisticas = filtrar_novas(
+        df_vendas, DIRETORIO_INDICE, colunas.get('id_venda'), chaves=chaves_lote)
+    # Repetidas em chunks anteriores desta mesma carga (já gravadas em disco)
+    repetidas = contem(DIRETORIO_CARGA, chaves_lote)
+    df_vendas, chaves_lote = df_vendas[~repetidas], chaves_lote[~repetidas]
+    estatisticas['repetidas_na_carga'] += int(repetidas.sum())
+    estatisticas['novas'] -= int(repetidas.sum())
+    for chave in ('lidas', 'ja_vistas', 'repetidas_na_carga', 'novas'):
+        totais[chave] += estatisticas[chave]
+    return df_vendas, chaves_lote
+
+
+def processar_chunks(chunks, carga):
+    """
+    Acumula cubo, sketch e chaves de cada lote, gravando checkpoints periódicos
+
+    carga (dict): {'fonte', 'progresso', 'acumulados', 'incremental',
+    'checkpoint', 'checkpoint_segundos', 'identidade'}; progresso e
+    acumulados são atualizados no lugar. Se a carga falhar no meio, o que
+    já foi acumulado é gravado no checkpoint antes de a exceção seguir.
+
+    Retorna False quando as colunas de data e valor não são encontradas.
+    """
+    progresso, acumulados = carga['progresso'], carga['acumulados']
+    totais = progresso['totais']
+    parquet = carga['fonte']['parquet']
+    arquivo_csv = None if parquet else carga['fonte']['caminho']
+    checkpoint = carga['checkpoint']
+    ultimo_checkpoint = time.monotonic()
+    linhas_salvas = progresso['linhas']
+    try:
+        for df_vendas in chunks:
+            linhas_chunk = len(df_vendas)
+            colunas = progresso['colunas'] or identificar_colunas(df_vendas)
+            if colunas is None:
+                return False
+            
+            # Chaves das transações (id da venda ou hash da linha bruta)
+            chaves_lote = df_vendas.pop(COLUNA_CHAVE).to_numpy() if parquet else None
+            if carga['incremental']:
+                df_vendas, chaves_lote = filtrar_lote(df_vendas, colunas, chaves_lote, totais)
+            elif chaves_lote is None:
+                chaves_lote = chaves_transacoes(df_vendas, colunas.get('id_venda'))
+            if not df_vendas.empty:
+                lote = processar_lote(df_vendas, colunas)
+                for chave in ('transacoes', 'datas_invalidas', 'valores_invalidos'):
+                    totais[chave] += lote[chave]
+                acumular_lote(acumulados, lote)
+            # Chaves da carga vão para disco (segmentos do checkpoint não são compactados)
+            registrar_chaves(DIRETORIO_CARGA, chaves_lote, preservar_ate=progresso['segmento_carga'])
+            
+            # O chunk só conta como processado depois de acumulado
+            progresso['linhas'] += linhas_chunk
+            progresso['chunks'] += 1
+            progresso['colunas'] = colunas
+            if checkpoint and time.monotonic() - ultimo_checkpoint >= carga['checkpoint_segundos']:
+                salvar_progresso(checkpoint, carga['identidade'], progresso, acumulados, arquivo_csv)
+                linhas_salvas = progresso['linhas']
+                ultimo_checkpoint = time.monotonic()
+                print(f"💾 Checkpoint: {progresso['linhas']:,} linhas processadas")
+    except BaseException:
+        # Falha no meio da carga: guarda o que já foi acumulado para a próxima execução
+        if checkpoint and progresso['linhas'] > linhas_salvas:
+            salvar_progresso(checkpoint, carga['identidade'], progresso, acumulados, arquivo_csv)
+            print(f"💾 Checkpoint gravado após falha: {progresso['linhas']:,} linhas processadas")
+        raise
+    
+    if checkpoint and not progresso['concluido']:
+        progresso['concluido'] = True
+        salvar_progresso(checkpoint, carga['identidade'], progresso, acumulados, arquivo_csv)
+    return True
+
+
+def relatar_agrupamento(df_agrupado, cubo):
+    """
+    Mostra a tabela mensal, as estatísticas resumidas e as vendas por dia da semana
+    """
+    # Mostrar resultado
+    print(f"\n5. RESULTADO DO AGRUPAMENTO:")
+    print("-" * 30)
+    print(f"Primeiras 15 linhas do agrupamento:")
+    print(df_agrupado.head(15))
+    
+    print(f"\nÚltimas 10 linhas do agrupamento:")
+    print(df_agrupado.tail(10))
+    
+    # Estatísticas resumidas
+    print(f"\n6. ESTATÍSTICAS RESUMIDAS:")
+    print("-" * 30)
+    print(f"📅 Período: {df_agrupado['Ano'].min()} a {df_agrupado['Ano'].max()}")
+    print(f"📊 Total de meses: {len(df_agrupado)}")
+    print(f"💰 Valor total geral: R$ {df_agrupado['Valor_Total_Mes'].sum():,.2f}")
+    print(f"📈 Valor médio por mês: R$ {df_agrupado['Valor_Total_Mes'].mean():,.2f}")
+    print(f"🔝 Maior valor mensal: R$ {df_agrupado['Valor_Total_Mes'].max():,.2f}")
+    print(f"🔻 Menor valor mensal: R$ {df_agrupado['Valor_Total_Mes'].min():,.2f}")
+    print(f"🛒 Total de vendas: {df_agrupado['Numero_Transacoes'].sum():,}")
+    
+    if 'Total_Itens_Vendidos' in df_agrupado.columns:
+        print(f"📦 Total de itens vendidos: {df_agrupado['Total_Itens_Vendidos'].sum():,}")
+    
+    # Vendas por dia da semana, direto do cubo
+    por_dia = agregar_cubo(cubo, ['Dia_Semana'])
+    print(f"\n📆 VENDAS POR DIA DA SEMANA:")
+    for _, row in por_dia.iterrows():
+        print(f"  {DIAS_SEMANA[int(row['Dia_Semana'])]}: R$ {row['valor_total__soma']:,.2f} "
+              f"({int(row['valor_total__contagem'])} vendas)")
+    
+    # Mostrar top 5 meses com maiores vendas
+    print(f"\n📈 TOP 5 MESES COM MAIORES VENDAS:")
+    top_vendas = df_agrupado.nlargest(5, 'Valor_Total_Mes')[['Ano_Mes', 'Ano', 'Mes', 'Valor_Total_Mes', 'Numero_Transacoes']]
+    for _, row in top_vendas.iterrows():
+        print(f"  {int(row['Mes']):02d}/{int(row['Ano'])}: R$ {row['Valor_Total_Mes']:,.2f} ({int(row['Numero_Transacoes'])} vendas) (Ano_Mes: {int(row['Ano_Mes'])})")
+
+
+def tratar_vendas_confeitaria(arquivo_vendas=ARQUIVO_VENDAS, retornar_detalhes=False, incremental=False,
+                              max_memoria=None, inicio=None, fim=None, checkpoint=None,
+                              checkpoint_segundos=CHECKPOINT_SEGUNDOS):
+
     """
     Lê e trata os dados de vendas da confeitaria, agrupando por ano e mês
+
+    O CSV é lido em chunks dimensionados pelo orçamento de memória
+    (max_memoria, MAX_MEMORY, tamanho da Lambda ou limite do cgroup). Cada
+    chunk é agregado em um cubo (dia x produto) com medidas aditivas e em
+    um sketch de quantis do valor de cada venda por Ano_Mes, mesclados aos
+    acumulados; a tabela mensal é uma reagregação do cubo final, com as
+    colunas Ticket_P50/P90/P99 vindas do sketch.
+
+    No modo incremental as transações já vistas em cargas anteriores (índice
+    de chaves em DIRETORIO_INDICE, pelo id da venda ou hash da linha) e as
+    repetidas no próprio extrato são descartadas, e o cubo/sketch das linhas
+    novas é mesclado ao cubo/sketch salvos, sem reler o histórico.
+
+    Se arquivo_vendas for o diretório gerado por converter_vendas_parquet,
+    as transações já vêm tipadas e só as partições de inicio..fim (Ano_Mes)
+    e as colunas usadas na agregação são lidas; as chaves de deduplicação
+    gravadas na conversão dispensam o hash das linhas.
+
+    As chaves das transações não ficam em memória: cada chunk grava as suas
+    em um segmento de DIRETORIO_CARGA (compactado como o índice), e as
+    repetidas no próprio extrato são achadas com searchsorted nesses
+    segmentos. registrar_carga os incorpora ao índice depois que as saídas
+    forem salvas.
+
+    Com checkpoint, os acumulados parciais (cubo, sketch), o último segmento
+    de chaves gravado e a posição alcançada na fonte (linhas e, no CSV,
+    bytes) são gravados a cada checkpoint_segundos e quando a carga falha;
+    a próxima execução com a mesma fonte e os mesmos parâmetros retoma desse
+    ponto e chega ao mesmo resultado de uma execução sem interrupção. Remova o checkpoint
+    (limpar_checkpoint) depois de salvar as saídas. Erros inesperados no
+    meio da carga seguem para o chamador, com o checkpoint já gravado.
+
+    Uma carga incremental sem transações novas não é um erro: retorna
+    {'mensal': None, 'cubo': None, 'sketch': None, 'sem_novidades': True}
+    (ou um DataFrame vazio, sem retornar_detalhes).
+
+    Parâmetros:
+    arquivo_vendas (str): caminho do CSV bruto de vendas ou do diretório Parquet
+    retornar_detalhes (bool): se True retorna {'mensal', 'cubo', 'sketch'}
+    incremental (bool): se True processa só as transações novas
+    max_memoria (str|int): orçamento de memória (ex: "512MB"); None consulta o ambiente
+    inicio, fim (int): faixa de Ano_Mes (YYYYMM) a processar; só com a fonte Parquet
+    checkpoint (str): diretório do checkpoint; None desativa
+    checkpoint_segundos (float): intervalo mínimo entre checkpoints
     """
     print("="*70)
     print("TRATAMENTO DE DADOS - VENDAS CONFEITARIA")
     print("="*70)
     
-    # Caminho correto para o arquivo
-    arquivo_vendas = r"c:\Users\JuuhF\Downloads\dados-projeto\AB-Analise-Dados\analise-dados\data\raw\vendas_confeitaria.csv"
-    
+    # Planejar a leitura em chunks
+    print("\n1. CARREGANDO DADOS:")
+    print("-" * 30)
     try:
-        # Ler o arquivo CSV
-        print("\n1. CARREGANDO DADOS:")
-        print("-" * 30)
-        df_vendas = ler_CSV(arquivo_vendas)
-        
-        # Mostrar dados brutos
-        print(f"\n📖 Primeiras 10 linhas dos dados brutos:")
-        print(df_vendas.head(10))
-        
-        print(f"\n📊 Informações dos dados brutos:")
-        print(df_vendas.info())
-        
-        # Verificar se as colunas necessárias existem
-        print(f"\n2. ANÁLISE DAS COLUNAS:")
-        print("-" * 30)
-        colunas_necessarias = ['data', 'valor_unitario']  # Ajustar conforme necessário
-        
-        print(f"Colunas disponíveis: {list(df_vendas.columns)}")
-        
-        # Identificar colunas de data e valor
-        coluna_data = None
-        coluna_valor = None
-        
-        for col in df_vendas.columns:
-            col_lower = col.lower()
-            if 'data' in col_lower or 'date' in col_lower:
-                coluna_data = col
-            elif 'valor' in col_lower or 'price' in col_lower or 'preco' in col_lower:
-                coluna_valor = col
-        
-        print(f"🗓️ Coluna de data identificada: {coluna_data}")
-        print(f"💰 Coluna de valor identificada: {coluna_valor}")
-        
-        if not coluna_data or not coluna_valor:
-            print("❌ Erro: Não foi possível identificar as colunas de data e valor automaticamente")
-            print("Colunas disponíveis:", list(df_vendas.columns))
-            return None
-        
-        # Converter coluna de data
-        print(f"\n3. PROCESSAMENTO DOS DADOS:")
-        print("-" * 30)
-        
-        print(f"Convertendo coluna {coluna_data} para datetime...")
-        df_vendas[coluna_data] = pd.to_datetime(df_vendas[coluna_data], errors='coerce')
-        
-        # Verificar conversão de data
-        datas_invalidas = df_vendas[coluna_data].isna().sum()
-        if datas_invalidas > 0:
-            print(f"⚠️ Atenção: {datas_invalidas} datas inválidas encontradas")
-            # Remover linhas com datas inválidas
-            df_vendas = df_vendas.dropna(subset=[coluna_data])
-            print(f"📊 Dados após remoção de datas inválidas: {df_vendas.shape}")
-        
-        # Converter coluna de valor para numérico
-        print(f"Convertendo coluna {coluna_valor} para numérico...")
-        df_vendas[coluna_valor] = pd.to_numeric(df_vendas[coluna_valor], errors='coerce')
-        
-        # Verificar conversão de valor
-        valores_invalidos = df_vendas[coluna_valor].isna().sum()
-        if valores_invalidos > 0:
-            print(f"⚠️ Atenção: {valores_invalidos} valores inválidos encontrados")
-            # Remover linhas com valores inválidos
-            df_vendas = df_vendas.dropna(subset=[coluna_valor])
-            print(f"📊 Dados após remoção de valores inválidos: {df_vendas.shape}")
-        
-        # Extrair ano e mês
-        df_vendas['Ano'] = df_vendas[coluna_data].dt.year
-        df_vendas['Mes'] = df_vendas[coluna_data].dt.month
-        
-        # Criar campo Ano_Mes (formato YYYYMM)
-        df_vendas['Ano_Mes'] = df_vendas['Ano'] * 100 + df_vendas['Mes']
-        
-        # Calcular valor total por venda (valor_unitario * quantidade)
-        # Primeiro vamos converter quantidade para numérico
-        coluna_quantidade = None
-        for col in df_vendas.columns:
-            if 'quantidade' in col.lower() or 'qty' in col.lower() or 'quant' in col.lower():
-                coluna_quantidade = col
-                break
-        
-        if coluna_quantidade:
-            print(f"📦 Coluna de quantidade identificada: {coluna_quantidade}")
-            df_vendas[coluna_quantidade] = pd.to_numeric(df_vendas[coluna_quantidade], errors='coerce')
-            
-            # Calcular valor total da venda (valor_unitario * quantidade)
-            df_vendas['Valor_Total_Venda'] = df_vendas[coluna_valor] * df_vendas[coluna_quantidade]
-            print(f"✅ Coluna Valor_Total_Venda criada (valor_unitario × quantidade)")
-        else:
-            # Se não tiver quantidade, usar apenas valor unitário
-            df_vendas['Valor_Total_Venda'] = df_vendas[coluna_valor]
-            print(f"⚠️ Coluna quantidade não encontrada, usando apenas valor_unitario")
-        
-        print(f"✅ Colunas Ano, Mes e Ano_Mes criadas com sucesso!")
-        
-        # Agrupar por Ano_Mes e somar valores
-        print(f"\n4. AGRUPAMENTO POR ANO E MÊS:")
-        print("-" * 30)
-        
-        # Agregações mais detalhadas
-        agregacoes = {
-            'Valor_Total_Venda': ['sum', 'count', 'mean'],
-            coluna_valor: ['mean', 'max', 'min']
-        }
-        
-        if coluna_quantidade:
-            agregacoes[coluna_quantidade] = ['sum', 'mean']
-        
-        df_agrupado = df_vendas.groupby(['Ano', 'Mes', 'Ano_Mes']).agg(agregacoes).round(2)
-        
-        # Flatten das colunas com nomes mais descritivos
-        colunas_novas = []
-        for col_nivel1, col_nivel2 in df_agrupado.columns:
-            if col_nivel1 == 'Valor_Total_Venda':
-                if col_nivel2 == 'sum':
-                    colunas_novas.append('Valor_Total_Mes')
-                elif col_nivel2 == 'count':
-                    # número de transações no mês
-                    colunas_novas.append('Numero_Transacoes')
-                elif col_nivel2 == 'mean':
-                    colunas_novas.append('Valor_Medio_Por_Transacao')
-            elif col_nivel1 == coluna_valor:
-                if col_nivel2 == 'mean':
-                    colunas_novas.append('Valor_Unitario_Medio')
-                elif col_nivel2 == 'max':
-                    colunas_novas.append('Valor_Unitario_Max')
-                elif col_nivel2 == 'min':
-                    colunas_novas.append('Valor_Unitario_Min')
-            elif col_nivel1 == coluna_quantidade:
-                if col_nivel2 == 'sum':
-                    colunas_novas.append('Total_Itens_Vendidos')
-                elif col_nivel2 == 'mean':
-                    colunas_novas.append('Itens_Medios_Por_Transacao')
-            else:
-                colunas_novas.append(f"{col_nivel1}_{col_nivel2}")
-        
-        df_agrupado.columns = colunas_novas
-        df_agrupado = df_agrupado.reset_index()
-        
-        print(f"✅ Agrupamento concluído!")
-        print(f"📊 Dimensões do resultado: {df_agrupado.shape}")
-        
-        # Mostrar resultado
-        print(f"\n5. RESULTADO DO AGRUPAMENTO:")
-        print("-" * 30)
-        print(f"Primeiras 15 linhas do agrupamento:")
-        print(df_agrupado.head(15))
-        
-        print(f"\nÚltimas 10 linhas do agrupamento:")
-        print(df_agrupado.tail(10))
-        
-        # Estatísticas resumidas
-        print(f"\n6. ESTATÍSTICAS RESUMIDAS:")
-        print("-" * 30)
-        print(f"📅 Período: {df_agrupado['Ano'].min()} a {df_agrupado['Ano'].max()}")
-        print(f"📊 Total de meses: {len(df_agrupado)}")
-        print(f"💰 Valor total geral: R$ {df_agrupado['Valor_Total_Mes'].sum():,.2f}")
-        print(f"📈 Valor médio por mês: R$ {df_agrupado['Valor_Total_Mes'].mean():,.2f}")
-        print(f"🔝 Maior valor mensal: R$ {df_agrupado['Valor_Total_Mes'].max():,.2f}")
-        print(f"🔻 Menor valor mensal: R$ {df_agrupado['Valor_Total_Mes'].min():,.2f}")
-        print(f"🛒 Total de vendas: {df_agrupado['Quantidade_Vendas'].sum():,}")
-        
-        if 'Quantidade_Total' in df_agrupado.columns:
-            print(f"📦 Total de itens vendidos: {df_agrupado['Quantidade_Total'].sum():,}")
-        
-        # Mostrar top 5 meses com maiores vendas
-        print(f"\n📈 TOP 5 MESES COM MAIORES VENDAS:")
-        top_vendas = df_agrupado.nlargest(5, 'Valor_Total_Mes')[['Ano_Mes', 'Ano', 'Mes', 'Valor_Total_Mes', 'Quantidade_Vendas']]
-        for _, row in top_vendas.iterrows():
-            print(f"  {int(row['Mes']):02d}/{int(row['Ano'])}: R$ {row['Valor_Total_Mes']:,.2f} ({int(row['Quantidade_Vendas'])} vendas) (Ano_Mes: {int(row['Ano_Mes'])})")
-        
-        return df_agrupado
-        
-    except FileNotFoundError as e:
+        fonte = planejar_fonte(arquivo_vendas, max_memoria, inicio, fim)
+    except (FileNotFoundError, ValueError) as e:
         print(f"❌ Erro: {e}")
         return None
-    except Exception as e:
-        print(f"❌ Erro inesperado: {e}")
-        import traceback
-        traceback.print_exc()
+    
+    # Retomar de um checkpoint da mesma fonte e dos mesmos parâmetros
+    identidade = identidade_execucao(arquivo_vendas, fonte['parquet'], incremental, inicio, fim)
+    progresso, acumulados = iniciar_progresso(checkpoint, identidade)
+    carga = {'fonte': fonte, 'progresso': progresso, 'acumulados': acumulados, 'incremental': incremental,
+             'checkpoint': checkpoint, 'checkpoint_segundos': checkpoint_segundos, 'identidade': identidade}
+    if not processar_chunks(ler_fonte(fonte, progresso, inicio, fim), carga):
         return None
+    cubo, sketch = finalizar_acumulados(acumulados)
+    totais = progresso['totais']
+    if progresso['colunas'] is None:
+        print("❌ Erro: arquivo de vendas sem linhas")
+        return None
+    print(f"📚 {progresso['chunks']} chunk(s) lidos; último tamanho planejado: "
+          f"{fonte['plano']['linhas_por_chunk']:,} linhas")
+    
+    if incremental:
+        print(f"🔁 Carga incremental: {totais['lidas']:,} lidas, "
+              f"{totais['ja_vistas']:,} já vistas, "
+              f"{totais['repetidas_na_carga']:,} repetidas, {totais['novas']:,} novas")
+        if totais['novas'] == 0:
+            print("ℹ️ Nenhuma transação nova nesta carga")
+            if retornar_detalhes:
+                return {'mensal': None, 'cubo': None, 'sketch': None, 'sem_novidades': True}
+            return pd.DataFrame()
+    
+    if totais['datas_invalidas'] > 0:
+        print(f"⚠️ Atenção: {totais['datas_invalidas']} datas inválidas encontradas e removidas")
+    if totais['valores_invalidos'] > 0:
+        print(f"⚠️ Atenção: {totais['valores_invalidos']} valores inválidos encontrados e removidos")
+    if cubo is None or cubo.empty:
+        print("❌ Erro: nenhuma transação válida")
+        return None
+    
+    print(f"\n4. CUBO DE VENDAS E AGRUPAMENTO POR ANO E MÊS:")
+    print("-" * 30)
+    print(f"🧊 Cubo criado: {len(cubo):,} células para {totais['transacoes']:,} transações")
+    
+    if incremental:
+        cubo, sketch = mesclar_com_anteriores(cubo, sketch)
+        print(f"🧊 Cubo mesclado com as cargas anteriores: {len(cubo):,} células")
+    elif inicio is not None or fim is not None:
+        cubo, sketch = substituir_meses(cubo, sketch, inicio, fim)
+        print(f"🧊 Meses reprocessados substituídos no cubo salvo: {len(cubo):,} células")
+    
+    # Tabela mensal servida a partir do cubo, sem reagrupar as transações
+    df_agrupado = tabela_mensal_do_cubo(cubo)
+    quantis = quantis_sketch(sketch, prefixo='Ticket_P').round(2)
+    df_agrupado = df_agrupado.merge(quantis, on='Ano_Mes', how='left')
+    
+    print(f"✅ Agrupamento concluído!")
+    print(f"📊 Dimensões do resultado: {df_agrupado.shape}")
+    relatar_agrupamento(df_agrupado, cubo)
+    
+    if retornar_detalhes:
+        return {'mensal': df_agrupado, 'cubo': cubo, 'sketch': sketch}
+    return df_agrupado
+
+
+def carregar_anteriores():
+    """
+    Cubo e sketch salvos por cargas anteriores (None quando ausentes)
+    """
+    caminho_cubo = os.path.join(DIRETORIO_SAIDA, ARQUIVO_CUBO)
+    caminho_sketch = os.path.join(DIRETORIO_SAIDA, ARQUIVO_SKETCH)
+    cubo_anterior, sketch_anterior = None, None
+    
+    if os.path.exists(caminho_cubo):
+        cubo_anterior = carregar_cubo(caminho_cubo)
+        for dimensao in ('Produto', 'Loja'):
+            if dimensao in cubo_anterior.columns:
+                # Produto/loja vazios são gravados como '' e relidos como NaN
+                cubo_anterior[dimensao] = cubo_anterior[dimensao].fillna('')
+    if os.path.exists(caminho_sketch):
+        sketch_anterior = pd.read_csv(caminho_sketch)
+    return cubo_anterior, sketch_anterior
+
+
+def mesclar_com_anteriores(cubo, sketch):
+    """
+    Mescla cubo e sketch de uma carga incremental com os salvos anteriormente
+    """
+    cubo_anterior, sketch_anterior = carregar_anteriores()
+    if cubo_anterior is not None:
+        cubo = mesclar_cubos([cubo_anterior, cubo])
+    if sketch_anterior is not None:
+        sketch = mesclar_sketches([sketch_anterior, sketch])
+    return cubo, sketch
+
+
+def substituir_meses(cubo, sketch, inicio=None, fim=None):
+    """
+    Troca os meses inicio..fim (Ano_Mes) do cubo e do sketch salvos pelos reprocessados
+    """
+    def fora_da_faixa(df):
+        dentro = pd.Series(True, index=df.index)
+        if inicio is not None:
+            dentro &= df['Ano_Mes'] >= inicio
+        if fim is not None:
+            dentro &= df['Ano_Mes'] <= fim
+        return df[~dentro]
+    
+    cubo_anterior, sketch_anterior = carregar_anteriores()
+    if cubo_anterior is not None:
+        cubo = mesclar_cubos([fora_da_faixa(cubo_anterior), cubo])
+    if sketch_anterior is not None:
+        sketch = mesclar_sketches([fora_da_faixa(sketch_anterior), sketch])
+    return cubo, sketch
 
 
-def salvar_vendas_tratadas_csv(df_vendas, nome_arquivo="vendas_confeitaria_tratadas.csv"):
+def registrar_carga(incremental=False):
+    """
+    Incorpora ao índice as chaves da carga (depois que as saídas foram salvas)
+    
+    Numa carga completa o índice é refeito com as chaves de toda a base
+    (o índice novo é gravado antes de o antigo ser removido).
+    """
+    if not incremental:
+        total = incorporar_segmentos(DIRETORIO_INDICE, DIRETORIO_CARGA, substituir=True)
+        print(f"🔑 Índice de transações refeito: {total:,} chaves")
+        return total
+    total = incorporar_segmentos(DIRETORIO_INDICE, DIRETORIO_CARGA)
+    print(f"🔑 Índice de transações atualizado: {total:,} chaves da carga")
+    return total
+
+
+def salvar_vendas_tratadas_csv(df_vendas, nome_arquivo=VENDAS_PROCESSED_FILE):
     """
     Salva os dados de vendas tratados em CSV
     """
@@ -223,15 +610,20 @@ def salvar_vendas_tratadas_csv(df_vendas, nome_arquivo="vendas_confeitaria_trata
         return None
     
     # Diretório de saída
-    diretorio_saida = r"c:\Users\JuuhF\Downloads\dados-projeto\AB-Analise-Dados\data\processed"
+    diretorio_saida = DIRETORIO_SAIDA
     os.makedirs(diretorio_saida, exist_ok=True)
     
     # Caminho completo
     caminho_arquivo = os.path.join(diretorio_saida, nome_arquivo)
     
     try:
-        # Salvar CSV
-        df_vendas.to_csv(caminho_arquivo, index=False, encoding='utf-8')
+        # Contrato da camada de vendas mensais (falha cedo se violado)
+        garantir_esquema(aplicar_esquema(df_vendas, ESQUEMA_VENDAS_MENSAL), ESQUEMA_VENDAS_MENSAL)
+
+        # Salvar CSV (escrita atômica)
+        if not salvar_atomico(df_vendas, caminho_arquivo):
+            return None
+        salvar_esquema(caminho_arquivo, ESQUEMA_VENDAS_MENSAL, df_vendas)
         
         print(f"\n7. SALVAMENTO DOS DADOS:")
         print("-" * 30)
@@ -247,13 +639,71 @@ def salvar_vendas_tratadas_csv(df_vendas, nome_arquivo="vendas_confeitaria_trata
         return None
 
 
+def salvar_cubo_vendas(cubo, nome_arquivo=ARQUIVO_CUBO):
+    """
+    Salva o cubo de vendas ao lado da tabela mensal
+    """
+    if cubo is None or cubo.empty:
+        print("❌ Erro: cubo está vazio ou é None")
+        return None
+    
+    caminho_arquivo = os.path.join(DIRETORIO_SAIDA, nome_arquivo)
+    if not salvar_atomico(cubo, caminho_arquivo, date_format='%Y-%m-%d'):
+        return None
+    print(f"🧊 Cubo salvo: {caminho_arquivo} ({len(cubo):,} células)")
+    return caminho_arquivo
+
+
+def salvar_sketch_vendas(sketch, nome_arquivo=ARQUIVO_SKETCH):
+    """
+    Salva o sketch de quantis do ticket (Ano_Mes, bucket, contagem)
+
+    Percentis de qualquer mês ou período são obtidos com
+    quantis_sketch(mesclar_sketches([...])) sem reler as transações.
+    """
+    if sketch is None or sketch.empty:
+        print("❌ Erro: sketch está vazio ou é None")
+        return None
+    
+    caminho_arquivo = os.path.join(DIRETORIO_SAIDA, nome_arquivo)
+    if not salvar_atomico(sketch, caminho_arquivo):
+        return None
+    print(f"📐 Sketch de quantis salvo: {caminho_arquivo} ({len(sketch):,} buckets)")
+    return caminho_arquivo
+
+
 if __name__ == "__main__":
+    # --incremental: processa só as transações que não estavam nas cargas anteriores
+    # --parquet [DIR]: lê o Parquet particionado (etapa parquet) em vez do CSV bruto
+    # --inicio/--fim YYYYMM: reprocessa só esses meses (requer --parquet)
+    # --sem-checkpoint: não grava nem retoma o checkpoint da carga
+    parser = argparse.ArgumentParser(description='Tratamento das vendas da confeitaria')
+    parser.add_argument('--incremental', action='store_true')
+    parser.add_argument('--parquet', nargs='?', const=diretorio_parquet_padrao(), default=None)
+    parser.add_argument('--inicio', type=int, default=None)
+    parser.add_argument('--fim', type=int, default=None)
+    parser.add_argument('--sem-checkpoint', action='store_true')
+    # Executado também pela CLI (runpy), que deixa os próprios argumentos em sys.argv
+    args, _ = parser.parse_known_args()
+    parcial = args.inicio is not None or args.fim is not None
+    
     # Executar tratamento
-    df_resultado = tratar_vendas_confeitaria()
+    resultado = tratar_vendas_confeitaria(args.parquet or ARQUIVO_VENDAS, retornar_detalhes=True,
+                                          incremental=args.incremental,
+                                          inicio=args.inicio, fim=args.fim,
+                                          checkpoint=None if args.sem_checkpoint else DIRETORIO_CHECKPOINT) or {}
+    df_resultado = resultado.get('mensal')
     
     # Salvar resultado
     if df_resultado is not None:
         arquivo_salvo = salvar_vendas_tratadas_csv(df_resultado)
+        cubo_salvo = salvar_cubo_vendas(resultado['cubo'])
+        sketch_salvo = salvar_sketch_vendas(resultado['sketch'])
+        if arquivo_salvo and cubo_salvo and sketch_salvo:
+            # Reprocessar alguns meses não apaga as chaves dos demais
+            registrar_carga(args.incremental or parcial)
+            # Saídas gravadas: a próxima carga começa do zero
+            limpar_checkpoint(DIRETORIO_CHECKPOINT)
         
         if arquivo_salvo:
             print(f"\n🎉 PROCESSAMENTO CONCLUÍDO!")
@@ -261,6 +711,10 @@ if __name__ == "__main__":
             print(f"🚀 Pronto para análises e dashboards!")
         else:
             print(f"\n⚠️ Processamento concluído, mas houve erro no salvamento")
+    elif resultado.get('sem_novidades'):
+        # Nada a gravar: as saídas e o índice da carga anterior continuam valendo
+        limpar_checkpoint(DIRETORIO_CHECKPOINT)
+        print(f"\n✅ Nenhuma transação nova: saídas anteriores mantidas")
     else:
         print(f"\n❌ Erro no processamento dos dados")
 
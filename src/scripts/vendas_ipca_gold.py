@@ -9,12 +9,36 @@ Mantém apenas as colunas solicitadas:
  - Valor_Total_Mes
  - Total_Itens_Vendidos (ou Quantidade_Total)
 
+Quando o IPCA traz a coluna 'indice', acrescenta também os valores em reais
+constantes (Valor_Total_Mes_Real e Valor_Medio_Por_Venda_Real).
+
 Saída: data/processed/base_gold_ipca_vendas.csv
+
+Indicadores do repositório src.utils.indicadores (ex: INPC, IGP-M) podem ser
+acrescentados à tabela gold com criar_base_gold(indicadores=[...]).
+
+Com vendas de várias lojas (cubo com a dimensão Loja), criar_base_gold_por_loja
+gera uma tabela gold por loja em data/processed/gold_por_loja/Loja=<id>/.
 """
 
+import argparse
 import os
+import sys
 import pandas as pd
 
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+from src.utils.arrays_mensais import montar_mensal
+from src.utils.cache import memoizar_em_disco
+from src.utils.cubo_vendas import carregar_cubo
+from src.utils.data_utils import salvar_atomico
+from src.utils.deflator import calcular_tabela_deflacao, deflacionar_agregados
+from src.utils.esquemas import (ESQUEMA_GOLD, ESQUEMA_IPCA, ESQUEMA_VENDAS_MENSAL,
+                                aplicar_esquema, caminho_esquema, garantir_esquema,
+                                ler_csv_com_esquema, resolver_colunas, salvar_esquema)
+from src.utils.indicadores import tabela_indicadores
+from src.utils.gold_lojas import (COLUNA_LOJA, juntar_ipca, salvar_gold_particionado,
+                                  tabela_mensal_por_loja)
+
 
 def localizar_arquivo_processed(nome):
     base = os.path.dirname(os.path.dirname(os.path.dirname(__file__)))
@@ -29,51 +53,21 @@ def carregar_csv(caminho):
 
 
 def padronizar_colunas_vendas(df):
-    # normaliza nomes: remove espaços e deixa lower para busca
-    cols_map = {c: c for c in df.columns}
-    lc = {c.lower(): c for c in df.columns}
-
-    # map possíveis nomes
-    def encontrar(*candidatos):
-        for cand in candidatos:
-            if cand.lower() in lc:
-                return lc[cand.lower()]
-        return None
-
-    # candidatos para cada campo
-    num_trans = encontrar('Numero_Transacoes', 'Quantidade_Vendas', 'quantidade_vendas')
-    total_itens = encontrar('Total_Itens_Vendidos', 'Quantidade_Total', 'quantidade_total')
-    valor_medio = encontrar('Valor_Medio_Por_Venda', 'Valor_Medio_Por_Transacao', 'valor_medio_por_venda')
-    valor_total = encontrar('Valor_Total_Mes', 'valor_total_mes')
-
-    # also ensure Ano_Mes present
-    ano_mes_col = encontrar('Ano_Mes', 'ano_mes')
-
-    # build standardized df
-    std = pd.DataFrame()
-    if ano_mes_col is None:
+    # colunas resolvidas pelo contrato declarado em ESQUEMA_VENDAS_MENSAL
+    mapeamento = resolver_colunas(df.columns, ESQUEMA_VENDAS_MENSAL, exigir=False)
+
+    if 'Ano_Mes' not in mapeamento:
         # try to build from Ano/Mes
-        ano_col = encontrar('Ano', 'ano', 'year')
-        mes_col = encontrar('Mes', 'mes', 'month')
-        if ano_col and mes_col:
-            std['Ano_Mes'] = df[ano_col].astype(int) * 100 + df[mes_col].astype(int)
-        else:
+        lc = {c.lower(): c for c in df.columns}
+        ano_col = next((lc[c] for c in ('ano', 'year') if c in lc), None)
+        mes_col = next((lc[c] for c in ('mes', 'month') if c in lc), None)
+        if not (ano_col and mes_col):
             raise KeyError('Não foi possível localizar coluna Ano_Mes nem Ano/Mes nas vendas')
-    else:
-        std['Ano_Mes'] = df[ano_mes_col].astype(int)
-
-    # pull in requested columns if exist, else fill NA
-    std['Numero_Transacoes'] = df[num_trans] if num_trans in df.columns else pd.NA
-    std['Total_Itens_Vendidos'] = df[total_itens] if total_itens in df.columns else pd.NA
-    std['Valor_Medio_Por_Venda'] = df[valor_medio] if valor_medio in df.columns else pd.NA
-    std['Valor_Total_Mes'] = df[valor_total] if valor_total in df.columns else pd.NA
+        df = df.assign(Ano_Mes=df[ano_col].astype(int) * 100 + df[mes_col].astype(int))
 
-    # ensure numeric types where possible
-    for col in ['Numero_Transacoes', 'Total_Itens_Vendidos', 'Valor_Medio_Por_Venda', 'Valor_Total_Mes']:
-        if col in std.columns:
-            std[col] = pd.to_numeric(std[col], errors='coerce')
-
-    return std
+    # falha cedo se faltar coluna obrigatória (antes era preenchida com NA)
+    std = aplicar_esquema(df, ESQUEMA_VENDAS_MENSAL, resolver_colunas(df.columns, ESQUEMA_VENDAS_MENSAL))
+    return std.reset_index(drop=True)
 
 
 def padronizar_colunas_ipca(df):
@@ -81,39 +75,55 @@ def padronizar_colunas_ipca(df):
     if 'Ano_Mes' not in df.columns and 'ano' in df.columns and 'mes' in df.columns:
         df['Ano_Mes'] = df['ano'].astype(int) * 100 + df['mes'].astype(int)
 
-    # select columns
-    out = pd.DataFrame()
-    if 'Ano_Mes' not in df.columns:
-        raise KeyError('IPCA sem coluna Ano_Mes')
-    out['Ano_Mes'] = df['Ano_Mes'].astype(int)
-
-    # map variacao_mensal/variacao_anual
-    if 'variacao_mensal' in df.columns:
-        out['variacao_mensal'] = pd.to_numeric(df['variacao_mensal'], errors='coerce')
-    else:
-        out['variacao_mensal'] = pd.NA
-
-    if 'variacao_anual' in df.columns:
-        out['variacao_anual'] = pd.to_numeric(df['variacao_anual'], errors='coerce')
-    else:
-        out['variacao_anual'] = pd.NA
-
-    return out
-
-
-def criar_base_gold():
+    # Ano_Mes, variacao_mensal, variacao_anual e indice (usado na deflação)
+    return aplicar_esquema(df, ESQUEMA_IPCA).reset_index(drop=True)
+
+
+@memoizar_em_disco(argumentos_arquivo=('caminho',), arquivos_associados=(caminho_esquema,),
+                   dependencias=(carregar_csv, padronizar_colunas_ipca, aplicar_esquema, ler_csv_com_esquema))
+def carregar_ipca_padronizado(caminho):
+    """
+    Carrega e padroniza o IPCA processado (com cache em disco)
+
+    Se houver esquema salvo ao lado do arquivo, lê só as colunas do contrato
+    com tipos explícitos, sem inferência.
+    """
+    if os.path.exists(caminho_esquema(caminho)):
+        return ler_csv_com_esquema(caminho, ESQUEMA_IPCA)
+    return padronizar_colunas_ipca(carregar_csv(caminho))
+
+
+@memoizar_em_disco(argumentos_arquivo=('caminho',), arquivos_associados=(caminho_esquema,),
+                   dependencias=(carregar_csv, padronizar_colunas_vendas, aplicar_esquema, ler_csv_com_esquema))
+def carregar_vendas_padronizadas(caminho):
+    """
+    Carrega e padroniza as vendas tratadas (com cache em disco)
+    """
+    if os.path.exists(caminho_esquema(caminho)):
+        return ler_csv_com_esquema(caminho, ESQUEMA_VENDAS_MENSAL)
+    return padronizar_colunas_vendas(carregar_csv(caminho))
+
+
+def criar_base_gold(ano_mes_base=None, versoes=0, indicadores=None):
+    """
+    Cria a tabela gold IPCA x Vendas
+
+    Parâmetros:
+    ano_mes_base (int): mês base (YYYYMM) para os valores reais;
+        se None usa o último mês disponível no IPCA
+    versoes (int): quantos snapshots anteriores da tabela gold manter
+    indicadores (list): indicadores ('inpc') ou colunas ('igpm__variacao_mensal')
+        do repositório de indicadores acrescentados por Ano_Mes
+    """
     processed_dir = os.path.dirname(localizar_arquivo_processed(''))
     ipca_path = localizar_arquivo_processed('ipca_processado.csv')
     vendas_path = localizar_arquivo_processed('vendas_confeitaria_tratadas.csv')
 
+    # carrega e padroniza
     print('🔍 Carregando IPCA de:', ipca_path)
-    ipca = carregar_csv(ipca_path)
+    ipca_std = carregar_ipca_padronizado(ipca_path)
     print('🔍 Carregando Vendas de:', vendas_path)
-    vendas = carregar_csv(vendas_path)
-
-    # padroniza
-    ipca_std = padronizar_colunas_ipca(ipca)
-    vendas_std = padronizar_colunas_vendas(vendas)
+    vendas_std = carregar_vendas_padronizadas(vendas_path)
 
     # remover duplicações por Ano_Mes
     ipca_std = ipca_std.drop_duplicates(subset=['Ano_Mes'])
@@ -129,16 +139,95 @@ def criar_base_gold():
     cols_existentes = [c for c in cols_finais if c in df_gold.columns]
     df_gold = df_gold[cols_existentes]
 
+    # valores em reais constantes a partir do índice do IPCA
+    if 'indice' in ipca_std.columns:
+        tabela_deflacao = calcular_tabela_deflacao(ipca_std, ano_mes_base)
+        df_gold = deflacionar_agregados(df_gold, tabela_deflacao)
+        print(f"💱 Valores reais calculados (base {tabela_deflacao['ano_mes_base']})")
+    else:
+        print('⚠️ IPCA sem coluna indice: valores reais não calculados')
+
+    # indicadores extras lidos da matriz mensal do repositório, sem reler os dumps
+    if indicadores:
+        extras = tabela_indicadores(indicadores)
+        df_gold = df_gold.merge(extras, on='Ano_Mes', how='left')
+        print(f"📈 Indicadores acrescentados: {[c for c in extras.columns if c != 'Ano_Mes']}")
+
+    # valida o contrato da camada gold antes de publicar
+    garantir_esquema(df_gold, ESQUEMA_GOLD)
+
     # salvar
     out_path = localizar_arquivo_processed('tabela_gold_ipca_vendas.csv')
-    df_gold.to_csv(out_path, index=False, encoding='utf-8')
+    if not salvar_atomico(df_gold, out_path, versoes=versoes):
+        raise IOError(f'Falha ao salvar base gold em {out_path}')
+    salvar_esquema(out_path, ESQUEMA_GOLD, df_gold)
     print(f'💾 Base gold salva em: {out_path} (linhas: {len(df_gold)})')
 
     return df_gold
 
 
+def criar_base_gold_por_loja(ano_mes_base=None, lojas=None):
+    """
+    Cria uma tabela gold por loja a partir do cubo de vendas com a dimensão Loja
+
+    O IPCA é carregado e montado uma única vez como matriz mensal; as
+    vendas de todas as lojas são unidas a ele em um só gather vetorizado e
+    deflacionadas juntas. Só as partições cujo conteúdo mudou são regravadas.
+
+    Parâmetros:
+    ano_mes_base (int): mês base (YYYYMM) para os valores reais
+    lojas (list): se informado, gera só estas lojas (as demais partições ficam)
+    """
+    ipca_path = localizar_arquivo_processed('ipca_processado.csv')
+    cubo_path = localizar_arquivo_processed('cubo_vendas.csv')
+    saida = localizar_arquivo_processed('gold_por_loja')
+
+    print('🔍 Carregando IPCA de:', ipca_path)
+    ipca_std = carregar_ipca_padronizado(ipca_path).drop_duplicates(subset=['Ano_Mes'])
+    tabela_ipca = montar_mensal(ipca_std, 'ipca')
+    print('🔍 Carregando cubo de vendas de:', cubo_path)
+    if not os.path.exists(cubo_path):
+        raise FileNotFoundError(f"Arquivo não encontrado: {cubo_path}")
+    cubo = carregar_cubo(cubo_path)
+    if lojas is not None and COLUNA_LOJA in cubo.columns:
+        cubo = cubo[cubo[COLUNA_LOJA].isin([str(l) for l in lojas])]
+
+    # vendas mensais de todas as lojas em uma tabela longa, no contrato da camada
+    mensal = tabela_mensal_por_loja(cubo)
+    vendas_std = aplicar_esquema(mensal, ESQUEMA_VENDAS_MENSAL)
+    vendas_std.insert(0, COLUNA_LOJA, mensal[COLUNA_LOJA].fillna('').astype(str))
+    print(f"🏪 {vendas_std[COLUNA_LOJA].nunique()} loja(s), {len(vendas_std)} linhas loja x mês")
+
+    print('🔗 Unindo todas as lojas ao IPCA por Ano_Mes...')
+    df_gold = juntar_ipca(vendas_std, tabela_ipca)
+    cols_finais = [COLUNA_LOJA, 'Ano_Mes', 'variacao_mensal', 'variacao_anual', 'Numero_Transacoes',
+                   'Valor_Medio_Por_Venda', 'Valor_Total_Mes', 'Total_Itens_Vendidos']
+    df_gold = df_gold[[c for c in cols_finais if c in df_gold.columns]]
+
+    if 'indice' in ipca_std.columns:
+        tabela_deflacao = calcular_tabela_deflacao(ipca_std, ano_mes_base)
+        df_gold = deflacionar_agregados(df_gold, tabela_deflacao)
+        print(f"💱 Valores reais calculados (base {tabela_deflacao['ano_mes_base']})")
+    else:
+        print('⚠️ IPCA sem coluna indice: valores reais não calculados')
+
+    contagens = salvar_gold_particionado(df_gold, saida, parcial=lojas is not None)
+    print(f"💾 Gold por loja em: {saida} ({contagens['gravadas']} gravadas, "
+          f"{contagens['inalteradas']} inalteradas, {contagens['removidas']} removidas)")
+    return df_gold
+
+
 if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Tabela gold IPCA x vendas')
+    parser.add_argument('--por-loja', action='store_true', help='uma tabela gold por loja')
+    parser.add_argument('--lojas', nargs='+', default=None, help='só estas lojas (com --por-loja)')
+    parser.add_argument('--indicadores', nargs='+', default=None,
+                        help='indicadores extras do repositório (ex: inpc igpm__variacao_mensal)')
+    args, _ = parser.parse_known_args()
     try:
-        df = criar_base_gold()
+        if args.por_loja:
+            df = criar_base_gold_por_loja(lojas=args.lojas)
+        else:
+            df = criar_base_gold(indicadores=args.indicadores)
     except Exception as e:
         print('Erro ao criar base gold:', e)
\ No newline at end of file
@@ -0,0 +1,259 @@
+"""
+Arrays mensais mapeados em memória para workers paralelos
+
+Exporta séries indexadas por Ano_Mes (IPCA processado, tabela gold) como
+matrizes float64 contíguas em arquivos .npy, uma linha por mês em um eixo
+contínuo (meses ausentes como NaN) e uma coluna por métrica, mais um
+cabeçalho JSON com as colunas, a faixa de Ano_Mes e a impressão digital do
+CSV de origem. Workers abrem os arquivos com np.load(mmap_mode='r'): as
+páginas vêm do cache do sistema operacional e são compartilhadas entre os
+processos, sem reler nem reprocessar os CSVs e sem cópia por worker.
+
+Cada versão da matriz vai para um arquivo próprio (<nome>_<hash>.npy,
+hash do conteúdo) e só o cabeçalho <nome>.json é substituído, de forma
+atômica, passando a apontar para ela: quem lê o cabeçalho sempre abre a
+matriz correspondente, nunca uma matriz nova com um cabeçalho antigo. Um
+worker que já mapeou a versão anterior continua lendo-a até reabrir; a
+versão anterior é mantida e as mais antigas são removidas.
+"""
+
+import hashlib
+import json
+import os
+import re
+import numpy as np
+import pandas as pd
+from typing import Any, Dict, Optional, Sequence
+
+from config.settings import ARRAYS_PATH, IPCA_PROCESSED_FILE
+from src.utils.cache import impressao_digital_arquivo
+from src.utils.data_utils import escrever_atomico
+from src.utils.deflator import ano_mes_para_chave
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROCESSED_DIR = os.path.join(BASE_DIR, 'data', 'processed')
+
+# Releituras do cabeçalho quando a versão apontada some antes de ser aberta
+TENTATIVAS_ANEXAR = 3
+
+# Tabelas exportadas por padrão: CSV de origem em data/processed
+TABELAS_MENSAIS = {
+    'ipca': IPCA_PROCESSED_FILE,
+    'gold': 'tabela_gold_ipca_vendas.csv'
+}
+
+
+def diretorio_arrays_padrao() -> str:
+    """
+    Retorna o diretório dos arrays (config/settings.py)
+    """
+    caminho = os.environ.get('ARRAYS_DIR', ARRAYS_PATH)
+    return caminho if os.path.isabs(caminho) else os.path.join(BASE_DIR, caminho)
+
+
+def _chave_para_ano_mes(chaves: np.ndarray) -> np.ndarray:
+    return (chaves // 12) * 100 + chaves % 12 + 1
+
+
+def _matriz_mensal(df: pd.DataFrame, nome: str, colunas: Optional[Sequence[str]]):
+    if df['Ano_Mes'].duplicated().any():
+        raise ValueError(f"{nome}: Ano_Mes duplicado, não é possível indexar por mês")
+    if colunas is None:
+        colunas = [c for c in df.select_dtypes(include='number').columns if c != 'Ano_Mes']
+
+    chaves = ano_mes_para_chave(df['Ano_Mes'])
+    inicio, fim = int(chaves.min()), int(chaves.max())
+    matriz = np.full((fim - inicio + 1, len(colunas)), np.nan)
+    matriz[chaves - inicio] = df[list(colunas)].to_numpy(dtype=float)
+    return list(colunas), matriz, inicio
+
+
+def montar_mensal(df: pd.DataFrame,
+                  nome: str = 'mensal',
+                  colunas: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Monta em memória a mesma estrutura de anexar_mensal, sem passar pelo disco
+
+    Útil quando a exportação não existe ou está desatualizada: a matriz é
+    montada uma vez e compartilhada por todas as consultas (valores_mensais).
+    """
+    colunas, matriz, inicio = _matriz_mensal(df, nome, colunas)
+    cabecalho = {
+        'nome': nome,
+        'colunas': colunas,
+        'dtype': str(matriz.dtype),
+        'meses': int(matriz.shape[0]),
+        'ano_mes_inicial': int(_chave_para_ano_mes(inicio)),
+        'ano_mes_final': int(_chave_para_ano_mes(inicio + matriz.shape[0] - 1)),
+        'fonte': None
+    }
+    return {'cabecalho': cabecalho, 'dados': matriz,
+            'colunas': {c: i for i, c in enumerate(colunas)}, 'chave_inicial': inicio}
+
+
+def exportar_mensal(df: pd.DataFrame,
+                    nome: str,
+                    diretorio: Optional[str] = None,
+                    colunas: Optional[Sequence[str]] = None,
+                    fonte: Optional[Dict[str, Any]] = None) -> str:
+    """
+    Exporta um DataFrame mensal como matriz .npy + cabeçalho JSON
+
+    Args:
+        df: DataFrame com Ano_Mes (único por linha)
+        nome: Nome base dos arquivos (<nome>_<hash>.npy e <nome>.json)
+        diretorio: Diretório de saída (padrão: config/settings.py)
+        colunas: Colunas exportadas (padrão: todas as numéricas)
+        fonte: Impressão digital do arquivo de origem, gravada no cabeçalho
+
+    Returns:
+        Caminho do cabeçalho JSON
+    """
+    diretorio = diretorio or diretorio_arrays_padrao()
+    colunas, matriz, inicio = _matriz_mensal(df, nome, colunas)
+    fim = inicio + matriz.shape[0] - 1
+
+    # Nome da versão: hash das colunas, do mês inicial e do conteúdo da matriz
+    h = hashlib.blake2b(digest_size=8)
+    h.update(json.dumps([list(colunas), inicio, matriz.shape]).encode('utf-8'))
+    h.update(np.ascontiguousarray(matriz).tobytes())
+    caminho_dados = os.path.join(diretorio, f"{nome}_{h.hexdigest()}.npy")
+    caminho_cabecalho = os.path.join(diretorio, f"{nome}.json")
+    anterior = _arquivo_do_cabecalho(caminho_cabecalho)
+
+    def escrever_dados(temporario):
+        # np.save acrescenta .npy a caminhos sem a extensão; o arquivo aberto evita isso
+        with open(temporario, 'wb') as arquivo:
+            np.save(arquivo, matriz)
+
+    if not os.path.exists(caminho_dados):
+        escrever_atomico(caminho_dados, escrever_dados)
+
+    cabecalho = {
+        'nome': nome,
+        'arquivo': os.path.basename(caminho_dados),
+        'colunas': list(colunas),
+        'dtype': str(matriz.dtype),
+        'meses': int(matriz.shape[0]),
+        'ano_mes_inicial': int(_chave_para_ano_mes(inicio)),
+        'ano_mes_final': int(_chave_para_ano_mes(fim)),
+        'fonte': fonte
+    }
+
+    def escrever_cabecalho(temporario):
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(cabecalho, arquivo, ensure_ascii=False, indent=2)
+
+    escrever_atomico(caminho_cabecalho, escrever_cabecalho)
+    _remover_versoes_antigas(diretorio, nome, {cabecalho['arquivo'], anterior})
+    return caminho_cabecalho
+
+
+def _arquivo_do_cabecalho(caminho_cabecalho: str) -> Optional[str]:
+    try:
+        with open(caminho_cabecalho, encoding='utf-8') as arquivo:
+            return json.load(arquivo).get('arquivo')
+    except (OSError, ValueError):
+        return None
+
+
+def _remover_versoes_antigas(diretorio: str, nome: str, manter) -> None:
+    """
+    Remove as matrizes de <nome> fora de `manter` (a atual e a anterior)
+    """
+    padrao = re.compile(rf'{re.escape(nome)}(_[0-9a-f]{{16}})?\.npy')
+    for arquivo in os.listdir(diretorio):
+        if padrao.fullmatch(arquivo) and arquivo not in manter:
+            try:
+                os.remove(os.path.join(diretorio, arquivo))
+            except OSError:
+                # Ainda mapeado por um worker (Windows): sai na próxima exportação
+                pass
+
+
+def anexar_mensal(caminho_cabecalho: str) -> Dict[str, Any]:
+    """
+    Abre uma exportação sem copiar os dados (memmap somente leitura)
+
+    O cabeçalho nomeia a versão da matriz; se ela foi removida entre a
+    leitura do cabeçalho e a abertura (duas exportações no meio tempo), o
+    cabeçalho é relido.
+
+    Returns:
+        Dict com 'cabecalho', 'dados' (memmap meses x colunas), 'colunas'
+        (nome -> posição) e 'chave_inicial'
+    """
+    for tentativa in range(TENTATIVAS_ANEXAR):
+        with open(caminho_cabecalho, encoding='utf-8') as arquivo:
+            cabecalho = json.load(arquivo)
+        caminho_dados = os.path.join(os.path.dirname(caminho_cabecalho), cabecalho['arquivo'])
+        try:
+            dados = np.load(caminho_dados, mmap_mode='r')
+            break
+        except FileNotFoundError:
+            if tentativa == TENTATIVAS_ANEXAR - 1:
+                raise
+    if dados.shape != (cabecalho['meses'], len(cabecalho['colunas'])):
+        raise ValueError(f"{caminho_dados}: formato {dados.shape} não confere com o cabeçalho")
+    return {
+        'cabecalho': cabecalho,
+        'dados': dados,
+        'colunas': {c: i for i, c in enumerate(cabecalho['colunas'])},
+        'chave_inicial': int(ano_mes_para_chave(cabecalho['ano_mes_inicial']))
+    }
+
+
+def coluna_mensal(tabela: Dict[str, Any], coluna: str) -> np.ndarray:
+    """
+    Visão (sem cópia) de uma coluna para todos os meses
+    """
+    return tabela['dados'][:, tabela['colunas'][coluna]]
+
+
+def valores_mensais(tabela: Dict[str, Any], coluna: str, ano_mes) -> np.ndarray:
+    """
+    Valores de uma coluna para os Ano_Mes pedidos (NaN fora da faixa)
+    """
+    serie = coluna_mensal(tabela, coluna)
+    posicoes = np.atleast_1d(ano_mes_para_chave(ano_mes)) - tabela['chave_inicial']
+    dentro = (posicoes >= 0) & (posicoes < len(serie))
+    resultado = np.full(posicoes.shape, np.nan)
+    resultado[dentro] = serie[posicoes[dentro]]
+    return resultado
+
+
+def meses_da_tabela(tabela: Dict[str, Any]) -> np.ndarray:
+    """
+    Ano_Mes de cada linha da exportação
+    """
+    return _chave_para_ano_mes(tabela['chave_inicial'] + np.arange(tabela['cabecalho']['meses']))
+
+
+def exportar_tabelas(diretorio_origem: Optional[str] = None,
+                     diretorio: Optional[str] = None,
+                     forcar: bool = False) -> Dict[str, str]:
+    """
+    Exporta IPCA e gold, pulando as tabelas cujo CSV não mudou
+
+    Returns:
+        Nome da tabela -> caminho do cabeçalho (só as existentes)
+    """
+    diretorio = diretorio or diretorio_arrays_padrao()
+    exportadas = {}
+    for nome, arquivo in TABELAS_MENSAIS.items():
+        caminho_csv = os.path.join(diretorio_origem or PROCESSED_DIR, arquivo)
+        if not os.path.exists(caminho_csv):
+            continue
+        fonte = impressao_digital_arquivo(caminho_csv)
+        caminho_cabecalho = os.path.join(diretorio, f"{nome}.json")
+        if not forcar and os.path.exists(caminho_cabecalho):
+            with open(caminho_cabecalho, encoding='utf-8') as arquivo:
+                if json.load(arquivo).get('fonte') == fonte:
+                    exportadas[nome] = caminho_cabecalho
+                    continue
+        df = pd.read_csv(caminho_csv)
+        # O IPCA processado repete ano/mes em minúsculas; basta a versão Ano/Mes
+        df = df.drop(columns=[c for c in ('ano', 'mes') if c in df.columns and c.capitalize() in df.columns])
+        exportadas[nome] = exportar_mensal(df, nome, diretorio, fonte=fonte)
+        print(f"🧮 Arrays de {nome} exportados: {exportadas[nome]}")
+    return exportadas
@@ -0,0 +1,222 @@
+"""
+Cache em disco para funções de carregamento e padronização de dados
+
+A chave de cada entrada combina: nome da função, versão do código (fonte da
+função e de suas dependências), impressão digital dos arquivos de entrada
+(tamanho, mtime e opcionalmente hash do conteúdo) e os demais parâmetros.
+Os resultados ficam serializados com pickle, preservando os tipos dos
+DataFrames, e o diretório é limitado por tamanho e número de entradas com
+descarte LRU (o mtime de cada entrada é atualizado a cada acerto).
+"""
+
+import functools
+import hashlib
+import inspect
+import os
+import pickle
+from typing import Any, Callable, Dict, Iterable, Optional, Sequence
+
+from config.settings import CACHE_PATH, CACHE_MAX_MB, CACHE_MAX_ENTRADAS
+from src.utils.data_utils import escrever_atomico
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+EXTENSAO = '.pkl'
+
+
+def diretorio_cache_padrao() -> str:
+    """
+    Retorna o diretório de cache (variável CACHE_DIR ou config/settings.py)
+    """
+    diretorio = os.environ.get('CACHE_DIR', CACHE_PATH)
+    if not os.path.isabs(diretorio):
+        diretorio = os.path.join(BASE_DIR, diretorio)
+    return diretorio
+
+
+def impressao_digital_arquivo(caminho: str,
+                              hash_conteudo: bool = False) -> Dict[str, Any]:
+    """
+    Calcula a impressão digital de um arquivo de entrada
+
+    Args:
+        caminho: Caminho do arquivo
+        hash_conteudo: Se deve incluir o hash BLAKE2 do conteúdo
+
+    Returns:
+        Dicionário com caminho absoluto, tamanho, mtime e hash opcional
+    """
+    info = os.stat(caminho)
+    digital = {
+        'caminho': os.path.abspath(caminho),
+        'tamanho': info.st_size,
+        'mtime_ns': info.st_mtime_ns
+    }
+    if hash_conteudo:
+        h = hashlib.blake2b(digest_size=16)
+        with open(caminho, 'rb') as arquivo:
+            for bloco in iter(lambda: arquivo.read(1024 * 1024), b''):
+                h.update(bloco)
+        digital['hash'] = h.hexdigest()
+    return digital
+
+
+def versao_codigo(funcoes: Iterable[Callable]) -> str:
+    """
+    Gera um identificador da versão do código a partir do fonte das funções
+    """
+    h = hashlib.blake2b(digest_size=16)
+    for funcao in funcoes:
+        try:
+            fonte = inspect.getsource(funcao)
+        except (OSError, TypeError):
+            fonte = funcao.__code__.co_code.hex()
+        h.update(fonte.encode('utf-8'))
+    return h.hexdigest()
+
+
+def limpar_cache(diretorio: Optional[str] = None) -> int:
+    """
+    Remove todas as entradas do cache
+
+    Returns:
+        Número de entradas removidas
+    """
+    diretorio = diretorio or diretorio_cache_padrao()
+    if not os.path.isdir(diretorio):
+        return 0
+    removidas = 0
+    for nome in os.listdir(diretorio):
+        if nome.endswith(EXTENSAO):
+            os.remove(os.path.join(diretorio, nome))
+            removidas += 1
+    return removidas
+
+
+def aplicar_limites(diretorio: str,
+                    max_mb: float = CACHE_MAX_MB,
+                    max_entradas: int = CACHE_MAX_ENTRADAS) -> int:
+    """
+    Descarta as entradas menos usadas até respeitar os limites do cache
+
+    Returns:
+        Número de entradas descartadas
+    """
+    entradas = []
+    for nome in os.listdir(diretorio):
+        if nome.endswith(EXTENSAO):
+            caminho = os.path.join(diretorio, nome)
+            try:
+                info = os.stat(caminho)
+            except FileNotFoundError:
+                continue
+            entradas.append((info.st_mtime_ns, info.st_size, caminho))
+
+    entradas.sort()
+    total = sum(tamanho for _, tamanho, _ in entradas)
+    limite_bytes = max_mb * 1024 * 1024
+    descartadas = 0
+    while entradas and (total > limite_bytes or len(entradas) > max_entradas):
+        _, tamanho, caminho = entradas.pop(0)
+        try:
+            os.remove(caminho)
+        except FileNotFoundError:
+            pass
+        total -= tamanho
+        descartadas += 1
+    return descartadas
+
+
+def memoizar_em_disco(argumentos_arquivo: Sequence[str] = (),
+                      arquivos_associados: Sequence[Callable[[str], str]] = (),
+                      versao: str = '1',
+                      dependencias: Sequence[Callable] = (),
+                      hash_conteudo: bool = False,
+                      diretorio: Optional[str] = None,
+                      max_mb: float = CACHE_MAX_MB,
+                      max_entradas: int = CACHE_MAX_ENTRADAS) -> Callable:
+    """
+    Decorador que memoiza o resultado da função em disco
+
+    Resultados None não são guardados (as funções do pipeline retornam None
+    em caso de erro). Defina CACHE_DESATIVADO=1 para ignorar o cache.
+
+    Args:
+        argumentos_arquivo: Nomes dos parâmetros que são caminhos de arquivo
+        arquivos_associados: Funções que dão, para cada caminho de
+            argumentos_arquivo, um arquivo ao lado também lido pela função
+            (ex: caminho_esquema); sua impressão digital, ou a ausência
+            dele, entra na chave
+        versao: Versão manual, para invalidar entradas antigas
+        dependencias: Funções chamadas internamente cujo código também
+            deve invalidar o cache quando mudar
+        hash_conteudo: Se inclui o hash do conteúdo dos arquivos na chave
+        diretorio: Diretório do cache (padrão: config/settings.py)
+        max_mb: Tamanho máximo do cache em MB
+        max_entradas: Número máximo de entradas
+
+    Returns:
+        Decorador
+    """
+    def decorador(funcao: Callable) -> Callable:
+        assinatura = inspect.signature(funcao)
+        codigo = versao_codigo([funcao, *dependencias])
+
+        def calcular_chave(args, kwargs) -> str:
+            parametros = assinatura.bind(*args, **kwargs)
+            parametros.apply_defaults()
+            partes = [funcao.__module__, funcao.__qualname__, versao, codigo]
+            for nome, valor in parametros.arguments.items():
+                if nome in argumentos_arquivo and valor is not None:
+                    for associar in arquivos_associados:
+                        associado = associar(valor)
+                        digital = (impressao_digital_arquivo(associado, hash_conteudo)
+                                   if os.path.exists(associado) else None)
+                        partes.append(f"{associado}={digital!r}")
+                    valor = impressao_digital_arquivo(valor, hash_conteudo)
+                partes.append(f"{nome}={valor!r}")
+            return hashlib.blake2b('\x1f'.join(partes).encode('utf-8'),
+                                   digest_size=20).hexdigest()
+
+        @functools.wraps(funcao)
+        def envoltorio(*args, **kwargs):
+            if os.environ.get('CACHE_DESATIVADO') == '1':
+                return funcao(*args, **kwargs)
+
+            pasta = diretorio or diretorio_cache_padrao()
+            caminho = os.path.join(pasta, calcular_chave(args, kwargs) + EXTENSAO)
+
+            try:
+                with open(caminho, 'rb') as arquivo:
+                    resultado = pickle.load(arquivo)
+                os.utime(caminho)
+                print(f"⚡ Cache: {funcao.__name__} carregado de {os.path.basename(caminho)}")
+                return resultado
+            except FileNotFoundError:
+                pass
+            except Exception as e:
+                print(f"⚠️ Entrada de cache inválida descartada ({e})")
+                try:
+                    os.remove(caminho)
+                except OSError:
+                    pass
+
+            resultado = funcao(*args, **kwargs)
+            if resultado is None:
+                return resultado
+
+            try:
+                def gravar(temporario):
+                    with open(temporario, 'wb') as arquivo:
+                        pickle.dump(resultado, arquivo, protocol=pickle.HIGHEST_PROTOCOL)
+
+                escrever_atomico(caminho, gravar)
+                aplicar_limites(pasta, max_mb, max_entradas)
+            except Exception as e:
+                print(f"⚠️ Não foi possível gravar o cache: {e}")
+
+            return resultado
+
+        envoltorio.sem_cache = funcao
+        return envoltorio
+
+    return decorador
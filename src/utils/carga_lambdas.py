@@ -0,0 +1,442 @@
+"""
+Teste de carga local dos handlers Lambda (scripts 1 e 2)
+
+Roda cada handler contra substitutos locais, sem rede nem AWS:
+
+- um servidor HTTP local (asyncio, em uma thread) que gera CSVs sintéticos
+  de feriados em <url>/<categoria>/csv/<ano>.csv, apontado pelo script 1
+  via FERIADOS_BASE_URL;
+- um S3 emulado em memória, injetado no lugar de cliente_s3() dos scripts,
+  com latência configurável por requisição e contagem por operação.
+
+Cada cenário roda em um processo novo (spawn), como um contêiner Lambda:
+a primeira invocação (com a importação do módulo) é a partida a frio e as
+seguintes são quentes. O relatório traz duração, pico de memória da
+função (RSS após a importação mais o crescimento durante as invocações,
+sem os dados do S3 emulado), requisições HTTP e S3 e uma sugestão de
+memória e timeout para a função. Para medir contra um emulador S3 de
+verdade (ex: MinIO), use S3_ENDPOINT_URL com os scripts diretamente.
+"""
+
+import asyncio
+import csv
+import hashlib
+import importlib
+import io
+import math
+import multiprocessing
+import os
+import random
+import re
+import statistics
+import threading
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor
+from datetime import date, timedelta
+from functools import lru_cache
+from types import SimpleNamespace
+from typing import Any, Dict, List, Optional, Sequence
+
+MODULOS = {
+    'download': 'src.scripts.script1_download_to_s3',
+    'transferir': 'src.scripts.script2_transfer_s3_to_s3'
+}
+BUCKET_RAW = 'feriados-carga-raw'
+BUCKET_PROCESSADO = 'feriados-carga-processado'
+CATEGORIAS = ('nacional', 'estadual', 'municipal', 'facultativo')
+COLUNAS_FERIADOS = ['Data', 'Nome_Feriado', 'Tipo_Feriado', 'Descricao', 'Sigla_Estado', 'Municipio']
+UFS = ('SP', 'RJ', 'MG', 'RS', 'BA', 'PR')
+MUNICIPIOS = ('São Paulo', 'Campinas', 'Santos', 'Rio de Janeiro', 'Belo Horizonte')
+ANO_INICIAL = 2000
+PAGINA_LISTAGEM = 1000
+# Margem sobre o pico medido para sugerir memória e timeout da função
+MARGEM_MEMORIA = 1.5
+MARGEM_TIMEOUT = 3.0
+
+_ROTA = re.compile(r'^/(?P<categoria>[a-z]+)/csv/(?P<ano>\d{4})\.csv$')
+
+
+class NoSuchKey(Exception):
+    """Objeto inexistente no S3 emulado (como s3.exceptions.NoSuchKey)"""
+
+
+class PreconditionFailed(Exception):
+    """Escrita condicional recusada no S3 emulado (como o ClientError 412 do boto3)"""
+
+    def __init__(self, chave):
+        super().__init__(chave)
+        self.response = {'Error': {'Code': 'PreconditionFailed', 'Message': chave},
+                         'ResponseMetadata': {'HTTPStatusCode': 412}}
+
+
+def _etag(corpo: bytes) -> str:
+    return f'"{hashlib.md5(corpo).hexdigest()}"'
+
+
+@lru_cache(maxsize=256)
+def gerar_csv_feriados(categoria: str, ano: int, linhas: int) -> bytes:
+    """
+    CSV sintético de feriados (determinístico por categoria, ano e linhas)
+    """
+    rng = random.Random(f"{categoria}-{ano}")
+    saida = io.StringIO()
+    escritor = csv.writer(saida, lineterminator='\n')
+    escritor.writerow(COLUNAS_FERIADOS)
+    inicio = date(ano, 1, 1)
+    for i in range(linhas):
+        dia = inicio + timedelta(days=i % 365)
+        uf = '' if categoria == 'nacional' else rng.choice(UFS)
+        municipio = rng.choice(MUNICIPIOS) if categoria == 'municipal' else ''
+        escritor.writerow([dia.strftime('%d/%m/%Y'), f"Feriado {i}", categoria.upper(),
+                           f"Feriado sintético {i} de {ano}", uf, municipio])
+    return saida.getvalue().encode('utf-8')
+
+
+def iniciar_servidor_feriados(linhas: int = 100,
+                              latencia: float = 0.0,
+                              host: str = '127.0.0.1') -> Dict[str, Any]:
+    """
+    Sobe o servidor HTTP de feriados sintéticos em uma thread
+
+    Returns:
+        Estado do servidor (url, contadores de requisições e bytes)
+    """
+    estado = {'requisicoes': 0, 'bytes': 0, 'linhas': linhas, 'latencia': latencia}
+    pronto = threading.Event()
+
+    async def tratar(leitor, escritor):
+        linha = await leitor.readline()
+        while (await leitor.readline()) not in (b'\r\n', b'\n', b''):
+            pass
+        partes = linha.decode('latin-1').split()
+        rota = _ROTA.match(partes[1] if len(partes) > 1 else '')
+        estado['requisicoes'] += 1
+        if estado['latencia']:
+            await asyncio.sleep(estado['latencia'])
+        if rota and rota['categoria'] in CATEGORIAS:
+            corpo = gerar_csv_feriados(rota['categoria'], int(rota['ano']), estado['linhas'])
+            status = '200 OK'
+        else:
+            corpo, status = b'nao encontrado', '404 Not Found'
+        estado['bytes'] += len(corpo)
+        escritor.write((f"HTTP/1.1 {status}\r\nContent-Type: text/csv; charset=utf-8\r\n"
+                        f"Content-Length: {len(corpo)}\r\nConnection: close\r\n\r\n").encode() + corpo)
+        await escritor.drain()
+        escritor.close()
+
+    def rodar():
+        laco = asyncio.new_event_loop()
+        servidor = laco.run_until_complete(asyncio.start_server(tratar, host, 0))
+        estado.update(laco=laco, servidor=servidor, porta=servidor.sockets[0].getsockname()[1])
+        pronto.set()
+        laco.run_forever()
+        laco.run_until_complete(servidor.wait_closed())
+        laco.close()
+
+    threading.Thread(target=rodar, daemon=True).start()
+    pronto.wait()
+    estado['url'] = f"http://{host}:{estado['porta']}/"
+    return estado
+
+
+def parar_servidor_feriados(estado: Dict[str, Any]) -> None:
+    """
+    Encerra o servidor HTTP de feriados
+    """
+    def parar():
+        estado['servidor'].close()
+        estado['laco'].stop()
+
+    estado['laco'].call_soon_threadsafe(parar)
+
+
+def criar_s3_emulado(latencia: float = 0.0,
+                     objetos: Optional[Dict] = None) -> SimpleNamespace:
+    """
+    Cliente S3 em memória com a parte da API usada pelos scripts
+
+    Cada chamada conta uma requisição (por operação, como no CloudTrail) e
+    espera `latencia` segundos. put_object aceita as condições IfMatch e
+    IfNoneMatch='*' (PreconditionFailed quando não atendidas) e get_object
+    devolve o ETag.
+
+    Args:
+        latencia: Atraso por requisição em segundos
+        objetos: Conteúdo inicial {(bucket, chave): bytes}
+
+    Returns:
+        Objeto com put_object, get_object, delete_object, get_paginator,
+        exceptions.NoSuchKey e `estado` (objetos e contadores)
+    """
+    estado = {'objetos': dict(objetos or {}), 'requisicoes': Counter()}
+
+    def chamada(operacao):
+        estado['requisicoes'][operacao] += 1
+        if latencia:
+            time.sleep(latencia)
+
+    def put_object(Bucket, Key, Body, IfMatch=None, IfNoneMatch=None, **_):
+        chamada('PutObject')
+        if hasattr(Body, 'read'):
+            Body = Body.read()
+        if isinstance(Body, str):
+            Body = Body.encode('utf-8')
+        atual = estado['objetos'].get((Bucket, Key))
+        if IfNoneMatch == '*' and atual is not None:
+            raise PreconditionFailed(Key)
+        if IfMatch is not None and (atual is None or _etag(atual) != IfMatch):
+            raise PreconditionFailed(Key)
+        estado['objetos'][(Bucket, Key)] = bytes(Body)
+        return {'ETag': _etag(estado['objetos'][(Bucket, Key)])}
+
+    def get_object(Bucket, Key, **_):
+        chamada('GetObject')
+        try:
+            corpo = estado['objetos'][(Bucket, Key)]
+        except KeyError:
+            raise NoSuchKey(Key) from None
+        return {'Body': io.BytesIO(corpo), 'ContentLength': len(corpo), 'ETag': _etag(corpo)}
+
+    def delete_object(Bucket, Key, **_):
+        chamada('DeleteObject')
+        estado['objetos'].pop((Bucket, Key), None)
+        return {}
+
+    def paginate(Bucket, Prefix='', **_):
+        chaves = sorted(k for b, k in estado['objetos'] if b == Bucket and k.startswith(Prefix))
+        for inicio in range(0, max(len(chaves), 1), PAGINA_LISTAGEM):
+            chamada('ListObjectsV2')
+            pagina = chaves[inicio:inicio + PAGINA_LISTAGEM]
+            conteudo = [{'Key': k, 'Size': len(estado['objetos'][(Bucket, k)])} for k in pagina]
+            yield {'Contents': conteudo} if conteudo else {}
+
+    return SimpleNamespace(
+        put_object=put_object,
+        get_object=get_object,
+        delete_object=delete_object,
+        get_paginator=lambda nome: SimpleNamespace(paginate=paginate),
+        exceptions=SimpleNamespace(NoSuchKey=NoSuchKey),
+        estado=estado
+    )
+
+
+def objetos_raw(objetos: int, linhas: int) -> Dict:
+    """
+    Arquivos de feriados-raw/ como o script 1 os grava (entrada do script 2)
+    """
+    resultado = {}
+    for i in range(objetos):
+        categoria, ano = CATEGORIAS[i % len(CATEGORIAS)], ANO_INICIAL + i // len(CATEGORIAS)
+        chave = f"feriados-raw/{categoria}_{ano}.csv"
+        resultado[(BUCKET_RAW, chave)] = gerar_csv_feriados(categoria, ano, linhas)
+    return resultado
+
+
+def evento_s3(chaves: Sequence[str], bucket: str = BUCKET_RAW) -> Dict[str, Any]:
+    """
+    Notificação S3 de ObjectCreated para as chaves
+    """
+    return {'Records': [{'eventName': 'ObjectCreated:Put',
+                         's3': {'bucket': {'name': bucket}, 'object': {'key': chave}}}
+                        for chave in chaves]}
+
+
+def _pico_memoria_mb() -> Optional[float]:
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss em KB no Linux
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def _rss_mb() -> Optional[float]:
+    """
+    RSS atual do processo (Linux: /proc/self/statm; None em outros sistemas)
+    """
+    try:
+        with open('/proc/self/statm') as arquivo:
+            paginas = int(arquivo.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE') / 1024 ** 2
+    except (OSError, ValueError, AttributeError):
+        return None
+
+
+def _pico_rss_mb() -> Optional[float]:
+    """
+    Pico de RSS desde o último reinício (VmHWM de /proc/self/status)
+    """
+    try:
+        with open('/proc/self/status') as arquivo:
+            for linha in arquivo:
+                if linha.startswith('VmHWM:'):
+                    return int(linha.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return None
+
+
+def _executar_medindo_rss(funcao):
+    """
+    Executa funcao() medindo o pico de RSS só durante a chamada
+
+    O pico do processo é reiniciado no RSS atual antes da chamada
+    (escrevendo 5 em /proc/self/clear_refs, Linux 4.0+), de modo que
+    alocações temporárias da função aparecem mesmo quando já liberadas.
+
+    Returns:
+        Tupla (retorno de funcao, pico de RSS em MB ou None sem esse recurso)
+    """
+    try:
+        with open('/proc/self/clear_refs', 'w') as arquivo:
+            arquivo.write('5')
+    except OSError:
+        return funcao(), None
+    return funcao(), _pico_rss_mb()
+
+
+def _bytes_s3(s3) -> int:
+    return sum(len(c) for c in s3.estado['objetos'].values())
+
+
+def _executar_handler(config: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Roda as invocações de um cenário (executado em um processo novo)
+
+    O pico de memória atribuído ao handler é o RSS depois de importar o
+    módulo (interpretador + dependências, como num contêiner Lambda) mais o
+    maior crescimento do RSS durante uma invocação acima do nível medido
+    com o S3 emulado já semeado, descontados os bytes que o handler gravou
+    no emulador. Sem /proc (fora do Linux), cai no RSS máximo do processo,
+    que inclui o emulador e superestima a função.
+    """
+    os.environ.update(config['ambiente'])
+    inicio = time.perf_counter()
+    modulo = importlib.import_module(config['modulo'])
+    importacao = time.perf_counter() - inicio
+    rss_importado = _rss_mb()
+
+    objetos = objetos_raw(config['objetos'], config['linhas']) if config['semear'] else {}
+    s3 = criar_s3_emulado(config['latencia_s3'], objetos)
+    modulo.cliente_s3 = lambda: s3
+    del objetos
+    rss_emulador, bytes_iniciais = _rss_mb(), _bytes_s3(s3)
+
+    invocacoes = []
+    crescimento = 0.0
+    for evento in config['eventos']:
+        antes = Counter(s3.estado['requisicoes'])
+        inicio = time.perf_counter()
+        resposta, pico = _executar_medindo_rss(lambda: modulo.lambda_handler(evento, None))
+        invocacoes.append({
+            'duracao_s': time.perf_counter() - inicio,
+            'status': resposta.get('statusCode'),
+            'requisicoes_s3': dict(s3.estado['requisicoes'] - antes)
+        })
+        if pico is None or rss_emulador is None:
+            crescimento = None
+        elif crescimento is not None:
+            gravado = max(0, _bytes_s3(s3) - bytes_iniciais) / 1024 ** 2
+            crescimento = max(crescimento, pico - rss_emulador - gravado)
+
+    pico_mb = rss_importado + crescimento if crescimento is not None else _pico_memoria_mb()
+    return {
+        'importacao_s': importacao,
+        'invocacoes': invocacoes,
+        'pico_mb': pico_mb,
+        'objetos_s3': len(s3.estado['objetos']),
+        'bytes_s3': _bytes_s3(s3)
+    }
+
+
+def executar_carga(handler: str = 'download',
+                   objetos: int = 8,
+                   linhas: int = 100,
+                   latencia_http: float = 0.0,
+                   latencia_s3: float = 0.0,
+                   repeticoes: int = 3,
+                   modo: str = 'completo') -> Dict[str, Any]:
+    """
+    Executa um cenário de carga de um handler em um processo novo
+
+    Args:
+        handler: 'download' (script 1) ou 'transferir' (script 2)
+        objetos: Arquivos de feriados (script 1: arredondado a 4 categorias por ano)
+        linhas: Linhas por arquivo
+        latencia_http: Atraso por requisição do servidor de feriados (s)
+        latencia_s3: Atraso por requisição do S3 emulado (s)
+        repeticoes: Invocações no mesmo processo (a primeira é a frio)
+        modo: Script 2: 'completo' (invocação manual) ou 'incremental'
+              (evento S3 com um arquivo; a primeira invocação reconstrói tudo)
+
+    Returns:
+        Dict com tempos (frio, quente), pico de memória, requisições HTTP e S3
+        por invocação (a última) e sugestão de memória/timeout
+    """
+    if handler not in MODULOS:
+        raise ValueError(f"Handler desconhecido: {handler}")
+    servidor = None
+    ambiente = {'S3_BUCKET_NAME': BUCKET_RAW, 'S3_BUCKET_ORIGEM': BUCKET_RAW,
+                'S3_BUCKET_DESTINO': BUCKET_PROCESSADO}
+    if handler == 'download':
+        anos = max(1, math.ceil(objetos / len(CATEGORIAS)))
+        objetos = anos * len(CATEGORIAS)
+        servidor = iniciar_servidor_feriados(linhas, latencia_http)
+        ambiente['FERIADOS_BASE_URL'] = servidor['url']
+        ambiente['FERIADOS_ANOS'] = ','.join(str(ANO_INICIAL + i) for i in range(anos))
+        eventos = [{}] * repeticoes
+    elif modo == 'incremental':
+        eventos = [{}] + [evento_s3(['feriados-raw/nacional_2000.csv'])] * (repeticoes - 1)
+    else:
+        eventos = [{}] * repeticoes
+
+    config = {'modulo': MODULOS[handler], 'ambiente': ambiente, 'objetos': objetos,
+              'linhas': linhas, 'latencia_s3': latencia_s3, 'semear': handler == 'transferir',
+              'eventos': eventos}
+    try:
+        contexto = multiprocessing.get_context('spawn')
+        with ProcessPoolExecutor(max_workers=1, mp_context=contexto) as executor:
+            medida = executor.submit(_executar_handler, config).result()
+    finally:
+        if servidor is not None:
+            parar_servidor_feriados(servidor)
+
+    invocacoes = medida['invocacoes']
+    quentes = [i['duracao_s'] for i in invocacoes[1:]]
+    frio = medida['importacao_s'] + invocacoes[0]['duracao_s']
+    pior = max([frio] + quentes)
+    resultado = {
+        'handler': handler,
+        'modo': modo if handler == 'transferir' else 'completo',
+        'objetos': objetos,
+        'linhas': linhas,
+        'latencia_http_s': latencia_http,
+        'latencia_s3_s': latencia_s3,
+        'importacao_s': round(medida['importacao_s'], 4),
+        'frio_s': round(frio, 4),
+        'quente_s': round(statistics.median(quentes), 4) if quentes else None,
+        'pico_mb': round(medida['pico_mb'], 1) if medida['pico_mb'] else None,
+        'requisicoes_http': servidor['requisicoes'] // len(eventos) if servidor else 0,
+        'bytes_http': servidor['bytes'] // len(eventos) if servidor else 0,
+        'requisicoes_s3': invocacoes[-1]['requisicoes_s3'],
+        'objetos_s3': medida['objetos_s3'],
+        'bytes_s3': medida['bytes_s3'],
+        'status': [i['status'] for i in invocacoes],
+        'timeout_sugerido_s': math.ceil(pior * MARGEM_TIMEOUT)
+    }
+    if medida['pico_mb']:
+        # Lambda aloca memória de 1 em 1 MB a partir de 128 MB
+        resultado['memoria_sugerida_mb'] = max(128, math.ceil(medida['pico_mb'] * MARGEM_MEMORIA))
+    return resultado
+
+
+def executar_matriz(handlers: Sequence[str] = ('download', 'transferir'),
+                    objetos: Sequence[int] = (8, 64),
+                    linhas: Sequence[int] = (100, 10_000),
+                    **kwargs) -> List[Dict[str, Any]]:
+    """
+    Executa executar_carga para todas as combinações de handler, objetos e linhas
+    """
+    return [executar_carga(handler, n, l, **kwargs)
+            for handler in handlers for n in objetos for l in linhas]
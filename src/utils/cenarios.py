@@ -0,0 +1,179 @@
+"""
+Cenários Monte Carlo de vendas sob inflação
+
+Projeta o faturamento nominal e real (em reais do último mês observado) em
+milhares de caminhos de IPCA, todos calculados como matrizes NumPy
+(caminhos x meses):
+
+1. Tendência: regressão do log de Valor_Total_Mes em tempo e mês do ano
+   (sazonalidade) sobre a tabela gold.
+2. Caminhos de IPCA: blocos de meses históricos de variacao_mensal
+   reamostrados (bootstrap em blocos móveis) ou uma distribuição informada.
+   No bootstrap o resíduo de vendas do mesmo mês histórico acompanha a
+   inflação sorteada, preservando a relação entre as duas séries.
+3. Índice acumulado = cumprod(1 + variação/100); vendas nominais =
+   tendência x exp(resíduo); vendas reais = nominais / índice acumulado.
+
+Os caminhos são gerados em lotes de tamanho fixo, cada um com sua semente
+derivada (SeedSequence.spawn), opcionalmente em um pool de processos; o
+resultado depende só da semente, não do número de processos.
+"""
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Any, Callable, Dict, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.deflator import ano_mes_para_chave
+
+CAMINHOS_POR_LOTE = 10_000
+PERCENTIS_PADRAO = (5, 25, 50, 75, 95)
+
+
+def _amostrar_normal(gerador: np.random.Generator, forma, media: float, desvio: float) -> np.ndarray:
+    return gerador.normal(media, desvio, size=forma)
+
+
+def amostrador_normal(media: float, desvio: float) -> Callable:
+    """
+    Distribuição normal i.i.d. para variacao_mensal (% ao mês)
+
+    Retorna um callable serializável (pode ir para o pool de processos).
+    Amostradores próprios devem ter a assinatura f(gerador, (caminhos, meses))
+    e ser definidos em nível de módulo.
+    """
+    return partial(_amostrar_normal, media=media, desvio=desvio)
+
+
+def ajustar_tendencia(df: pd.DataFrame, coluna_valor: str = 'Valor_Total_Mes') -> Dict[str, Any]:
+    """
+    Ajusta log(valor) ~ tempo + mês do ano por mínimos quadrados
+
+    Returns:
+        Dict com coeficientes, resíduos por mês histórico e a última chave mensal
+    """
+    dados = df.dropna(subset=[coluna_valor, 'variacao_mensal']).sort_values('Ano_Mes')
+    dados = dados[dados[coluna_valor] > 0]
+    chaves = ano_mes_para_chave(dados['Ano_Mes'])
+    t = (chaves - chaves[-1]).astype(float)
+    meses = chaves % 12
+
+    # Mês do ano como dummies (janeiro é a referência do intercepto)
+    x = np.column_stack([np.ones_like(t), t] + [(meses == m).astype(float) for m in range(1, 12)])
+    y = np.log(dados[coluna_valor].to_numpy(dtype=float))
+    coeficientes, *_ = np.linalg.lstsq(x, y, rcond=None)
+    return {
+        'intercepto': coeficientes[0],
+        'inclinacao': coeficientes[1],
+        'sazonal': np.r_[0.0, coeficientes[2:]],
+        'residuos': y - x @ coeficientes,
+        'variacoes': dados['variacao_mensal'].to_numpy(dtype=float),
+        'chave_final': int(chaves[-1])
+    }
+
+
+def _indices_blocos(gerador: np.random.Generator, caminhos: int, horizonte: int,
+                    tamanho: int, tamanho_bloco: int) -> np.ndarray:
+    """
+    Índices de meses históricos em blocos móveis (caminhos x horizonte)
+    """
+    n_blocos = -(-horizonte // tamanho_bloco)
+    inicios = gerador.integers(0, tamanho - tamanho_bloco + 1, size=(caminhos, n_blocos))
+    indices = inicios[:, :, None] + np.arange(tamanho_bloco)
+    return indices.reshape(caminhos, -1)[:, :horizonte]
+
+
+def _simular_lote(argumentos) -> Dict[str, np.ndarray]:
+    """
+    Simula um lote de caminhos (função de módulo para o pool de processos)
+    """
+    tendencia, caminhos, horizonte, tamanho_bloco, amostrador, semente = argumentos
+    gerador = np.random.default_rng(semente)
+    historico = len(tendencia['variacoes'])
+    bloco = max(1, min(tamanho_bloco, historico))
+
+    indices = _indices_blocos(gerador, caminhos, horizonte, historico, bloco)
+    residuos = tendencia['residuos'][indices]
+    if amostrador is None:
+        variacoes = tendencia['variacoes'][indices]
+    else:
+        variacoes = np.asarray(amostrador(gerador, (caminhos, horizonte)), dtype=float)
+
+    t = np.arange(1, horizonte + 1, dtype=float)
+    meses = (tendencia['chave_final'] + t.astype(int)) % 12
+    log_tendencia = tendencia['intercepto'] + tendencia['inclinacao'] * t + tendencia['sazonal'][meses]
+
+    indice = np.cumprod(1 + variacoes / 100, axis=1)
+    nominal = np.exp(log_tendencia[None, :] + residuos)
+    return {'indice': indice, 'nominal': nominal, 'real': nominal / indice}
+
+
+def simular_cenarios(df: pd.DataFrame,
+                     horizonte: int = 36,
+                     caminhos: int = 10_000,
+                     tamanho_bloco: int = 12,
+                     amostrador: Optional[Callable] = None,
+                     processos: Optional[int] = 1,
+                     semente: int = 0,
+                     coluna_valor: str = 'Valor_Total_Mes') -> Dict[str, Any]:
+    """
+    Gera os caminhos de IPCA e de vendas para os próximos `horizonte` meses
+
+    Args:
+        df: Tabela gold (Ano_Mes, variacao_mensal, coluna_valor)
+        horizonte: Meses projetados após o último mês observado
+        caminhos: Número de caminhos simulados
+        tamanho_bloco: Meses por bloco no bootstrap histórico
+        amostrador: Distribuição de variacao_mensal (None: bootstrap histórico)
+        processos: Processos do pool (1: no processo atual; None: CPUs)
+        semente: Semente (resultado reprodutível)
+        coluna_valor: Coluna de vendas projetada
+
+    Returns:
+        Dict com 'meses' (Ano_Mes futuros) e matrizes caminhos x meses
+        'indice' (IPCA acumulado), 'nominal' e 'real'
+    """
+    tendencia = ajustar_tendencia(df, coluna_valor)
+    processos = processos or os.cpu_count() or 1
+
+    n_lotes = -(-caminhos // CAMINHOS_POR_LOTE)
+    tamanhos = np.diff(np.linspace(0, caminhos, n_lotes + 1).astype(int))
+    sementes = np.random.SeedSequence(semente).spawn(n_lotes)
+    lotes = [(tendencia, int(n), horizonte, tamanho_bloco, amostrador, s)
+             for n, s in zip(tamanhos, sementes) if n > 0]
+
+    if processos == 1 or len(lotes) == 1:
+        resultados = [_simular_lote(lote) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            resultados = list(executor.map(_simular_lote, lotes))
+
+    futuras = tendencia['chave_final'] + np.arange(1, horizonte + 1)
+    cenarios = {'meses': (futuras // 12) * 100 + futuras % 12 + 1}
+    for chave in ('indice', 'nominal', 'real'):
+        cenarios[chave] = np.concatenate([r[chave] for r in resultados], axis=0)
+    return cenarios
+
+
+def resumo_percentis(cenarios: Dict[str, Any],
+                     percentis: Sequence[float] = PERCENTIS_PADRAO) -> pd.DataFrame:
+    """
+    Percentis por mês do IPCA acumulado (%) e das vendas nominais e reais
+
+    Returns:
+        DataFrame com Ano_Mes e colunas <Serie>_P<percentil>
+    """
+    resumo = pd.DataFrame({'Ano_Mes': cenarios['meses']})
+    series = {
+        'IPCA_Acumulado': (cenarios['indice'] - 1) * 100,
+        'Valor_Nominal': cenarios['nominal'],
+        'Valor_Real': cenarios['real']
+    }
+    for nome, matriz in series.items():
+        valores = np.percentile(matriz, percentis, axis=0)
+        for p, linha in zip(percentis, valores):
+            resumo[f"{nome}_P{p:g}"] = linha
+    return resumo.round(2)
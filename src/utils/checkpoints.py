@@ -0,0 +1,132 @@
+"""
+Checkpoints de processamentos longos em chunks (retomada após falha)
+
+Um checkpoint é um diretório com o estado do processamento (JSON: posição
+alcançada na fonte, contadores, identidade da execução) e os artefatos
+parciais (DataFrames em pickle, arrays em .npy). Cada gravação usa uma
+geração nova de arquivos e só então troca o estado.json de forma atômica;
+uma queda no meio da gravação deixa o checkpoint anterior intacto.
+
+O estado guarda a identidade da execução (fonte, impressão digital,
+parâmetros): um checkpoint de outra fonte ou de outros parâmetros é
+ignorado em vez de retomado.
+"""
+
+import glob
+import json
+import os
+import pickle
+from datetime import datetime
+from typing import Any, Dict, Optional, Tuple
+
+import numpy as np
+
+from src.utils.data_utils import escrever_atomico
+
+ARQUIVO_ESTADO = 'estado.json'
+
+
+def salvar_checkpoint(diretorio: str,
+                      identidade: Dict[str, Any],
+                      progresso: Dict[str, Any],
+                      artefatos: Dict[str, Any]) -> int:
+    """
+    Grava um checkpoint (nova geração de artefatos + estado.json atômico)
+
+    Args:
+        diretorio: Diretório do checkpoint
+        identidade: O que precisa coincidir para retomar (fonte, parâmetros)
+        progresso: Posição e contadores (serializáveis em JSON)
+        artefatos: Nome -> np.ndarray (.npy) ou qualquer objeto (pickle)
+
+    Returns:
+        Número da geração gravada
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    anterior = _ler_estado(diretorio)
+    geracao = anterior['geracao'] + 1 if anterior else 1
+
+    arquivos = {}
+    for nome, valor in artefatos.items():
+        if isinstance(valor, np.ndarray):
+            arquivo = f"{nome}_{geracao:06d}.npy"
+
+            def escrever(temporario, valor=valor):
+                with open(temporario, 'wb') as saida:
+                    np.save(saida, valor)
+        else:
+            arquivo = f"{nome}_{geracao:06d}.pkl"
+
+            def escrever(temporario, valor=valor):
+                with open(temporario, 'wb') as saida:
+                    pickle.dump(valor, saida, protocol=pickle.HIGHEST_PROTOCOL)
+        escrever_atomico(os.path.join(diretorio, arquivo), escrever)
+        arquivos[nome] = arquivo
+
+    estado = {'geracao': geracao, 'identidade': identidade, 'progresso': progresso,
+              'artefatos': arquivos, 'gravado_em': datetime.now().isoformat(timespec='seconds')}
+
+    def gravar(temporario):
+        with open(temporario, 'w', encoding='utf-8') as saida:
+            json.dump(estado, saida, ensure_ascii=False, indent=2, default=_json_padrao)
+
+    escrever_atomico(os.path.join(diretorio, ARQUIVO_ESTADO), gravar)
+
+    # Gerações antigas só saem depois que o novo estado está no lugar
+    atuais = set(arquivos.values()) | {ARQUIVO_ESTADO}
+    for caminho in glob.glob(os.path.join(diretorio, '*_[0-9][0-9][0-9][0-9][0-9][0-9].*')):
+        if os.path.basename(caminho) not in atuais:
+            os.remove(caminho)
+    return geracao
+
+
+def carregar_checkpoint(diretorio: str,
+                        identidade: Dict[str, Any]) -> Optional[Tuple[Dict[str, Any], Dict[str, Any]]]:
+    """
+    Carrega o checkpoint se ele pertence à mesma execução
+
+    Returns:
+        Tupla (progresso, artefatos) ou None se não houver checkpoint compatível
+    """
+    estado = _ler_estado(diretorio)
+    if estado is None:
+        return None
+    # Compara pela forma serializada (tuplas e listas, chaves numéricas)
+    if json.loads(json.dumps(identidade, default=_json_padrao)) != estado['identidade']:
+        return None
+    artefatos = {}
+    for nome, arquivo in estado['artefatos'].items():
+        caminho = os.path.join(diretorio, arquivo)
+        if arquivo.endswith('.npy'):
+            artefatos[nome] = np.load(caminho)
+        else:
+            with open(caminho, 'rb') as entrada:
+                artefatos[nome] = pickle.load(entrada)
+    return estado['progresso'], artefatos
+
+
+def limpar_checkpoint(diretorio: str) -> None:
+    """
+    Remove o checkpoint (depois que o resultado final foi salvo)
+    """
+    if not os.path.isdir(diretorio):
+        return
+    for caminho in glob.glob(os.path.join(diretorio, '*')):
+        os.remove(caminho)
+    os.rmdir(diretorio)
+
+
+def _ler_estado(diretorio: str) -> Optional[Dict[str, Any]]:
+    caminho = os.path.join(diretorio, ARQUIVO_ESTADO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as entrada:
+        return json.load(entrada)
+
+
+def _json_padrao(valor):
+    if isinstance(valor, np.integer):
+        return int(valor)
+    if isinstance(valor, np.floating):
+        return float(valor)
+    raise TypeError(f"Valor não serializável em JSON: {type(valor).__name__}")
@@ -0,0 +1,242 @@
+"""
+Camada de consultas SQL embarcada sobre as camadas processada e gold
+
+Registra IPCA, vendas mensais, gold e feriados como tabelas de um banco
+SQLite local, com índices em Ano_Mes, Data e Sigla_Estado, e algumas views
+de apoio. Cada tabela guarda a impressão digital (tamanho e mtime) do CSV
+de origem: antes de cada consulta os arquivos são verificados e apenas os
+que mudaram são recarregados, de modo que o banco acompanha as saídas das
+etapas sem reprocessamento completo.
+
+Exemplo:
+    consultar("SELECT * FROM gold WHERE variacao_mensal > 0.5")
+    consultar("SELECT * FROM vw_feriados WHERE Sigla_Estado = 'SP' AND Trimestre = 4")
+"""
+
+import os
+import sqlite3
+import pandas as pd
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from config.settings import CONSULTAS_DB_FILE
+from src.utils.datas import converter_datas
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROCESSED_DIR = os.path.join(BASE_DIR, 'data', 'processed')
+
+# Tabelas registradas: arquivo de origem, índices e colunas de data (gravadas em ISO)
+DATASETS = {
+    'ipca': {
+        'arquivo': 'ipca_processado.csv',
+        'indices': [['Ano_Mes']]
+    },
+    'vendas_mensal': {
+        'arquivo': 'vendas_confeitaria_tratadas.csv',
+        'indices': [['Ano_Mes']]
+    },
+    'gold': {
+        'arquivo': 'tabela_gold_ipca_vendas.csv',
+        'indices': [['Ano_Mes']]
+    },
+    'feriados': {
+        'arquivo': os.path.join('feriados', 'feriados_completo.csv'),
+        'indices': [['Data'], ['Sigla_Estado', 'Data']],
+        'datas': ['Data']
+    }
+}
+
+# Views de apoio e as tabelas de que dependem
+VIEWS = {
+    'vw_feriados': {
+        'tabelas': {'feriados'},
+        'sql': """
+            SELECT *,
+                   CAST(strftime('%Y%m', Data) AS INTEGER) AS Ano_Mes,
+                   (CAST(strftime('%m', Data) AS INTEGER) + 2) / 3 AS Trimestre
+            FROM feriados
+        """
+    },
+    'vw_vendas_ipca': {
+        'tabelas': {'vendas_mensal', 'ipca'},
+        'sql': """
+            SELECT v.*, i.variacao_mensal, i.variacao_anual, i.indice
+            FROM vendas_mensal v
+            JOIN ipca i ON i.Ano_Mes = v.Ano_Mes
+        """
+    }
+}
+
+
+def caminho_banco_padrao() -> str:
+    """
+    Retorna o caminho do banco de consultas (config/settings.py)
+    """
+    caminho = os.environ.get('CONSULTAS_DB', CONSULTAS_DB_FILE)
+    return caminho if os.path.isabs(caminho) else os.path.join(BASE_DIR, caminho)
+
+
+def conectar(caminho: Optional[str] = None) -> sqlite3.Connection:
+    """
+    Abre o banco de consultas criando a tabela de controle se necessário
+    """
+    caminho = caminho or caminho_banco_padrao()
+    os.makedirs(os.path.dirname(os.path.abspath(caminho)), exist_ok=True)
+    conexao = sqlite3.connect(caminho)
+    conexao.execute('PRAGMA journal_mode=WAL')
+    conexao.execute("""
+        CREATE TABLE IF NOT EXISTS _fontes (
+            tabela TEXT PRIMARY KEY,
+            arquivo TEXT,
+            tamanho INTEGER,
+            mtime_ns INTEGER,
+            registros INTEGER
+        )
+    """)
+    return conexao
+
+
+def _caminho_dataset(definicao: Dict[str, Any], diretorio: Optional[str]) -> str:
+    arquivo = definicao['arquivo']
+    return arquivo if os.path.isabs(arquivo) else os.path.join(diretorio or PROCESSED_DIR, arquivo)
+
+
+def _remover_colunas_repetidas(df: pd.DataFrame) -> pd.DataFrame:
+    """
+    Trata colunas que só diferem por maiúsculas (SQLite não as distingue)
+
+    Ex.: o IPCA processado tem 'ano' e 'Ano'. Cópias idênticas são removidas;
+    as demais recebem um sufixo numérico.
+    """
+    vistas = {}
+    renomear, remover = {}, []
+    for coluna in df.columns:
+        chave = coluna.lower()
+        if chave not in vistas:
+            vistas[chave] = coluna
+        elif df[coluna].equals(df[vistas[chave]]):
+            remover.append(coluna)
+        else:
+            renomear[coluna] = f"{coluna}_{sum(c.lower() == chave for c in renomear) + 2}"
+    return df.drop(columns=remover).rename(columns=renomear)
+
+
+def carregar_tabela(conexao: sqlite3.Connection,
+                    nome: str,
+                    caminho: str,
+                    definicao: Dict[str, Any]) -> int:
+    """
+    (Re)carrega um CSV como tabela, recriando seus índices
+
+    Returns:
+        Número de registros carregados
+    """
+    df = _remover_colunas_repetidas(pd.read_csv(caminho))
+    for coluna in definicao.get('datas', []):
+        if coluna in df.columns:
+            datas, _ = converter_datas(df[coluna])
+            df[coluna] = datas.dt.strftime('%Y-%m-%d')
+
+    info = os.stat(caminho)
+    with conexao:
+        df.to_sql(nome, conexao, if_exists='replace', index=False, chunksize=10_000)
+        for colunas in definicao.get('indices', []):
+            if all(c in df.columns for c in colunas):
+                colunas_sql = ', '.join(f'"{c}"' for c in colunas)
+                conexao.execute(f'CREATE INDEX IF NOT EXISTS "ix_{nome}_{"_".join(colunas)}" '
+                                f'ON "{nome}" ({colunas_sql})')
+        conexao.execute(
+            'INSERT OR REPLACE INTO _fontes (tabela, arquivo, tamanho, mtime_ns, registros) '
+            'VALUES (?, ?, ?, ?, ?)',
+            (nome, os.path.abspath(caminho), info.st_size, info.st_mtime_ns, len(df))
+        )
+    return len(df)
+
+
+def criar_views(conexao: sqlite3.Connection) -> List[str]:
+    """
+    Cria as views cujas tabelas de origem já estão registradas
+    """
+    tabelas = {linha[0] for linha in conexao.execute(
+        "SELECT name FROM sqlite_master WHERE type = 'table'")}
+    criadas = []
+    with conexao:
+        for nome, view in VIEWS.items():
+            if view['tabelas'] <= tabelas:
+                conexao.execute(f'CREATE VIEW IF NOT EXISTS "{nome}" AS {view["sql"]}')
+                criadas.append(nome)
+    return criadas
+
+
+def sincronizar(conexao: Optional[sqlite3.Connection] = None,
+                tabelas: Optional[Iterable[str]] = None,
+                diretorio: Optional[str] = None,
+                forcar: bool = False) -> List[str]:
+    """
+    Recarrega as tabelas cujos arquivos de origem mudaram
+
+    Args:
+        conexao: Conexão aberta (abre o banco padrão se None)
+        tabelas: Tabelas a verificar (padrão: todas as registradas)
+        diretorio: Diretório dos CSVs (padrão: data/processed)
+        forcar: Recarrega mesmo sem mudança
+
+    Returns:
+        Lista das tabelas recarregadas
+    """
+    propria = conexao is None
+    conexao = conexao or conectar()
+    try:
+        registradas = {linha[0]: linha[1:] for linha in conexao.execute(
+            'SELECT tabela, tamanho, mtime_ns FROM _fontes')}
+        recarregadas = []
+        for nome in tabelas or DATASETS:
+            definicao = DATASETS[nome]
+            caminho = _caminho_dataset(definicao, diretorio)
+            if not os.path.exists(caminho):
+                continue
+            info = os.stat(caminho)
+            if not forcar and registradas.get(nome) == (info.st_size, info.st_mtime_ns):
+                continue
+            registros = carregar_tabela(conexao, nome, caminho, definicao)
+            print(f"🗄️ Tabela {nome} sincronizada ({registros} registros)")
+            recarregadas.append(nome)
+        criar_views(conexao)
+        return recarregadas
+    finally:
+        if propria:
+            conexao.close()
+
+
+def consultar(sql: str,
+              parametros: Sequence[Any] = (),
+              caminho: Optional[str] = None,
+              diretorio: Optional[str] = None,
+              formato: str = 'pandas'):
+    """
+    Executa uma consulta SQL sobre as camadas registradas
+
+    Args:
+        sql: Consulta SQL (tabelas: ipca, vendas_mensal, gold, feriados;
+            views: vw_feriados, vw_vendas_ipca)
+        parametros: Parâmetros posicionais da consulta (?)
+        caminho: Caminho do banco (padrão: config/settings.py)
+        diretorio: Diretório dos CSVs de origem (padrão: data/processed)
+        formato: 'pandas' ou 'arrow' (requer pyarrow)
+
+    Returns:
+        DataFrame ou pyarrow.Table com o resultado
+    """
+    conexao = conectar(caminho)
+    try:
+        sincronizar(conexao, diretorio=diretorio)
+        resultado = pd.read_sql_query(sql, conexao, params=list(parametros))
+    finally:
+        conexao.close()
+
+    if formato == 'arrow':
+        try:
+            import pyarrow as pa
+        except ImportError:
+            raise ImportError("formato='arrow' requer o pacote pyarrow")
+        return pa.Table.from_pandas(resultado, preserve_index=False)
+    return resultado
@@ -0,0 +1,284 @@
+"""
+Correlação cruzada defasada entre IPCA e vendas via FFT
+
+As séries da tabela gold são alinhadas em um eixo mensal contínuo (meses
+ausentes viram NaN). Para cada par de métricas (x, y) e defasagem L, a
+correlação de Pearson entre x[t] e y[t + L] é montada a partir de seis
+somas sobre os pares válidos (n, Σx, Σy, Σx², Σy², Σxy), e cada soma para
+todas as defasagens é uma correlação cruzada calculada com FFT sobre as
+séries preenchidas com zero e suas máscaras. Todos os pares de métricas,
+janelas móveis e réplicas de bootstrap são processados como dimensões
+extras do mesmo lote de FFTs.
+
+Defasagem L > 0 significa que x antecede y em L meses.
+"""
+
+import os
+import warnings
+import numpy as np
+import pandas as pd
+from concurrent.futures import ProcessPoolExecutor
+from typing import Optional, Sequence, Tuple
+
+from src.utils.deflator import ano_mes_para_chave
+
+COLUNAS_IPCA = ('variacao_mensal', 'variacao_anual')
+COLUNAS_VENDAS = ('Valor_Total_Mes', 'Numero_Transacoes')
+
+# Réplicas de bootstrap por tarefa do pool
+REPLICAS_POR_LOTE = 100
+
+
+def alinhar_mensal(df: pd.DataFrame,
+                   colunas: Sequence[str],
+                   coluna_ano_mes: str = 'Ano_Mes') -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Monta a matriz (meses, colunas) em um eixo mensal contínuo
+
+    Returns:
+        Tupla (Ano_Mes de cada linha, matriz float com NaN nos meses ausentes)
+    """
+    chaves = ano_mes_para_chave(df[coluna_ano_mes])
+    inicio = chaves.min()
+    matriz = np.full((chaves.max() - inicio + 1, len(colunas)), np.nan)
+    matriz[chaves - inicio] = df[list(colunas)].to_numpy(dtype=float)
+    todas = np.arange(inicio, chaves.max() + 1)
+    return (todas // 12) * 100 + todas % 12 + 1, matriz
+
+
+def _correlacao_fft(a: np.ndarray, b: np.ndarray, nfft: int, defasagens: np.ndarray) -> np.ndarray:
+    """
+    Σ_t a[t, i] * b[t + L, j] para todas as defasagens e pares (i, j)
+
+    a: (..., T, p) e b: (..., T, q) -> (..., n_defasagens, p, q)
+    """
+    fa = np.fft.rfft(a, n=nfft, axis=-2)
+    fb = np.fft.rfft(b, n=nfft, axis=-2)
+    produto = np.conj(fa)[..., :, :, None] * fb[..., :, None, :]
+    cruzada = np.fft.irfft(produto, n=nfft, axis=-3)
+    return np.take(cruzada, defasagens % nfft, axis=-3)
+
+
+def _pearson(pares, soma_x, soma_y, soma_xx, soma_yy, soma_xy, min_pares: int) -> np.ndarray:
+    """
+    Correlação de Pearson a partir das somas sobre os pares válidos
+    """
+    covariancia = pares * soma_xy - soma_x * soma_y
+    variancia = (pares * soma_xx - soma_x ** 2) * (pares * soma_yy - soma_y ** 2)
+    escala = np.maximum(np.abs(pares * soma_xx), np.abs(pares * soma_yy)) + 1e-300
+    validos = (pares >= min_pares) & (variancia > 1e-12 * escala ** 2)
+    correlacoes = np.full(np.shape(covariancia), np.nan)
+    correlacoes[validos] = covariancia[validos] / np.sqrt(variancia[validos])
+    return np.clip(correlacoes, -1, 1)
+
+
+def correlacao_defasada(x: np.ndarray,
+                        y: np.ndarray,
+                        max_defasagem: int = 12,
+                        min_pares: int = 6) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Correlação de Pearson para todas as defasagens e pares de colunas
+
+    Args:
+        x: Array (..., T, p) alinhado por mês, com NaN nos ausentes
+        y: Array (..., T, q) no mesmo eixo de x
+        max_defasagem: Defasagens calculadas de -max a +max
+        min_pares: Mínimo de pares válidos para a correlação (senão NaN)
+
+    Returns:
+        Tupla (defasagens, correlações (..., n_defasagens, p, q), nº de pares)
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    tamanho = x.shape[-2]
+    defasagens = np.arange(-max_defasagem, max_defasagem + 1)
+    nfft = 1 << int(np.ceil(np.log2(2 * tamanho - 1)))
+
+    mx, my = np.isfinite(x), np.isfinite(y)
+    # Centralizar melhora a precisão numérica (a correlação não muda)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        x0 = np.where(mx, x - np.nanmean(np.where(mx, x, np.nan), axis=-2, keepdims=True), 0.0)
+        y0 = np.where(my, y - np.nanmean(np.where(my, y, np.nan), axis=-2, keepdims=True), 0.0)
+    x0 = np.nan_to_num(x0)
+    y0 = np.nan_to_num(y0)
+    mx, my = mx.astype(float), my.astype(float)
+
+    pares = np.rint(_correlacao_fft(mx, my, nfft, defasagens))
+    soma_x = _correlacao_fft(x0, my, nfft, defasagens)
+    soma_y = _correlacao_fft(mx, y0, nfft, defasagens)
+    soma_xx = _correlacao_fft(x0 * x0, my, nfft, defasagens)
+    soma_yy = _correlacao_fft(mx, y0 * y0, nfft, defasagens)
+    soma_xy = _correlacao_fft(x0, y0, nfft, defasagens)
+
+    return defasagens, _pearson(pares, soma_x, soma_y, soma_xx, soma_yy, soma_xy, min_pares), \
+        pares.astype(np.int64)
+
+
+def _tabela_longa(defasagens, correlacoes, pares, colunas_x, colunas_y) -> pd.DataFrame:
+    d, i, j = np.meshgrid(np.arange(len(defasagens)), np.arange(len(colunas_x)),
+                          np.arange(len(colunas_y)), indexing='ij')
+    return pd.DataFrame({
+        'Metrica_X': np.asarray(colunas_x, dtype=object)[i.ravel()],
+        'Metrica_Y': np.asarray(colunas_y, dtype=object)[j.ravel()],
+        'Defasagem': defasagens[d.ravel()],
+        'Correlacao': correlacoes.reshape(-1),
+        'Pares': pares.reshape(-1)
+    }).sort_values(['Metrica_X', 'Metrica_Y', 'Defasagem'], ignore_index=True)
+
+
+def tabela_correlacoes(df: pd.DataFrame,
+                       colunas_x: Sequence[str] = COLUNAS_IPCA,
+                       colunas_y: Sequence[str] = COLUNAS_VENDAS,
+                       max_defasagem: int = 12,
+                       min_pares: int = 6) -> pd.DataFrame:
+    """
+    Correlações defasadas de todos os pares de métricas da tabela gold
+
+    Returns:
+        DataFrame longo (Metrica_X, Metrica_Y, Defasagem, Correlacao, Pares)
+    """
+    _, x = alinhar_mensal(df, colunas_x)
+    _, y = alinhar_mensal(df, colunas_y)
+    defasagens, correlacoes, pares = correlacao_defasada(x, y, max_defasagem, min_pares)
+    return _tabela_longa(defasagens, correlacoes, pares, colunas_x, colunas_y)
+
+
+def correlacao_movel(df: pd.DataFrame,
+                     janela: int = 24,
+                     colunas_x: Sequence[str] = COLUNAS_IPCA,
+                     colunas_y: Sequence[str] = COLUNAS_VENDAS,
+                     max_defasagem: int = 6,
+                     min_pares: int = 6) -> pd.DataFrame:
+    """
+    Correlações defasadas em janelas móveis de `janela` meses
+
+    Todas as janelas entram como uma dimensão de lote das FFTs.
+
+    Returns:
+        DataFrame longo com Ano_Mes_Fim (último mês da janela) e as colunas
+        de tabela_correlacoes
+    """
+    meses, x = alinhar_mensal(df, colunas_x)
+    _, y = alinhar_mensal(df, colunas_y)
+    if len(meses) < janela:
+        return pd.DataFrame(columns=['Ano_Mes_Fim', 'Metrica_X', 'Metrica_Y',
+                                     'Defasagem', 'Correlacao', 'Pares'])
+    # (n_janelas, janela, colunas)
+    janelas_x = np.lib.stride_tricks.sliding_window_view(x, janela, axis=0).transpose(0, 2, 1)
+    janelas_y = np.lib.stride_tricks.sliding_window_view(y, janela, axis=0).transpose(0, 2, 1)
+    defasagens, correlacoes, pares = correlacao_defasada(janelas_x, janelas_y,
+                                                         max_defasagem, min_pares)
+    partes = []
+    for indice, fim in enumerate(meses[janela - 1:]):
+        parte = _tabela_longa(defasagens, correlacoes[indice], pares[indice], colunas_x, colunas_y)
+        parte.insert(0, 'Ano_Mes_Fim', fim)
+        partes.append(parte)
+    return pd.concat(partes, ignore_index=True)
+
+
+def _reamostrar_blocos(tamanho: int, tamanho_bloco: int, reamostras: int,
+                       gerador: np.random.Generator) -> np.ndarray:
+    """
+    Índices de bootstrap em blocos móveis (reamostras, tamanho)
+    """
+    n_blocos = -(-tamanho // tamanho_bloco)
+    inicios = gerador.integers(0, tamanho - tamanho_bloco + 1, size=(reamostras, n_blocos))
+    indices = inicios[:, :, None] + np.arange(tamanho_bloco)
+    return indices.reshape(reamostras, -1)[:, :tamanho]
+
+
+def _lote_bootstrap(argumentos) -> np.ndarray:
+    """
+    Executa um lote de réplicas (função de módulo para o pool de processos)
+
+    Para cada réplica e defasagem L, os pares (x[t], y[t + L]) são tomados
+    nos instantes t reamostrados; pares fora da série ficam mascarados.
+    """
+    x, y, reamostras, tamanho_bloco, max_defasagem, min_pares, semente = argumentos
+    gerador = np.random.default_rng(semente)
+    defasagens = np.arange(-max_defasagem, max_defasagem + 1)
+    indices = _reamostrar_blocos(len(x), tamanho_bloco, reamostras, gerador)
+
+    # (réplicas, defasagens, T) -> índice de y pareado com cada t reamostrado
+    alvos = indices[:, None, :] + defasagens[None, :, None]
+    fora = (alvos < 0) | (alvos >= len(y))
+    xs = np.broadcast_to(x[indices][:, None], alvos.shape + x.shape[1:])
+    ys = np.where(fora[..., None], np.nan, y[np.clip(alvos, 0, len(y) - 1)])
+
+    mx = np.isfinite(xs).astype(float)
+    my = np.isfinite(ys).astype(float)
+    x0, y0 = np.nan_to_num(xs), np.nan_to_num(ys)
+
+    def somar(a, b):
+        return np.einsum('...tp,...tq->...pq', a, b)
+
+    return _pearson(somar(mx, my), somar(x0, my), somar(mx, y0), somar(x0 * x0, my),
+                    somar(mx, y0 * y0), somar(x0, y0), min_pares)
+
+
+def intervalos_bootstrap(df: pd.DataFrame,
+                         colunas_x: Sequence[str] = COLUNAS_IPCA,
+                         colunas_y: Sequence[str] = COLUNAS_VENDAS,
+                         max_defasagem: int = 12,
+                         reamostras: int = 1000,
+                         tamanho_bloco: int = 6,
+                         nivel: float = 0.95,
+                         processos: Optional[int] = None,
+                         semente: int = 0,
+                         min_pares: int = 6) -> pd.DataFrame:
+    """
+    Intervalos de confiança das correlações por bootstrap em blocos móveis
+
+    Os instantes t são reamostrados em blocos (preservando a autocorrelação
+    dentro de cada bloco) e, para cada defasagem, pareados com y[t + L]. As
+    réplicas são divididas em lotes de tamanho fixo executados em um pool
+    de processos; o resultado depende só da semente, não do nº de processos.
+
+    Args:
+        df: Tabela gold (Ano_Mes e métricas)
+        reamostras: Número de réplicas
+        tamanho_bloco: Meses por bloco
+        nivel: Nível de confiança do intervalo percentil
+        processos: Processos do pool (None: CPUs; 1: no processo atual)
+        semente: Semente dos lotes (resultado reprodutível)
+
+    Returns:
+        tabela_correlacoes acrescida de IC_Inferior e IC_Superior
+    """
+    _, x = alinhar_mensal(df, colunas_x)
+    _, y = alinhar_mensal(df, colunas_y)
+    # centralizar antes das somas melhora a precisão (a correlação não muda)
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore', RuntimeWarning)
+        x = x - np.nanmean(x, axis=0)
+        y = y - np.nanmean(y, axis=0)
+    tamanho_bloco = max(1, min(tamanho_bloco, len(x)))
+    processos = processos or os.cpu_count() or 1
+
+    n_lotes = -(-reamostras // REPLICAS_POR_LOTE)
+    tamanhos = np.diff(np.linspace(0, reamostras, n_lotes + 1).astype(int))
+    sementes = np.random.SeedSequence(semente).spawn(n_lotes)
+    lotes = [(x, y, int(n), tamanho_bloco, max_defasagem, min_pares, s)
+             for n, s in zip(tamanhos, sementes) if n > 0]
+
+    if processos == 1 or len(lotes) == 1:
+        replicas = [_lote_bootstrap(lote) for lote in lotes]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            replicas = list(executor.map(_lote_bootstrap, lotes))
+    replicas = np.concatenate(replicas, axis=0)
+
+    alfa = (1 - nivel) / 2
+    with warnings.catch_warnings():
+        # combinações sem réplicas válidas resultam em NaN
+        warnings.simplefilter('ignore', RuntimeWarning)
+        limites = np.nanquantile(replicas, [alfa, 1 - alfa], axis=0)
+
+    defasagens, correlacoes, pares = correlacao_defasada(x, y, max_defasagem, min_pares)
+    tabela = _tabela_longa(defasagens, correlacoes, pares, colunas_x, colunas_y)
+    inferior = _tabela_longa(defasagens, limites[0], pares, colunas_x, colunas_y)
+    superior = _tabela_longa(defasagens, limites[1], pares, colunas_x, colunas_y)
+    tabela['IC_Inferior'] = inferior['Correlacao']
+    tabela['IC_Superior'] = superior['Correlacao']
+    return tabela
@@ -0,0 +1,189 @@
+"""
+Cubo pré-agregado de vendas
+
+O cubo guarda, na granularidade mais fina usada nas análises (dia x
+produto, com mês e dia da semana derivados da data), medidas aditivas de
+cada métrica: soma, contagem, soma dos quadrados, mínimo e máximo.
+Qualquer agregação mais grossa (mês, produto, dia da semana) e as
+médias/desvios são obtidas do cubo sem reler as transações, e cubos de
+cargas diferentes podem ser mesclados.
+
+O cubo das vendas não traz a dimensão Feriado: como ele guarda o dia,
+feriado x dia comum é marcado na consulta, passando o cubo salvo e as
+datas de feriado para adicionar_dimensoes_calendario(cubo, 'Data', datas)
+(uma lista de feriados atualizada não exige reprocessar as vendas).
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Iterable, List, Optional, Sequence
+
+# Sufixos das medidas aditivas e a função usada para reagregá-las
+MEDIDAS_ADITIVAS = {
+    'soma': 'sum',
+    'contagem': 'sum',
+    'soma_quadrados': 'sum',
+    'min': 'min',
+    'max': 'max'
+}
+
+DIAS_SEMANA = ['Segunda', 'Terça', 'Quarta', 'Quinta', 'Sexta', 'Sábado', 'Domingo']
+
+
+def colunas_medida(metrica: str) -> List[str]:
+    """
+    Nomes das colunas do cubo para uma métrica (ex: valor_total__soma)
+    """
+    return [f"{metrica}__{sufixo}" for sufixo in MEDIDAS_ADITIVAS]
+
+
+def metricas_do_cubo(cubo: pd.DataFrame) -> List[str]:
+    """
+    Lista as métricas presentes no cubo
+    """
+    return sorted({c.split('__')[0] for c in cubo.columns if '__' in c})
+
+
+def dimensoes_do_cubo(cubo: pd.DataFrame) -> List[str]:
+    """
+    Lista as colunas de dimensão do cubo
+    """
+    return [c for c in cubo.columns if '__' not in c]
+
+
+def construir_cubo(df: pd.DataFrame,
+                   dimensoes: Sequence[str],
+                   metricas: Dict[str, str]) -> pd.DataFrame:
+    """
+    Calcula as medidas aditivas em uma única passada de groupby
+
+    Args:
+        df: Transações já tipadas
+        dimensoes: Colunas de agrupamento (granularidade do cubo)
+        metricas: Nome da métrica no cubo -> coluna numérica de origem
+
+    Returns:
+        DataFrame com uma linha por célula do cubo
+    """
+    base = df[list(dimensoes)].copy()
+    agregacoes = {}
+    for metrica, coluna in metricas.items():
+        valores = pd.to_numeric(df[coluna], errors='coerce').astype(float)
+        base[metrica] = valores
+        base[f"{metrica}__q"] = valores * valores
+        agregacoes[f"{metrica}__soma"] = (metrica, 'sum')
+        agregacoes[f"{metrica}__contagem"] = (metrica, 'count')
+        agregacoes[f"{metrica}__soma_quadrados"] = (f"{metrica}__q", 'sum')
+        agregacoes[f"{metrica}__min"] = (metrica, 'min')
+        agregacoes[f"{metrica}__max"] = (metrica, 'max')
+
+    cubo = base.groupby(list(dimensoes), observed=True, dropna=False).agg(**agregacoes)
+    return cubo.reset_index()
+
+
+def agregar_cubo(cubo: pd.DataFrame,
+                 dimensoes: Iterable[str] = (),
+                 derivar: bool = True) -> pd.DataFrame:
+    """
+    Reagrega o cubo para uma granularidade mais grossa
+
+    Args:
+        cubo: Cubo (ou resultado de agregar_cubo com derivar=False)
+        dimensoes: Dimensões mantidas; vazio agrega tudo em uma linha
+        derivar: Se acrescenta média e desvio padrão de cada métrica
+
+    Returns:
+        DataFrame agregado
+    """
+    dimensoes = list(dimensoes)
+    funcoes = {c: MEDIDAS_ADITIVAS[c.split('__')[1]] for c in cubo.columns
+               if '__' in c and c.split('__')[1] in MEDIDAS_ADITIVAS}
+
+    if dimensoes:
+        agregado = cubo.groupby(dimensoes, observed=True, dropna=False).agg(funcoes).reset_index()
+    else:
+        agregado = cubo.agg(funcoes).to_frame().T
+
+    if derivar:
+        for metrica in metricas_do_cubo(agregado):
+            n = agregado[f"{metrica}__contagem"].astype(float)
+            soma = agregado[f"{metrica}__soma"]
+            agregado[f"{metrica}__media"] = soma / n.where(n > 0)
+            variancia = (agregado[f"{metrica}__soma_quadrados"] - soma * soma / n.where(n > 0)) \
+                / (n - 1).where(n > 1)
+            agregado[f"{metrica}__desvio"] = np.sqrt(variancia.clip(lower=0))
+    return agregado
+
+
+def mesclar_cubos(cubos: Iterable[pd.DataFrame]) -> pd.DataFrame:
+    """
+    Mescla cubos com as mesmas dimensões (ex: cargas ou chunks diferentes)
+    """
+    cubos = [c for c in cubos if c is not None and not c.empty]
+    if not cubos:
+        return pd.DataFrame()
+    juntos = pd.concat(cubos, ignore_index=True)
+    return agregar_cubo(juntos, dimensoes_do_cubo(juntos), derivar=False)
+
+
+def adicionar_dimensoes_calendario(df: pd.DataFrame,
+                                   coluna_data: str,
+                                   datas_feriados: Optional[Iterable] = None) -> pd.DataFrame:
+    """
+    Acrescenta Data (dia), Ano, Mes, Ano_Mes, Dia_Semana e Feriado
+
+    Args:
+        df: Transações com coluna datetime
+        coluna_data: Coluna de data da venda
+        datas_feriados: Datas de feriado (opcional) para a dimensão Feriado
+
+    Returns:
+        Cópia do DataFrame com as dimensões de calendário
+    """
+    resultado = df.copy()
+    dia = resultado[coluna_data].dt.normalize()
+    resultado['Data'] = dia
+    resultado['Ano'] = dia.dt.year
+    resultado['Mes'] = dia.dt.month
+    resultado['Ano_Mes'] = resultado['Ano'] * 100 + resultado['Mes']
+    resultado['Dia_Semana'] = dia.dt.dayofweek
+    if datas_feriados is not None:
+        feriados = pd.to_datetime(pd.Series(list(datas_feriados))).dt.normalize().unique()
+        resultado['Feriado'] = dia.isin(feriados)
+    return resultado
+
+
+def carregar_cubo(caminho: str) -> pd.DataFrame:
+    """
+    Carrega um cubo salvo em CSV (a coluna Data volta como datetime)
+    """
+    # Ids de loja são texto ('001' não pode virar 1)
+    cubo = pd.read_csv(caminho, dtype={'Loja': str})
+    if 'Data' in cubo.columns:
+        cubo['Data'] = pd.to_datetime(cubo['Data'], format='%Y-%m-%d')
+    return cubo
+
+
+def tabela_mensal_do_cubo(cubo: pd.DataFrame, dimensoes: Iterable[str] = ()) -> pd.DataFrame:
+    """
+    Gera a tabela mensal do pipeline de vendas a partir do cubo
+
+    Espera as métricas valor_total, valor_unitario e (opcional) quantidade,
+    produzindo as mesmas colunas do agrupamento por Ano/Mes/Ano_Mes.
+    Dimensões extras (ex: ['Loja']) geram uma linha por valor e mês.
+    """
+    chaves = [*dimensoes, 'Ano', 'Mes', 'Ano_Mes']
+    mensal = agregar_cubo(cubo, chaves)
+    tabela = mensal[chaves].copy()
+    tabela['Valor_Total_Mes'] = mensal['valor_total__soma']
+    tabela['Numero_Transacoes'] = mensal['valor_total__contagem'].astype(int)
+    tabela['Valor_Medio_Por_Transacao'] = mensal['valor_total__media']
+    tabela['Valor_Unitario_Medio'] = mensal['valor_unitario__media']
+    tabela['Valor_Unitario_Max'] = mensal['valor_unitario__max']
+    tabela['Valor_Unitario_Min'] = mensal['valor_unitario__min']
+    if 'quantidade__soma' in mensal.columns:
+        itens = mensal['quantidade__soma']
+        inteiros = np.isclose(itens, np.round(itens)).all()
+        tabela['Total_Itens_Vendidos'] = np.round(itens).astype('int64') if inteiros else itens
+        tabela['Itens_Medios_Por_Transacao'] = mensal['quantidade__media']
+    return tabela.sort_values([*dimensoes, 'Ano_Mes']).round(2).reset_index(drop=True)
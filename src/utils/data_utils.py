@@ -4,9 +4,18 @@ Utilitários para processamento de dados
 
 import pandas as pd
 import os
-import gzip
-from io import StringIO
-from typing import Optional, Dict, Any
+import re
+import shutil
+import tempfile
+from datetime import datetime
+from typing import Optional, Dict, Any, Callable, List
+
+from src.utils.memoria import ler_em_chunks
+
+# ioctl FICLONE do Linux (cópia copy-on-write em btrfs/xfs)
+FICLONE = 0x40049409
+# Sufixo dos snapshots: <arquivo>.<mtime em %Y%m%dT%H%M%S_%f>
+_SUFIXO_SNAPSHOT = r'\.\d{8}T\d{6}_\d{6}'
 
 def verificar_estrutura_diretorios() -> None:
     """
@@ -25,25 +34,27 @@ def verificar_estrutura_diretorios() -> None:
         print(f"✅ Diretório verificado: {diretorio}")
 
 def carregar_arquivo_comprimido(caminho_arquivo: str, 
-                               encoding: str = 'utf-8') -> pd.DataFrame:
+                               encoding: str = 'utf-8',
+                               max_memoria=None) -> pd.DataFrame:
     """
     Carrega arquivo CSV comprimido (.gz)
     
+    O arquivo é descomprimido e lido em chunks dimensionados pelo orçamento
+    de memória, sem materializar o texto inteiro.
+
     Args:
         caminho_arquivo: Caminho para o arquivo .gz
         encoding: Codificação do arquivo
+        max_memoria: Orçamento de memória (ex: "512MB"); None consulta o ambiente
         
     Returns:
         DataFrame com os dados carregados
     """
     try:
-        with gzip.open(caminho_arquivo, 'rt', encoding=encoding) as arquivo:
-            conteudo = arquivo.read()
-        
-        # Trata valores ausentes do IBGE
-        conteudo = conteudo.replace('..', '')
-        
-        return pd.read_csv(StringIO(conteudo))
+        # Trata valores ausentes do IBGE ('..')
+        chunks = ler_em_chunks(caminho_arquivo, max_memoria, compression='gzip',
+                               encoding=encoding, na_values=['..'])
+        return pd.concat(chunks, ignore_index=True)
     
     except Exception as e:
         print(f"❌ Erro ao carregar {caminho_arquivo}: {e}")
@@ -76,16 +87,200 @@ def gerar_relatorio_dados(df: pd.DataFrame,
     
     return relatorio
 
+def escrever_atomico(caminho: str, escrever: Callable[[str], None]) -> None:
+    """
+    Escreve um arquivo de forma atômica
+
+    O conteúdo é gravado em um temporário no mesmo diretório, sincronizado
+    com fsync e renomeado sobre o destino com os.replace. Leitores
+    concorrentes veem o arquivo antigo ou o novo, nunca um arquivo parcial.
+
+    Args:
+        caminho: Caminho de destino
+        escrever: Função que recebe o caminho temporário e grava o conteúdo
+    """
+    diretorio = os.path.dirname(os.path.abspath(caminho))
+    os.makedirs(diretorio, exist_ok=True)
+    descritor, temporario = tempfile.mkstemp(
+        dir=diretorio, prefix=f".{os.path.basename(caminho)}.", suffix='.tmp')
+    os.close(descritor)
+    try:
+        escrever(temporario)
+        with open(temporario, 'rb') as arquivo:
+            os.fsync(arquivo.fileno())
+        os.chmod(temporario, _modo_destino(caminho))
+        os.replace(temporario, caminho)
+    except BaseException:
+        if os.path.exists(temporario):
+            os.remove(temporario)
+        raise
+    _sincronizar_diretorio(diretorio)
+
+
+def _modo_destino(caminho: str) -> int:
+    """Permissões do arquivo existente ou as padrão do umask (mkstemp usa 0600)"""
+    if os.path.exists(caminho):
+        return os.stat(caminho).st_mode & 0o777
+    umask = os.umask(0)
+    os.umask(umask)
+    return 0o666 & ~umask
+
+
+def _sincronizar_diretorio(diretorio: str) -> None:
+    """Garante que a renomeação foi persistida (no-op onde não suportado)"""
+    try:
+        descritor = os.open(diretorio, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(descritor)
+    except OSError:
+        pass
+    finally:
+        os.close(descritor)
+
+
+def _clonar_arquivo(origem: str, destino: str, modo: str) -> str:
+    """
+    Cria uma cópia barata de origem em destino
+
+    Tenta o modo pedido e recua para os seguintes: hardlink -> reflink -> cópia.
+
+    Returns:
+        Modo efetivamente usado
+    """
+    modos = ['hardlink', 'reflink', 'copia']
+    for tentativa in modos[modos.index(modo):]:
+        try:
+            if tentativa == 'hardlink':
+                os.link(origem, destino)
+            elif tentativa == 'reflink':
+                import fcntl
+                with open(origem, 'rb') as src, open(destino, 'wb') as dst:
+                    fcntl.ioctl(dst.fileno(), FICLONE, src.fileno())
+            else:
+                shutil.copy2(origem, destino)
+            return tentativa
+        except (OSError, ImportError, AttributeError):
+            if os.path.exists(destino) and tentativa != 'hardlink':
+                os.remove(destino)
+    raise OSError(f"Não foi possível copiar {origem} para {destino}")
+
+
+def criar_snapshot(caminho: str,
+                   modo: str = 'hardlink',
+                   diretorio_versoes: Optional[str] = None) -> Optional[str]:
+    """
+    Guarda a versão atual de um arquivo em <dir>/.versoes/
+
+    Com hardlink nenhum dado é copiado: como as escritas substituem o
+    arquivo principal por um novo inode (escrever_atomico), o conteúdo antigo
+    continua intacto no snapshot.
+
+    Args:
+        caminho: Arquivo a versionar
+        modo: 'hardlink', 'reflink' ou 'copia'
+        diretorio_versoes: Diretório dos snapshots (padrão: <dir>/.versoes)
+
+    Returns:
+        Caminho do snapshot ou None se o arquivo não existe
+    """
+    if not os.path.exists(caminho):
+        return None
+    diretorio_versoes = diretorio_versoes or os.path.join(
+        os.path.dirname(os.path.abspath(caminho)), '.versoes')
+    os.makedirs(diretorio_versoes, exist_ok=True)
+    carimbo = datetime.fromtimestamp(os.path.getmtime(caminho)).strftime('%Y%m%dT%H%M%S_%f')
+    destino = os.path.join(diretorio_versoes, f"{os.path.basename(caminho)}.{carimbo}")
+    if not os.path.exists(destino):
+        _clonar_arquivo(caminho, destino, modo)
+    return destino
+
+
+def listar_versoes(caminho: str, diretorio_versoes: Optional[str] = None) -> List[str]:
+    """
+    Lista os snapshots de um arquivo, do mais antigo ao mais recente
+    """
+    diretorio_versoes = diretorio_versoes or os.path.join(
+        os.path.dirname(os.path.abspath(caminho)), '.versoes')
+    if not os.path.isdir(diretorio_versoes):
+        return []
+    # Só o nome exato mais o carimbo: os de x.csv.gz não entram nos de x.csv
+    padrao = re.compile(re.escape(os.path.basename(caminho)) + _SUFIXO_SNAPSHOT)
+    return sorted(os.path.join(diretorio_versoes, nome)
+                  for nome in os.listdir(diretorio_versoes) if padrao.fullmatch(nome))
+
+
+def aplicar_retencao(caminho: str, manter: int,
+                     diretorio_versoes: Optional[str] = None) -> List[str]:
+    """
+    Remove os snapshots mais antigos, mantendo apenas os `manter` mais recentes
+
+    Returns:
+        Lista dos snapshots removidos
+    """
+    versoes = listar_versoes(caminho, diretorio_versoes)
+    removidas = versoes[:max(len(versoes) - manter, 0)]
+    for versao in removidas:
+        os.remove(versao)
+    return removidas
+
+
+def salvar_atomico(df: pd.DataFrame,
+                   caminho: str,
+                   versoes: int = 0,
+                   modo_snapshot: str = 'hardlink',
+                   **kwargs_csv) -> bool:
+    """
+    Salva DataFrame em CSV com escrita atômica e snapshots versionados
+
+    Args:
+        df: DataFrame para salvar
+        caminho: Caminho de destino
+        versoes: Quantos snapshots anteriores manter (0 = nenhum)
+        modo_snapshot: 'hardlink', 'reflink' ou 'copia'
+        **kwargs_csv: Parâmetros extras para DataFrame.to_csv
+
+    Returns:
+        True se salvou com sucesso
+    """
+    kwargs_csv.setdefault('index', False)
+    kwargs_csv.setdefault('encoding', 'utf-8')
+    try:
+        if versoes > 0:
+            snapshot = criar_snapshot(caminho, modo_snapshot)
+            if snapshot:
+                print(f"🗂️ Snapshot criado: {snapshot}")
+
+        escrever_atomico(caminho, lambda temporario: df.to_csv(temporario, **kwargs_csv))
+
+        if versoes > 0:
+            aplicar_retencao(caminho, versoes)
+        return True
+
+    except Exception as e:
+        print(f"❌ Erro ao salvar {caminho}: {e}")
+        return False
+
+
 def salvar_com_backup(df: pd.DataFrame, 
                      caminho: str, 
-                     criar_backup: bool = True) -> bool:
+                     criar_backup: bool = True,
+                     versoes: int = 0,
+                     modo_snapshot: str = 'hardlink') -> bool:
     """
     Salva DataFrame com opção de backup
     
+    A escrita é atômica: o arquivo principal nunca fica truncado. O backup
+    é um hardlink (ou cópia) da versão anterior, feito sem renomear o
+    arquivo principal, e versoes > 0 mantém também snapshots em .versoes/.
+
     Args:
         df: DataFrame para salvar
         caminho: Caminho de destino
         criar_backup: Se deve criar backup do arquivo existente
+        versoes: Quantos snapshots anteriores manter (0 = nenhum)
+        modo_snapshot: 'hardlink', 'reflink' ou 'copia'
         
     Returns:
         True se salvou com sucesso
@@ -94,14 +289,17 @@ def salvar_com_backup(df: pd.DataFrame,
         # Criar backup se arquivo existir
         if criar_backup and os.path.exists(caminho):
             backup_path = f"{caminho}.backup"
-            os.rename(caminho, backup_path)
+            temporario = f"{backup_path}.{os.getpid()}.tmp"
+            _clonar_arquivo(caminho, temporario, modo_snapshot)
+            os.replace(temporario, backup_path)
             print(f"📦 Backup criado: {backup_path}")
         
         # Salvar novo arquivo
-        df.to_csv(caminho, index=False, encoding='utf-8')
+        if not salvar_atomico(df, caminho, versoes=versoes, modo_snapshot=modo_snapshot):
+            return False
         print(f"✅ Arquivo salvo: {caminho}")
         return True
         
     except Exception as e:
         print(f"❌ Erro ao salvar {caminho}: {e}")
-        return False
\ No newline at end of file
+        return False
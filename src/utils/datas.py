@@ -0,0 +1,100 @@
+"""
+Conversão de colunas de data com memoização por valor único
+
+Colunas de data em logs de transações repetem poucos milhares de valores
+distintos em milhões de linhas. A conversão fatoriza a coluna, converte
+apenas os valores únicos com um formato explícito (informado ou detectado
+uma vez, priorizando o padrão brasileiro dia/mês/ano) e distribui o
+resultado de volta pelos códigos.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Optional, Sequence, Tuple
+
+# Formatos testados na detecção, em ordem de preferência (dia primeiro)
+FORMATOS_DATA = [
+    '%d/%m/%Y',
+    '%Y-%m-%d',
+    '%d/%m/%Y %H:%M:%S',
+    '%Y-%m-%d %H:%M:%S',
+    '%d-%m-%Y',
+    '%Y/%m/%d',
+    '%d/%m/%y',
+    '%Y%m%d'
+]
+
+
+def detectar_formato(valores: Sequence[str],
+                     formatos: Sequence[str] = FORMATOS_DATA,
+                     amostra: int = 500) -> Optional[str]:
+    """
+    Detecta o formato que converte a maior parte de uma amostra de valores
+
+    Args:
+        valores: Valores de texto (de preferência já únicos)
+        formatos: Formatos candidatos, em ordem de preferência
+        amostra: Quantidade máxima de valores testados
+
+    Returns:
+        Melhor formato ou None se nenhum converte valor algum
+    """
+    valores = pd.Series(list(valores[:amostra]), dtype='object')
+    melhor, melhor_convertidos = None, 0
+    for formato in formatos:
+        convertidos = int(pd.to_datetime(valores, format=formato, errors='coerce').notna().sum())
+        if convertidos > melhor_convertidos:
+            melhor, melhor_convertidos = formato, convertidos
+            if convertidos == len(valores):
+                break
+    return melhor
+
+
+def converter_datas(serie: pd.Series,
+                    formato: Optional[str] = None,
+                    dayfirst: bool = True) -> Tuple[pd.Series, int]:
+    """
+    Converte uma coluna de texto em datetime convertendo só os valores únicos
+
+    Valores que não seguem o formato principal são tentados uma vez com
+    inferência por valor (format='mixed', respeitando dayfirst).
+
+    Args:
+        serie: Coluna com as datas em texto
+        formato: Formato explícito; se None é detectado nos valores únicos
+        dayfirst: Se datas ambíguas no fallback são lidas como dia/mês
+
+    Returns:
+        Tupla (Series datetime64 com NaT nas inválidas, nº de valores inválidos)
+    """
+    if pd.api.types.is_datetime64_any_dtype(serie):
+        return serie, 0
+
+    codigos, unicos = pd.factorize(serie)
+    unicos = pd.Series(np.asarray(unicos, dtype=object).astype(str), dtype='object').str.strip()
+
+    if formato is None:
+        formato = detectar_formato(unicos)
+
+    if formato is not None:
+        convertidos = pd.to_datetime(unicos, format=formato, errors='coerce')
+    else:
+        convertidos = pd.Series(pd.NaT, index=unicos.index, dtype='datetime64[ns]')
+
+    restantes = convertidos.isna()
+    if restantes.any():
+        convertidos = convertidos.astype('datetime64[ns]')
+        convertidos[restantes] = pd.to_datetime(unicos[restantes], format='mixed',
+                                                dayfirst=dayfirst, errors='coerce')
+
+    valores = convertidos.to_numpy(dtype='datetime64[ns]')
+    resultado = np.full(len(codigos), np.datetime64('NaT'), dtype='datetime64[ns]')
+    validos = codigos >= 0
+    vazios = np.flatnonzero((unicos == '').to_numpy())
+    if len(vazios):
+        validos &= ~np.isin(codigos, vazios)
+    resultado[validos] = valores[codigos[validos]]
+
+    datas = pd.Series(resultado, index=serie.index, name=serie.name)
+    invalidas = int(np.count_nonzero(validos & np.isnat(resultado)))
+    return datas, invalidas
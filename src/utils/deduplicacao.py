@@ -0,0 +1,338 @@
+"""
+Deduplicação de transações entre cargas com índice persistente de chaves
+
+Cada transação vira uma chave uint64: o hash do id da venda, quando o
+extrato tem id, ou o hash da linha inteira (pd.util.hash_pandas_object). O
+índice em disco é um conjunto de segmentos .npy com chaves ordenadas e
+únicas (8 bytes por chave, sem estrutura extra); a consulta abre os
+segmentos com mmap e usa np.searchsorted, sem carregar o histórico. Cada
+carga grava um segmento novo, e os segmentos são compactados em um só
+quando passam de um limite, com uma intercalação k-way dos segmentos
+mapeados em memória gravada direto em um .npy mapeado (a memória usada é
+de alguns blocos por segmento, não o histórico inteiro).
+
+Com hash de 64 bits, a chance de alguma colisão entre 100 milhões de chaves
+é da ordem de 0,03% (uma colisão descartaria uma venda nova).
+"""
+
+import glob
+import os
+import re
+import numpy as np
+import pandas as pd
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from src.utils.data_utils import escrever_atomico
+
+MAX_SEGMENTOS = 8
+# Chaves lidas de cada segmento por rodada da intercalação (8 MB por segmento)
+BLOCO_INTERCALACAO = 1024 ** 2
+_PADRAO_SEGMENTO = re.compile(r'segmento_(\d+)\.npy$')
+
+
+def chaves_transacoes(df: pd.DataFrame,
+                      coluna_id: Optional[str] = None,
+                      colunas: Optional[Sequence[str]] = None) -> np.ndarray:
+    """
+    Calcula a chave uint64 de cada transação
+
+    Args:
+        df: Transações (de preferência ainda como texto bruto)
+        coluna_id: Coluna com o id da venda; se None usa o hash da linha
+        colunas: Colunas do hash da linha (padrão: todas)
+
+    Returns:
+        Array uint64 com uma chave por linha
+    """
+    if coluna_id is not None:
+        valores = df[coluna_id].astype(str).str.strip().to_numpy(dtype=object)
+        return pd.util.hash_array(valores)
+    colunas = list(colunas) if colunas is not None else list(df.columns)
+    return pd.util.hash_pandas_object(df[colunas], index=False).to_numpy(dtype=np.uint64)
+
+
+def listar_segmentos(diretorio: str) -> List[str]:
+    """
+    Segmentos do índice em ordem de criação
+    """
+    caminhos = glob.glob(os.path.join(diretorio, 'segmento_*.npy'))
+    return sorted(caminhos, key=lambda c: int(_PADRAO_SEGMENTO.search(c).group(1)))
+
+
+def contem(diretorio: str, chaves: np.ndarray) -> np.ndarray:
+    """
+    Indica quais chaves já estão no índice
+
+    Returns:
+        Array booleano alinhado a `chaves`
+    """
+    chaves = np.asarray(chaves, dtype=np.uint64)
+    vistas = np.zeros(len(chaves), dtype=bool)
+    if len(chaves) == 0:
+        return vistas
+    # Chaves ordenadas percorrem cada segmento em sequência
+    ordem = np.argsort(chaves, kind='stable')
+    ordenadas = chaves[ordem]
+    for caminho in listar_segmentos(diretorio):
+        segmento = np.load(caminho, mmap_mode='r')
+        if len(segmento) == 0:
+            continue
+        posicoes = np.minimum(np.searchsorted(segmento, ordenadas), len(segmento) - 1)
+        vistas[ordem] |= np.asarray(segmento[posicoes]) == ordenadas
+    return vistas
+
+
+def _salvar_segmento(caminho: str, chaves: np.ndarray) -> None:
+    def escrever(temporario):
+        with open(temporario, 'wb') as arquivo:
+            np.save(arquivo, chaves)
+
+    escrever_atomico(caminho, escrever)
+
+
+def _ordenadas_unicas(chaves: np.ndarray) -> np.ndarray:
+    # Ordenação + vizinhas diferentes: bem mais rápido que np.unique para uint64
+    ordenadas = np.sort(np.asarray(chaves, dtype=np.uint64))
+    if len(ordenadas) == 0:
+        return ordenadas
+    return ordenadas[np.r_[True, ordenadas[1:] != ordenadas[:-1]]]
+
+
+def _numero_segmento(caminho: str) -> int:
+    return int(_PADRAO_SEGMENTO.search(caminho).group(1))
+
+
+def _proximo_segmento(diretorio: str) -> str:
+    segmentos = listar_segmentos(diretorio)
+    proximo = _numero_segmento(segmentos[-1]) + 1 if segmentos else 1
+    return os.path.join(diretorio, f"segmento_{proximo:06d}.npy")
+
+
+def _intercalar(fontes: Sequence[np.ndarray], saida: np.ndarray, bloco: int) -> int:
+    """
+    Intercala arrays ordenados em `saida`, sem repetir chaves
+
+    A cada rodada lê até `bloco` chaves de cada fonte; tudo que é menor ou
+    igual à menor das últimas chaves lidas já pode ser gravado, porque
+    nenhuma fonte tem mais chaves nesse intervalo.
+
+    Returns:
+        Número de chaves gravadas
+    """
+    posicoes = [0] * len(fontes)
+    escritas = 0
+    while True:
+        ativas = [i for i, fonte in enumerate(fontes) if posicoes[i] < len(fonte)]
+        if not ativas:
+            return escritas
+        janelas = {i: np.asarray(fontes[i][posicoes[i]:posicoes[i] + bloco]) for i in ativas}
+        limite = min(janela[-1] for janela in janelas.values())
+        partes = []
+        for i, janela in janelas.items():
+            ate = int(np.searchsorted(janela, limite, side='right'))
+            partes.append(janela[:ate])
+            posicoes[i] += ate
+        rodada = _ordenadas_unicas(np.concatenate(partes))
+        saida[escritas:escritas + len(rodada)] = rodada
+        escritas += len(rodada)
+
+
+def _gravar_intercalado(caminho: str, segmentos: Sequence[str], bloco: int = BLOCO_INTERCALACAO) -> int:
+    """
+    Grava em `caminho` (escrita atômica) a união ordenada dos segmentos
+
+    Returns:
+        Total de chaves gravadas
+    """
+    fontes = [np.load(c, mmap_mode='r') for c in segmentos]
+    capacidade = sum(len(f) for f in fontes)
+    total = {'chaves': 0}
+
+    def escrever(temporario):
+        if capacidade == 0:
+            with open(temporario, 'wb') as arquivo:
+                np.save(arquivo, np.empty(0, dtype=np.uint64))
+            return
+        saida = np.lib.format.open_memmap(temporario, mode='w+', dtype=np.uint64, shape=(capacidade,))
+        total['chaves'] = _intercalar(fontes, saida, bloco)
+        saida.flush()
+        del saida
+        if total['chaves'] < capacidade:
+            # Chaves repetidas entre segmentos: copia o prefixo preenchido em blocos
+            cheio = np.load(temporario, mmap_mode='r')
+            ajustado = np.lib.format.open_memmap(f"{temporario}.ajuste", mode='w+', dtype=np.uint64,
+                                                 shape=(total['chaves'],))
+            for inicio in range(0, total['chaves'], bloco):
+                ajustado[inicio:inicio + bloco] = cheio[inicio:min(inicio + bloco, total['chaves'])]
+            ajustado.flush()
+            del ajustado, cheio
+            os.replace(f"{temporario}.ajuste", temporario)
+
+    escrever_atomico(caminho, escrever)
+    del fontes
+    return total['chaves']
+
+
+def registrar_chaves(diretorio: str,
+                     chaves: np.ndarray,
+                     max_segmentos: int = MAX_SEGMENTOS,
+                     preservar_ate: int = 0) -> int:
+    """
+    Acrescenta chaves ao índice (novo segmento) e compacta se necessário
+
+    Depois de gravar, o último segmento é juntado ao anterior enquanto for
+    ao menos do mesmo tamanho (como um contador binário): com um segmento
+    por chunk, o índice fica com O(log n) segmentos e cada chave é
+    regravada O(log n) vezes.
+
+    Args:
+        preservar_ate: Segmentos com número até este não são tocados pela
+            compactação (ex: os registrados em um checkpoint)
+
+    Returns:
+        Número de chaves novas gravadas
+    """
+    novas = _ordenadas_unicas(chaves)
+    novas = novas[~contem(diretorio, novas)]
+    if len(novas) == 0:
+        return 0
+
+    os.makedirs(diretorio, exist_ok=True)
+    _salvar_segmento(_proximo_segmento(diretorio), novas)
+    consolidar_segmentos(diretorio, preservar_ate)
+
+    if len(_segmentos_depois(diretorio, preservar_ate)) > max_segmentos:
+        compactar_indice(diretorio, depois_de=preservar_ate)
+    return len(novas)
+
+
+def _segmentos_depois(diretorio: str, numero: int) -> List[str]:
+    return [c for c in listar_segmentos(diretorio) if _numero_segmento(c) > numero]
+
+
+def consolidar_segmentos(diretorio: str, preservar_ate: int = 0) -> int:
+    """
+    Junta os últimos segmentos enquanto o último for ao menos do tamanho do anterior
+
+    Returns:
+        Número do último segmento (0 se não houver nenhum)
+    """
+    while True:
+        segmentos = _segmentos_depois(diretorio, preservar_ate)
+        if len(segmentos) < 2:
+            break
+        penultimo, ultimo = segmentos[-2:]
+        if len(np.load(ultimo, mmap_mode='r')) < len(np.load(penultimo, mmap_mode='r')):
+            break
+        _gravar_intercalado(_proximo_segmento(diretorio), [penultimo, ultimo])
+        os.remove(penultimo)
+        os.remove(ultimo)
+    segmentos = listar_segmentos(diretorio)
+    return _numero_segmento(segmentos[-1]) if segmentos else 0
+
+
+def descartar_segmentos(diretorio: str, depois_de: int) -> int:
+    """
+    Remove os segmentos com número maior que depois_de (ex: gravados depois de um checkpoint)
+
+    Returns:
+        Número de segmentos removidos
+    """
+    segmentos = _segmentos_depois(diretorio, depois_de)
+    for caminho in segmentos:
+        os.remove(caminho)
+    return len(segmentos)
+
+
+def incorporar_segmentos(destino: str, origem: str, substituir: bool = False) -> int:
+    """
+    Passa para o índice destino as chaves de um índice de trabalho (origem)
+
+    Com substituir, o índice destino passa a ter só as chaves da origem
+    (intercaladas em um segmento novo, gravado antes de os antigos saírem).
+    Sem ele, os segmentos da origem viram segmentos novos do destino. Em
+    ambos os casos a origem fica vazia.
+
+    Returns:
+        Número de chaves incorporadas
+    """
+    os.makedirs(destino, exist_ok=True)
+    segmentos = listar_segmentos(origem)
+    if substituir:
+        antigos = listar_segmentos(destino)
+        total = _gravar_intercalado(_proximo_segmento(destino), segmentos)
+        for caminho in antigos + segmentos:
+            os.remove(caminho)
+        return total
+    total = 0
+    for caminho in segmentos:
+        total += len(np.load(caminho, mmap_mode='r'))
+        os.replace(caminho, _proximo_segmento(destino))
+    consolidar_segmentos(destino)
+    if len(listar_segmentos(destino)) > MAX_SEGMENTOS:
+        compactar_indice(destino)
+    return total
+
+
+def limpar_indice(diretorio: str) -> None:
+    """
+    Remove todos os segmentos
+    """
+    for caminho in listar_segmentos(diretorio):
+        os.remove(caminho)
+
+
+def compactar_indice(diretorio: str, bloco: int = BLOCO_INTERCALACAO, depois_de: int = 0) -> int:
+    """
+    Junta os segmentos em um só (chaves ordenadas e únicas)
+
+    Os segmentos são intercalados a partir do mmap, em blocos de `bloco`
+    chaves, direto para o arquivo de saída mapeado em memória.
+
+    Args:
+        depois_de: Só junta os segmentos com número maior que este
+
+    Returns:
+        Total de chaves nos segmentos juntados
+    """
+    segmentos = _segmentos_depois(diretorio, depois_de)
+    if len(segmentos) <= 1:
+        return sum(len(np.load(c, mmap_mode='r')) for c in segmentos)
+    # O segmento compactado recebe um número novo; os antigos só saem depois
+    # (uma queda no meio deixa chaves repetidas entre segmentos, não perdidas)
+    total = _gravar_intercalado(_proximo_segmento(diretorio), segmentos, bloco)
+    for caminho in segmentos:
+        os.remove(caminho)
+    return total
+
+
+def filtrar_novas(df: pd.DataFrame,
+                  diretorio: str,
+                  coluna_id: Optional[str] = None,
+                  colunas: Optional[Sequence[str]] = None,
+                  chaves: Optional[np.ndarray] = None) -> Tuple[pd.DataFrame, np.ndarray, Dict[str, int]]:
+    """
+    Remove as transações já vistas em cargas anteriores e as repetidas na carga
+
+    As chaves das linhas mantidas não são gravadas aqui: chame
+    registrar_chaves depois que os resultados da carga forem salvos.
+
+    Args:
+        chaves: Chaves já calculadas (ex: gravadas na conversão para Parquet)
+
+    Returns:
+        Tupla (linhas novas, chaves das linhas novas, contagens)
+    """
+    if chaves is None:
+        chaves = chaves_transacoes(df, coluna_id, colunas)
+    chaves = np.asarray(chaves, dtype=np.uint64)
+    repetidas = pd.Series(chaves).duplicated().to_numpy()
+    vistas = contem(diretorio, chaves)
+    manter = ~(repetidas | vistas)
+    estatisticas = {
+        'lidas': len(df),
+        'ja_vistas': int(vistas.sum()),
+        'repetidas_na_carga': int((repetidas & ~vistas).sum()),
+        'novas': int(manter.sum())
+    }
+    return df[manter], chaves[manter], estatisticas
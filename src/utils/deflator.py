@@ -0,0 +1,151 @@
+"""
+Deflação de valores de vendas para reais constantes usando o índice do IPCA
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, Optional, Sequence
+
+
+def ano_mes_para_chave(ano_mes) -> np.ndarray:
+    """
+    Converte Ano_Mes (YYYYMM) em chave mensal contínua (ano * 12 + mês - 1)
+
+    Args:
+        ano_mes: Escalar, array ou Series com valores no formato YYYYMM
+
+    Returns:
+        Array de inteiros com a chave mensal
+    """
+    valores = np.asarray(ano_mes, dtype=np.int64)
+    return (valores // 100) * 12 + (valores % 100) - 1
+
+
+def calcular_tabela_deflacao(df_ipca: pd.DataFrame,
+                             ano_mes_base: Optional[int] = None,
+                             coluna_indice: str = 'indice') -> Dict[str, Any]:
+    """
+    Pré-calcula o fator de deflação de cada Ano_Mes em relação ao mês base
+
+    O fator de um mês é indice[base] / indice[mês], de modo que
+    valor_real = valor_nominal * fator (em reais do mês base). Os fatores
+    ficam em um array denso indexado pela chave mensal, permitindo aplicar
+    a deflação com um único gather.
+
+    Args:
+        df_ipca: DataFrame com colunas Ano_Mes e indice
+        ano_mes_base: Mês base (YYYYMM); se None usa o último mês com índice
+        coluna_indice: Nome da coluna com o número-índice
+
+    Returns:
+        Dicionário com ano_mes_base, chave_inicial e o array de fatores
+    """
+    if 'Ano_Mes' not in df_ipca.columns or coluna_indice not in df_ipca.columns:
+        raise KeyError(f"IPCA precisa das colunas Ano_Mes e {coluna_indice}")
+
+    indice = pd.to_numeric(df_ipca[coluna_indice], errors='coerce').to_numpy(dtype=float)
+    ano_mes = df_ipca['Ano_Mes'].to_numpy(dtype=np.int64)
+
+    validos = np.isfinite(indice) & (indice > 0)
+    if not validos.any():
+        raise ValueError("IPCA sem valores válidos de índice")
+    indice = indice[validos]
+    ano_mes = ano_mes[validos]
+
+    chaves = ano_mes_para_chave(ano_mes)
+    chave_inicial = int(chaves.min())
+    indice_denso = np.full(int(chaves.max()) - chave_inicial + 1, np.nan)
+    indice_denso[chaves - chave_inicial] = indice
+
+    if ano_mes_base is None:
+        ano_mes_base = int(ano_mes[np.argmax(chaves)])
+    posicao_base = int(ano_mes_para_chave(ano_mes_base)) - chave_inicial
+    if not 0 <= posicao_base < len(indice_denso) or np.isnan(indice_denso[posicao_base]):
+        raise ValueError(f"Mês base {ano_mes_base} sem índice IPCA disponível")
+
+    return {
+        'ano_mes_base': int(ano_mes_base),
+        'chave_inicial': chave_inicial,
+        'fatores': indice_denso[posicao_base] / indice_denso
+    }
+
+
+def obter_fatores(tabela: Dict[str, Any], ano_mes) -> np.ndarray:
+    """
+    Busca os fatores de deflação para um vetor de Ano_Mes (gather único)
+
+    Args:
+        tabela: Tabela gerada por calcular_tabela_deflacao
+        ano_mes: Valores YYYYMM (um por linha, podem repetir)
+
+    Returns:
+        Array de fatores; NaN para meses fora da tabela
+    """
+    fatores = tabela['fatores']
+    posicoes = ano_mes_para_chave(ano_mes) - tabela['chave_inicial']
+    fora = (posicoes < 0) | (posicoes >= len(fatores))
+    resultado = fatores[np.clip(posicoes, 0, len(fatores) - 1)]
+    if fora.any():
+        resultado = np.where(fora, np.nan, resultado)
+    return resultado
+
+
+def deflacionar_agregados(df: pd.DataFrame,
+                          tabela: Dict[str, Any],
+                          colunas: Sequence[str] = ('Valor_Total_Mes', 'Valor_Medio_Por_Venda'),
+                          sufixo: str = '_Real') -> pd.DataFrame:
+    """
+    Adiciona colunas em reais constantes a uma tabela mensal
+
+    Args:
+        df: DataFrame com Ano_Mes e colunas monetárias nominais
+        tabela: Tabela gerada por calcular_tabela_deflacao
+        colunas: Colunas nominais a deflacionar (as ausentes são ignoradas)
+        sufixo: Sufixo das novas colunas
+
+    Returns:
+        Cópia do DataFrame com as colunas deflacionadas
+    """
+    resultado = df.copy()
+    fatores = obter_fatores(tabela, resultado['Ano_Mes'])
+    for coluna in colunas:
+        if coluna in resultado.columns:
+            nominal = pd.to_numeric(resultado[coluna], errors='coerce').to_numpy(dtype=float)
+            resultado[f"{coluna}{sufixo}"] = (nominal * fatores).round(2)
+    return resultado
+
+
+def deflacionar_transacoes(df: pd.DataFrame,
+                           tabela: Dict[str, Any],
+                           coluna_valor: str = 'Valor_Total_Venda',
+                           coluna_data: Optional[str] = None,
+                           coluna_real: Optional[str] = None) -> pd.DataFrame:
+    """
+    Deflaciona vendas no nível de transação
+
+    Usa a coluna Ano_Mes se existir; caso contrário deriva o mês da coluna
+    de data. A conversão é feita sem agrupamento: cada linha busca seu fator
+    diretamente no array da tabela.
+
+    Args:
+        df: DataFrame de transações
+        tabela: Tabela gerada por calcular_tabela_deflacao
+        coluna_valor: Coluna com o valor nominal da venda
+        coluna_data: Coluna datetime usada quando não há Ano_Mes
+        coluna_real: Nome da coluna de saída (padrão: <coluna_valor>_Real)
+
+    Returns:
+        Cópia do DataFrame com a coluna deflacionada
+    """
+    if 'Ano_Mes' in df.columns:
+        ano_mes = df['Ano_Mes'].to_numpy(dtype=np.int64)
+    elif coluna_data is not None:
+        datas = pd.to_datetime(df[coluna_data])
+        ano_mes = (datas.dt.year * 100 + datas.dt.month).to_numpy(dtype=np.int64)
+    else:
+        raise KeyError("Transações sem Ano_Mes; informe coluna_data")
+
+    resultado = df.copy()
+    nominal = pd.to_numeric(resultado[coluna_valor], errors='coerce').to_numpy(dtype=float)
+    resultado[coluna_real or f"{coluna_valor}_Real"] = nominal * obter_fatores(tabela, ano_mes)
+    return resultado
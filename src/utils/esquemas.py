@@ -0,0 +1,334 @@
+"""
+Contratos de esquema das camadas IPCA, vendas, feriados e gold
+
+Cada esquema declara as colunas canônicas de uma camada, seus sinônimos na
+origem, tipo e restrições (faixa, unicidade, Ano_Mes válido, data válida).
+A resolução de nomes acontece uma única vez e o esquema resolvido é salvo
+ao lado do arquivo de saída (<arquivo>.schema.json); os carregamentos
+seguintes leem com tipos explícitos, sem inferência, e falham cedo quando o
+contrato é violado.
+"""
+
+import json
+import os
+import numpy as np
+import pandas as pd
+from typing import Dict, Any, List, Optional, Iterable
+
+# Tipos lógicos -> dtype pandas usado na leitura/coerção
+TIPOS_PANDAS = {
+    'int': 'Int64',
+    'float': 'float64',
+    # Contagem que pode ser fracionária (ex: itens em kg): inteira quando todos os valores são
+    'quantidade': 'float64',
+    'texto': 'string',
+    'data': 'string'
+}
+TIPOS_NUMERICOS = ('int', 'float', 'quantidade')
+
+ESQUEMA_IPCA = {
+    'nome': 'ipca',
+    'colunas': {
+        'Ano_Mes': {'tipo': 'int', 'ano_mes': True, 'unico': True, 'sinonimos': ['ano_mes']},
+        'variacao_mensal': {'tipo': 'float', 'min': -100},
+        'variacao_anual': {'tipo': 'float', 'min': -100},
+        'indice': {'tipo': 'float', 'min': 0, 'obrigatoria': False}
+    }
+}
+
+ESQUEMA_VENDAS_TRANSACOES = {
+    'nome': 'vendas_transacoes',
+    'colunas': {
+        'data': {'tipo': 'data', 'sinonimos': ['date', 'data_venda'], 'contem': ['data', 'date']},
+        'valor_unitario': {'tipo': 'float', 'min': 0,
+                           'sinonimos': ['valor', 'preco', 'price'],
+                           'contem': ['valor', 'price', 'preco']},
+        'quantidade': {'tipo': 'float', 'min': 0, 'obrigatoria': False,
+                       'sinonimos': ['qty', 'qtd'], 'contem': ['quantidade', 'qty', 'quant']},
+        'produto': {'tipo': 'texto', 'obrigatoria': False,
+                    'sinonimos': ['product', 'item', 'nome_produto'], 'contem': ['produto']},
+        'id_venda': {'tipo': 'texto', 'obrigatoria': False,
+                     'sinonimos': ['id', 'id_transacao', 'transacao_id', 'codigo_venda']},
+        'loja': {'tipo': 'texto', 'obrigatoria': False,
+                 'sinonimos': ['store', 'filial', 'id_loja', 'loja_id', 'branch'], 'contem': ['loja']}
+    }
+}
+
+ESQUEMA_VENDAS_MENSAL = {
+    'nome': 'vendas_mensal',
+    'colunas': {
+        'Ano_Mes': {'tipo': 'int', 'ano_mes': True, 'unico': True, 'sinonimos': ['ano_mes']},
+        'Numero_Transacoes': {'tipo': 'int', 'min': 0, 'sinonimos': ['Quantidade_Vendas']},
+        'Total_Itens_Vendidos': {'tipo': 'quantidade', 'min': 0, 'obrigatoria': False,
+                                 'sinonimos': ['Quantidade_Total']},
+        'Valor_Medio_Por_Venda': {'tipo': 'float', 'min': 0, 'obrigatoria': False,
+                                  'sinonimos': ['Valor_Medio_Por_Transacao']},
+        'Valor_Total_Mes': {'tipo': 'float', 'min': 0}
+    }
+}
+
+ESQUEMA_FERIADOS = {
+    'nome': 'feriados',
+    'colunas': {
+        'Data': {'tipo': 'data', 'formatos': ['%d/%m/%Y', '%Y-%m-%d'], 'sinonimos': ['date']},
+        'Nome_Feriado': {'tipo': 'texto', 'sinonimos': ['nome', 'holiday']},
+        'Titulo': {'tipo': 'texto', 'obrigatoria': False, 'sinonimos': ['title']},
+        'Tipo_Feriado': {'tipo': 'texto', 'obrigatoria': False, 'sinonimos': ['tipo']},
+        'Descricao': {'tipo': 'texto', 'obrigatoria': False, 'sinonimos': ['Descrição', 'description']},
+        'Sigla_Estado': {'tipo': 'texto', 'obrigatoria': False, 'sinonimos': ['uf']},
+        'Municipio': {'tipo': 'texto', 'obrigatoria': False}
+    }
+}
+
+ESQUEMA_GOLD = {
+    'nome': 'gold_ipca_vendas',
+    'colunas': {
+        'Ano_Mes': {'tipo': 'int', 'ano_mes': True, 'unico': True},
+        'variacao_mensal': {'tipo': 'float', 'min': -100},
+        'variacao_anual': {'tipo': 'float', 'min': -100},
+        'Numero_Transacoes': {'tipo': 'int', 'min': 0},
+        'Valor_Medio_Por_Venda': {'tipo': 'float', 'min': 0, 'obrigatoria': False},
+        'Valor_Total_Mes': {'tipo': 'float', 'min': 0},
+        'Total_Itens_Vendidos': {'tipo': 'quantidade', 'min': 0, 'obrigatoria': False},
+        'Valor_Total_Mes_Real': {'tipo': 'float', 'min': 0, 'obrigatoria': False},
+        'Valor_Medio_Por_Venda_Real': {'tipo': 'float', 'min': 0, 'obrigatoria': False}
+    }
+}
+
+
+def resolver_colunas(colunas: Iterable[str],
+                     esquema: Dict[str, Any],
+                     exigir: bool = True) -> Dict[str, str]:
+    """
+    Resolve o nome de origem de cada coluna canônica do esquema
+
+    Primeiro procura o nome canônico e os sinônimos (sem diferenciar
+    maiúsculas); depois, se declarado, uma coluna que contenha algum dos
+    trechos de 'contem'.
+
+    Args:
+        colunas: Nomes das colunas de origem
+        esquema: Esquema declarativo
+        exigir: Se deve levantar KeyError para colunas obrigatórias ausentes
+
+    Returns:
+        Dicionário coluna canônica -> coluna de origem
+    """
+    colunas = list(colunas)
+    por_nome = {str(c).strip().lower(): c for c in colunas}
+    usadas = set()
+    mapeamento = {}
+
+    for canonica, regra in esquema['colunas'].items():
+        encontrada = None
+        for candidato in [canonica, *regra.get('sinonimos', [])]:
+            origem = por_nome.get(candidato.lower())
+            if origem is not None and origem not in usadas:
+                encontrada = origem
+                break
+        if encontrada is None:
+            for trecho in regra.get('contem', []):
+                encontrada = next((c for c in colunas
+                                   if trecho in str(c).lower() and c not in usadas), None)
+                if encontrada is not None:
+                    break
+        if encontrada is not None:
+            mapeamento[canonica] = encontrada
+            usadas.add(encontrada)
+
+    faltando = [c for c, regra in esquema['colunas'].items()
+                if regra.get('obrigatoria', True) and c not in mapeamento]
+    if exigir and faltando:
+        raise KeyError(f"Esquema {esquema['nome']}: colunas obrigatórias ausentes {faltando} "
+                       f"(disponíveis: {colunas})")
+    return mapeamento
+
+
+def dtype_pandas(tipo: str, serie: Optional[pd.Series] = None) -> str:
+    """
+    dtype pandas de um tipo lógico (para 'quantidade', conforme os valores)
+    """
+    if tipo == 'quantidade' and serie is not None and pd.api.types.is_numeric_dtype(serie):
+        valores = serie.to_numpy(dtype=float, na_value=np.nan)
+        finitos = valores[np.isfinite(valores)]
+        if np.array_equal(finitos, np.round(finitos)):
+            return 'Int64'
+    return TIPOS_PANDAS[tipo]
+
+
+def aplicar_esquema(df: pd.DataFrame,
+                    esquema: Dict[str, Any],
+                    mapeamento: Optional[Dict[str, str]] = None) -> pd.DataFrame:
+    """
+    Seleciona, renomeia e converte as colunas do esquema
+
+    Colunas opcionais ausentes são omitidas; colunas de data continuam como
+    texto (o formato é validado por validar_esquema).
+
+    Args:
+        df: DataFrame de origem
+        esquema: Esquema declarativo
+        mapeamento: Resultado de resolver_colunas (resolvido aqui se None)
+
+    Returns:
+        Novo DataFrame apenas com as colunas canônicas
+    """
+    mapeamento = mapeamento or resolver_colunas(df.columns, esquema)
+    saida = pd.DataFrame(index=df.index)
+    for canonica, origem in mapeamento.items():
+        tipo = esquema['colunas'][canonica]['tipo']
+        serie = df[origem]
+        if tipo in TIPOS_NUMERICOS:
+            serie = pd.to_numeric(serie, errors='coerce')
+        saida[canonica] = serie.astype(dtype_pandas(tipo, serie))
+    return saida
+
+
+def validar_esquema(df: pd.DataFrame, esquema: Dict[str, Any]) -> List[str]:
+    """
+    Valida um DataFrame já padronizado contra o esquema (operações vetorizadas)
+
+    Returns:
+        Lista de violações encontradas (vazia se o contrato é respeitado)
+    """
+    erros = []
+    for canonica, regra in esquema['colunas'].items():
+        if canonica not in df.columns:
+            if regra.get('obrigatoria', True):
+                erros.append(f"{canonica}: coluna ausente")
+            continue
+
+        serie = df[canonica]
+        tipo = regra['tipo']
+
+        if tipo in TIPOS_NUMERICOS:
+            if not pd.api.types.is_numeric_dtype(serie):
+                erros.append(f"{canonica}: tipo {serie.dtype} não numérico")
+                continue
+            valores = serie.to_numpy(dtype=float, na_value=np.nan)
+            if tipo == 'int':
+                fracionarios = np.count_nonzero(np.isfinite(valores) & (valores != np.round(valores)))
+                if fracionarios:
+                    erros.append(f"{canonica}: {fracionarios} valores não inteiros")
+            if 'min' in regra:
+                abaixo = np.count_nonzero(valores < regra['min'])
+                if abaixo:
+                    erros.append(f"{canonica}: {abaixo} valores abaixo de {regra['min']}")
+            if 'max' in regra:
+                acima = np.count_nonzero(valores > regra['max'])
+                if acima:
+                    erros.append(f"{canonica}: {acima} valores acima de {regra['max']}")
+            if regra.get('ano_mes'):
+                ano = valores // 100
+                mes = valores % 100
+                invalidos = np.count_nonzero(~np.isfinite(valores) | (mes < 1) | (mes > 12)
+                                             | (ano < 1900) | (ano > 2100))
+                if invalidos:
+                    erros.append(f"{canonica}: {invalidos} valores de Ano_Mes inválidos")
+
+        elif tipo == 'data' and not pd.api.types.is_datetime64_any_dtype(serie):
+            texto = serie.astype('string').str.strip()
+            preenchidos = texto.notna() & (texto != '')
+            validas = pd.Series(False, index=serie.index)
+            for formato in regra.get('formatos', ['%Y-%m-%d']):
+                convertidas = pd.to_datetime(texto.where(preenchidos & ~validas),
+                                             format=formato, errors='coerce')
+                validas |= convertidas.notna()
+            invalidas = int((preenchidos & ~validas).sum())
+            if invalidas:
+                erros.append(f"{canonica}: {invalidas} datas inválidas")
+
+        if regra.get('unico'):
+            duplicados = int(serie.duplicated().sum())
+            if duplicados:
+                erros.append(f"{canonica}: {duplicados} valores duplicados")
+
+    return erros
+
+
+def garantir_esquema(df: pd.DataFrame, esquema: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Valida o DataFrame e levanta ValueError se o contrato for violado
+    """
+    erros = validar_esquema(df, esquema)
+    if erros:
+        raise ValueError(f"Esquema {esquema['nome']} violado: " + '; '.join(erros))
+    return df
+
+
+def caminho_esquema(caminho_dados: str) -> str:
+    """
+    Caminho do arquivo de esquema salvo ao lado dos dados
+    """
+    return f"{caminho_dados}.schema.json"
+
+
+def salvar_esquema(caminho_dados: str,
+                   esquema: Dict[str, Any],
+                   df: pd.DataFrame) -> str:
+    """
+    Salva o esquema resolvido de uma saída (<arquivo>.schema.json)
+
+    Registra, para cada coluna do esquema, o nome usado no arquivo, o tipo
+    lógico e o dtype de leitura. Levanta KeyError se faltar coluna
+    obrigatória, para que nenhuma saída seja publicada sem contrato.
+
+    Returns:
+        Caminho do arquivo de esquema
+    """
+    from src.utils.data_utils import escrever_atomico
+
+    mapeamento = resolver_colunas(df.columns, esquema)
+    colunas = [{'nome': canonica,
+                'origem': origem,
+                'tipo': esquema['colunas'][canonica]['tipo'],
+                'dtype': dtype_pandas(esquema['colunas'][canonica]['tipo'], df[origem])}
+               for canonica, origem in mapeamento.items()]
+    conteudo = {'esquema': esquema['nome'], 'colunas': colunas, 'registros': len(df)}
+    if 'Ano_Mes' in mapeamento and len(df):
+        conteudo['ano_mes_inicio'] = int(df[mapeamento['Ano_Mes']].min())
+        conteudo['ano_mes_fim'] = int(df[mapeamento['Ano_Mes']].max())
+
+    destino = caminho_esquema(caminho_dados)
+
+    def gravar(temporario):
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(conteudo, arquivo, ensure_ascii=False, indent=2)
+
+    escrever_atomico(destino, gravar)
+    return destino
+
+
+def ler_csv_com_esquema(caminho: str, esquema: Dict[str, Any]) -> pd.DataFrame:
+    """
+    Lê um CSV da camada usando o esquema salvo, sem inferência de tipos
+
+    Se o arquivo .schema.json existir, lê apenas as colunas registradas com
+    dtype explícito; caso contrário resolve os nomes e converte os tipos.
+    Em ambos os casos valida o contrato antes de retornar.
+
+    Args:
+        caminho: Caminho do CSV
+        esquema: Esquema declarativo da camada
+
+    Returns:
+        DataFrame com as colunas canônicas tipadas
+    """
+    if not os.path.exists(caminho):
+        raise FileNotFoundError(f"Arquivo não encontrado: {caminho}")
+
+    sidecar = caminho_esquema(caminho)
+    if os.path.exists(sidecar):
+        with open(sidecar, encoding='utf-8') as arquivo:
+            salvo = json.load(arquivo)
+        if salvo.get('esquema') != esquema['nome']:
+            raise ValueError(f"{caminho} segue o esquema {salvo.get('esquema')}, "
+                             f"esperado {esquema['nome']}")
+        tipos = {c['origem']: c['dtype'] for c in salvo['colunas']}
+        df = pd.read_csv(caminho, usecols=list(tipos), dtype=tipos)
+        df = df.rename(columns={c['origem']: c['nome'] for c in salvo['colunas']})
+        df = df[[c['nome'] for c in salvo['colunas']]]
+    else:
+        df = aplicar_esquema(pd.read_csv(caminho), esquema)
+
+    return garantir_esquema(df, esquema)
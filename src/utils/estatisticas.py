@@ -0,0 +1,271 @@
+"""
+Estatísticas descritivas incrementais e mergeáveis por coluna
+
+O estado de cada coluna guarda contagem, nulos, média e M2 (soma dos
+quadrados dos desvios, de Welford), mínimo e máximo, mais um sketch de
+quantis (src.utils.sketches) separado por sinal. Estados de chunks, shards
+ou cargas diferentes são mesclados com a fórmula paralela de Chan:
+
+    n = n_a + n_b
+    media = (n_a * media_a + n_b * media_b) / n
+    M2 = M2_a + M2_b + n_a * (media_a - media)^2 + n_b * (media_b - media)^2
+
+Contagem, nulos, média, desvio, mínimo e máximo ficam exatos. Os quantis
+são interpolados como em DataFrame.describe() (posição q * (n - 1)), mas
+entre os valores representativos dos buckets: cada ponto tem erro relativo
+de no máximo alfa. Valores infinitos ficam fora do sketch, e os quantis são
+os dos valores finitos. Atualizar o relatório de uma base que só cresce custa o
+hash das linhas já resumidas e o resumo das novas: atualizar_estatisticas
+reconhece o prefixo já resumido pela sua impressão digital e resume só o
+resto.
+"""
+
+import json
+import os
+from typing import Any, Dict, Iterable, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from src.utils.data_utils import escrever_atomico
+from src.utils.sketches import ALFA_PADRAO, indices_buckets, valor_bucket
+
+COLUNAS_MOMENTOS = ['coluna', 'numerica', 'contagem', 'nulos', 'media', 'm2', 'minimo', 'maximo']
+COLUNAS_SKETCH = ['coluna', 'sinal', 'bucket', 'contagem']
+QUANTIS_PADRAO = (0.25, 0.5, 0.75)
+
+
+def _numerica(serie: pd.Series) -> bool:
+    return pd.api.types.is_numeric_dtype(serie) and not pd.api.types.is_bool_dtype(serie)
+
+
+def resumir(df: pd.DataFrame,
+            colunas: Optional[Sequence[str]] = None,
+            alfa: float = ALFA_PADRAO) -> Dict[str, Any]:
+    """
+    Estado das estatísticas de um DataFrame (um chunk, um shard ou a base toda)
+
+    Args:
+        df: Linhas a resumir
+        colunas: Colunas a resumir (padrão: todas); só as numéricas têm
+            média, desvio, extremos e quantis, as demais só contagem e nulos
+        alfa: Erro relativo máximo dos quantis
+
+    Returns:
+        Dict com 'linhas', 'alfa', 'momentos' e 'sketch' (DataFrames)
+    """
+    colunas = list(df.columns) if colunas is None else list(colunas)
+    momentos, sketches = [], []
+    for coluna in colunas:
+        serie = df[coluna]
+        contagem = int(serie.notna().sum())
+        linha = {'coluna': coluna, 'numerica': _numerica(serie), 'contagem': contagem,
+                 'nulos': len(serie) - contagem, 'media': np.nan, 'm2': np.nan,
+                 'minimo': np.nan, 'maximo': np.nan}
+        if linha['numerica']:
+            valores = serie.to_numpy(dtype=float, na_value=np.nan)
+            valores = valores[~np.isnan(valores)]
+            if contagem:
+                # Com +inf e -inf a média e o M2 ficam NaN, como em describe()
+                with np.errstate(invalid='ignore'):
+                    media = valores.mean()
+                    linha.update(media=media, m2=float(((valores - media) ** 2).sum()),
+                                 minimo=valores.min(), maximo=valores.max())
+            # ±inf entram na contagem, média e extremos, mas não têm bucket no sketch
+            finitos = valores[np.isfinite(valores)]
+            # Valores negativos vão para um sketch próprio (o sketch só ordena positivos)
+            sinal = np.where(finitos < 0, -1, 1)
+            base = pd.DataFrame({'sinal': sinal, 'bucket': indices_buckets(np.abs(finitos), alfa)})
+            sketch = base.groupby(['sinal', 'bucket'], sort=True).size().rename('contagem').reset_index()
+            sketch.insert(0, 'coluna', coluna)
+            sketches.append(sketch)
+        momentos.append(linha)
+    return {'linhas': len(df), 'alfa': alfa,
+            'momentos': pd.DataFrame(momentos, columns=COLUNAS_MOMENTOS),
+            'sketch': _juntar_sketches(sketches)}
+
+
+def _juntar_sketches(sketches) -> pd.DataFrame:
+    sketches = [s for s in sketches if not s.empty]
+    if not sketches:
+        return pd.DataFrame(columns=COLUNAS_SKETCH)
+    juntos = pd.concat(sketches, ignore_index=True)
+    return juntos.groupby(['coluna', 'sinal', 'bucket'], sort=False)['contagem'].sum().reset_index()
+
+
+def mesclar_estatisticas(estados: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Mescla estados de chunks, shards ou cargas (fórmula paralela de Chan)
+
+    O resultado é o mesmo que resumir todas as linhas de uma vez (a menos
+    de arredondamento de ponto flutuante).
+    """
+    estados = [e for e in estados if e is not None]
+    if not estados:
+        raise ValueError("Nenhum estado de estatísticas para mesclar")
+    alfas = {e['alfa'] for e in estados}
+    if len(alfas) > 1:
+        raise ValueError(f"Sketches com alfas diferentes não podem ser mesclados: {sorted(alfas)}")
+
+    juntos = pd.concat([e['momentos'] for e in estados], ignore_index=True)
+    # Partes sem valores não contribuem para média e M2
+    n = juntos['contagem'].astype(float)
+    media_parte = juntos['media'].where(n > 0, 0.0)
+    juntos = juntos.assign(_soma=n * media_parte, m2=juntos['m2'].where(n > 0, 0.0))
+    grupos = juntos.groupby('coluna', sort=False)
+    momentos = pd.DataFrame({
+        'numerica': grupos['numerica'].all(),
+        'contagem': grupos['contagem'].sum(),
+        'nulos': grupos['nulos'].sum(),
+        'minimo': grupos['minimo'].min(),
+        'maximo': grupos['maximo'].max(),
+    })
+    total = momentos['contagem'].astype(float)
+    momentos['media'] = (grupos['_soma'].sum() / total).where(total > 0)
+    # Desvio de cada parte em relação à média mesclada
+    desvio = media_parte - juntos['coluna'].map(momentos['media'])
+    momentos['m2'] = grupos['m2'].sum() + (n * desvio ** 2).groupby(juntos['coluna'], sort=False).sum()
+    textuais = ~momentos['numerica']
+    momentos.loc[textuais, ['media', 'm2', 'minimo', 'maximo']] = np.nan
+    momentos.loc[momentos['contagem'] == 0, ['media', 'm2']] = np.nan
+    momentos = momentos.reset_index()[COLUNAS_MOMENTOS]
+
+    return {'linhas': sum(e['linhas'] for e in estados), 'alfa': alfas.pop(),
+            'momentos': momentos,
+            'sketch': _juntar_sketches([e['sketch'] for e in estados])}
+
+
+def _quantis_coluna(sketch: pd.DataFrame, quantis: Sequence[float], alfa: float) -> Dict[float, float]:
+    # Valores representativos com sinal, em ordem crescente
+    valores = valor_bucket(sketch['bucket'].to_numpy(), alfa) * sketch['sinal'].to_numpy()
+    ordem = np.argsort(valores, kind='stable')
+    valores = valores[ordem]
+    acumulado = np.cumsum(sketch['contagem'].to_numpy(dtype=np.int64)[ordem])
+    total = acumulado[-1]
+
+    def valor_posicao(posicao):
+        # Valor da posição (0-based) na ordem: primeiro bucket que a ultrapassa
+        return valores[np.searchsorted(acumulado, posicao, side='right')]
+
+    resultado = {}
+    for q in quantis:
+        # Interpolação linear entre as posições vizinhas, como em describe()
+        posicao = q * (total - 1)
+        abaixo = np.floor(posicao)
+        acima = min(abaixo + 1, total - 1)
+        inferior = valor_posicao(abaixo)
+        resultado[q] = float(inferior + (posicao - abaixo) * (valor_posicao(acima) - inferior))
+    return resultado
+
+
+def descrever(estado: Dict[str, Any], quantis: Sequence[float] = QUANTIS_PADRAO) -> pd.DataFrame:
+    """
+    Tabela no formato de DataFrame.describe() para as colunas numéricas
+
+    count, mean, std (amostral), min e max são exatos; os quantis são
+    interpolados como em describe(), sobre os valores dos buckets do sketch
+    (erro relativo de no máximo alfa em cada ponto interpolado).
+    """
+    momentos = estado['momentos'][estado['momentos']['numerica']].set_index('coluna')
+    linhas = ['count', 'mean', 'std', 'min'] + [f"{q * 100:g}%" for q in quantis] + ['max']
+    tabela = pd.DataFrame(index=linhas, columns=list(momentos.index), dtype=float)
+    for coluna, m in momentos.iterrows():
+        n = m['contagem']
+        valores = {'count': n, 'mean': m['media'], 'min': m['minimo'], 'max': m['maximo'],
+                   'std': np.sqrt(m['m2'] / (n - 1)) if n > 1 else np.nan}
+        sketch = estado['sketch'][estado['sketch']['coluna'] == coluna]
+        if not sketch.empty:
+            for q, valor in _quantis_coluna(sketch, quantis, estado['alfa']).items():
+                valores[f"{q * 100:g}%"] = valor
+        tabela[coluna] = pd.Series(valores)
+    return tabela
+
+
+def nulos_por_coluna(estado: Dict[str, Any]) -> pd.Series:
+    """
+    Nulos por coluna, como DataFrame.isnull().sum()
+    """
+    return estado['momentos'].set_index('coluna')['nulos'].rename(None).rename_axis(None)
+
+
+def _impressoes_prefixos(df: pd.DataFrame, tamanhos: Sequence[int]) -> list:
+    """
+    Impressão digital das primeiras n linhas de df para cada n em tamanhos
+
+    Hash de cada linha ponderado pela posição: qualquer valor alterado,
+    removido ou trocado de lugar no prefixo muda a impressão.
+    """
+    hashes = pd.util.hash_pandas_object(df, index=False).to_numpy(dtype=np.uint64)
+    # Soma em uint64 com estouro módulo 2**64
+    ponderados = np.cumsum(hashes * np.arange(1, len(hashes) + 1, dtype=np.uint64), dtype=np.uint64)
+    return [f"{int(ponderados[n - 1]):016x}" if n else None for n in tamanhos]
+
+
+def atualizar_estatisticas(estado: Optional[Dict[str, Any]],
+                           df: pd.DataFrame,
+                           colunas: Optional[Sequence[str]] = None) -> Dict[str, Any]:
+    """
+    Estado para a base df reaproveitando o estado de uma versão anterior dela
+
+    Se df começa pelas mesmas linhas já resumidas (mesmas colunas e mesma
+    impressão digital das primeiras `linhas` linhas), só as linhas depois
+    delas são resumidas e mescladas; caso contrário (revisão de qualquer
+    linha, remoção, outra base) a base é resumida do zero.
+
+    Returns:
+        Estado com 'impressao' e 'colunas' (para a próxima atualização) e
+        'novas' (linhas resumidas nesta chamada)
+    """
+    colunas = list(df.columns) if colunas is None else list(colunas)
+    linhas = estado['linhas'] if estado else 0
+    prefixo, completa = _impressoes_prefixos(df[colunas], [min(linhas, len(df)), len(df)])
+    reaproveitar = (estado is not None and 0 < linhas <= len(df)
+                    and estado.get('colunas') == colunas
+                    and estado.get('impressao') == prefixo)
+    if reaproveitar:
+        novas = df.iloc[linhas:]
+        resultado = mesclar_estatisticas([estado, resumir(novas, colunas, estado['alfa'])])
+    else:
+        novas = df
+        resultado = resumir(df, colunas)
+    resultado['colunas'] = colunas
+    resultado['novas'] = len(novas)
+    resultado['impressao'] = completa
+    return resultado
+
+
+def salvar_estatisticas(estado: Dict[str, Any], caminho: str) -> str:
+    """
+    Grava o estado em JSON (escrita atômica)
+    """
+    conteudo = {
+        'linhas': int(estado['linhas']), 'alfa': estado['alfa'],
+        'colunas': estado.get('colunas'), 'impressao': estado.get('impressao'),
+        # to_json converte NaN em null e tipos numpy em números
+        'momentos': json.loads(estado['momentos'].to_json(orient='records')),
+        'sketch': json.loads(estado['sketch'].to_json(orient='records')),
+    }
+
+    def gravar(temporario):
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(conteudo, arquivo, ensure_ascii=False)
+
+    escrever_atomico(caminho, gravar)
+    return caminho
+
+
+def carregar_estatisticas(caminho: str) -> Optional[Dict[str, Any]]:
+    """
+    Lê um estado salvo por salvar_estatisticas (None se não existir)
+    """
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        conteudo = json.load(arquivo)
+    momentos = pd.DataFrame(conteudo['momentos'], columns=COLUNAS_MOMENTOS)
+    for coluna in ('media', 'm2', 'minimo', 'maximo'):
+        momentos[coluna] = momentos[coluna].astype(float)
+    momentos['numerica'] = momentos['numerica'].astype(bool)
+    conteudo['momentos'] = momentos
+    conteudo['sketch'] = pd.DataFrame(conteudo['sketch'], columns=COLUNAS_SKETCH)
+    return conteudo
@@ -0,0 +1,198 @@
+"""
+Estudo de eventos: impacto dos feriados nas vendas diárias
+
+Cada evento (feriado, município) é alinhado à série diária de vendas em
+janelas de ±k dias. Em vez de filtrar as vendas feriado a feriado, as datas
+viram inteiros (dias desde 1970, prefixados pelo código da série quando há
+várias lojas/municípios) e todos os dias de todas as janelas são localizados
+de uma vez com np.searchsorted no vetor ordenado de vendas, produzindo uma
+matriz eventos x deslocamentos. O uplift de cada dia é medido contra a média
+de uma janela de base ao redor do evento (fora da janela ±k).
+
+Dias sem registro de venda ficam como NaN (não entram nas médias).
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Iterable, Optional
+
+from src.utils.cubo_vendas import agregar_cubo
+from src.utils.datas import converter_datas
+
+# Separa o código da série do número do dia na chave composta
+_FATOR_SERIE = np.int64(1) << 32
+
+
+def _dias(datas) -> np.ndarray:
+    """
+    Converte datas em número de dias desde 1970-01-01 (int64)
+    """
+    return pd.to_datetime(pd.Series(datas)).to_numpy(dtype='datetime64[D]').astype(np.int64)
+
+
+def alinhar_eventos(dias_vendas: np.ndarray,
+                    valores: np.ndarray,
+                    dias_eventos: np.ndarray,
+                    deslocamentos: np.ndarray,
+                    series_vendas: Optional[np.ndarray] = None,
+                    series_eventos: Optional[np.ndarray] = None) -> np.ndarray:
+    """
+    Busca o valor de venda de cada evento em cada deslocamento (vetorizado)
+
+    Args:
+        dias_vendas: Dia (int) de cada registro de venda
+        valores: Valor de cada registro de venda
+        dias_eventos: Dia (int) de cada evento
+        deslocamentos: Deslocamentos em dias (ex: -3..3)
+        series_vendas: Código inteiro da série de cada venda (opcional)
+        series_eventos: Código inteiro da série de cada evento (opcional)
+
+    Returns:
+        Matriz (n_eventos, n_deslocamentos) com NaN onde não há venda
+    """
+    chaves = np.asarray(dias_vendas, dtype=np.int64)
+    alvos = np.asarray(dias_eventos, dtype=np.int64)[:, None] + np.asarray(deslocamentos, dtype=np.int64)
+    if series_vendas is not None:
+        chaves = chaves + np.asarray(series_vendas, dtype=np.int64) * _FATOR_SERIE
+        alvos = alvos + np.asarray(series_eventos, dtype=np.int64)[:, None] * _FATOR_SERIE
+
+    ordem = np.argsort(chaves, kind='stable')
+    chaves = chaves[ordem]
+    valores = np.asarray(valores, dtype=float)[ordem]
+
+    matriz = np.full(alvos.shape, np.nan)
+    if len(chaves) == 0:
+        return matriz
+    posicoes = np.searchsorted(chaves, alvos)
+    posicoes_validas = np.minimum(posicoes, len(chaves) - 1)
+    encontrados = chaves[posicoes_validas] == alvos
+    matriz[encontrados] = valores[posicoes_validas[encontrados]]
+    return matriz
+
+
+def _media_linhas(matriz: np.ndarray) -> np.ndarray:
+    """
+    Média por linha ignorando NaN (NaN quando a linha não tem valores)
+    """
+    observados = np.isfinite(matriz)
+    contagem = observados.sum(axis=1)
+    soma = np.where(observados, matriz, 0).sum(axis=1)
+    return np.divide(soma, contagem, out=np.full(len(matriz), np.nan), where=contagem > 0)
+
+
+def vendas_diarias_do_cubo(cubo: pd.DataFrame,
+                           dimensoes: Iterable[str] = (),
+                           metrica: str = 'valor_total') -> pd.DataFrame:
+    """
+    Série diária de vendas (Data, [dimensões], Valor) a partir do cubo
+    """
+    diario = agregar_cubo(cubo, ['Data', *dimensoes], derivar=False)
+    diario = diario[['Data', *dimensoes, f"{metrica}__soma"]]
+    return diario.rename(columns={f"{metrica}__soma": 'Valor'})
+
+
+def preparar_feriados(feriados: pd.DataFrame,
+                      uf: Optional[str] = 'SP',
+                      municipios: Optional[Iterable[str]] = None) -> pd.DataFrame:
+    """
+    Seleciona os eventos nacionais e da UF, com escopo e data convertida
+
+    Args:
+        feriados: Tabela de feriados (feriados_completo.csv)
+        uf: Sigla do estado (None mantém todos)
+        municipios: Restringe os feriados municipais a estes municípios
+
+    Returns:
+        Eventos únicos (Data, Nome_Feriado, Escopo, Sigla_Estado, Municipio)
+    """
+    eventos = feriados.copy()
+    for coluna in ('Sigla_Estado', 'Municipio', 'Tipo_Feriado', 'Nome_Feriado'):
+        if coluna not in eventos.columns:
+            eventos[coluna] = ''
+        eventos[coluna] = eventos[coluna].fillna('').astype(str).str.strip()
+    eventos['Data'], _ = converter_datas(eventos['Data'])
+    eventos = eventos.dropna(subset=['Data'])
+
+    tipo = eventos['Tipo_Feriado'].str.upper()
+    eventos['Escopo'] = np.select(
+        [(tipo == 'NACIONAL') | (eventos['Sigla_Estado'] == ''), eventos['Municipio'] == ''],
+        ['NACIONAL', 'ESTADUAL'], default='MUNICIPAL')
+
+    manter = eventos['Escopo'] == 'NACIONAL'
+    if uf is None:
+        manter |= True
+    else:
+        manter |= eventos['Sigla_Estado'].str.upper() == uf.upper()
+    if municipios is not None:
+        manter &= (eventos['Escopo'] != 'MUNICIPAL') | eventos['Municipio'].isin(list(municipios))
+
+    colunas = ['Data', 'Nome_Feriado', 'Escopo', 'Sigla_Estado', 'Municipio']
+    return eventos.loc[manter, colunas].drop_duplicates().reset_index(drop=True)
+
+
+def estudo_feriados(vendas: pd.DataFrame,
+                    feriados: pd.DataFrame,
+                    janela: int = 3,
+                    janela_base: int = 14,
+                    coluna_valor: str = 'Valor',
+                    coluna_serie: Optional[str] = None) -> dict:
+    """
+    Mede o uplift de vendas em janelas de ±janela dias ao redor dos feriados
+
+    Args:
+        vendas: Vendas diárias com Data, coluna_valor e (opcional) coluna_serie
+        feriados: Eventos de preparar_feriados
+        janela: Meio-tamanho da janela do evento (k)
+        janela_base: Dias de cada lado, além da janela, usados como base
+        coluna_valor: Coluna com o valor diário
+        coluna_serie: Coluna de vendas com o município de cada série; os
+            feriados municipais só se aplicam à série do mesmo município e
+            os nacionais/estaduais a todas as séries
+
+    Returns:
+        Dict com 'eventos' (uma linha por evento e série) e 'perfil'
+        (uplift médio por Escopo e Deslocamento)
+    """
+    eventos = feriados.reset_index(drop=True)
+    dias_vendas = _dias(vendas['Data'])
+    valores = vendas[coluna_valor].to_numpy(dtype=float)
+    series_vendas = series_eventos = None
+
+    if coluna_serie is not None:
+        codigos, nomes = pd.factorize(vendas[coluna_serie].astype(str))
+        series_vendas = codigos
+        # Eventos gerais são replicados para cada série; municipais casam pelo nome
+        gerais = eventos[eventos['Escopo'] != 'MUNICIPAL']
+        gerais = gerais.loc[gerais.index.repeat(len(nomes))].assign(Serie=np.tile(nomes, len(gerais)))
+        municipais = eventos[(eventos['Escopo'] == 'MUNICIPAL') & eventos['Municipio'].isin(nomes)]
+        eventos = pd.concat([gerais, municipais.assign(Serie=municipais['Municipio'])],
+                            ignore_index=True)
+        series_eventos = nomes.get_indexer(eventos['Serie'])
+
+    deslocamentos = np.arange(-(janela + janela_base), janela + janela_base + 1)
+    matriz = alinhar_eventos(dias_vendas, valores, _dias(eventos['Data']), deslocamentos,
+                             series_vendas, series_eventos)
+
+    na_janela = np.abs(deslocamentos) <= janela
+    base = _media_linhas(np.where(na_janela, np.nan, matriz))
+    base = np.where(base > 0, base, np.nan)
+    uplift = matriz[:, na_janela] / base[:, None] - 1
+
+    resultado = eventos.copy()
+    if coluna_serie is not None:
+        resultado = resultado.drop(columns=[coluna_serie], errors='ignore') \
+            .rename(columns={'Serie': coluna_serie})
+    resultado['Base'] = base
+    resultado['Valor_Feriado'] = matriz[:, janela + janela_base]
+    resultado['Uplift_Dia'] = uplift[:, janela]
+    resultado['Uplift_Janela'] = _media_linhas(uplift)
+    resultado['Dias_Observados'] = np.isfinite(uplift).sum(axis=1)
+
+    # Perfil médio por escopo e deslocamento (todas as janelas de uma vez)
+    perfil = pd.DataFrame(uplift, columns=deslocamentos[na_janela])
+    perfil['Escopo'] = resultado['Escopo'].to_numpy()
+    perfil = perfil.melt(id_vars='Escopo', var_name='Deslocamento', value_name='Uplift')
+    perfil = perfil.dropna(subset=['Uplift']).groupby(['Escopo', 'Deslocamento'])['Uplift'] \
+        .agg(Uplift_Medio='mean', Eventos='count').reset_index()
+
+    return {'eventos': resultado, 'perfil': perfil}
@@ -0,0 +1,156 @@
+"""
+Tabela gold por loja: vendas de várias filiais unidas a um único IPCA
+
+As vendas mensais de todas as lojas ficam em uma só tabela longa (Loja,
+Ano_Mes, métricas), derivada do cubo de vendas com a dimensão Loja. O IPCA
+é montado uma vez como matriz densa indexada pela chave mensal
+(src.utils.arrays_mensais) e cada linha de venda busca sua variação com um
+único gather vetorizado: não há um join (nem uma leitura do IPCA) por loja,
+e acrescentar uma filial custa apenas as suas linhas.
+
+A saída é um dataset particionado no layout hive, um CSV por loja:
+
+    gold_por_loja/Loja=<id>/tabela_gold_ipca_vendas.csv
+    gold_por_loja/_manifesto.json
+
+O manifesto guarda um hash do conteúdo de cada partição; só as lojas cujo
+resultado mudou são regravadas, e partições de lojas que saíram do cubo são
+removidas.
+"""
+
+import json
+import os
+import shutil
+from typing import Any, Dict, Iterable, Optional, Sequence
+from urllib.parse import quote
+
+import numpy as np
+import pandas as pd
+
+from src.utils.arrays_mensais import valores_mensais
+from src.utils.cubo_vendas import tabela_mensal_do_cubo
+from src.utils.data_utils import escrever_atomico, salvar_atomico
+from src.utils.esquemas import ESQUEMA_GOLD, garantir_esquema, salvar_esquema
+
+COLUNA_LOJA = 'Loja'
+ARQUIVO_GOLD = 'tabela_gold_ipca_vendas.csv'
+ARQUIVO_MANIFESTO = '_manifesto.json'
+COLUNAS_IPCA = ('variacao_mensal', 'variacao_anual')
+
+
+def tabela_mensal_por_loja(cubo: pd.DataFrame) -> pd.DataFrame:
+    """
+    Tabela mensal de vendas com uma linha por loja e mês
+    """
+    if COLUNA_LOJA not in cubo.columns:
+        raise KeyError("Cubo de vendas sem a dimensão Loja (o extrato não tem coluna de loja)")
+    return tabela_mensal_do_cubo(cubo, [COLUNA_LOJA])
+
+
+def juntar_ipca(vendas: pd.DataFrame,
+                tabela_ipca: Dict[str, Any],
+                colunas: Sequence[str] = COLUNAS_IPCA) -> pd.DataFrame:
+    """
+    Acrescenta as colunas do IPCA a cada linha (inner join por Ano_Mes)
+
+    Args:
+        vendas: Tabela longa com Ano_Mes (qualquer número de lojas)
+        tabela_ipca: Matriz mensal de anexar_mensal ou montar_mensal
+        colunas: Colunas do IPCA a buscar
+
+    Returns:
+        Cópia das vendas com as colunas do IPCA, sem os meses ausentes no IPCA
+    """
+    ano_mes = vendas['Ano_Mes'].to_numpy(dtype=np.int64)
+    valores = {c: valores_mensais(tabela_ipca, c, ano_mes) for c in colunas}
+    # Mês sem nenhuma coluna preenchida = ausente no IPCA
+    presentes = ~np.all(np.isnan(np.column_stack(list(valores.values()))), axis=1)
+    resultado = vendas.copy()
+    for coluna, serie in valores.items():
+        resultado[coluna] = serie
+    return resultado[presentes].reset_index(drop=True)
+
+
+def caminho_particao(diretorio: str, loja) -> str:
+    """
+    Diretório da partição de uma loja (id escapado como no layout hive)
+    """
+    return os.path.join(diretorio, f"{COLUNA_LOJA}={quote(str(loja), safe='')}")
+
+
+def ler_manifesto(diretorio: str) -> Dict[str, Any]:
+    caminho = os.path.join(diretorio, ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {'particoes': {}}
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _hash_particao(df: pd.DataFrame) -> str:
+    return f"{int(pd.util.hash_pandas_object(df, index=False).sum()) & (2 ** 64 - 1):016x}"
+
+
+def salvar_gold_particionado(gold: pd.DataFrame,
+                             diretorio: str,
+                             parcial: bool = False) -> Dict[str, int]:
+    """
+    Grava uma partição por loja, pulando as que não mudaram
+
+    Args:
+        gold: Tabela gold longa com a coluna Loja
+        diretorio: Raiz do dataset particionado
+        parcial: Se gold traz só algumas lojas (as demais partições são mantidas)
+
+    Returns:
+        Contagens {'gravadas', 'inalteradas', 'removidas'}
+    """
+    os.makedirs(diretorio, exist_ok=True)
+    manifesto = ler_manifesto(diretorio)
+    particoes = manifesto['particoes']
+    contagens = {'gravadas': 0, 'inalteradas': 0, 'removidas': 0}
+
+    for loja, parte in gold.groupby(COLUNA_LOJA, sort=True):
+        parte = parte.drop(columns=COLUNA_LOJA).reset_index(drop=True)
+        assinatura = _hash_particao(parte)
+        caminho = os.path.join(caminho_particao(diretorio, loja), ARQUIVO_GOLD)
+        if particoes.get(str(loja)) == assinatura and os.path.exists(caminho):
+            contagens['inalteradas'] += 1
+            continue
+        garantir_esquema(parte, ESQUEMA_GOLD)
+        os.makedirs(os.path.dirname(caminho), exist_ok=True)
+        if not salvar_atomico(parte, caminho):
+            raise IOError(f"Falha ao salvar a partição da loja {loja} em {caminho}")
+        salvar_esquema(caminho, ESQUEMA_GOLD, parte)
+        particoes[str(loja)] = assinatura
+        contagens['gravadas'] += 1
+
+    if not parcial:
+        atuais = set(gold[COLUNA_LOJA].astype(str))
+        for loja in [l for l in particoes if l not in atuais]:
+            shutil.rmtree(caminho_particao(diretorio, loja), ignore_errors=True)
+            del particoes[loja]
+            contagens['removidas'] += 1
+
+    def gravar(temporario):
+        with open(temporario, 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, indent=2, sort_keys=True)
+
+    escrever_atomico(os.path.join(diretorio, ARQUIVO_MANIFESTO), gravar)
+    return contagens
+
+
+def ler_gold_particionado(diretorio: str, lojas: Optional[Iterable] = None) -> pd.DataFrame:
+    """
+    Lê o dataset particionado (todas as lojas ou só as pedidas) em uma tabela longa
+    """
+    if lojas is None:
+        lojas = sorted(ler_manifesto(diretorio)['particoes'])
+    partes = []
+    for loja in lojas:
+        caminho = os.path.join(caminho_particao(diretorio, loja), ARQUIVO_GOLD)
+        parte = pd.read_csv(caminho)
+        parte.insert(0, COLUNA_LOJA, str(loja))
+        partes.append(parte)
+    if not partes:
+        return pd.DataFrame(columns=[COLUNA_LOJA])
+    return pd.concat(partes, ignore_index=True)
@@ -0,0 +1,323 @@
+"""
+Repositório de indicadores mensais (IPCA, INPC, IPCA-15, IGP-M, ...)
+
+Um registro declara cada fonte: arquivo bruto em data/raw, formato
+('ibge': colunas ano/mes e uma coluna por métrica, como os dumps da Base
+dos Dados; 'sgs': série do Banco Central exportada como data;valor) e as
+métricas mantidas (padrão: todas as numéricas). As fontes são lidas em
+paralelo e reunidas em uma tabela larga indexada por Ano_Mes, com uma
+coluna <indicador>__<metrica> por indicador e métrica.
+
+As atualizações só acrescentam: cada uma grava uma release com as células
+(Ano_Mes, coluna, valor) novas ou revistas desde a anterior, e o manifesto
+guarda a impressão digital de cada fonte, de modo que arquivos que não
+mudaram não são relidos. O estado atual (a última release de cada célula)
+é materializado como matriz mensal .npy (src.utils.arrays_mensais), da
+qual a camada gold escolhe qualquer subconjunto de colunas sem reprocessar
+os dumps; as releases anteriores reconstroem a tabela como era em
+qualquer atualização.
+"""
+
+import json
+import os
+from concurrent.futures import ProcessPoolExecutor
+from datetime import datetime
+from typing import Any, Dict, List, Optional, Sequence
+
+import numpy as np
+import pandas as pd
+
+from config.settings import INDICADORES_PATH, IPCA_RAW_FILE
+from src.utils.arrays_mensais import anexar_mensal, exportar_mensal, meses_da_tabela
+from src.utils.cache import impressao_digital_arquivo
+from src.utils.data_utils import escrever_atomico
+from src.utils.datas import converter_datas
+from src.utils.memoria import ler_em_chunks
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+RAW_DIR = os.path.join(BASE_DIR, 'data', 'raw')
+
+ARQUIVO_MANIFESTO = '_manifesto.json'
+NOME_TABELA = 'indicadores'
+SEPARADOR = '__'
+FORMATOS = ('ibge', 'sgs')
+
+FONTES_INDICADORES: Dict[str, Dict[str, Any]] = {}
+
+
+def registrar_fonte(nome: str,
+                    arquivo: str,
+                    formato: str = 'ibge',
+                    metricas: Optional[Sequence[str]] = None,
+                    descricao: str = '',
+                    registro: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Declara uma fonte de indicador no registro
+
+    Args:
+        nome: Nome do indicador (prefixo das colunas, ex: 'inpc')
+        arquivo: Arquivo bruto (relativo a data/raw ou absoluto)
+        formato: 'ibge' (ano, mes, métricas) ou 'sgs' (data;valor do BCB)
+        metricas: Métricas mantidas (padrão: todas as numéricas; 'sgs' usa 'valor')
+        descricao: Texto livre
+        registro: Registro alterado (padrão: FONTES_INDICADORES)
+    """
+    if formato not in FORMATOS:
+        raise ValueError(f"Formato de indicador desconhecido: {formato} (use {FORMATOS})")
+    if SEPARADOR in nome:
+        raise ValueError(f"Nome de indicador não pode conter '{SEPARADOR}': {nome}")
+    registro = FONTES_INDICADORES if registro is None else registro
+    registro[nome] = {'nome': nome, 'arquivo': arquivo, 'formato': formato,
+                      'metricas': list(metricas) if metricas else None, 'descricao': descricao}
+    return registro[nome]
+
+
+registrar_fonte('ipca', IPCA_RAW_FILE, descricao='IPCA (IBGE)')
+registrar_fonte('inpc', 'br_ibge_inpc_mes_brasil.csv.gz', descricao='INPC (IBGE)')
+registrar_fonte('ipca15', 'br_ibge_ipca15_mes_brasil.csv.gz', descricao='IPCA-15 (IBGE)')
+registrar_fonte('igpm', 'bcb_sgs_189_igpm.csv', formato='sgs', metricas=['variacao_mensal'],
+                descricao='IGP-M (FGV), série 189 do SGS/BCB')
+
+
+def diretorio_indicadores_padrao() -> str:
+    """
+    Retorna o diretório do repositório de indicadores (config/settings.py)
+    """
+    caminho = os.environ.get('INDICADORES_DIR', INDICADORES_PATH)
+    return caminho if os.path.isabs(caminho) else os.path.join(BASE_DIR, caminho)
+
+
+def caminho_fonte(definicao: Dict[str, Any], diretorio_raw: Optional[str] = None) -> str:
+    arquivo = definicao['arquivo']
+    return arquivo if os.path.isabs(arquivo) else os.path.join(diretorio_raw or RAW_DIR, arquivo)
+
+
+def _ler_ibge(caminho: str) -> pd.DataFrame:
+    # '..' é o marcador de valor ausente do IBGE
+    df = pd.concat(ler_em_chunks(caminho, na_values=['..']), ignore_index=True)
+    por_nome = {str(c).strip().lower(): c for c in df.columns}
+    ano = next((por_nome[c] for c in ('ano', 'year') if c in por_nome), None)
+    mes = next((por_nome[c] for c in ('mes', 'mês', 'month') if c in por_nome), None)
+    if ano is None or mes is None:
+        raise KeyError(f"{caminho}: colunas de ano e mês não encontradas em {list(df.columns)}")
+    anos = pd.to_numeric(df[ano], errors='coerce')
+    meses = pd.to_numeric(df[mes], errors='coerce')
+    validos = anos.notna() & meses.notna()
+    resultado = df.loc[validos].drop(columns=[ano, mes])
+    resultado = resultado.apply(pd.to_numeric, errors='coerce').dropna(axis=1, how='all')
+    resultado.insert(0, 'Ano_Mes', (anos[validos] * 100 + meses[validos]).astype('int64'))
+    return resultado
+
+
+def _ler_sgs(caminho: str) -> pd.DataFrame:
+    df = pd.read_csv(caminho, sep=';', dtype=str)
+    df.columns = [str(c).strip().lower() for c in df.columns]
+    datas, _ = converter_datas(df['data'])
+    valores = pd.to_numeric(df['valor'].str.replace(',', '.', regex=False), errors='coerce')
+    validos = datas.notna()
+    return pd.DataFrame({'Ano_Mes': (datas[validos].dt.year * 100 + datas[validos].dt.month).astype('int64'),
+                         'valor': valores[validos]})
+
+
+def carregar_fonte(definicao: Dict[str, Any], diretorio_raw: Optional[str] = None) -> pd.DataFrame:
+    """
+    Lê uma fonte bruta e devolve Ano_Mes + colunas <indicador>__<metrica>
+
+    Função de módulo: pode rodar em um pool de processos.
+    """
+    caminho = caminho_fonte(definicao, diretorio_raw)
+    df = _ler_ibge(caminho) if definicao['formato'] == 'ibge' else _ler_sgs(caminho)
+    metricas = definicao['metricas']
+    if definicao['formato'] == 'sgs' and metricas:
+        df = df.rename(columns={'valor': metricas[0]})
+    elif metricas:
+        faltando = [m for m in metricas if m not in df.columns]
+        if faltando:
+            raise KeyError(f"{caminho}: métricas ausentes {faltando}")
+        df = df[['Ano_Mes', *metricas]]
+    # Última linha vale em meses repetidos no dump
+    df = df.drop_duplicates(subset=['Ano_Mes'], keep='last').sort_values('Ano_Mes')
+    df.columns = ['Ano_Mes'] + [f"{definicao['nome']}{SEPARADOR}{c}" for c in df.columns[1:]]
+    return df.reset_index(drop=True)
+
+
+def _carregar_fonte(argumentos):
+    return carregar_fonte(*argumentos)
+
+
+def ler_manifesto(diretorio: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Manifesto do repositório: releases gravadas e impressão digital de cada fonte
+    """
+    caminho = os.path.join(diretorio or diretorio_indicadores_padrao(), ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return {'releases': [], 'fontes': {}}
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _para_longo(largo: pd.DataFrame) -> pd.DataFrame:
+    longo = largo.melt(id_vars='Ano_Mes', var_name='coluna', value_name='valor')
+    return longo.dropna(subset=['valor'])
+
+
+def ler_releases(diretorio: Optional[str] = None, ate: Optional[int] = None) -> pd.DataFrame:
+    """
+    Reaplica as releases em ordem e devolve o estado em formato longo
+
+    Args:
+        diretorio: Repositório (padrão: config/settings.py)
+        ate: Última release aplicada (padrão: todas)
+
+    Returns:
+        DataFrame (Ano_Mes, coluna, valor, release) com a última versão de cada célula
+    """
+    diretorio = diretorio or diretorio_indicadores_padrao()
+    partes = []
+    for release in ler_manifesto(diretorio)['releases']:
+        if ate is not None and release['numero'] > ate:
+            break
+        parte = pd.read_csv(os.path.join(diretorio, release['arquivo']))
+        parte['release'] = release['numero']
+        partes.append(parte)
+    if not partes:
+        return pd.DataFrame(columns=['Ano_Mes', 'coluna', 'valor', 'release'])
+    longo = pd.concat(partes, ignore_index=True)
+    return longo.drop_duplicates(subset=['Ano_Mes', 'coluna'], keep='last').reset_index(drop=True)
+
+
+def _para_largo(longo: pd.DataFrame) -> pd.DataFrame:
+    if longo.empty:
+        return pd.DataFrame(columns=['Ano_Mes'])
+    largo = longo.pivot(index='Ano_Mes', columns='coluna', values='valor')
+    largo = largo.reindex(columns=sorted(largo.columns)).reset_index()
+    largo.columns.name = None
+    return largo
+
+
+def atualizar_indicadores(fontes: Optional[Sequence[str]] = None,
+                          diretorio: Optional[str] = None,
+                          diretorio_raw: Optional[str] = None,
+                          processos: Optional[int] = None,
+                          forcar: bool = False,
+                          registro: Optional[Dict[str, Dict[str, Any]]] = None) -> Dict[str, Any]:
+    """
+    Lê as fontes que mudaram em paralelo e grava uma release com as células novas
+
+    Args:
+        fontes: Indicadores a atualizar (padrão: todos os do registro)
+        diretorio: Repositório (padrão: config/settings.py)
+        diretorio_raw: Diretório dos arquivos brutos (padrão: data/raw)
+        processos: Processos do pool (1: no processo atual; None: um por fonte, até as CPUs)
+        forcar: Relê as fontes mesmo sem mudança no arquivo
+        registro: Registro de fontes (padrão: FONTES_INDICADORES)
+
+    Returns:
+        Dict com release (número ou None), celulas, lidas, inalteradas e ausentes
+    """
+    registro = FONTES_INDICADORES if registro is None else registro
+    diretorio = diretorio or diretorio_indicadores_padrao()
+    manifesto = ler_manifesto(diretorio)
+    resumo = {'release': None, 'celulas': 0, 'lidas': [], 'inalteradas': [], 'ausentes': []}
+
+    pendentes = {}
+    for nome in (fontes or list(registro)):
+        definicao = registro[nome]
+        caminho = caminho_fonte(definicao, diretorio_raw)
+        if not os.path.exists(caminho):
+            resumo['ausentes'].append(nome)
+            continue
+        impressao = impressao_digital_arquivo(caminho)
+        if not forcar and manifesto['fontes'].get(nome) == impressao:
+            resumo['inalteradas'].append(nome)
+            continue
+        pendentes[nome] = impressao
+
+    argumentos = [(registro[nome], diretorio_raw) for nome in pendentes]
+    processos = processos or min(len(argumentos), os.cpu_count() or 1)
+    if processos <= 1 or len(argumentos) <= 1:
+        tabelas = [_carregar_fonte(a) for a in argumentos]
+    else:
+        with ProcessPoolExecutor(max_workers=processos) as executor:
+            tabelas = list(executor.map(_carregar_fonte, argumentos))
+    resumo['lidas'] = list(pendentes)
+
+    caminho_tabela = os.path.join(diretorio, f"{NOME_TABELA}.json")
+    if tabelas:
+        novo = pd.concat([_para_longo(t) for t in tabelas], ignore_index=True)
+        atual = ler_releases(diretorio)[['Ano_Mes', 'coluna', 'valor']]
+        comparado = novo.merge(atual, on=['Ano_Mes', 'coluna'], how='left', suffixes=('', '_atual'))
+        mudou = comparado['valor_atual'].isna() | (comparado['valor'] != comparado['valor_atual'])
+        celulas = comparado.loc[mudou, ['Ano_Mes', 'coluna', 'valor']]
+
+        if len(celulas):
+            numero = len(manifesto['releases']) + 1
+            arquivo = os.path.join('releases', f"release_{numero:06d}.csv")
+            os.makedirs(os.path.join(diretorio, 'releases'), exist_ok=True)
+            escrever_atomico(os.path.join(diretorio, arquivo),
+                             lambda temporario: celulas.to_csv(temporario, index=False))
+            manifesto['releases'].append({
+                'numero': numero,
+                'arquivo': arquivo,
+                'fontes': {nome: pendentes[nome] for nome in pendentes},
+                'celulas': int(len(celulas)),
+                'gerado_em': datetime.now().isoformat(timespec='seconds')
+            })
+            resumo.update(release=numero, celulas=int(len(celulas)))
+        manifesto['fontes'].update(pendentes)
+
+        def gravar(temporario):
+            with open(temporario, 'w', encoding='utf-8') as saida:
+                json.dump(manifesto, saida, ensure_ascii=False, indent=2)
+
+        escrever_atomico(os.path.join(diretorio, ARQUIVO_MANIFESTO), gravar)
+
+    if resumo['release'] is not None or (manifesto['releases'] and not os.path.exists(caminho_tabela)):
+        largo = _para_largo(ler_releases(diretorio))
+        exportar_mensal(largo, NOME_TABELA, diretorio,
+                        fonte={'release': manifesto['releases'][-1]['numero']})
+    return resumo
+
+
+def _selecionar_colunas(disponiveis: Sequence[str], pedidas: Optional[Sequence[str]]) -> List[str]:
+    if pedidas is None:
+        return list(disponiveis)
+    selecionadas = []
+    for pedida in pedidas:
+        # 'ipca' seleciona todas as métricas do indicador; 'ipca__indice' só uma
+        encontradas = [c for c in disponiveis
+                       if c == pedida or (SEPARADOR not in pedida and c.startswith(pedida + SEPARADOR))]
+        if not encontradas:
+            raise KeyError(f"Indicador ou coluna não encontrado: {pedida} (disponíveis: {list(disponiveis)})")
+        selecionadas += [c for c in encontradas if c not in selecionadas]
+    return selecionadas
+
+
+def tabela_indicadores(colunas: Optional[Sequence[str]] = None,
+                       diretorio: Optional[str] = None,
+                       ate: Optional[int] = None) -> pd.DataFrame:
+    """
+    Tabela larga (Ano_Mes + colunas pedidas) do repositório de indicadores
+
+    Args:
+        colunas: Indicadores ('inpc') ou colunas ('ipca__variacao_mensal');
+            padrão: todas
+        diretorio: Repositório (padrão: config/settings.py)
+        ate: Release de referência (padrão: a atual, lida da matriz mapeada)
+
+    Returns:
+        DataFrame com um mês por linha (só meses com algum valor)
+    """
+    diretorio = diretorio or diretorio_indicadores_padrao()
+    caminho_tabela = os.path.join(diretorio, f"{NOME_TABELA}.json")
+    if ate is None and os.path.exists(caminho_tabela):
+        tabela = anexar_mensal(caminho_tabela)
+        selecionadas = _selecionar_colunas(tabela['cabecalho']['colunas'], colunas)
+        posicoes = [tabela['colunas'][c] for c in selecionadas]
+        largo = pd.DataFrame(np.asarray(tabela['dados'][:, posicoes]), columns=selecionadas)
+        largo.insert(0, 'Ano_Mes', meses_da_tabela(tabela))
+    else:
+        largo = _para_largo(ler_releases(diretorio, ate))
+        selecionadas = _selecionar_colunas([c for c in largo.columns if c != 'Ano_Mes'], colunas)
+        largo = largo[['Ano_Mes', *selecionadas]]
+    return largo.dropna(subset=selecionadas, how='all').reset_index(drop=True)
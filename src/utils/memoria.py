@@ -0,0 +1,306 @@
+"""
+Orçamento de memória e planejamento de chunks para os carregamentos
+
+O orçamento vem, nesta ordem, do argumento explícito, da variável
+MAX_MEMORY (ex: "512MB"), de config/settings.py, do tamanho da Lambda
+(AWS_LAMBDA_FUNCTION_MEMORY_SIZE, em MB), do limite do cgroup e, por fim,
+da RAM física. O planejador lê uma amostra das primeiras linhas, mede os
+bytes por linha depois da tipagem e escolhe quantas linhas ler por chunk
+para caber no orçamento; a cada chunk o tamanho é recalculado com o RSS
+atual do processo e os bytes por linha observados, encolhendo quando a
+memória sobe (ex: acumuladores crescendo) e crescendo quando sobra folga.
+"""
+
+import os
+import re
+from typing import Any, Callable, Dict, Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from config.settings import MAX_MEMORY
+
+# Fração do orçamento que o processo pode ocupar (o resto é margem do runtime)
+FRACAO_UTIL = 0.6
+# Cópias de trabalho de um chunk durante o processamento (bruto, tipado, agregados)
+FATOR_TRABALHO = 4
+LINHAS_AMOSTRA = 2000
+LINHAS_MINIMAS = 10_000
+# Crescimento máximo do chunk entre duas leituras
+CRESCIMENTO_MAXIMO = 2.0
+ORCAMENTO_PADRAO = 1024 ** 3
+BLOCO_CONTAGEM = 4 * 1024 ** 2
+
+_UNIDADES = {'': 1, 'B': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3, 'T': 1024 ** 4}
+_PADRAO_TAMANHO = re.compile(r'^\s*(\d+(?:[.,]\d+)?)\s*([KMGT]?)(?:I?B)?\s*$', re.IGNORECASE)
+_CGROUP_LIMITES = ('/sys/fs/cgroup/memory.max', '/sys/fs/cgroup/memory/memory.limit_in_bytes')
+
+
+def interpretar_tamanho(texto) -> int:
+    """
+    Converte "512MB", "2G", "1.5GiB" ou um número de bytes em bytes
+    """
+    if isinstance(texto, (int, float)):
+        return int(texto)
+    encontrado = _PADRAO_TAMANHO.match(str(texto))
+    if not encontrado:
+        raise ValueError(f"Tamanho de memória inválido: {texto!r}")
+    numero, unidade = encontrado.groups()
+    return int(float(numero.replace(',', '.')) * _UNIDADES[unidade.upper()])
+
+
+def memoria_fisica() -> Optional[int]:
+    """
+    RAM física da máquina (None onde os.sysconf não existe)
+    """
+    try:
+        return os.sysconf('SC_PAGE_SIZE') * os.sysconf('SC_PHYS_PAGES')
+    except (AttributeError, ValueError, OSError):
+        return None
+
+
+def limite_cgroup() -> Optional[int]:
+    """
+    Limite de memória do cgroup (v2 ou v1), se houver um limite efetivo
+    """
+    fisica = memoria_fisica()
+    for caminho in _CGROUP_LIMITES:
+        try:
+            with open(caminho) as arquivo:
+                valor = arquivo.read().strip()
+        except OSError:
+            continue
+        if not valor.isdigit():
+            return None
+        # cgroup v1 sem limite reporta um número próximo de 2**63
+        limite = int(valor)
+        return None if fisica and limite >= fisica else limite
+    return None
+
+
+def orcamento_memoria(valor=None) -> int:
+    """
+    Orçamento de memória do processo em bytes
+
+    Args:
+        valor: Orçamento explícito ("512MB" ou bytes); None consulta o ambiente
+    """
+    for candidato in (valor, os.environ.get('MAX_MEMORY'), MAX_MEMORY):
+        if candidato:
+            return interpretar_tamanho(candidato)
+    lambda_mb = os.environ.get('AWS_LAMBDA_FUNCTION_MEMORY_SIZE')
+    if lambda_mb:
+        return int(lambda_mb) * 1024 ** 2
+    return limite_cgroup() or memoria_fisica() or ORCAMENTO_PADRAO
+
+
+def rss_atual() -> int:
+    """
+    Memória residente atual do processo em bytes (0 se indisponível)
+    """
+    try:
+        with open('/proc/self/statm') as arquivo:
+            paginas = int(arquivo.read().split()[1])
+        return paginas * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, AttributeError, IndexError):
+        pass
+    try:
+        import resource
+        # Sem /proc, o pico (ru_maxrss, em KB no Linux e bytes no macOS) é a melhor aproximação
+        pico = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return pico if pico > 1024 ** 3 else pico * 1024
+    except ImportError:
+        return 0
+
+
+def bytes_por_linha(df: pd.DataFrame) -> float:
+    """
+    Bytes ocupados por linha (inclui o conteúdo das strings)
+    """
+    if len(df) == 0:
+        return 0.0
+    # Medir strings custa uma passada pelos dados: chunks grandes usam uma amostra
+    if len(df) > LINHAS_AMOSTRA:
+        df = df.iloc[::len(df) // LINHAS_AMOSTRA]
+    return float(df.memory_usage(deep=True, index=True).sum()) / len(df)
+
+
+def _linhas_que_cabem(plano: Dict[str, Any]) -> int:
+    folga = plano['orcamento'] * FRACAO_UTIL - rss_atual()
+    linhas = folga / (max(plano['bytes_por_linha'], 1.0) * FATOR_TRABALHO)
+    return max(LINHAS_MINIMAS, int(linhas))
+
+
+def planejar_chunks(caminho: str,
+                    orcamento=None,
+                    tipar: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                    linhas_amostra: int = LINHAS_AMOSTRA,
+                    **kwargs_csv) -> Dict[str, Any]:
+    """
+    Estima o tamanho dos chunks de um CSV a partir de uma amostra
+
+    Args:
+        caminho: CSV (comprimido ou não, conforme kwargs_csv)
+        orcamento: Orçamento de memória (padrão: orcamento_memoria())
+        tipar: Função aplicada a cada chunk (a amostra é medida depois dela)
+        linhas_amostra: Linhas lidas para a estimativa
+        **kwargs_csv: Parâmetros de pd.read_csv
+
+    Returns:
+        Dict com orcamento, bytes_por_linha e linhas_por_chunk
+    """
+    amostra = pd.read_csv(caminho, nrows=linhas_amostra, **kwargs_csv)
+    tipada = tipar(amostra) if tipar is not None else amostra
+    # O maior entre o texto bruto e o resultado tipado (ambos coexistem no chunk)
+    return planejar_por_amostra(amostra, orcamento, tipada)
+
+
+def planejar_por_amostra(amostra: pd.DataFrame,
+                         orcamento=None,
+                         tipada: Optional[pd.DataFrame] = None) -> Dict[str, Any]:
+    """
+    Plano de chunks a partir de uma amostra já carregada (qualquer fonte)
+
+    Returns:
+        Dict com orcamento, bytes_por_linha e linhas_por_chunk
+    """
+    medida = bytes_por_linha(amostra)
+    if tipada is not None:
+        medida = max(medida, bytes_por_linha(tipada))
+    plano = {'orcamento': orcamento_memoria(orcamento), 'bytes_por_linha': medida, 'chunks': 0}
+    plano['linhas_por_chunk'] = _linhas_que_cabem(plano)
+    return plano
+
+
+def ajustar_plano(plano: Dict[str, Any], chunk: pd.DataFrame) -> int:
+    """
+    Recalcula as linhas do próximo chunk com o RSS atual e o último chunk lido
+
+    Returns:
+        Novo número de linhas por chunk
+    """
+    if len(chunk) > 0:
+        plano['bytes_por_linha'] = max(plano['bytes_por_linha'], bytes_por_linha(chunk))
+    limite = int(plano['linhas_por_chunk'] * CRESCIMENTO_MAXIMO)
+    plano['linhas_por_chunk'] = min(_linhas_que_cabem(plano), limite)
+    return plano['linhas_por_chunk']
+
+
+def avancar_registros(caminho: str, deslocamento: int, registros: int) -> Optional[int]:
+    """
+    Posição em bytes depois de mais `registros` registros CSV a partir de deslocamento
+
+    Conta como o pd.read_csv: quebras de linha dentro de campos entre aspas
+    não encerram o registro e linhas em branco (ou só com espaços e tabs)
+    não contam. O deslocamento precisa estar no início de um registro.
+
+    Returns:
+        Posição em bytes, ou None se alguma aspa não abre nem fecha um campo
+        (ex: 5" x 7"), caso em que a contagem do pandas pode ser outra e a
+        retomada deve pular as linhas já lidas (ler_em_chunks(pular=...))
+    """
+    aspas, virgula, quebra = ord('"'), ord(','), ord('\n')
+    brancos = np.array([ord(' '), ord('\t'), ord('\r'), quebra], dtype=np.uint8)
+    entre_aspas = False     # bloco anterior terminou dentro de um campo entre aspas
+    com_conteudo = False    # registro em aberto já tem algum caractere não branco
+    anterior = quebra       # último byte do bloco anterior
+    with open(caminho, 'rb') as arquivo:
+        arquivo.seek(deslocamento)
+        while registros > 0:
+            bloco = np.frombuffer(arquivo.read(BLOCO_CONTAGEM), dtype=np.uint8)
+            if not len(bloco):
+                break
+            e_aspas = bloco == aspas
+            # Paridade das aspas antes de cada byte: ímpar = dentro de um campo entre aspas
+            dentro = (np.cumsum(e_aspas) - e_aspas + entre_aspas) % 2 == 1
+            previo = np.concatenate(([anterior], bloco[:-1]))
+            abre = e_aspas & ~dentro
+            # Aspas abrem um campo depois de vírgula ou quebra ("" escapado também vale)
+            if np.any(abre & (previo != virgula) & (previo != quebra) & (previo != aspas)):
+                return None
+
+            # Registros terminados neste bloco que têm algum caractere não branco
+            quebras = np.flatnonzero((bloco == quebra) & ~dentro)
+            conteudo = np.cumsum(~np.isin(bloco, brancos))
+            ate_quebra = conteudo[quebras]
+            inicio = np.concatenate(([0], ate_quebra[:-1]))
+            validos = ate_quebra > inicio
+            if len(validos) and com_conteudo:
+                validos[0] = True
+            fins = quebras[validos]
+            if len(fins) >= registros:
+                return deslocamento + int(fins[registros - 1]) + 1
+            registros -= len(fins)
+
+            if len(quebras):
+                com_conteudo = bool(conteudo[-1] > ate_quebra[-1])
+            else:
+                com_conteudo = com_conteudo or bool(conteudo[-1] > 0)
+            entre_aspas = bool(dentro[-1] != e_aspas[-1])
+            anterior = int(bloco[-1])
+            deslocamento += len(bloco)
+    return deslocamento
+
+
+def ler_em_chunks(caminho: str,
+                  orcamento=None,
+                  tipar: Optional[Callable[[pd.DataFrame], pd.DataFrame]] = None,
+                  plano: Optional[Dict[str, Any]] = None,
+                  deslocamento: int = 0,
+                  pular: int = 0,
+                  **kwargs_csv) -> Iterator[pd.DataFrame]:
+    """
+    Lê um CSV em chunks dimensionados pelo orçamento de memória
+
+    O tamanho é reavaliado antes de cada leitura, depois que o chamador
+    processou o chunk anterior, de modo que a memória retida pelo
+    processamento também entra na conta.
+
+    Args:
+        caminho: CSV a ler
+        orcamento: Orçamento de memória (padrão: orcamento_memoria())
+        tipar: Função aplicada a cada chunk antes de entregá-lo
+        plano: Plano de planejar_chunks (é atualizado a cada chunk)
+        deslocamento: Posição em bytes de onde retomar a leitura (ex: de um
+            checkpoint, via avancar_registros); o cabeçalho continua vindo do
+            início do arquivo. Só para CSVs sem compressão.
+        pular: Registros já processados a descartar no início da leitura
+            (retomada quando o deslocamento em bytes não é confiável)
+        **kwargs_csv: Parâmetros de pd.read_csv
+
+    Yields:
+        DataFrames tipados
+    """
+    if plano is None:
+        plano = planejar_chunks(caminho, orcamento, tipar, **kwargs_csv)
+    if deslocamento:
+        comprimido = caminho.endswith(('.gz', '.bz2', '.zip', '.xz', '.zst'))
+        if comprimido or kwargs_csv.get('compression') not in (None, 'infer'):
+            raise ValueError(f"Retomada por deslocamento exige CSV sem compressão: {caminho}")
+        if deslocamento >= os.path.getsize(caminho):
+            return
+        cabecalho = list(pd.read_csv(caminho, nrows=0, **kwargs_csv).columns)
+        with open(caminho, 'rb') as arquivo:
+            arquivo.seek(deslocamento)
+            yield from _ler_leitor(pd.read_csv(arquivo, iterator=True, header=None, names=cabecalho,
+                                               **kwargs_csv), tipar, plano, pular)
+        return
+    yield from _ler_leitor(pd.read_csv(caminho, iterator=True, **kwargs_csv), tipar, plano, pular)
+
+
+def _ler_leitor(leitor, tipar, plano, pular=0) -> Iterator[pd.DataFrame]:
+    with leitor:
+        while True:
+            try:
+                if pular:
+                    # Registros já processados: lidos e descartados, sem tipar
+                    pular -= len(leitor.get_chunk(min(pular, plano['linhas_por_chunk'])))
+                    continue
+                chunk = leitor.get_chunk(plano['linhas_por_chunk'])
+            except StopIteration:
+                return
+            if tipar is not None:
+                chunk = tipar(chunk)
+            plano['chunks'] += 1
+            yield chunk
+            ajustar_plano(plano, chunk)
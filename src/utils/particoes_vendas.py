@@ -0,0 +1,326 @@
+"""
+Vendas brutas convertidas uma vez para Parquet particionado por Ano_Mes
+
+A ingestão lê o CSV bruto em chunks (orçamento de memória de
+src.utils.memoria), tipa as colunas do ESQUEMA_VENDAS_TRANSACOES com os
+nomes canônicos (data como datetime, valor_unitario e quantidade como
+float, produto, id_venda e loja como texto), guarda a chave de deduplicação de
+cada transação calculada sobre a linha bruta (a mesma do índice de
+src.utils.deduplicacao) e grava um diretório no layout hive:
+
+    vendas_parquet/Ano_Mes=202401/parte-00000.parquet
+    vendas_parquet/_manifesto.json
+
+Cada mês é um único arquivo, mantido aberto durante a conversão: as
+linhas de cada mês se acumulam entre os chunks e são gravadas em row
+groups de LINHAS_POR_GRUPO linhas, cada um ordenado por data e com
+estatísticas min/max, de modo que filtros por data pulam row groups
+inteiros (e a conversão não gera um arquivo por chunk e mês); filtros
+por Ano_Mes nem abrem as partições fora da faixa, e só as colunas pedidas
+são lidas. Reprocessar um mês não exige reler anos de histórico.
+
+O manifesto guarda a impressão digital do CSV de origem: a conversão é
+pulada quando o CSV não mudou. O diretório novo é montado ao lado e trocado
+no fim, sem deixar uma conversão pela metade no lugar da anterior.
+
+pyarrow é opcional: só é importado quando a conversão ou a leitura rodam.
+"""
+
+import json
+import os
+import shutil
+from datetime import datetime
+from typing import Any, Dict, Iterator, List, Optional, Sequence
+
+import pandas as pd
+
+from config.settings import VENDAS_PARQUET_PATH
+from src.utils.cache import impressao_digital_arquivo
+from src.utils.datas import converter_datas
+from src.utils.deduplicacao import chaves_transacoes
+from src.utils.esquemas import ESQUEMA_VENDAS_TRANSACOES, resolver_colunas
+from src.utils.memoria import ajustar_plano, ler_em_chunks, planejar_por_amostra
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+ARQUIVO_MANIFESTO = '_manifesto.json'
+COLUNA_PARTICAO = 'Ano_Mes'
+COLUNA_CHAVE = 'chave_transacao'
+LINHAS_POR_GRUPO = 128_000
+# Linhas retidas em memória, somando todos os meses, antes de gravar os maiores
+LINHAS_PENDENTES_MAXIMAS = 8 * LINHAS_POR_GRUPO
+# Tipos gravados por coluna canônica (a partição Ano_Mes fica no caminho)
+TIPOS_PARQUET = {
+    'data': 'timestamp[ns]',
+    'valor_unitario': 'double',
+    'quantidade': 'double',
+    'produto': 'string',
+    'id_venda': 'string',
+    'loja': 'string',
+    COLUNA_CHAVE: 'uint64'
+}
+
+
+def diretorio_parquet_padrao() -> str:
+    """
+    Retorna o diretório do Parquet de vendas (config/settings.py)
+    """
+    caminho = os.environ.get('VENDAS_PARQUET_DIR', VENDAS_PARQUET_PATH)
+    return caminho if os.path.isabs(caminho) else os.path.join(BASE_DIR, caminho)
+
+
+def _importar_pyarrow():
+    try:
+        import pyarrow
+        import pyarrow.dataset
+        import pyarrow.parquet
+    except ImportError as e:
+        raise ImportError("vendas em Parquet requerem o pacote pyarrow") from e
+    return pyarrow
+
+
+def tipar_transacoes(df: pd.DataFrame, colunas: Dict[str, str]) -> pd.DataFrame:
+    """
+    Tipa um chunk bruto com os nomes canônicos e acrescenta chave e Ano_Mes
+
+    Linhas com data inválida ficam com Ano_Mes nulo (o chamador descarta).
+    """
+    tipado = pd.DataFrame(index=df.index)
+    tipado['data'], _ = converter_datas(df[colunas['data']])
+    tipado['valor_unitario'] = pd.to_numeric(df[colunas['valor_unitario']], errors='coerce')
+    if colunas.get('quantidade'):
+        tipado['quantidade'] = pd.to_numeric(df[colunas['quantidade']], errors='coerce')
+    for nome in ('produto', 'id_venda', 'loja'):
+        if colunas.get(nome):
+            tipado[nome] = df[colunas[nome]].astype(object)
+    # Chave sobre a linha bruta: igual à de uma carga direta do CSV
+    tipado[COLUNA_CHAVE] = chaves_transacoes(df, colunas.get('id_venda'))
+    tipado[COLUNA_PARTICAO] = (tipado['data'].dt.year * 100 + tipado['data'].dt.month).astype('Int64')
+    return tipado
+
+
+def ler_manifesto(diretorio: Optional[str] = None) -> Optional[Dict[str, Any]]:
+    """
+    Manifesto da última conversão (None se o diretório não foi gerado)
+    """
+    caminho = os.path.join(diretorio or diretorio_parquet_padrao(), ARQUIVO_MANIFESTO)
+    if not os.path.exists(caminho):
+        return None
+    with open(caminho, encoding='utf-8') as arquivo:
+        return json.load(arquivo)
+
+
+def _esquema_arrow(pa, colunas: Sequence[str]):
+    return pa.schema([(nome, pa.type_for_alias(TIPOS_PARQUET[nome])) for nome in colunas])
+
+
+def _trocar_diretorio(temporario: str, diretorio: str) -> None:
+    antigo = diretorio.rstrip(os.sep) + '.antigo'
+    shutil.rmtree(antigo, ignore_errors=True)
+    if os.path.exists(diretorio):
+        os.replace(diretorio, antigo)
+    os.replace(temporario, diretorio)
+    shutil.rmtree(antigo, ignore_errors=True)
+
+
+def _gravar_pendentes(pa, esquema, temporario: str, escritores: Dict[int, Any],
+                      pendentes: Dict[int, List[pd.DataFrame]], ano_mes: int) -> None:
+    """
+    Grava as linhas pendentes de um mês, ordenadas por data, no arquivo da partição
+
+    O arquivo de cada mês é aberto na primeira gravação e recebe um row
+    group (de até LINHAS_POR_GRUPO linhas) a cada gravação seguinte.
+    """
+    parte = pd.concat(pendentes.pop(ano_mes), ignore_index=True).sort_values('data', kind='stable')
+    escritor = escritores.get(ano_mes)
+    if escritor is None:
+        pasta = os.path.join(temporario, f"{COLUNA_PARTICAO}={ano_mes}")
+        os.makedirs(pasta, exist_ok=True)
+        escritor = pa.parquet.ParquetWriter(os.path.join(pasta, 'parte-00000.parquet'), esquema,
+                                            write_statistics=True)
+        escritores[ano_mes] = escritor
+    escritor.write_table(pa.Table.from_pandas(parte, schema=esquema, preserve_index=False),
+                         row_group_size=LINHAS_POR_GRUPO)
+
+
+def converter_vendas_parquet(arquivo_csv: str,
+                             diretorio: Optional[str] = None,
+                             max_memoria=None,
+                             forcar: bool = False) -> Dict[str, Any]:
+    """
+    Converte o CSV bruto de vendas em Parquet particionado por Ano_Mes
+
+    Args:
+        arquivo_csv: CSV bruto de vendas
+        diretorio: Diretório de saída (padrão: config/settings.py)
+        max_memoria: Orçamento de memória da leitura (ex: "512MB")
+        forcar: Converte mesmo que o CSV não tenha mudado
+
+    Returns:
+        Manifesto (origem, colunas, linhas, datas_invalidas, meses, arquivos)
+    """
+    pa = _importar_pyarrow()
+    diretorio = (diretorio or diretorio_parquet_padrao()).rstrip(os.sep)
+    origem = impressao_digital_arquivo(arquivo_csv)
+    manifesto = ler_manifesto(diretorio)
+    if not forcar and manifesto is not None and manifesto.get('origem') == origem:
+        manifesto['convertido'] = False
+        return manifesto
+
+    temporario = diretorio + '.tmp'
+    shutil.rmtree(temporario, ignore_errors=True)
+    os.makedirs(temporario)
+
+    colunas, esquema = None, None
+    linhas, datas_invalidas = 0, 0
+    # Um arquivo aberto por mês e as linhas de cada mês ainda não gravadas
+    escritores, pendentes = {}, {}
+    try:
+        for chunk in ler_em_chunks(arquivo_csv, max_memoria, dtype=str):
+            if colunas is None:
+                colunas = resolver_colunas(chunk.columns, ESQUEMA_VENDAS_TRANSACOES, exigir=False)
+                if not colunas.get('data') or not colunas.get('valor_unitario'):
+                    raise ValueError(f"Colunas de data e valor não identificadas em {list(chunk.columns)}")
+            tipado = tipar_transacoes(chunk, colunas)
+            linhas += len(tipado)
+            validas = tipado[COLUNA_PARTICAO].notna()
+            datas_invalidas += int((~validas).sum())
+            tipado = tipado[validas]
+            if esquema is None:
+                esquema = _esquema_arrow(pa, [c for c in tipado.columns if c != COLUNA_PARTICAO])
+            for ano_mes, parte in tipado.groupby(COLUNA_PARTICAO, sort=True):
+                partes = pendentes.setdefault(int(ano_mes), [])
+                partes.append(parte.drop(columns=COLUNA_PARTICAO))
+                if sum(map(len, partes)) >= LINHAS_POR_GRUPO:
+                    _gravar_pendentes(pa, esquema, temporario, escritores, pendentes, int(ano_mes))
+            # Memória retida nos meses que ainda não somam um row group: grava os maiores
+            while sum(len(p) for partes in pendentes.values() for p in partes) > LINHAS_PENDENTES_MAXIMAS:
+                maior = max(pendentes, key=lambda mes: sum(map(len, pendentes[mes])))
+                _gravar_pendentes(pa, esquema, temporario, escritores, pendentes, maior)
+
+        for ano_mes in sorted(pendentes):
+            _gravar_pendentes(pa, esquema, temporario, escritores, pendentes, ano_mes)
+        for escritor in escritores.values():
+            escritor.close()
+
+        manifesto = {
+            'origem': origem,
+            'colunas': colunas or {},
+            'linhas': linhas,
+            'datas_invalidas': datas_invalidas,
+            'meses': sorted(escritores),
+            'arquivos': len(escritores),
+            'gerado_em': datetime.now().isoformat(timespec='seconds')
+        }
+        with open(os.path.join(temporario, ARQUIVO_MANIFESTO), 'w', encoding='utf-8') as arquivo:
+            json.dump(manifesto, arquivo, ensure_ascii=False, indent=2)
+        _trocar_diretorio(temporario, diretorio)
+    except BaseException:
+        for escritor in escritores.values():
+            escritor.close()
+        shutil.rmtree(temporario, ignore_errors=True)
+        raise
+    manifesto['convertido'] = True
+    return manifesto
+
+
+def _filtro(pa, inicio: Optional[int], fim: Optional[int], filtro=None):
+    campo = pa.dataset.field(COLUNA_PARTICAO)
+    for condicao in ((campo >= inicio) if inicio is not None else None,
+                     (campo <= fim) if fim is not None else None):
+        if condicao is not None:
+            filtro = condicao if filtro is None else filtro & condicao
+    return filtro
+
+
+def abrir_vendas_parquet(diretorio: Optional[str] = None):
+    """
+    Abre o diretório como pyarrow.dataset (partições hive Ano_Mes=YYYYMM)
+    """
+    pa = _importar_pyarrow()
+    diretorio = diretorio or diretorio_parquet_padrao()
+    if not os.path.isdir(diretorio):
+        raise FileNotFoundError(f"Parquet de vendas não encontrado: {diretorio}")
+    particao = pa.dataset.partitioning(pa.schema([(COLUNA_PARTICAO, pa.int32())]), flavor='hive')
+    return pa.dataset.dataset(diretorio, format='parquet', partitioning=particao)
+
+
+def ler_vendas_parquet(diretorio: Optional[str] = None,
+                       colunas: Optional[Sequence[str]] = None,
+                       inicio: Optional[int] = None,
+                       fim: Optional[int] = None,
+                       filtro=None) -> pd.DataFrame:
+    """
+    Lê só as partições e colunas pedidas
+
+    Args:
+        diretorio: Diretório do Parquet (padrão: config/settings.py)
+        colunas: Colunas a ler (padrão: todas, inclusive Ano_Mes)
+        inicio, fim: Faixa de Ano_Mes (YYYYMM, inclusiva); poda as partições
+        filtro: Expressão pyarrow.dataset extra (ex: por data, usa o min/max dos row groups)
+    """
+    pa = _importar_pyarrow()
+    dataset = abrir_vendas_parquet(diretorio)
+    tabela = dataset.to_table(columns=list(colunas) if colunas is not None else None,
+                              filter=_filtro(pa, inicio, fim, filtro))
+    return tabela.to_pandas()
+
+
+def planejar_lotes_parquet(diretorio: Optional[str] = None,
+                           colunas: Optional[Sequence[str]] = None,
+                           orcamento=None) -> Dict[str, Any]:
+    """
+    Plano de lotes (src.utils.memoria) medido no primeiro row group do diretório
+    """
+    dataset = abrir_vendas_parquet(diretorio)
+    amostra = next(dataset.to_batches(columns=list(colunas) if colunas is not None else None,
+                                      batch_size=LINHAS_POR_GRUPO), None)
+    amostra = amostra.to_pandas() if amostra is not None else pd.DataFrame()
+    return planejar_por_amostra(amostra, orcamento)
+
+
+def ler_lotes_parquet(diretorio: Optional[str] = None,
+                      colunas: Optional[Sequence[str]] = None,
+                      inicio: Optional[int] = None,
+                      fim: Optional[int] = None,
+                      orcamento=None,
+                      plano: Optional[Dict[str, Any]] = None,
+                      filtro=None,
+                      pular: int = 0) -> Iterator[pd.DataFrame]:
+    """
+    Lê as partições pedidas em lotes dimensionados pelo orçamento de memória
+
+    Os lotes do scanner (no máximo um row group cada) são juntados até o
+    tamanho planejado, reavaliado depois de cada entrega como em
+    ler_em_chunks. A ordem das linhas é estável entre leituras, de modo
+    que `pular` retoma uma leitura interrompida (ex: de um checkpoint).
+
+    Yields:
+        DataFrames tipados com as colunas pedidas
+    """
+    pa = _importar_pyarrow()
+    if plano is None:
+        plano = planejar_lotes_parquet(diretorio, colunas, orcamento)
+    dataset = abrir_vendas_parquet(diretorio)
+    lotes = dataset.to_batches(columns=list(colunas) if colunas is not None else None,
+                               filter=_filtro(pa, inicio, fim, filtro),
+                               batch_size=LINHAS_POR_GRUPO)
+    pendentes: List[Any] = []
+    linhas = 0
+    for lote in lotes:
+        if pular >= lote.num_rows:
+            pular -= lote.num_rows
+            continue
+        if pular:
+            lote, pular = lote.slice(pular), 0
+        pendentes.append(lote)
+        linhas += lote.num_rows
+        if linhas >= plano['linhas_por_chunk']:
+            chunk = pa.Table.from_batches(pendentes).to_pandas()
+            pendentes, linhas = [], 0
+            plano['chunks'] += 1
+            yield chunk
+            ajustar_plano(plano, chunk)
+    if pendentes:
+        plano['chunks'] += 1
+        yield pa.Table.from_batches(pendentes).to_pandas()
@@ -0,0 +1,329 @@
+"""
+Serviço HTTP assíncrono (somente leitura) para as camadas gold e IPCA
+
+Carrega as tabelas processadas uma vez em memória (DataFrames ordenados
+por Ano_Mes) e atende consultas por faixa de Ano_Mes em JSON, CSV ou Arrow
+(este último se pyarrow estiver instalado). Implementado só com asyncio e
+a biblioteca padrão: um servidor HTTP/1.1 mínimo com keep-alive.
+
+- A faixa é localizada com np.searchsorted no vetor de Ano_Mes.
+- Cada resposta tem ETag derivado da versão da tabela e da consulta; com
+  If-None-Match igual a resposta é 304 sem serializar nada.
+- Respostas serializadas ficam em um cache LRU pequeno por versão.
+- A impressão digital (tamanho, mtime) dos CSVs é verificada no máximo a
+  cada `intervalo_verificacao` segundos; se mudou, a tabela é recarregada
+  em uma thread e passa a ser servida com uma nova versão.
+
+Rotas:
+    GET /saude
+    GET /tabelas
+    GET /<tabela>?inicio=YYYYMM&fim=YYYYMM&formato=json|csv|arrow
+"""
+
+import asyncio
+import hashlib
+import io
+import json
+import os
+import time
+from collections import OrderedDict
+from typing import Any, Dict, Optional, Tuple
+from urllib.parse import parse_qs, urlsplit
+
+import numpy as np
+import pandas as pd
+
+from config.settings import IPCA_PROCESSED_FILE, SERVICO_HOST, SERVICO_PORTA
+from src.utils.cache import impressao_digital_arquivo
+
+BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+PROCESSED_DIR = os.path.join(BASE_DIR, 'data', 'processed')
+
+# Tabelas servidas: nome da rota -> CSV em data/processed
+TABELAS_SERVICO = {
+    'gold': 'tabela_gold_ipca_vendas.csv',
+    'ipca': IPCA_PROCESSED_FILE,
+    'vendas': 'vendas_confeitaria_tratadas.csv'
+}
+
+TIPOS_CONTEUDO = {
+    'json': 'application/json',
+    'csv': 'text/csv; charset=utf-8',
+    'arrow': 'application/vnd.apache.arrow.stream'
+}
+
+MOTIVOS = {200: 'OK', 304: 'Not Modified', 400: 'Bad Request', 404: 'Not Found',
+           405: 'Method Not Allowed', 406: 'Not Acceptable', 500: 'Internal Server Error'}
+
+MAX_RESPOSTAS_CACHE = 256
+
+
+def carregar_tabela_servico(caminho: str) -> Dict[str, Any]:
+    """
+    Lê um CSV da camada processada para a estrutura em memória do serviço
+
+    Returns:
+        Dict com 'df' (ordenado por Ano_Mes), 'ano_mes' (array int64),
+        'fonte' (impressão digital) e 'versao'
+    """
+    fonte = impressao_digital_arquivo(caminho)
+    df = pd.read_csv(caminho)
+    # Colunas que só diferem por maiúsculas (ano/Ano no IPCA) confundem os clientes
+    df = df.loc[:, ~df.columns.str.lower().duplicated()]
+    df = df.sort_values('Ano_Mes', kind='stable').reset_index(drop=True)
+    versao = hashlib.blake2b(f"{fonte['tamanho']}:{fonte['mtime_ns']}".encode(), digest_size=8).hexdigest()
+    return {
+        'df': df,
+        'ano_mes': df['Ano_Mes'].to_numpy(dtype=np.int64),
+        'fonte': fonte,
+        'versao': versao
+    }
+
+
+def criar_estado(diretorio: Optional[str] = None,
+                 tabelas: Optional[Dict[str, str]] = None,
+                 intervalo_verificacao: float = 1.0) -> Dict[str, Any]:
+    """
+    Cria o estado do serviço (tabelas carregadas sob demanda)
+    """
+    diretorio = diretorio or PROCESSED_DIR
+    return {
+        'caminhos': {nome: os.path.join(diretorio, arquivo)
+                     for nome, arquivo in (tabelas or TABELAS_SERVICO).items()},
+        'tabelas': {},
+        'verificado_em': {},
+        'travas': {},
+        'respostas': OrderedDict(),
+        'intervalo_verificacao': intervalo_verificacao
+    }
+
+
+async def obter_tabela(estado: Dict[str, Any], nome: str) -> Optional[Dict[str, Any]]:
+    """
+    Retorna a tabela em memória, recarregando se o arquivo mudou
+    """
+    caminho = estado['caminhos'][nome]
+    agora = time.monotonic()
+    tabela = estado['tabelas'].get(nome)
+    if tabela is not None and agora - estado['verificado_em'].get(nome, 0) < estado['intervalo_verificacao']:
+        return tabela
+
+    trava = estado['travas'].setdefault(nome, asyncio.Lock())
+    async with trava:
+        tabela = estado['tabelas'].get(nome)
+        if not os.path.exists(caminho):
+            return tabela
+        info = os.stat(caminho)
+        if tabela is None or (tabela['fonte']['tamanho'], tabela['fonte']['mtime_ns']) != \
+                (info.st_size, info.st_mtime_ns):
+            tabela = await asyncio.to_thread(carregar_tabela_servico, caminho)
+            estado['tabelas'][nome] = tabela
+        estado['verificado_em'][nome] = time.monotonic()
+    return tabela
+
+
+def fatiar(tabela: Dict[str, Any], inicio: Optional[int], fim: Optional[int]) -> pd.DataFrame:
+    """
+    Linhas com inicio <= Ano_Mes <= fim (limites opcionais)
+    """
+    ano_mes = tabela['ano_mes']
+    a = 0 if inicio is None else int(np.searchsorted(ano_mes, inicio, side='left'))
+    b = len(ano_mes) if fim is None else int(np.searchsorted(ano_mes, fim, side='right'))
+    return tabela['df'].iloc[a:b]
+
+
+def serializar(df: pd.DataFrame, formato: str) -> bytes:
+    """
+    Serializa o recorte em JSON (registros), CSV ou Arrow IPC stream
+    """
+    if formato == 'json':
+        return df.to_json(orient='records').encode('utf-8')
+    if formato == 'csv':
+        return df.to_csv(index=False).encode('utf-8')
+    import pyarrow as pa
+    tabela = pa.Table.from_pandas(df, preserve_index=False)
+    saida = io.BytesIO()
+    with pa.ipc.new_stream(saida, tabela.schema) as escritor:
+        escritor.write_table(tabela)
+    return saida.getvalue()
+
+
+def _formato_pedido(parametros: Dict[str, list], cabecalhos: Dict[str, str]) -> str:
+    if 'formato' in parametros:
+        return parametros['formato'][0].lower()
+    aceita = cabecalhos.get('accept', '')
+    for formato, tipo in TIPOS_CONTEUDO.items():
+        if tipo.split(';')[0] in aceita:
+            return formato
+    return 'json'
+
+
+def _resposta_json(status: int, conteudo: Any) -> Tuple[int, Dict[str, str], bytes]:
+    return status, {'Content-Type': TIPOS_CONTEUDO['json']}, json.dumps(conteudo).encode('utf-8')
+
+
+async def responder(estado: Dict[str, Any],
+                    metodo: str,
+                    alvo: str,
+                    cabecalhos: Dict[str, str]) -> Tuple[int, Dict[str, str], bytes]:
+    """
+    Monta a resposta (status, cabeçalhos, corpo) de uma requisição
+    """
+    if metodo not in ('GET', 'HEAD'):
+        return _resposta_json(405, {'erro': 'somente GET'})
+
+    partes = urlsplit(alvo)
+    rota = partes.path.strip('/')
+    parametros = parse_qs(partes.query)
+
+    if rota == 'saude':
+        return _resposta_json(200, {'status': 'ok'})
+
+    if rota == 'tabelas':
+        resumo = {}
+        for nome in estado['caminhos']:
+            tabela = await obter_tabela(estado, nome)
+            if tabela is not None:
+                resumo[nome] = {
+                    'versao': tabela['versao'],
+                    'registros': len(tabela['df']),
+                    'colunas': list(tabela['df'].columns),
+                    'ano_mes_inicial': int(tabela['ano_mes'][0]) if len(tabela['ano_mes']) else None,
+                    'ano_mes_final': int(tabela['ano_mes'][-1]) if len(tabela['ano_mes']) else None
+                }
+        return _resposta_json(200, resumo)
+
+    if rota not in estado['caminhos']:
+        return _resposta_json(404, {'erro': f"tabela '{rota}' não encontrada"})
+
+    try:
+        inicio = int(parametros['inicio'][0]) if 'inicio' in parametros else None
+        fim = int(parametros['fim'][0]) if 'fim' in parametros else None
+    except ValueError:
+        return _resposta_json(400, {'erro': 'inicio e fim devem ser Ano_Mes no formato YYYYMM'})
+
+    formato = _formato_pedido(parametros, cabecalhos)
+    if formato not in TIPOS_CONTEUDO:
+        return _resposta_json(406, {'erro': f"formato '{formato}' não suportado"})
+
+    tabela = await obter_tabela(estado, rota)
+    if tabela is None:
+        return _resposta_json(404, {'erro': f"arquivo da tabela '{rota}' não existe"})
+
+    chave = (rota, tabela['versao'], inicio, fim, formato)
+    etag = '"' + hashlib.blake2b(repr(chave).encode(), digest_size=12).hexdigest() + '"'
+    base = {'ETag': etag, 'Cache-Control': 'no-cache', 'X-Versao-Tabela': tabela['versao']}
+
+    pedidas = [e.strip() for e in cabecalhos.get('if-none-match', '').split(',')]
+    if etag in pedidas or '*' in pedidas:
+        return 304, base, b''
+
+    respostas = estado['respostas']
+    corpo = respostas.get(chave)
+    if corpo is None:
+        try:
+            corpo = serializar(fatiar(tabela, inicio, fim), formato)
+        except ImportError:
+            return _resposta_json(406, {'erro': "formato 'arrow' requer o pacote pyarrow"})
+        respostas[chave] = corpo
+        if len(respostas) > MAX_RESPOSTAS_CACHE:
+            respostas.popitem(last=False)
+    else:
+        respostas.move_to_end(chave)
+    return 200, {**base, 'Content-Type': TIPOS_CONTEUDO[formato]}, corpo
+
+
+async def _ler_requisicao(leitor: asyncio.StreamReader) -> Optional[Tuple[str, str, str, Dict[str, str]]]:
+    try:
+        bruto = await leitor.readuntil(b'\r\n\r\n')
+    except (asyncio.IncompleteReadError, asyncio.LimitOverrunError, ConnectionError):
+        return None
+    linhas = bruto.decode('latin-1').split('\r\n')
+    try:
+        metodo, alvo, versao = linhas[0].split(' ', 2)
+    except ValueError:
+        return None
+    cabecalhos = {}
+    for linha in linhas[1:]:
+        if ':' in linha:
+            nome, valor = linha.split(':', 1)
+            cabecalhos[nome.strip().lower()] = valor.strip()
+    # Corpo de requisição é ignorado (serviço somente leitura), mas consumido
+    tamanho = int(cabecalhos.get('content-length', 0) or 0)
+    if tamanho:
+        await leitor.readexactly(tamanho)
+    return metodo.upper(), alvo, versao.upper(), cabecalhos
+
+
+async def tratar_conexao(estado: Dict[str, Any],
+                         leitor: asyncio.StreamReader,
+                         escritor: asyncio.StreamWriter) -> None:
+    """
+    Atende as requisições de uma conexão (keep-alive)
+    """
+    try:
+        while True:
+            requisicao = await _ler_requisicao(leitor)
+            if requisicao is None:
+                break
+            metodo, alvo, versao, cabecalhos = requisicao
+            try:
+                status, extras, corpo = await responder(estado, metodo, alvo, cabecalhos)
+            except Exception as e:
+                status, extras, corpo = _resposta_json(500, {'erro': str(e)})
+
+            manter = cabecalhos.get('connection', '').lower() != 'close' and versao != 'HTTP/1.0'
+            linhas = [f"HTTP/1.1 {status} {MOTIVOS.get(status, '')}",
+                      f"Content-Length: {len(corpo)}",
+                      f"Connection: {'keep-alive' if manter else 'close'}"]
+            linhas += [f"{nome}: {valor}" for nome, valor in extras.items()]
+            escritor.write(('\r\n'.join(linhas) + '\r\n\r\n').encode('latin-1'))
+            if metodo != 'HEAD':
+                escritor.write(corpo)
+            await escritor.drain()
+            if not manter:
+                break
+    except ConnectionError:
+        pass
+    finally:
+        escritor.close()
+        try:
+            await escritor.wait_closed()
+        except ConnectionError:
+            pass
+
+
+async def iniciar_servico(host: str = SERVICO_HOST,
+                          porta: int = SERVICO_PORTA,
+                          diretorio: Optional[str] = None,
+                          intervalo_verificacao: float = 1.0) -> Tuple[asyncio.AbstractServer, Dict[str, Any]]:
+    """
+    Inicia o servidor (porta 0 escolhe uma porta livre)
+
+    Returns:
+        Tupla (asyncio.Server, estado do serviço)
+    """
+    estado = criar_estado(diretorio, intervalo_verificacao=intervalo_verificacao)
+    # Pré-carrega as tabelas para que a primeira requisição não pague a leitura
+    for nome in estado['caminhos']:
+        await obter_tabela(estado, nome)
+    servidor = await asyncio.start_server(
+        lambda leitor, escritor: tratar_conexao(estado, leitor, escritor), host, porta, backlog=1024)
+    return servidor, estado
+
+
+def executar(host: str = SERVICO_HOST, porta: int = SERVICO_PORTA, diretorio: Optional[str] = None) -> None:
+    """
+    Executa o serviço até ser interrompido (Ctrl+C)
+    """
+    async def principal():
+        servidor, _ = await iniciar_servico(host, porta, diretorio)
+        enderecos = ', '.join(str(s.getsockname()) for s in servidor.sockets)
+        print(f"🌐 Serviço de dados em {enderecos}")
+        async with servidor:
+            await servidor.serve_forever()
+
+    try:
+        asyncio.run(principal())
+    except KeyboardInterrupt:
+        print("🛑 Serviço encerrado")
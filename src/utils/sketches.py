@@ -0,0 +1,132 @@
+"""
+Sketches de quantis mergeáveis para valores de venda
+
+Implementa um sketch de buckets logarítmicos (estilo DDSketch): cada valor
+positivo v cai no bucket ceil(log(v) / log(gamma)), com
+gamma = (1 + alfa) / (1 - alfa). Qualquer quantil estimado tem erro relativo
+de no máximo alfa, e o sketch é só uma contagem por (chave, bucket): mesclar
+sketches de chunks ou shards diferentes é somar as contagens. Para tickets
+entre R$ 1 e R$ 1.000 com alfa = 1% são cerca de 350 buckets por chave.
+
+Valores menores ou iguais a zero são contados no bucket BUCKET_ZERO e
+estimados como 0.
+"""
+
+import numpy as np
+import pandas as pd
+from typing import Iterable, Sequence
+
+ALFA_PADRAO = 0.01
+BUCKET_ZERO = -(2 ** 31)
+
+
+def _gamma(alfa: float) -> float:
+    return (1 + alfa) / (1 - alfa)
+
+
+def indices_buckets(valores, alfa: float = ALFA_PADRAO) -> np.ndarray:
+    """
+    Calcula o bucket de cada valor (vetorizado)
+    """
+    valores = np.asarray(valores, dtype=float)
+    indices = np.full(valores.shape, BUCKET_ZERO, dtype=np.int64)
+    positivos = valores > 0
+    indices[positivos] = np.ceil(np.log(valores[positivos]) / np.log(_gamma(alfa))).astype(np.int64)
+    return indices
+
+
+def valor_bucket(indices, alfa: float = ALFA_PADRAO) -> np.ndarray:
+    """
+    Valor representativo de cada bucket (erro relativo <= alfa)
+    """
+    indices = np.asarray(indices, dtype=np.int64)
+    gamma = _gamma(alfa)
+    zero = indices == BUCKET_ZERO
+    expoentes = np.where(zero, 0, indices).astype(float)
+    valores = 2 * np.power(gamma, expoentes) / (gamma + 1)
+    return np.where(zero, 0.0, valores)
+
+
+def construir_sketch(chaves,
+                     valores,
+                     nome_chave: str = 'Ano_Mes',
+                     alfa: float = ALFA_PADRAO) -> pd.DataFrame:
+    """
+    Constrói os sketches de todas as chaves em uma passada
+
+    Args:
+        chaves: Chave de cada valor (ex: Ano_Mes da transação)
+        valores: Valores a resumir (ex: Valor_Total_Venda)
+        nome_chave: Nome da coluna de chave no sketch
+        alfa: Erro relativo máximo dos quantis
+
+    Returns:
+        DataFrame longo com colunas [nome_chave, bucket, contagem]
+    """
+    chaves = np.asarray(chaves)
+    valores = np.asarray(valores, dtype=float)
+    validos = ~np.isnan(valores)
+    base = pd.DataFrame({nome_chave: chaves[validos],
+                         'bucket': indices_buckets(valores[validos], alfa)})
+    sketch = base.groupby([nome_chave, 'bucket'], sort=True).size().rename('contagem')
+    return sketch.reset_index()
+
+
+def mesclar_sketches(sketches: Iterable[pd.DataFrame],
+                     nome_chave: str = 'Ano_Mes') -> pd.DataFrame:
+    """
+    Mescla sketches (de chunks, shards ou cargas) somando as contagens
+    """
+    sketches = [s for s in sketches if s is not None and not s.empty]
+    if not sketches:
+        return pd.DataFrame(columns=[nome_chave, 'bucket', 'contagem'])
+    juntos = pd.concat(sketches, ignore_index=True)
+    return juntos.groupby([nome_chave, 'bucket'], sort=True)['contagem'].sum().reset_index()
+
+
+def quantis_sketch(sketch: pd.DataFrame,
+                   quantis: Sequence[float] = (0.5, 0.9, 0.99),
+                   nome_chave: str = 'Ano_Mes',
+                   alfa: float = ALFA_PADRAO,
+                   prefixo: str = 'P') -> pd.DataFrame:
+    """
+    Estima quantis de todas as chaves a partir do sketch
+
+    Args:
+        sketch: Resultado de construir_sketch/mesclar_sketches
+        quantis: Quantis desejados (entre 0 e 1)
+        nome_chave: Coluna de chave
+        alfa: O mesmo alfa usado na construção
+        prefixo: Prefixo das colunas de saída (P50, P90, ...)
+
+    Returns:
+        DataFrame com uma linha por chave e uma coluna por quantil (vazio
+        para um sketch sem contagens)
+    """
+    colunas = [f"{prefixo}{round(q * 100):g}" for q in quantis]
+    if sketch.empty:
+        vazio = pd.DataFrame({nome_chave: sketch[nome_chave]})
+        return vazio.assign(**{coluna: pd.Series(dtype=float) for coluna in colunas})
+    ordenado = sketch.sort_values([nome_chave, 'bucket'])
+    chaves = ordenado[nome_chave].to_numpy()
+    contagens = ordenado['contagem'].to_numpy(dtype=np.int64)
+    valores = valor_bucket(ordenado['bucket'].to_numpy(), alfa)
+
+    # início de cada grupo e acumulado dentro do grupo
+    inicio = np.r_[True, chaves[1:] != chaves[:-1]]
+    grupo = np.cumsum(inicio) - 1
+    acumulado = np.cumsum(contagens)
+    base_grupo = (acumulado - contagens)[inicio]
+    acumulado_grupo = acumulado - base_grupo[grupo]
+    total_grupo = np.add.reduceat(contagens, np.flatnonzero(inicio))
+
+    resultado = pd.DataFrame({nome_chave: chaves[inicio]})
+    for q, coluna in zip(quantis, colunas):
+        # posição (0-based) do quantil em cada grupo, como no DDSketch
+        posicao = np.floor(q * (total_grupo - 1))
+        alvo = acumulado_grupo > posicao[grupo]
+        # primeiro bucket de cada grupo que ultrapassa a posição
+        candidatos = np.where(alvo, np.arange(len(alvo)), len(alvo))
+        primeiro = np.minimum.reduceat(candidatos, np.flatnonzero(inicio))
+        resultado[coluna] = valores[primeiro]
+    return resultado
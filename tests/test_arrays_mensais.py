@@ -0,0 +1,85 @@
+"""
+Testes da exportação de arrays mensais mapeados em memória
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.arrays_mensais import (anexar_mensal, coluna_mensal, exportar_mensal,
+                                      exportar_tabelas, meses_da_tabela, valores_mensais)
+
+
+class TestArraysMensais(unittest.TestCase):
+
+    def setUp(self):
+        self.gold = pd.DataFrame({
+            'Ano_Mes': [202311, 202312, 202402],
+            'variacao_mensal': [0.28, 0.56, 0.83],
+            'Valor_Total_Mes': [1000.0, 1500.0, 1200.0],
+            'Produto': ['a', 'b', 'c']
+        })
+
+    def test_exporta_e_anexa_sem_copia(self):
+        """Testa eixo mensal contínuo, cabeçalho e acesso via memmap"""
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = exportar_mensal(self.gold, 'gold', pasta)
+            tabela = anexar_mensal(caminho)
+
+            self.assertIsInstance(tabela['dados'], np.memmap)
+            self.assertEqual(tabela['cabecalho']['colunas'], ['variacao_mensal', 'Valor_Total_Mes'])
+            self.assertEqual(tabela['cabecalho']['ano_mes_final'], 202402)
+            np.testing.assert_array_equal(meses_da_tabela(tabela), [202311, 202312, 202401, 202402])
+            self.assertTrue(np.isnan(coluna_mensal(tabela, 'Valor_Total_Mes')[2]))
+            np.testing.assert_array_equal(
+                valores_mensais(tabela, 'Valor_Total_Mes', [202402, 202311, 202501]),
+                [1200.0, 1000.0, np.nan])
+            del tabela
+
+    def test_reexporta_so_quando_origem_muda(self):
+        """Testa que a exportação é pulada com o CSV de origem inalterado"""
+        with tempfile.TemporaryDirectory() as origem, tempfile.TemporaryDirectory() as destino:
+            csv = os.path.join(origem, 'tabela_gold_ipca_vendas.csv')
+            self.gold.to_csv(csv, index=False)
+            caminho = exportar_tabelas(origem, destino)['gold']
+            mtime = os.stat(caminho).st_mtime_ns
+
+            exportar_tabelas(origem, destino)
+            self.assertEqual(os.stat(caminho).st_mtime_ns, mtime)
+
+            self.gold.assign(Valor_Total_Mes=0.0).to_csv(csv, index=False)
+            os.utime(csv, ns=(mtime + 10**9, mtime + 10**9))
+            exportar_tabelas(origem, destino)
+            self.assertEqual(coluna_mensal(anexar_mensal(caminho), 'Valor_Total_Mes')[0], 0.0)
+
+    def test_versoes_da_matriz(self):
+        """Testa que o cabeçalho nomeia a matriz da sua versão e só a anterior é mantida"""
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = exportar_mensal(self.gold, 'gold', pasta)
+            primeira = anexar_mensal(caminho)
+            nome_primeira = primeira['cabecalho']['arquivo']
+            self.assertRegex(nome_primeira, r'^gold_[0-9a-f]{16}\.npy$')
+
+            # Mesmo conteúdo, mesma versão
+            exportar_mensal(self.gold, 'gold', pasta)
+            self.assertEqual(anexar_mensal(caminho)['cabecalho']['arquivo'], nome_primeira)
+
+            # Um mês a mais: matriz nova, e a do cabeçalho lido antes continua consistente
+            exportar_mensal(pd.concat([self.gold, self.gold.assign(Ano_Mes=[202403, 202404, 202405])]),
+                            'gold', pasta)
+            segunda = anexar_mensal(caminho)
+            self.assertNotEqual(segunda['cabecalho']['arquivo'], nome_primeira)
+            self.assertEqual(segunda['dados'].shape, (7, 2))
+            self.assertEqual(np.load(os.path.join(pasta, nome_primeira)).shape, (4, 2))
+
+            exportar_mensal(self.gold.assign(Valor_Total_Mes=1.0), 'gold', pasta)
+            terceira = anexar_mensal(caminho)['cabecalho']['arquivo']
+            self.assertEqual(sorted(f for f in os.listdir(pasta) if f.endswith('.npy')),
+                             sorted([segunda['cabecalho']['arquivo'], terceira]))
+            np.testing.assert_array_equal(primeira['dados'][:, 1], [1000.0, 1500.0, np.nan, 1200.0])
+            del primeira, segunda
+
+
+if __name__ == '__main__':
+    unittest.main()
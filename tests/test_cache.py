@@ -0,0 +1,85 @@
+"""
+Testes do cache em disco de carregamentos
+"""
+
+import os
+import tempfile
+import time
+import unittest
+import pandas as pd
+from src.utils.cache import memoizar_em_disco, aplicar_limites
+
+
+class TestCache(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.cache = os.path.join(self.pasta.name, 'cache')
+        self.arquivo = os.path.join(self.pasta.name, 'dados.csv')
+        pd.DataFrame({'a': [1, 2]}).to_csv(self.arquivo, index=False)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_reutiliza_e_invalida_por_arquivo(self):
+        """Testa acerto de cache e invalidação quando o arquivo muda"""
+        chamadas = []
+
+        @memoizar_em_disco(argumentos_arquivo=('caminho',), diretorio=self.cache)
+        def carregar(caminho, fator=1):
+            chamadas.append(caminho)
+            return pd.read_csv(caminho) * fator
+
+        primeiro = carregar(self.arquivo)
+        segundo = carregar(self.arquivo)
+        self.assertEqual(len(chamadas), 1)
+        pd.testing.assert_frame_equal(primeiro, segundo)
+
+        carregar(self.arquivo, fator=2)
+        self.assertEqual(len(chamadas), 2)
+
+        pd.DataFrame({'a': [1, 2, 3]}).to_csv(self.arquivo, index=False)
+        self.assertEqual(len(carregar(self.arquivo)), 3)
+        self.assertEqual(len(chamadas), 3)
+
+    def test_invalida_por_arquivo_associado(self):
+        """Testa que criar ou alterar o arquivo ao lado (ex: esquema) invalida o cache"""
+        chamadas = []
+        lateral = lambda caminho: caminho + '.schema.json'
+
+        @memoizar_em_disco(argumentos_arquivo=('caminho',), arquivos_associados=(lateral,),
+                           diretorio=self.cache)
+        def carregar(caminho):
+            chamadas.append(caminho)
+            return pd.read_csv(caminho)
+
+        carregar(self.arquivo)
+        carregar(self.arquivo)
+        self.assertEqual(len(chamadas), 1)
+        with open(lateral(self.arquivo), 'w') as arquivo:
+            arquivo.write('{}')
+        carregar(self.arquivo)
+        self.assertEqual(len(chamadas), 2)
+        with open(lateral(self.arquivo), 'w') as arquivo:
+            arquivo.write('{"colunas": []}')
+        carregar(self.arquivo)
+        self.assertEqual(len(chamadas), 3)
+
+    def test_descarte_lru(self):
+        """Testa que as entradas menos usadas são descartadas primeiro"""
+        os.makedirs(self.cache)
+        for i, nome in enumerate(['antiga', 'media', 'nova']):
+            caminho = os.path.join(self.cache, f'{nome}.pkl')
+            with open(caminho, 'wb') as arquivo:
+                arquivo.write(b'x' * 10)
+            instante = time.time() - 100 + i
+            os.utime(caminho, (instante, instante))
+
+        descartadas = aplicar_limites(self.cache, max_mb=1, max_entradas=2)
+
+        self.assertEqual(descartadas, 1)
+        self.assertEqual(sorted(os.listdir(self.cache)), ['media.pkl', 'nova.pkl'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,97 @@
+"""
+Testes do teste de carga local dos handlers Lambda
+"""
+
+import csv
+import io
+import unittest
+from urllib.request import urlopen
+from src.utils.carga_lambdas import (COLUNAS_FERIADOS, NoSuchKey, PreconditionFailed,
+                                     _executar_medindo_rss, _rss_mb, criar_s3_emulado, executar_carga, iniciar_servidor_feriados,
+                                     parar_servidor_feriados)
+
+
+class TestCargaLambdas(unittest.TestCase):
+
+    def test_s3_emulado(self):
+        """Testa operações e contagem de requisições do S3 em memória"""
+        s3 = criar_s3_emulado()
+        s3.put_object(Bucket='b', Key='raw/a.csv', Body='x,y\n1,2\n')
+        s3.put_object(Bucket='b', Key='raw/b.csv', Body=io.BytesIO(b'z\n'))
+        self.assertEqual(s3.get_object(Bucket='b', Key='raw/b.csv')['Body'].read(), b'z\n')
+
+        paginas = list(s3.get_paginator('list_objects_v2').paginate(Bucket='b', Prefix='raw/'))
+        self.assertEqual([o['Key'] for o in paginas[0]['Contents']], ['raw/a.csv', 'raw/b.csv'])
+
+        s3.delete_object(Bucket='b', Key='raw/a.csv')
+        with self.assertRaises(s3.exceptions.NoSuchKey):
+            s3.get_object(Bucket='b', Key='raw/a.csv')
+        self.assertTrue(issubclass(s3.exceptions.NoSuchKey, NoSuchKey))
+        self.assertEqual(dict(s3.estado['requisicoes']),
+                         {'PutObject': 2, 'GetObject': 2, 'ListObjectsV2': 1, 'DeleteObject': 1})
+
+    def test_s3_emulado_escrita_condicional(self):
+        """Testa IfMatch pelo ETag lido e IfNoneMatch='*' (412 como o boto3)"""
+        s3 = criar_s3_emulado()
+        s3.put_object(Bucket='b', Key='c.csv', Body='v1', IfNoneMatch='*')
+        with self.assertRaises(PreconditionFailed) as erro:
+            s3.put_object(Bucket='b', Key='c.csv', Body='v2', IfNoneMatch='*')
+        self.assertEqual(erro.exception.response['ResponseMetadata']['HTTPStatusCode'], 412)
+
+        etag = s3.get_object(Bucket='b', Key='c.csv')['ETag']
+        s3.put_object(Bucket='b', Key='c.csv', Body='v2', IfMatch=etag)
+        with self.assertRaises(PreconditionFailed):
+            s3.put_object(Bucket='b', Key='c.csv', Body='v3', IfMatch=etag)
+        self.assertEqual(s3.get_object(Bucket='b', Key='c.csv')['Body'].read(), b'v2')
+
+    def test_servidor_feriados(self):
+        """Testa CSV sintético servido por categoria e ano"""
+        servidor = iniciar_servidor_feriados(linhas=30)
+        try:
+            with urlopen(servidor['url'] + 'municipal/csv/2024.csv') as resposta:
+                linhas = list(csv.reader(io.TextIOWrapper(resposta, encoding='utf-8')))
+            with self.assertRaises(Exception):
+                urlopen(servidor['url'] + 'outra/csv/2024.csv')
+        finally:
+            parar_servidor_feriados(servidor)
+        self.assertEqual(linhas[0], COLUNAS_FERIADOS)
+        self.assertEqual(len(linhas), 31)
+        self.assertEqual(linhas[1][0], '01/01/2024')
+        self.assertEqual(servidor['requisicoes'], 2)
+
+    def test_pico_rss_da_funcao(self):
+        """Testa que o pico medido capta só a alocação temporária da própria chamada"""
+        antes = _rss_mb()
+        len(b'y' * (256 * 1024 ** 2))  # pico anterior, fora da chamada medida
+        tamanho, pico = _executar_medindo_rss(lambda: len(b'x' * (64 * 1024 ** 2)))
+        self.assertEqual(tamanho, 64 * 1024 ** 2)
+        if antes is None or pico is None:
+            self.skipTest('pico de RSS indisponível (sem /proc/self/clear_refs)')
+        self.assertGreater(pico - antes, 48)
+        self.assertLess(pico - antes, 160)
+        self.assertLess(_rss_mb() - antes, 32)
+
+    def test_carga_download(self):
+        """Testa o script 1 a frio e quente contra o servidor e o S3 locais"""
+        resultado = executar_carga('download', objetos=6, linhas=50, repeticoes=2)
+        # 6 arquivos viram 2 anos x 4 categorias
+        self.assertEqual(resultado['objetos'], 8)
+        self.assertEqual(resultado['status'], [200, 200])
+        self.assertEqual(resultado['requisicoes_http'], 8)
+        self.assertEqual(resultado['requisicoes_s3'], {'PutObject': 8})
+        self.assertEqual(resultado['objetos_s3'], 8)
+        self.assertGreater(resultado['frio_s'], 0)
+        self.assertIsNotNone(resultado['quente_s'])
+
+    def test_carga_transferir_incremental(self):
+        """Testa o script 2: varredura completa a frio e eventos S3 quentes"""
+        resultado = executar_carga('transferir', objetos=5, linhas=40, repeticoes=3, modo='incremental')
+        self.assertEqual(resultado['status'], [200, 200, 200])
+        # Evento com um arquivo: lê consolidado e arquivo, grava processado e consolidado
+        self.assertEqual(resultado['requisicoes_s3'], {'GetObject': 2, 'PutObject': 2})
+        # 5 brutos + 5 processados + consolidado
+        self.assertEqual(resultado['objetos_s3'], 11)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Testes do motor de cenários Monte Carlo de vendas sob inflação
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.cenarios import (ajustar_tendencia, amostrador_normal, resumo_percentis,
+                                simular_cenarios)
+
+
+class TestCenarios(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(5)
+        meses = pd.period_range('2019-01', periods=60, freq='M')
+        sazonal = 1 + 0.2 * (meses.month == 12)
+        self.gold = pd.DataFrame({
+            'Ano_Mes': meses.year * 100 + meses.month,
+            'variacao_mensal': rng.normal(0.4, 0.3, 60),
+            'Valor_Total_Mes': 50000 * 1.01 ** np.arange(60) * sazonal * np.exp(rng.normal(0, 0.02, 60))
+        })
+
+    def test_tendencia(self):
+        """Testa crescimento e sazonalidade recuperados da série"""
+        tendencia = ajustar_tendencia(self.gold)
+        self.assertAlmostEqual(np.exp(tendencia['inclinacao']), 1.01, places=2)
+        self.assertAlmostEqual(np.exp(tendencia['sazonal'][11]), 1.2, delta=0.05)
+        self.assertEqual(tendencia['chave_final'], 2023 * 12 + 11)
+
+    def test_caminhos_bootstrap(self):
+        """Testa formato, meses futuros e relação entre índice, nominal e real"""
+        cenarios = simular_cenarios(self.gold, horizonte=24, caminhos=500)
+        self.assertEqual(cenarios['indice'].shape, (500, 24))
+        self.assertEqual(cenarios['meses'][0], 202401)
+        self.assertEqual(cenarios['meses'][-1], 202512)
+        np.testing.assert_allclose(cenarios['real'] * cenarios['indice'], cenarios['nominal'])
+
+        # No bootstrap toda variação sorteada é um mês histórico
+        variacoes = np.diff(np.log(cenarios['indice']), axis=1)
+        historico = np.log1p(self.gold['variacao_mensal'].to_numpy() / 100)
+        self.assertTrue(np.isin(np.round(variacoes, 10), np.round(historico, 10)).all())
+
+    def test_reprodutivel_com_processos(self):
+        """Testa o mesmo resultado com e sem pool de processos"""
+        argumentos = dict(horizonte=12, caminhos=25_000, semente=7)
+        serial = simular_cenarios(self.gold, processos=1, **argumentos)
+        paralelo = simular_cenarios(self.gold, processos=2, **argumentos)
+        np.testing.assert_array_equal(serial['indice'], paralelo['indice'])
+        np.testing.assert_array_equal(serial['nominal'], paralelo['nominal'])
+
+    def test_distribuicao_informada(self):
+        """Testa amostrador próprio e percentis por mês"""
+        cenarios = simular_cenarios(self.gold, horizonte=12, caminhos=20_000,
+                                    amostrador=amostrador_normal(0.5, 0.1))
+        resumo = resumo_percentis(cenarios, percentis=(5, 50, 95))
+        self.assertEqual(len(resumo), 12)
+        # 12 meses a 0,5% ao mês: ~6,17% acumulado na mediana
+        self.assertAlmostEqual(resumo['IPCA_Acumulado_P50'].iloc[-1], 6.17, delta=0.1)
+        self.assertTrue((resumo['Valor_Real_P5'] <= resumo['Valor_Real_P50']).all())
+        self.assertTrue((resumo['Valor_Real_P50'] <= resumo['Valor_Real_P95']).all())
+
+
+if __name__ == '__main__':
+    unittest.main()
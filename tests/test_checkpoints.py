@@ -0,0 +1,188 @@
+"""
+Testes dos checkpoints de processamentos em chunks
+"""
+
+import contextlib
+import io
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+import src.scripts.tratamento_vendas as tratamento_vendas
+from src.utils import memoria
+from src.utils.checkpoints import carregar_checkpoint, limpar_checkpoint, salvar_checkpoint
+from src.utils.deduplicacao import listar_segmentos
+from src.utils.particoes_vendas import converter_vendas_parquet
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+class TestCheckpoints(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.diretorio = os.path.join(self.pasta.name, 'checkpoint')
+        self.identidade = {'fonte': 'vendas.csv', 'origem': ['vendas.csv', 100, 1], 'inicio': None}
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_salvar_e_retomar(self):
+        """Testa progresso e artefatos recuperados e gerações antigas removidas"""
+        cubo = pd.DataFrame({'Ano_Mes': [202401, 202402], 'Valor_Total': [10.0, 20.0]})
+        chaves = np.array([3, 1, 2], dtype=np.uint64)
+        salvar_checkpoint(self.diretorio, self.identidade, {'linhas': 10},
+                          {'cubo': cubo.iloc[:1], 'chaves': chaves[:1]})
+        geracao = salvar_checkpoint(self.diretorio, self.identidade, {'linhas': np.int64(30)},
+                                    {'cubo': cubo, 'chaves': chaves})
+
+        progresso, artefatos = carregar_checkpoint(self.diretorio, self.identidade)
+        self.assertEqual(geracao, 2)
+        self.assertEqual(progresso, {'linhas': 30})
+        pd.testing.assert_frame_equal(artefatos['cubo'], cubo)
+        np.testing.assert_array_equal(artefatos['chaves'], chaves)
+        self.assertEqual(sorted(os.listdir(self.diretorio)),
+                         ['chaves_000002.npy', 'cubo_000002.pkl', 'estado.json'])
+
+    def test_identidade_diferente_ou_ausente(self):
+        """Testa que checkpoint de outra fonte é ignorado e limpar remove tudo"""
+        self.assertIsNone(carregar_checkpoint(self.diretorio, self.identidade))
+        salvar_checkpoint(self.diretorio, self.identidade, {'linhas': 10}, {})
+        outra = dict(self.identidade, origem=['vendas.csv', 200, 2])
+        self.assertIsNone(carregar_checkpoint(self.diretorio, outra))
+        self.assertIsNotNone(carregar_checkpoint(self.diretorio, dict(self.identidade)))
+        limpar_checkpoint(self.diretorio)
+        self.assertFalse(os.path.exists(self.diretorio))
+
+
+class TestRetomadaVendas(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        pasta = self.pasta.name
+        for nome, caminho in (('DIRETORIO_SAIDA', pasta),
+                              ('DIRETORIO_INDICE', os.path.join(pasta, 'indice')),
+                              ('DIRETORIO_CARGA', os.path.join(pasta, 'carga'))):
+            patcher = mock.patch.object(tratamento_vendas, nome, caminho)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+        self.checkpoint = os.path.join(pasta, 'checkpoint')
+
+        rng = np.random.default_rng(7)
+        n = 20_000
+        datas = pd.Timestamp('2023-01-01') + pd.to_timedelta(rng.integers(0, 700, n), unit='D')
+        vendas = pd.DataFrame({
+            'data': datas.strftime('%d/%m/%Y'),
+            'produto': rng.choice(['Bolo', 'Torta', 'Pudim'], n),
+            'valor_unitario': rng.uniform(1, 50, n).round(2),
+            'quantidade': rng.integers(1, 5, n)
+        })
+        # Linhas repetidas dentro da mesma carga (descartadas no modo incremental)
+        vendas = pd.concat([vendas, vendas.sample(1000, random_state=7)], ignore_index=True)
+        self.vendas = vendas
+        self.csv = os.path.join(pasta, 'vendas.csv')
+        vendas.to_csv(self.csv, index=False)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _tratar(self, fonte, checkpoint, falhar_em=None, incremental=False):
+        original = tratamento_vendas.processar_lote
+        chamadas = []
+
+        def processar_lote(*args):
+            chamadas.append(1)
+            if len(chamadas) == falhar_em:
+                raise RuntimeError('queda simulada')
+            return original(*args)
+
+        with mock.patch.object(tratamento_vendas, 'processar_lote', processar_lote), \
+                mock.patch.object(memoria, 'LINHAS_MINIMAS', 2000), \
+                contextlib.redirect_stdout(io.StringIO()):
+            return tratamento_vendas.tratar_vendas_confeitaria(
+                fonte, retornar_detalhes=True, incremental=incremental, max_memoria='1KB',
+                checkpoint=checkpoint, checkpoint_segundos=0)
+
+    def _chaves_carga(self):
+        segmentos = listar_segmentos(tratamento_vendas.DIRETORIO_CARGA)
+        return np.sort(np.concatenate([np.load(c) for c in segmentos]))
+
+    def _csv_com_linhas(self, produto, em_branco='', bruto=False):
+        """Grava um CSV com alguns produtos trocados e linhas em branco intercaladas"""
+        vendas = self.vendas.copy()
+        vendas.loc[::97, 'produto'] = 'PRODUTO' if bruto else produto
+        linhas = vendas.to_csv(index=False).splitlines(keepends=True)
+        if bruto:
+            # Gravado como está, sem as aspas que o to_csv acrescentaria
+            linhas = [l.replace('PRODUTO', produto) for l in linhas]
+        if em_branco:
+            linhas = [l + (em_branco if i % 53 == 0 else '') for i, l in enumerate(linhas)]
+        caminho = os.path.join(self.pasta.name, 'vendas_especiais.csv')
+        with open(caminho, 'w', newline='') as arquivo:
+            arquivo.writelines(linhas)
+        return caminho
+
+    def _verificar_retomada(self, fonte, pular_linhas=False):
+        for incremental in (False, True):
+            with self.subTest(incremental=incremental):
+                esperado = self._tratar(fonte, None, incremental=incremental)
+                chaves = self._chaves_carga()
+
+                # Duas quedas seguidas, cada uma depois de um checkpoint
+                for falhar_em in (4, 2):
+                    with self.assertRaises(RuntimeError):
+                        self._tratar(fonte, self.checkpoint, falhar_em, incremental)
+                identidade = tratamento_vendas.identidade_execucao(
+                    fonte, os.path.isdir(fonte), incremental, None, None)
+                progresso, _ = carregar_checkpoint(self.checkpoint, identidade)
+                self.assertGreater(progresso['linhas'], 0)
+                self.assertEqual(progresso.get('pular_linhas', False), pular_linhas)
+                retomado = self._tratar(fonte, self.checkpoint, incremental=incremental)
+
+                pd.testing.assert_frame_equal(retomado['mensal'], esperado['mensal'])
+                pd.testing.assert_frame_equal(retomado['cubo'], esperado['cubo'])
+                pd.testing.assert_frame_equal(retomado['sketch'], esperado['sketch'])
+                np.testing.assert_array_equal(self._chaves_carga(), chaves)
+                limpar_checkpoint(self.checkpoint)
+
+    def test_retomada_csv(self):
+        """Testa carga CSV interrompida retomada com o mesmo resultado de uma carga direta"""
+        self._verificar_retomada(self.csv)
+
+    def test_retomada_csv_linhas_em_branco(self):
+        """Testa retomada por bytes com linhas em branco, que o pandas não conta"""
+        self._verificar_retomada(self._csv_com_linhas('Bolo', em_branco='\n  \t\n\n'))
+
+    def test_retomada_csv_quebra_de_linha_entre_aspas(self):
+        """Testa retomada por bytes com quebras de linha dentro de campos entre aspas"""
+        self._verificar_retomada(self._csv_com_linhas('Bolo\nde pote, "grande"\n\n'))
+
+    def test_retomada_csv_aspas_no_meio_do_campo(self):
+        """Testa que aspas fora do início do campo fazem a retomada pular as linhas lidas"""
+        self._verificar_retomada(self._csv_com_linhas('Bolo 5" x 7"', bruto=True), pular_linhas=True)
+
+    def test_incremental_sem_novidades(self):
+        """Testa que uma carga incremental sem transações novas não é tratada como erro"""
+        primeira = self._tratar(self.csv, None, incremental=True)
+        with contextlib.redirect_stdout(io.StringIO()):
+            tratamento_vendas.salvar_cubo_vendas(primeira['cubo'])
+            tratamento_vendas.salvar_sketch_vendas(primeira['sketch'])
+            tratamento_vendas.registrar_carga(incremental=True)
+        resultado = self._tratar(self.csv, None, incremental=True)
+        self.assertEqual(resultado, {'mensal': None, 'cubo': None, 'sketch': None, 'sem_novidades': True})
+
+    @unittest.skipUnless(pq is not None, 'pyarrow não instalado')
+    def test_retomada_parquet(self):
+        """Testa retomada pelo Parquet, que pula as linhas já processadas dos lotes"""
+        parquet = os.path.join(self.pasta.name, 'parquet')
+        converter_vendas_parquet(self.csv, parquet)
+        self._verificar_retomada(parquet)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,42 @@
+"""
+Testes do código de saída da CLI quando uma etapa local falha
+"""
+
+import contextlib
+import io
+import unittest
+from unittest import mock
+from src.scripts import cli
+
+
+class TestCli(unittest.TestCase):
+
+    def _main(self, etapa, resultado):
+        atualizada = {'etapa': etapa, 'atualizada': False, 'motivo': 'saída ainda não gerada'}
+        with mock.patch.object(cli, 'situacao_etapa', return_value=atualizada), \
+                mock.patch.object(cli, 'executar_etapa', return_value=resultado), \
+                contextlib.redirect_stdout(io.StringIO()):
+            return cli.main([etapa])
+
+    def test_etapa_concluida(self):
+        """Testa retorno das funções e globais dos scripts executados via runpy"""
+        self.assertFalse(cli.etapa_concluida('ipca', None))
+        self.assertTrue(cli.etapa_concluida('gold', object()))
+        self.assertFalse(cli.etapa_concluida('vendas', {'resultado': {}}))
+        self.assertFalse(cli.etapa_concluida('vendas', {'resultado': {'mensal': 1}, 'arquivo_salvo': 'x',
+                                                        'cubo_salvo': None, 'sketch_salvo': 'z'}))
+        self.assertTrue(cli.etapa_concluida('vendas', {'resultado': {'mensal': 1}, 'arquivo_salvo': 'x',
+                                                       'cubo_salvo': 'y', 'sketch_salvo': 'z'}))
+        self.assertTrue(cli.etapa_concluida('vendas', {'resultado': {'sem_novidades': True}}))
+        self.assertFalse(cli.etapa_concluida('feriados', {'arquivo_final': None}))
+
+    def test_codigo_de_saida(self):
+        """Testa que a falha de uma etapa sai com código diferente de zero"""
+        self.assertEqual(self._main('ipca', None), 1)
+        self.assertEqual(self._main('vendas', {'resultado': {}}), 1)
+        self.assertEqual(self._main('ipca', object()), 0)
+        self.assertEqual(self._main('feriados', {'arquivo_final': 'feriados_completo.csv'}), 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
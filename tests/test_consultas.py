@@ -0,0 +1,57 @@
+"""
+Testes da camada de consultas SQL
+"""
+
+import os
+import tempfile
+import time
+import unittest
+import pandas as pd
+from src.utils.consultas import consultar
+
+
+class TestConsultas(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.banco = os.path.join(self.pasta.name, 'consultas.sqlite')
+        os.makedirs(os.path.join(self.pasta.name, 'feriados'))
+        pd.DataFrame({
+            'Ano_Mes': [202409, 202410, 202411],
+            'variacao_mensal': [0.44, 0.56, 0.39],
+            'Valor_Total_Mes': [100.0, 200.0, 300.0]
+        }).to_csv(os.path.join(self.pasta.name, 'tabela_gold_ipca_vendas.csv'), index=False)
+        pd.DataFrame({
+            'Data': ['12/10/2024', '15/11/2024', '09/07/2024'],
+            'Nome_Feriado': ['Aparecida', 'República', 'Revolução Constitucionalista'],
+            'Sigla_Estado': ['', '', 'SP']
+        }).to_csv(os.path.join(self.pasta.name, 'feriados', 'feriados_completo.csv'), index=False)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def consultar(self, sql):
+        return consultar(sql, caminho=self.banco, diretorio=self.pasta.name)
+
+    def test_consulta_gold_e_feriados(self):
+        """Testa filtros por Ano_Mes/variação e por trimestre nas datas ISO"""
+        gold = self.consultar('SELECT Ano_Mes FROM gold WHERE variacao_mensal > 0.5')
+        self.assertEqual(gold['Ano_Mes'].tolist(), [202410])
+
+        q4 = self.consultar('SELECT Data FROM vw_feriados WHERE Trimestre = 4 ORDER BY Data')
+        self.assertEqual(q4['Data'].tolist(), ['2024-10-12', '2024-11-15'])
+
+    def test_sincroniza_quando_arquivo_muda(self):
+        """Testa que uma nova saída da etapa é refletida na próxima consulta"""
+        self.assertEqual(self.consultar('SELECT COUNT(*) AS n FROM gold')['n'].iloc[0], 3)
+
+        caminho = os.path.join(self.pasta.name, 'tabela_gold_ipca_vendas.csv')
+        pd.DataFrame({'Ano_Mes': [202412], 'variacao_mensal': [0.52],
+                      'Valor_Total_Mes': [400.0]}).to_csv(caminho, mode='a', header=False, index=False)
+        os.utime(caminho, (time.time() + 5, time.time() + 5))
+
+        self.assertEqual(self.consultar('SELECT COUNT(*) AS n FROM gold')['n'].iloc[0], 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,74 @@
+"""
+Testes da correlação cruzada defasada via FFT
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.correlacao import (correlacao_defasada, correlacao_movel, intervalos_bootstrap,
+                                  tabela_correlacoes)
+
+
+def _correlacao_ingenua(x, y, defasagem):
+    """Pearson entre x[t] e y[t + defasagem] sobre os pares válidos"""
+    if defasagem >= 0:
+        a, b = x[:len(x) - defasagem], y[defasagem:]
+    else:
+        a, b = x[-defasagem:], y[:defasagem]
+    validos = np.isfinite(a) & np.isfinite(b)
+    return np.corrcoef(a[validos], b[validos])[0, 1]
+
+
+class TestCorrelacao(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        meses = pd.period_range('2016-01', periods=60, freq='M')
+        ipca = rng.normal(0.4, 0.3, 60)
+        # vendas respondem ao IPCA com 2 meses de atraso
+        vendas = 50000 - 20000 * np.roll(ipca, 2) + rng.normal(0, 1000, 60)
+        self.gold = pd.DataFrame({
+            'Ano_Mes': meses.year * 100 + meses.month,
+            'variacao_mensal': ipca,
+            'variacao_anual': rng.normal(5, 1, 60),
+            'Valor_Total_Mes': vendas,
+            'Numero_Transacoes': rng.integers(800, 1000, 60)
+        }).drop(index=[10, 11])  # meses ausentes
+        self.gold.loc[30, 'variacao_mensal'] = np.nan
+
+    def test_igual_ao_calculo_por_defasagem(self):
+        """Testa FFT com máscara de NaN contra o cálculo ingênuo defasagem a defasagem"""
+        x = np.array([1.0, 2.0, np.nan, 4.0, 3.0, 5.0, 7.0, 6.0, np.nan, 9.0])
+        y = np.array([2.0, 1.0, 3.0, np.nan, 6.0, 4.0, 8.0, 7.0, 9.0, 8.0])
+        defasagens, correlacoes, pares = correlacao_defasada(x[:, None], y[:, None], 3, min_pares=3)
+
+        for indice, defasagem in enumerate(defasagens):
+            self.assertAlmostEqual(correlacoes[indice, 0, 0], _correlacao_ingenua(x, y, defasagem))
+        self.assertEqual(pares[list(defasagens).index(0), 0, 0], 7)
+
+    def test_tabela_detecta_defasagem(self):
+        """Testa todas as combinações de métricas e o pico na defasagem 2"""
+        tabela = tabela_correlacoes(self.gold, max_defasagem=6)
+        self.assertEqual(len(tabela), 2 * 2 * 13)
+
+        par = tabela[(tabela['Metrica_X'] == 'variacao_mensal') & (tabela['Metrica_Y'] == 'Valor_Total_Mes')]
+        self.assertEqual(par.loc[par['Correlacao'].idxmin(), 'Defasagem'], 2)
+        self.assertLess(par['Correlacao'].min(), -0.9)
+
+    def test_janelas_moveis_e_bootstrap(self):
+        """Testa janelas móveis e intervalos de bootstrap reprodutíveis"""
+        movel = correlacao_movel(self.gold, janela=24, max_defasagem=2)
+        self.assertEqual(movel['Ano_Mes_Fim'].nunique(), 60 - 24 + 1)
+
+        ic = intervalos_bootstrap(self.gold, max_defasagem=3, reamostras=200, processos=1, semente=1)
+        ic_repetido = intervalos_bootstrap(self.gold, max_defasagem=3, reamostras=200, processos=1, semente=1)
+        pd.testing.assert_frame_equal(ic, ic_repetido)
+
+        linha = ic[(ic['Metrica_X'] == 'variacao_mensal') & (ic['Metrica_Y'] == 'Valor_Total_Mes')
+                   & (ic['Defasagem'] == 2)].iloc[0]
+        self.assertLessEqual(linha['IC_Inferior'], linha['Correlacao'])
+        self.assertLess(linha['IC_Superior'], 0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,65 @@
+"""
+Testes do cubo pré-agregado de vendas
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.cubo_vendas import (adicionar_dimensoes_calendario, agregar_cubo, construir_cubo,
+                                   mesclar_cubos, tabela_mensal_do_cubo)
+
+
+class TestCuboVendas(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        n = 500
+        self.vendas = adicionar_dimensoes_calendario(pd.DataFrame({
+            'data': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 90, n), unit='D'),
+            'produto': rng.choice(['Bolo', 'Torta'], n),
+            'valor_unitario': rng.uniform(3, 150, n),
+            'quantidade': rng.integers(1, 4, n)
+        }), 'data', datas_feriados=['2024-01-01', '2024-02-13'])
+        self.vendas['Valor_Total_Venda'] = self.vendas['valor_unitario'] * self.vendas['quantidade']
+        self.dimensoes = ['Data', 'Ano', 'Mes', 'Ano_Mes', 'Dia_Semana', 'Feriado', 'produto']
+        self.metricas = {'valor_total': 'Valor_Total_Venda', 'valor_unitario': 'valor_unitario',
+                         'quantidade': 'quantidade'}
+
+    def test_rollup_igual_ao_agrupamento_direto(self):
+        """Testa que média, desvio e extremos do rollup batem com o groupby"""
+        cubo = construir_cubo(self.vendas, self.dimensoes, self.metricas)
+        por_produto = agregar_cubo(cubo, ['produto']).set_index('produto')
+        esperado = self.vendas.groupby('produto')['Valor_Total_Venda'].agg(['mean', 'std', 'max'])
+
+        np.testing.assert_allclose(por_produto['valor_total__media'], esperado['mean'])
+        np.testing.assert_allclose(por_produto['valor_total__desvio'], esperado['std'])
+        np.testing.assert_allclose(por_produto['valor_total__max'], esperado['max'])
+
+        mensal = tabela_mensal_do_cubo(cubo)
+        self.assertEqual(mensal['Numero_Transacoes'].sum(), len(self.vendas))
+        self.assertEqual(mensal['Total_Itens_Vendidos'].sum(), self.vendas['quantidade'].sum())
+
+    def test_mesclar_cubos_de_chunks(self):
+        """Testa que cubos de partes das transações mesclam no cubo completo"""
+        completo = construir_cubo(self.vendas, self.dimensoes, self.metricas)
+        partes = [construir_cubo(self.vendas.iloc[inicio:inicio + 200], self.dimensoes, self.metricas)
+                  for inicio in range(0, len(self.vendas), 200)]
+
+        mesclado = mesclar_cubos(partes)
+
+        pd.testing.assert_frame_equal(tabela_mensal_do_cubo(mesclado), tabela_mensal_do_cubo(completo))
+        feriado = agregar_cubo(mesclado, ['Feriado']).set_index('Feriado')
+        self.assertEqual(feriado['valor_total__contagem'].sum(), len(self.vendas))
+
+    def test_feriado_marcado_no_cubo_salvo(self):
+        """Testa feriado x dia comum marcado no cubo (sem a dimensão) igual ao da transação"""
+        dimensoes = [d for d in self.dimensoes if d != 'Feriado']
+        cubo = construir_cubo(self.vendas, dimensoes, self.metricas)
+        marcado = adicionar_dimensoes_calendario(cubo, 'Data', datas_feriados=['2024-01-01', '2024-02-13'])
+
+        direto = construir_cubo(self.vendas, self.dimensoes, self.metricas)
+        pd.testing.assert_frame_equal(agregar_cubo(marcado, ['Feriado']), agregar_cubo(direto, ['Feriado']))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -6,7 +6,9 @@ import unittest
 import pandas as pd
 import tempfile
 import os
-from src.utils.data_utils import verificar_estrutura_diretorios, gerar_relatorio_dados
+from src.utils.data_utils import (verificar_estrutura_diretorios, gerar_relatorio_dados,
+                                  salvar_com_backup, salvar_atomico, listar_versoes,
+                                  criar_snapshot, aplicar_retencao)
 
 class TestDataUtils(unittest.TestCase):
     
@@ -32,5 +34,43 @@ class TestDataUtils(unittest.TestCase):
         
         self.assertIn('erro', relatorio)
 
+    def test_salvar_atomico_com_versoes(self):
+        """Testa escrita atômica mantendo apenas N snapshots"""
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'saida.csv')
+            for i in range(4):
+                self.assertTrue(salvar_atomico(pd.DataFrame({'v': [i]}), caminho, versoes=2))
+                os.utime(caminho, (1_700_000_000 + i, 1_700_000_000 + i))
+
+            versoes = listar_versoes(caminho)
+            self.assertEqual(len(versoes), 2)
+            self.assertEqual(pd.read_csv(versoes[-1])['v'].tolist(), [2])
+            self.assertEqual(pd.read_csv(caminho)['v'].tolist(), [3])
+            self.assertFalse([n for n in os.listdir(pasta) if n.endswith('.tmp')])
+
+    def test_listar_versoes_so_do_arquivo(self):
+        """Testa que os snapshots de x.csv.gz não são listados (nem removidos) com os de x.csv"""
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'saida.csv')
+            for nome in (caminho, caminho + '.gz'):
+                salvar_atomico(pd.DataFrame({'v': [1]}), nome)
+                criar_snapshot(nome)
+
+            versoes = listar_versoes(caminho)
+            self.assertEqual(len(versoes), 1)
+            self.assertTrue(os.path.basename(versoes[0]).startswith('saida.csv.2'))
+            aplicar_retencao(caminho, 0)
+            self.assertEqual(len(listar_versoes(caminho + '.gz')), 1)
+
+    def test_salvar_com_backup_preserva_principal(self):
+        """Testa que o backup guarda a versão anterior sem renomear o principal"""
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'saida.csv')
+            salvar_com_backup(pd.DataFrame({'v': [1]}), caminho)
+            salvar_com_backup(pd.DataFrame({'v': [2]}), caminho)
+
+            self.assertEqual(pd.read_csv(caminho)['v'].tolist(), [2])
+            self.assertEqual(pd.read_csv(f"{caminho}.backup")['v'].tolist(), [1])
+
 if __name__ == '__main__':
     unittest.main()
\ No newline at end of file
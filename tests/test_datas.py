@@ -0,0 +1,37 @@
+"""
+Testes da conversão de datas por valores únicos
+"""
+
+import unittest
+import pandas as pd
+from src.utils.datas import converter_datas, detectar_formato
+
+
+class TestDatas(unittest.TestCase):
+
+    def test_formato_brasileiro_detectado(self):
+        """Testa que dd/mm/aaaa é lido com o dia primeiro"""
+        serie = pd.Series(['01/02/2024', '13/02/2024', '01/02/2024', None, ' 05/03/2024 '])
+
+        datas, invalidas = converter_datas(serie)
+
+        self.assertEqual(detectar_formato(['01/02/2024', '13/02/2024']), '%d/%m/%Y')
+        self.assertEqual(invalidas, 0)
+        self.assertEqual(datas.iloc[0], pd.Timestamp('2024-02-01'))
+        self.assertEqual(datas.iloc[2], pd.Timestamp('2024-02-01'))
+        self.assertTrue(pd.isna(datas.iloc[3]))
+        self.assertEqual(datas.iloc[4], pd.Timestamp('2024-03-05'))
+
+    def test_contagem_de_invalidas(self):
+        """Testa contagem de valores não convertidos e fallback de formato"""
+        serie = pd.Series(['2024-01-31', '2024-02-30', 'sem data', '2024-01-31', '15/03/2024'])
+
+        datas, invalidas = converter_datas(serie)
+
+        self.assertEqual(invalidas, 2)
+        self.assertEqual(datas.iloc[4], pd.Timestamp('2024-03-15'))
+        self.assertEqual(datas.isna().sum(), 2)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,103 @@
+"""
+Testes da deduplicação de transações com índice persistente
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.deduplicacao import (_salvar_segmento, chaves_transacoes, compactar_indice,
+                                    consolidar_segmentos, contem, descartar_segmentos,
+                                    filtrar_novas, incorporar_segmentos, listar_segmentos,
+                                    registrar_chaves)
+
+
+class TestDeduplicacao(unittest.TestCase):
+
+    def setUp(self):
+        self.vendas = pd.DataFrame({
+            'id_venda': ['1', '2', '3', '4'],
+            'data': ['01/01/2024', '01/01/2024', '02/01/2024', '02/01/2024'],
+            'valor_unitario': ['10.0', '10.0', '5.5', '7.0']
+        })
+
+    def test_chaves_por_id_e_por_linha(self):
+        """Testa chaves estáveis pelo id e pelo hash da linha"""
+        por_id = chaves_transacoes(self.vendas, 'id_venda')
+        self.assertEqual(por_id.dtype, np.uint64)
+        np.testing.assert_array_equal(por_id, chaves_transacoes(self.vendas.iloc[::-1], 'id_venda')[::-1])
+
+        por_linha = chaves_transacoes(self.vendas, colunas=['data', 'valor_unitario'])
+        self.assertEqual(por_linha[0], por_linha[1])
+        self.assertNotEqual(por_linha[1], por_linha[2])
+
+    def test_cargas_sobrepostas(self):
+        """Testa descarte de linhas já vistas e repetidas entre cargas"""
+        with tempfile.TemporaryDirectory() as pasta:
+            novas, chaves, _ = filtrar_novas(self.vendas.iloc[:3], pasta, 'id_venda')
+            self.assertEqual(len(novas), 3)
+            registrar_chaves(pasta, chaves)
+
+            segunda = pd.concat([self.vendas.iloc[2:], self.vendas.iloc[[3]]])
+            novas, chaves, estatisticas = filtrar_novas(segunda, pasta, 'id_venda')
+            self.assertEqual(list(novas['id_venda']), ['4'])
+            self.assertEqual(estatisticas, {'lidas': 3, 'ja_vistas': 1, 'repetidas_na_carga': 1, 'novas': 1})
+
+    def test_segmentos_e_compactacao(self):
+        """Testa gravação por segmentos, compactação e consulta"""
+        rng = np.random.default_rng(0)
+        lotes = [rng.integers(0, 2 ** 63, 1000, dtype=np.uint64) for _ in range(5)]
+        with tempfile.TemporaryDirectory() as pasta:
+            for lote in lotes:
+                registrar_chaves(pasta, lote, max_segmentos=3)
+            self.assertLessEqual(len(listar_segmentos(pasta)), 3)
+            self.assertEqual(compactar_indice(pasta), 5000)
+            self.assertEqual(len(listar_segmentos(pasta)), 1)
+
+            consulta = np.concatenate([lotes[4][:10], np.array([1, 2, 3], dtype=np.uint64)])
+            np.testing.assert_array_equal(contem(pasta, consulta), [True] * 10 + [False] * 3)
+            self.assertFalse(contem(os.path.join(pasta, 'vazio'), consulta).any())
+
+    def test_intercalacao_em_blocos(self):
+        """Testa compactação em blocos pequenos com chaves repetidas entre segmentos"""
+        rng = np.random.default_rng(1)
+        lotes = [np.unique(rng.integers(0, 50_000, 3000, dtype=np.uint64)) for _ in range(4)]
+        with tempfile.TemporaryDirectory() as pasta:
+            # Segmentos sobrepostos, como após uma queda no meio de uma compactação
+            for numero, lote in enumerate(lotes, start=1):
+                _salvar_segmento(os.path.join(pasta, f"segmento_{numero:06d}.npy"), lote)
+            esperado = np.unique(np.concatenate(lotes))
+            self.assertEqual(compactar_indice(pasta, bloco=97), len(esperado))
+            segmentos = listar_segmentos(pasta)
+            self.assertEqual([os.path.basename(c) for c in segmentos], ['segmento_000005.npy'])
+            np.testing.assert_array_equal(np.load(segmentos[0]), esperado)
+
+    def test_indice_de_trabalho_com_checkpoint(self):
+        """Testa segmentos de uma carga: retomada após checkpoint e incorporação"""
+        with tempfile.TemporaryDirectory() as pasta:
+            carga, indice = os.path.join(pasta, 'carga'), os.path.join(pasta, 'indice')
+            for inicio in range(0, 40, 10):
+                registrar_chaves(carga, np.arange(inicio, inicio + 10, dtype=np.uint64))
+            ponto = consolidar_segmentos(carga)
+            self.assertEqual(len(listar_segmentos(carga)), 1)
+
+            # Chunks depois do checkpoint não mexem nos segmentos anteriores
+            registrar_chaves(carga, np.arange(40, 60, dtype=np.uint64), preservar_ate=ponto)
+            self.assertEqual(descartar_segmentos(carga, ponto), 1)
+            np.testing.assert_array_equal(contem(carga, np.array([39, 40], dtype=np.uint64)), [True, False])
+
+            registrar_chaves(indice, np.array([100], dtype=np.uint64))
+            self.assertEqual(incorporar_segmentos(indice, carga), 40)
+            self.assertEqual(listar_segmentos(carga), [])
+            self.assertTrue(contem(indice, np.array([0, 39, 100], dtype=np.uint64)).all())
+
+            registrar_chaves(carga, np.array([7, 8], dtype=np.uint64))
+            self.assertEqual(incorporar_segmentos(indice, carga, substituir=True), 2)
+            np.testing.assert_array_equal(contem(indice, np.array([7, 8, 9, 100], dtype=np.uint64)),
+                                          [True, True, False, False])
+            self.assertEqual(len(listar_segmentos(indice)), 1)
+
+
+if __name__ == '__main__':
+    unittest.main()
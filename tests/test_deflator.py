@@ -0,0 +1,48 @@
+"""
+Testes da deflação de vendas pelo IPCA
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.deflator import (calcular_tabela_deflacao, deflacionar_agregados,
+                                deflacionar_transacoes)
+
+
+class TestDeflator(unittest.TestCase):
+
+    def setUp(self):
+        self.ipca = pd.DataFrame({
+            'Ano_Mes': [202311, 202312, 202401, 202402],
+            'indice': [100.0, 101.0, 102.0, 104.0]
+        })
+
+    def test_fatores_mes_base(self):
+        """Testa fatores em relação ao mês base informado"""
+        tabela = calcular_tabela_deflacao(self.ipca, ano_mes_base=202312)
+        vendas = pd.DataFrame({'Ano_Mes': [202311, 202312, 202402],
+                               'Valor_Total_Mes': [100.0, 100.0, 100.0]})
+
+        resultado = deflacionar_agregados(vendas, tabela)
+
+        np.testing.assert_allclose(resultado['Valor_Total_Mes_Real'],
+                                   [101.0, 100.0, round(100 * 101 / 104, 2)])
+
+    def test_transacoes_com_mes_fora_da_tabela(self):
+        """Testa gather por transação e NaN para meses sem índice"""
+        tabela = calcular_tabela_deflacao(self.ipca)
+        transacoes = pd.DataFrame({
+            'Data': pd.to_datetime(['2023-11-05', '2024-02-10', '2024-05-01']),
+            'Valor_Total_Venda': [10.0, 10.0, 10.0]
+        })
+
+        resultado = deflacionar_transacoes(transacoes, tabela, coluna_data='Data')
+
+        self.assertEqual(tabela['ano_mes_base'], 202402)
+        self.assertAlmostEqual(resultado['Valor_Total_Venda_Real'].iloc[0], 10.4)
+        self.assertAlmostEqual(resultado['Valor_Total_Venda_Real'].iloc[1], 10.0)
+        self.assertTrue(np.isnan(resultado['Valor_Total_Venda_Real'].iloc[2]))
+
+
+if __name__ == '__main__':
+    unittest.main()
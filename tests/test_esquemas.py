@@ -0,0 +1,79 @@
+"""
+Testes dos contratos de esquema das camadas
+"""
+
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.utils.esquemas import (ESQUEMA_FERIADOS, ESQUEMA_VENDAS_MENSAL, aplicar_esquema,
+                                caminho_esquema, ler_csv_com_esquema, resolver_colunas,
+                                salvar_esquema, validar_esquema)
+
+
+class TestEsquemas(unittest.TestCase):
+
+    def setUp(self):
+        self.vendas = pd.DataFrame({
+            'Ano_Mes': [202401, 202402],
+            'Valor_Total_Mes': [100.5, 200.0],
+            'Quantidade_Vendas': [3, 4],
+            'Valor_Medio_Por_Venda': [33.5, 50.0]
+        })
+
+    def test_resolve_sinonimos_e_exige_obrigatorias(self):
+        """Testa resolução por sinônimo e falha com coluna obrigatória ausente"""
+        mapeamento = resolver_colunas(self.vendas.columns, ESQUEMA_VENDAS_MENSAL)
+        self.assertEqual(mapeamento['Numero_Transacoes'], 'Quantidade_Vendas')
+
+        with self.assertRaises(KeyError):
+            resolver_colunas(['Ano_Mes', 'Valor_Total_Mes'], ESQUEMA_VENDAS_MENSAL)
+
+    def test_validacao_vetorizada(self):
+        """Testa violações de Ano_Mes duplicado/inválido, faixa e data"""
+        vendas = self.vendas.copy()
+        vendas.loc[1, 'Ano_Mes'] = 202401
+        vendas.loc[1, 'Valor_Total_Mes'] = -1
+        erros = validar_esquema(aplicar_esquema(vendas, ESQUEMA_VENDAS_MENSAL), ESQUEMA_VENDAS_MENSAL)
+        self.assertTrue(any('duplicados' in e for e in erros))
+        self.assertTrue(any('abaixo de 0' in e for e in erros))
+
+        feriados = pd.DataFrame({'Data': ['25/12/2024', '2024-11-15', '31/02/2024'],
+                                 'Nome_Feriado': ['Natal', 'República', 'Inválido']})
+        erros = validar_esquema(aplicar_esquema(feriados, ESQUEMA_FERIADOS), ESQUEMA_FERIADOS)
+        self.assertEqual(erros, ['Data: 1 datas inválidas'])
+
+    def test_leitura_com_esquema_salvo(self):
+        """Testa leitura tipada a partir do esquema salvo ao lado do CSV"""
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'vendas.csv')
+            self.vendas.to_csv(caminho, index=False)
+            salvar_esquema(caminho, ESQUEMA_VENDAS_MENSAL, self.vendas)
+            self.assertTrue(os.path.exists(caminho_esquema(caminho)))
+
+            df = ler_csv_com_esquema(caminho, ESQUEMA_VENDAS_MENSAL)
+
+            self.assertEqual(list(df.columns), ['Ano_Mes', 'Numero_Transacoes',
+                                                'Valor_Medio_Por_Venda', 'Valor_Total_Mes'])
+            self.assertEqual(str(df['Numero_Transacoes'].dtype), 'Int64')
+
+    def test_quantidade_inteira_continua_inteira(self):
+        """Testa que contagens inteiras não viram float (1565 e não 1565.0) e fracionárias ficam float"""
+        vendas = self.vendas.assign(Total_Itens_Vendidos=[1565, 20])
+        std = aplicar_esquema(vendas, ESQUEMA_VENDAS_MENSAL)
+        self.assertEqual(str(std['Total_Itens_Vendidos'].dtype), 'Int64')
+        self.assertIn('\n202401,3,1565,', std.to_csv(index=False))
+
+        fracionadas = aplicar_esquema(vendas.assign(Total_Itens_Vendidos=[1.5, 2]), ESQUEMA_VENDAS_MENSAL)
+        self.assertEqual(str(fracionadas['Total_Itens_Vendidos'].dtype), 'float64')
+
+        with tempfile.TemporaryDirectory() as pasta:
+            caminho = os.path.join(pasta, 'vendas.csv')
+            std.to_csv(caminho, index=False)
+            salvar_esquema(caminho, ESQUEMA_VENDAS_MENSAL, std)
+            lido = ler_csv_com_esquema(caminho, ESQUEMA_VENDAS_MENSAL)
+            self.assertEqual(str(lido['Total_Itens_Vendidos'].dtype), 'Int64')
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,90 @@
+"""
+Testes das estatísticas incrementais e mergeáveis
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.estatisticas import (atualizar_estatisticas, carregar_estatisticas, descrever,
+                                    mesclar_estatisticas, nulos_por_coluna, resumir,
+                                    salvar_estatisticas)
+from src.utils.sketches import ALFA_PADRAO
+
+
+class TestEstatisticas(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(3)
+        n = 6000
+        self.df = pd.DataFrame({
+            'Ano_Mes': np.arange(n) + 190000,
+            'variacao_mensal': rng.normal(0.4, 0.6, n),
+            'produto': rng.choice(['Bolo', None], n)
+        })
+        self.df.loc[::9, 'variacao_mensal'] = np.nan
+
+    def assert_igual_describe(self, estado, df):
+        esperado = df.describe()
+        obtido = descrever(estado)
+        for linha in ('count', 'mean', 'std', 'min', 'max'):
+            np.testing.assert_allclose(obtido.loc[linha], esperado.loc[linha], rtol=1e-9)
+        pd.testing.assert_series_equal(nulos_por_coluna(estado), df.isnull().sum(), check_dtype=False)
+
+    def test_mesclar_chunks_equivale_a_passada_unica(self):
+        """Testa contagem, nulos, média, desvio e extremos exatos após mesclar chunks"""
+        partes = [resumir(self.df.iloc[i:i + 1000]) for i in range(0, len(self.df), 1000)]
+        estado = mesclar_estatisticas(partes + [resumir(self.df.iloc[:0])])
+        self.assertEqual(estado['linhas'], len(self.df))
+        self.assert_igual_describe(estado, self.df)
+
+        # Quantis do sketch, inclusive negativos, com erro relativo limitado
+        mediana = descrever(estado).loc['50%', 'variacao_mensal']
+        valores = np.sort(self.df['variacao_mensal'].dropna().to_numpy())
+        exato = valores[int(np.floor(0.5 * (len(valores) - 1)))]
+        self.assertLessEqual(abs(mediana - exato) / abs(exato), ALFA_PADRAO + 1e-9)
+        p1 = descrever(estado, quantis=(0.01,)).loc['1%', 'variacao_mensal']
+        self.assertLess(p1, 0)
+
+    def test_quantis_interpolados_como_describe(self):
+        """Testa quartis interpolados próximos dos de describe() em dados discretos"""
+        df = pd.DataFrame({'mes': np.tile(np.arange(1, 13), 40)[:475],
+                           'indice': np.linspace(10, 5000, 475)})
+        obtido = descrever(resumir(df))
+        esperado = df.describe()
+        for linha in ('25%', '50%', '75%'):
+            np.testing.assert_allclose(obtido.loc[linha], esperado.loc[linha], rtol=2 * ALFA_PADRAO)
+
+    def test_infinitos_fora_dos_quantis(self):
+        """Testa que ±inf entram na contagem e nos extremos sem corromper os quantis"""
+        finitos = np.linspace(1, 100, 99)
+        df = pd.DataFrame({'valor': np.r_[finitos, np.inf, -np.inf]})
+        obtido = descrever(resumir(df))
+        self.assertEqual(obtido.loc['count', 'valor'], 101)
+        self.assertEqual((obtido.loc['min', 'valor'], obtido.loc['max', 'valor']), (-np.inf, np.inf))
+        esperado = pd.Series(finitos).describe()
+        for linha in ('25%', '50%', '75%'):
+            np.testing.assert_allclose(obtido.loc[linha, 'valor'], esperado[linha], rtol=2 * ALFA_PADRAO)
+
+    def test_atualizacao_resume_so_linhas_novas(self):
+        """Testa reaproveitamento do estado salvo quando a base só cresce"""
+        pasta = tempfile.TemporaryDirectory()
+        self.addCleanup(pasta.cleanup)
+        caminho = os.path.join(pasta.name, 'estatisticas.json')
+        salvar_estatisticas(atualizar_estatisticas(None, self.df.iloc[:4000]), caminho)
+
+        estado = atualizar_estatisticas(carregar_estatisticas(caminho), self.df)
+        self.assertEqual(estado['novas'], 2000)
+        self.assert_igual_describe(estado, self.df)
+
+        # Linha do meio já resumida revisada: resume tudo de novo
+        revisado = self.df.copy()
+        revisado.loc[100, 'variacao_mensal'] = 10.0
+        estado = atualizar_estatisticas(carregar_estatisticas(caminho), revisado)
+        self.assertEqual(estado['novas'], len(revisado))
+        self.assert_igual_describe(estado, revisado)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,72 @@
+"""
+Testes do estudo de impacto dos feriados nas vendas
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.eventos_feriados import alinhar_eventos, estudo_feriados, preparar_feriados
+
+
+class TestEventosFeriados(unittest.TestCase):
+
+    def setUp(self):
+        self.feriados = pd.DataFrame({
+            'Data': ['25/12/2024', '09/07/2024', '25/01/2024', '20/11/2024', '13/06/2024'],
+            'Nome_Feriado': ['Natal', 'Revolução Constitucionalista', 'Aniversário de SP',
+                             'Consciência Negra', 'Santo Antônio'],
+            'Tipo_Feriado': ['NACIONAL', 'ESTADUAL', 'MUNICIPAL', 'MUNICIPAL', 'MUNICIPAL'],
+            'Sigla_Estado': ['', 'SP', 'SP', 'RJ', 'SP'],
+            'Municipio': ['', '', 'São Paulo', 'Rio de Janeiro', 'Adamantina']
+        })
+        dias = pd.date_range('2024-01-01', '2024-12-31')
+        self.vendas = pd.DataFrame({'Data': dias, 'Valor': 100.0})
+        self.vendas.loc[self.vendas['Data'] == '2024-12-25', 'Valor'] = 300.0
+        self.vendas.loc[self.vendas['Data'] == '2024-12-24', 'Valor'] = 150.0
+
+    def test_alinhamento_com_dias_ausentes(self):
+        """Testa o alinhamento por searchsorted com NaN onde não há venda"""
+        matriz = alinhar_eventos(np.array([10, 11, 13]), np.array([1.0, 2.0, 3.0]),
+                                 np.array([11, 20]), np.array([-1, 0, 1, 2]))
+        np.testing.assert_array_equal(matriz[0], [1.0, 2.0, np.nan, 3.0])
+        self.assertTrue(np.isnan(matriz[1]).all())
+
+    def test_escopos_sp_e_nacional(self):
+        """Testa a seleção de eventos nacionais e de SP com o escopo"""
+        eventos = preparar_feriados(self.feriados, uf='SP')
+        self.assertEqual(sorted(eventos['Escopo']), ['ESTADUAL', 'MUNICIPAL', 'MUNICIPAL', 'NACIONAL'])
+        self.assertNotIn('Rio de Janeiro', set(eventos['Municipio']))
+
+        eventos = preparar_feriados(self.feriados, uf='SP', municipios=['São Paulo'])
+        self.assertEqual(len(eventos), 3)
+
+    def test_uplift_na_janela(self):
+        """Testa uplift do dia e perfil por deslocamento"""
+        eventos = preparar_feriados(self.feriados, uf='SP')
+        resultado = estudo_feriados(self.vendas, eventos, janela=2, janela_base=7)
+
+        natal = resultado['eventos'].set_index('Nome_Feriado').loc['Natal']
+        self.assertAlmostEqual(natal['Base'], 100.0)
+        self.assertAlmostEqual(natal['Uplift_Dia'], 2.0)
+        self.assertEqual(natal['Dias_Observados'], 5)
+
+        perfil = resultado['perfil'].set_index(['Escopo', 'Deslocamento'])['Uplift_Medio']
+        self.assertAlmostEqual(perfil[('NACIONAL', -1)], 0.5)
+        self.assertAlmostEqual(perfil[('ESTADUAL', 0)], 0.0)
+
+    def test_series_por_municipio(self):
+        """Testa que feriados municipais só se aplicam à série do município"""
+        vendas = pd.concat([self.vendas.assign(Municipio='São Paulo'),
+                            self.vendas.assign(Municipio='Adamantina', Valor=50.0)])
+        eventos = preparar_feriados(self.feriados, uf='SP')
+        resultado = estudo_feriados(vendas, eventos, coluna_serie='Municipio')['eventos']
+
+        # Natal e 9 de julho para as duas séries + um municipal para cada
+        self.assertEqual(len(resultado), 6)
+        santo_antonio = resultado[resultado['Nome_Feriado'] == 'Santo Antônio']
+        self.assertEqual(list(santo_antonio['Municipio']), ['Adamantina'])
+        self.assertAlmostEqual(santo_antonio['Base'].iloc[0], 50.0)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,88 @@
+"""
+Testes da tabela gold particionada por loja
+"""
+
+import os
+import tempfile
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.arrays_mensais import montar_mensal
+from src.utils.cubo_vendas import adicionar_dimensoes_calendario, construir_cubo
+from src.utils.gold_lojas import (caminho_particao, juntar_ipca, ler_gold_particionado,
+                                  salvar_gold_particionado, tabela_mensal_por_loja)
+
+
+class TestGoldLojas(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.ipca = montar_mensal(pd.DataFrame({
+            'Ano_Mes': [202401, 202402, 202404],
+            'variacao_mensal': [0.42, 0.83, 0.38],
+            'variacao_anual': [4.51, 4.50, 3.69]
+        }), 'ipca')
+        vendas = pd.DataFrame({
+            'data': pd.to_datetime(['2024-01-05', '2024-01-20', '2024-02-03', '2024-03-10',
+                                    '2024-01-07', '2024-04-01']),
+            'Loja': ['001', '001', '001', '001', 'SP/02', 'SP/02'],
+            'valor_total': [10.0, 20.0, 30.0, 40.0, 5.0, 7.0],
+            'valor_unitario': [10.0, 20.0, 30.0, 40.0, 5.0, 7.0]
+        })
+        vendas = adicionar_dimensoes_calendario(vendas, 'data')
+        self.cubo = construir_cubo(vendas, ['Data', 'Ano', 'Mes', 'Ano_Mes', 'Dia_Semana', 'Loja'],
+                                   {'valor_total': 'valor_total', 'valor_unitario': 'valor_unitario'})
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _gold(self, mensal):
+        gold = juntar_ipca(mensal, self.ipca)
+        return gold.rename(columns={'Valor_Medio_Por_Transacao': 'Valor_Medio_Por_Venda'})[
+            ['Loja', 'Ano_Mes', 'variacao_mensal', 'variacao_anual', 'Numero_Transacoes',
+             'Valor_Medio_Por_Venda', 'Valor_Total_Mes']]
+
+    def test_mensal_por_loja_e_juncao(self):
+        """Testa uma linha por loja e mês e o inner join vetorizado com o IPCA"""
+        mensal = tabela_mensal_por_loja(self.cubo)
+        self.assertEqual(list(zip(mensal['Loja'], mensal['Ano_Mes'])),
+                         [('001', 202401), ('001', 202402), ('001', 202403),
+                          ('SP/02', 202401), ('SP/02', 202404)])
+        self.assertEqual(mensal['Valor_Total_Mes'].tolist(), [30.0, 30.0, 40.0, 5.0, 7.0])
+
+        gold = juntar_ipca(mensal, self.ipca)
+        # 202403 não tem IPCA
+        self.assertNotIn(202403, gold['Ano_Mes'].tolist())
+        np.testing.assert_array_equal(gold['variacao_mensal'], [0.42, 0.83, 0.42, 0.38])
+
+        with self.assertRaises(KeyError):
+            tabela_mensal_por_loja(self.cubo.drop(columns='Loja'))
+
+    def test_particoes_regravadas_so_quando_mudam(self):
+        """Testa layout Loja=<id>, pulo de partições iguais e remoção de lojas"""
+        destino = os.path.join(self.pasta.name, 'gold_por_loja')
+        gold = self._gold(tabela_mensal_por_loja(self.cubo))
+
+        self.assertEqual(salvar_gold_particionado(gold, destino),
+                         {'gravadas': 2, 'inalteradas': 0, 'removidas': 0})
+        self.assertTrue(os.path.isdir(os.path.join(destino, 'Loja=SP%2F02')))
+        self.assertEqual(caminho_particao(destino, 'SP/02'), os.path.join(destino, 'Loja=SP%2F02'))
+
+        lido = ler_gold_particionado(destino)
+        self.assertEqual(len(lido), len(gold))
+        self.assertEqual(sorted(lido['Loja'].unique()), ['001', 'SP/02'])
+
+        # Só a loja 001 muda
+        gold.loc[gold['Loja'] == '001', 'Valor_Total_Mes'] += 1
+        self.assertEqual(salvar_gold_particionado(gold, destino),
+                         {'gravadas': 1, 'inalteradas': 1, 'removidas': 0})
+
+        # Geração parcial mantém as outras lojas; a completa remove as ausentes
+        so_001 = gold[gold['Loja'] == '001']
+        self.assertEqual(salvar_gold_particionado(so_001, destino, parcial=True)['removidas'], 0)
+        self.assertEqual(salvar_gold_particionado(so_001, destino)['removidas'], 1)
+        self.assertEqual(ler_gold_particionado(destino)['Loja'].unique().tolist(), ['001'])
+
+
+if __name__ == '__main__':
+    unittest.main()
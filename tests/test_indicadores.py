@@ -0,0 +1,85 @@
+"""
+Testes do repositório de indicadores mensais
+"""
+
+import gzip
+import os
+import tempfile
+import unittest
+import numpy as np
+from src.utils.indicadores import (atualizar_indicadores, carregar_fonte, ler_releases,
+                                   registrar_fonte, tabela_indicadores)
+
+
+class TestIndicadores(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.raw = os.path.join(self.pasta.name, 'raw')
+        self.destino = os.path.join(self.pasta.name, 'indicadores')
+        os.makedirs(self.raw)
+        self.registro = {}
+        registrar_fonte('ipca', 'ipca.csv.gz', registro=self.registro)
+        registrar_fonte('inpc', 'inpc.csv.gz', metricas=['variacao_mensal'], registro=self.registro)
+        registrar_fonte('igpm', 'igpm.csv', formato='sgs', metricas=['variacao_mensal'],
+                        registro=self.registro)
+        registrar_fonte('ipca15', 'ausente.csv.gz', registro=self.registro)
+        self._ibge('ipca.csv.gz', [(2024, 1, 100.0, 0.42), (2024, 2, 100.8, '..'), (2024, 3, 101.0, 0.16)])
+        self._ibge('inpc.csv.gz', [(2024, 1, 200.0, 0.57), (2024, 2, 201.6, 0.81)])
+        with open(os.path.join(self.raw, 'igpm.csv'), 'w', encoding='utf-8') as arquivo:
+            arquivo.write('data;valor\n01/01/2024;0,07\n01/02/2024;-0,52\n')
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def _ibge(self, nome, linhas):
+        with gzip.open(os.path.join(self.raw, nome), 'wt', encoding='utf-8') as arquivo:
+            arquivo.write('ano,mes,indice,variacao_mensal\n')
+            arquivo.writelines(f"{a},{m},{i},{v}\n" for a, m, i, v in linhas)
+
+    def _atualizar(self, **kwargs):
+        return atualizar_indicadores(diretorio=self.destino, diretorio_raw=self.raw,
+                                     registro=self.registro, **kwargs)
+
+    def test_carregar_fontes(self):
+        """Testa colunas <indicador>__<metrica>, '..' como nulo e o formato SGS"""
+        ipca = carregar_fonte(self.registro['ipca'], self.raw)
+        self.assertEqual(list(ipca.columns), ['Ano_Mes', 'ipca__indice', 'ipca__variacao_mensal'])
+        self.assertTrue(np.isnan(ipca['ipca__variacao_mensal'][1]))
+        igpm = carregar_fonte(self.registro['igpm'], self.raw)
+        self.assertEqual(igpm['Ano_Mes'].tolist(), [202401, 202402])
+        self.assertEqual(igpm['igpm__variacao_mensal'].tolist(), [0.07, -0.52])
+        with self.assertRaises(ValueError):
+            registrar_fonte('x', 'x.csv', formato='xls', registro=self.registro)
+
+    def test_tabela_larga_e_releases(self):
+        """Testa releases só de acréscimo, fontes inalteradas e seleção de colunas"""
+        resumo = self._atualizar(processos=2)
+        self.assertEqual(resumo['release'], 1)
+        self.assertEqual(resumo['ausentes'], ['ipca15'])
+        self.assertEqual(resumo['celulas'], 5 + 2 + 2)
+
+        largo = tabela_indicadores(diretorio=self.destino)
+        self.assertEqual(largo['Ano_Mes'].tolist(), [202401, 202402, 202403])
+        self.assertEqual(largo.columns.tolist(), ['Ano_Mes', 'igpm__variacao_mensal', 'inpc__variacao_mensal',
+                                                  'ipca__indice', 'ipca__variacao_mensal'])
+        self.assertEqual(self._atualizar()['inalteradas'], ['ipca', 'inpc', 'igpm'])
+        self.assertIsNone(self._atualizar(forcar=True)['release'])
+
+        # Nova divulgação do INPC: um mês novo e uma revisão
+        self._ibge('inpc.csv.gz', [(2024, 1, 200.0, 0.57), (2024, 2, 201.6, 0.80), (2024, 3, 202.0, 0.19)])
+        resumo = self._atualizar()
+        self.assertEqual((resumo['release'], resumo['celulas'], resumo['lidas']), (2, 2, ['inpc']))
+
+        inpc = tabela_indicadores(['inpc', 'ipca__indice'], diretorio=self.destino)
+        self.assertEqual(inpc['inpc__variacao_mensal'].tolist(), [0.57, 0.80, 0.19])
+        self.assertEqual(inpc.columns.tolist(), ['Ano_Mes', 'inpc__variacao_mensal', 'ipca__indice'])
+        antes = tabela_indicadores(['inpc'], diretorio=self.destino, ate=1)
+        self.assertEqual(antes['inpc__variacao_mensal'].tolist(), [0.57, 0.81])
+        self.assertEqual(len(ler_releases(self.destino)), 10)
+        with self.assertRaises(KeyError):
+            tabela_indicadores(['selic'], diretorio=self.destino)
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Testes do orçamento de memória e do planejador de chunks
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.utils import memoria
+from src.utils.memoria import (avancar_registros, interpretar_tamanho, ler_em_chunks,
+                               orcamento_memoria, planejar_chunks)
+
+MB = 1024 ** 2
+
+
+class TestMemoria(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.caminho = os.path.join(self.pasta.name, 'vendas.csv')
+        n = 50_000
+        pd.DataFrame({
+            'data': np.repeat(pd.date_range('2024-01-01', periods=100).strftime('%d/%m/%Y'), n // 100),
+            'produto': np.tile(['Bolo', 'Torta', 'Brigadeiro', 'Pudim'], n // 4),
+            'valor_unitario': np.arange(n) % 97 + 0.5
+        }).to_csv(self.caminho, index=False)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_interpretar_tamanho(self):
+        """Testa unidades aceitas no orçamento"""
+        self.assertEqual(interpretar_tamanho('512MB'), 512 * MB)
+        self.assertEqual(interpretar_tamanho('2g'), 2048 * MB)
+        self.assertEqual(interpretar_tamanho('1.5GiB'), 1536 * MB)
+        self.assertEqual(interpretar_tamanho(1000), 1000)
+        with self.assertRaises(ValueError):
+            interpretar_tamanho('muito')
+
+    def test_prioridade_do_orcamento(self):
+        """Testa argumento > MAX_MEMORY > tamanho da Lambda"""
+        ambiente = {'MAX_MEMORY': '256MB', 'AWS_LAMBDA_FUNCTION_MEMORY_SIZE': '512'}
+        with mock.patch.dict(os.environ, ambiente):
+            self.assertEqual(orcamento_memoria('1GB'), 1024 * MB)
+            self.assertEqual(orcamento_memoria(), 256 * MB)
+            del os.environ['MAX_MEMORY']
+            self.assertEqual(orcamento_memoria(), 512 * MB)
+
+    def test_chunks_cabem_no_orcamento(self):
+        """Testa linhas por chunk proporcionais à folga do orçamento"""
+        with mock.patch.object(memoria, 'rss_atual', return_value=100 * MB):
+            pequeno = planejar_chunks(self.caminho, '200MB', dtype=str)
+            grande = planejar_chunks(self.caminho, '64GB', dtype=str)
+        folga = 200 * MB * memoria.FRACAO_UTIL - 100 * MB
+        self.assertLessEqual(pequeno['linhas_por_chunk'] * pequeno['bytes_por_linha'] * memoria.FATOR_TRABALHO,
+                             folga)
+        self.assertGreater(grande['linhas_por_chunk'], 100 * pequeno['linhas_por_chunk'])
+
+    def test_leitura_adapta_ao_rss(self):
+        """Testa que todas as linhas são lidas e o chunk encolhe quando o RSS sobe"""
+        # RSS sobe depois do primeiro chunk (ex: acumuladores crescendo)
+        rss = iter([100 * MB] + [119 * MB] * 1000)
+        with mock.patch.object(memoria, 'LINHAS_MINIMAS', 100), \
+                mock.patch.object(memoria, 'rss_atual', side_effect=lambda: next(rss)):
+            plano = planejar_chunks(self.caminho, '170MB', dtype=str)
+            tamanhos = [len(chunk) for chunk in ler_em_chunks(self.caminho, plano=plano, dtype=str)]
+
+        self.assertEqual(sum(tamanhos), 50_000)
+        self.assertEqual(plano['chunks'], len(tamanhos))
+        self.assertGreater(len(tamanhos), 2)
+        self.assertLess(tamanhos[1], tamanhos[0] / 5)
+
+    def test_tipagem_por_chunk(self):
+        """Testa a função de tipagem aplicada a cada chunk"""
+        tipar = lambda chunk: chunk.assign(valor_unitario=chunk['valor_unitario'].astype(float))
+        with mock.patch.object(memoria, 'LINHAS_MINIMAS', 1000):
+            chunks = list(ler_em_chunks(self.caminho, '1KB', tipar=tipar, dtype=str))
+        self.assertEqual(len(chunks), 50)
+        total = pd.concat(chunks)['valor_unitario'].sum()
+        self.assertAlmostEqual(total, (np.arange(50_000) % 97 + 0.5).sum())
+
+    def test_retomada_por_deslocamento(self):
+        """Testa que retomar do deslocamento em bytes lê exatamente as linhas restantes"""
+        completo = pd.read_csv(self.caminho, dtype=str)
+        # Cabeçalho + 12.345 linhas já processadas
+        deslocamento = avancar_registros(self.caminho, 0, 12_346)
+        with mock.patch.object(memoria, 'LINHAS_MINIMAS', 1000):
+            restante = pd.concat(ler_em_chunks(self.caminho, '1KB', deslocamento=deslocamento, dtype=str),
+                                 ignore_index=True)
+        pd.testing.assert_frame_equal(restante, completo.iloc[12_345:].reset_index(drop=True))
+        fim = avancar_registros(self.caminho, 0, 10 ** 9)
+        self.assertEqual(fim, os.path.getsize(self.caminho))
+        self.assertEqual(list(ler_em_chunks(self.caminho, deslocamento=fim, dtype=str)), [])
+
+
+if __name__ == '__main__':
+    unittest.main()
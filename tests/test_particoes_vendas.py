@@ -0,0 +1,120 @@
+"""
+Testes da conversão das vendas para Parquet particionado por Ano_Mes
+"""
+
+import os
+import tempfile
+import unittest
+from unittest import mock
+import numpy as np
+import pandas as pd
+from src.utils import memoria, particoes_vendas
+from src.utils.deduplicacao import chaves_transacoes
+from src.utils.particoes_vendas import (COLUNA_CHAVE, converter_vendas_parquet, ler_lotes_parquet,
+                                        ler_vendas_parquet)
+
+try:
+    import pyarrow.parquet as pq
+except ImportError:
+    pq = None
+
+
+@unittest.skipUnless(pq is not None, 'pyarrow não instalado')
+class TestParticoesVendas(unittest.TestCase):
+
+    def setUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.csv = os.path.join(self.pasta.name, 'vendas.csv')
+        self.destino = os.path.join(self.pasta.name, 'vendas_parquet')
+        self.bruto = pd.DataFrame({
+            'id_venda': [str(i) for i in range(8)],
+            'data_venda': ['15/01/2024', '02/01/2024', '10/02/2024', '28/02/2024',
+                           '05/03/2024', 'xx', '31/03/2024', '01/04/2024'],
+            'produto': ['Bolo', 'Torta', 'Bolo', None, 'Pudim', 'Bolo', 'Torta', 'Bolo'],
+            'quantidade': ['1', '2', '3', '1', '2', '1', '4', '2'],
+            'valor_unitario': ['10.5', '20', '30', '5', '12', '9', '7.5', '11']
+        })
+        self.bruto.to_csv(self.csv, index=False)
+
+    def tearDown(self):
+        self.pasta.cleanup()
+
+    def test_conversao_particionada_e_tipada(self):
+        """Testa partições, tipos, estatísticas e manifesto"""
+        manifesto = converter_vendas_parquet(self.csv, self.destino)
+        self.assertTrue(manifesto['convertido'])
+        self.assertEqual(manifesto['meses'], [202401, 202402, 202403, 202404])
+        self.assertEqual((manifesto['linhas'], manifesto['datas_invalidas']), (8, 1))
+        self.assertEqual(sorted(os.listdir(self.destino))[:2], ['Ano_Mes=202401', 'Ano_Mes=202402'])
+
+        arquivo = os.path.join(self.destino, 'Ano_Mes=202401', 'parte-00000.parquet')
+        metadados = pq.ParquetFile(arquivo).metadata
+        estatisticas = metadados.row_group(0).column(0).statistics
+        self.assertEqual(metadados.schema.names[0], 'data')
+        self.assertEqual((estatisticas.min, estatisticas.max),
+                         (pd.Timestamp('2024-01-02'), pd.Timestamp('2024-01-15')))
+
+        df = ler_vendas_parquet(self.destino)
+        self.assertEqual(str(df['data'].dtype), 'datetime64[ns]')
+        self.assertEqual(df['valor_unitario'].dtype, np.float64)
+        self.assertEqual(len(df), 7)
+
+    def test_chaves_iguais_as_do_csv(self):
+        """Testa que a chave gravada é a mesma de uma carga direta do CSV"""
+        converter_vendas_parquet(self.csv, self.destino)
+        df = ler_vendas_parquet(self.destino, ['id_venda', COLUNA_CHAVE])
+        esperadas = dict(zip(self.bruto['id_venda'], chaves_transacoes(self.bruto, 'id_venda')))
+        for id_venda, chave in zip(df['id_venda'], df[COLUNA_CHAVE]):
+            self.assertEqual(chave, esperadas[id_venda])
+
+    def test_leitura_por_faixa_e_colunas(self):
+        """Testa poda de partições e leitura só das colunas pedidas"""
+        converter_vendas_parquet(self.csv, self.destino)
+        df = ler_vendas_parquet(self.destino, ['valor_unitario', 'quantidade'],
+                                inicio=202402, fim=202403)
+        self.assertEqual(list(df.columns), ['valor_unitario', 'quantidade'])
+        self.assertEqual(sorted(df['valor_unitario']), [5.0, 7.5, 12.0, 30.0])
+
+        lotes = list(ler_lotes_parquet(self.destino, ['data', 'Ano_Mes'], inicio=202403))
+        total = pd.concat(lotes)
+        self.assertEqual(sorted(total['Ano_Mes'].unique()), [202403, 202404])
+        self.assertEqual(len(total), 3)
+
+    def test_um_arquivo_por_mes_entre_chunks(self):
+        """Testa que os chunks de um mês vão para o mesmo arquivo, em row groups ordenados"""
+        rng = np.random.default_rng(3)
+        n = 6000
+        datas = pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 90, n), unit='D')
+        pd.DataFrame({'data_venda': datas.strftime('%d/%m/%Y'),
+                      'valor_unitario': rng.uniform(1, 50, n).round(2)}).to_csv(self.csv, index=False)
+        with mock.patch.object(memoria, 'LINHAS_MINIMAS', 500), \
+                mock.patch.object(particoes_vendas, 'LINHAS_POR_GRUPO', 1000):
+            manifesto = converter_vendas_parquet(self.csv, self.destino, max_memoria='1KB')
+
+        self.assertEqual(manifesto['arquivos'], 3)
+        for mes in manifesto['meses']:
+            pasta = os.path.join(self.destino, f'Ano_Mes={mes}')
+            self.assertEqual(os.listdir(pasta), ['parte-00000.parquet'])
+            arquivo = pq.ParquetFile(os.path.join(pasta, 'parte-00000.parquet'))
+            self.assertGreater(arquivo.metadata.num_row_groups, 1)
+            for grupo in range(arquivo.metadata.num_row_groups):
+                datas_grupo = arquivo.read_row_group(grupo, columns=['data'])['data'].to_pandas()
+                self.assertTrue(datas_grupo.is_monotonic_increasing)
+        self.assertEqual(len(ler_vendas_parquet(self.destino)), n)
+
+    def test_conversao_pulada_sem_mudancas(self):
+        """Testa que o CSV inalterado não é convertido de novo"""
+        converter_vendas_parquet(self.csv, self.destino)
+        self.assertFalse(converter_vendas_parquet(self.csv, self.destino)['convertido'])
+        self.assertTrue(converter_vendas_parquet(self.csv, self.destino, forcar=True)['convertido'])
+
+        self.bruto.iloc[:3].to_csv(self.csv, index=False)
+        manifesto = converter_vendas_parquet(self.csv, self.destino)
+        self.assertTrue(manifesto['convertido'])
+        self.assertEqual(manifesto['meses'], [202401, 202402])
+        self.assertEqual(len(ler_vendas_parquet(self.destino)), 3)
+        self.assertFalse(os.path.exists(self.destino + '.tmp'))
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,61 @@
+"""
+Testes da projeção direta das colunas de feriados (script 1) contra o caminho pandas
+"""
+
+import io
+import unittest
+from src.scripts.script1_download_to_s3 import csv_via_pandas, transformar_csv
+
+COLUNAS = ['Data', 'Nome_Feriado', 'Tipo_Feriado', 'Descricao', 'Sigla_Estado', 'Municipio']
+CABECALHO = 'Data,Nome_Feriado,Tipo_Feriado,Descricao,Sigla_Estado,Municipio\n'
+
+# (caso, CSV de origem, projeção direta equivalente ao pandas)
+CASOS = [
+    ('simples', CABECALHO + '01/01/2024,Confraternização,NACIONAL,Ano novo,,\n', True),
+    ('valores NA', CABECALHO + '25/01/2024,Aniversário,MUNICIPAL,NA,SP,null\n'
+                               '02/11/2024,Finados,N/A,#N/A,None,nan\n', True),
+    ('NA com espaços fica', CABECALHO + '01/01/2024, NA ,NACIONAL,x, ,\n', True),
+    ('linhas curtas', CABECALHO + '01/01/2024,Ano novo\n07/09/2024,Independência,NACIONAL\n', True),
+    ('colunas ausentes e extras', 'Municipio,Data,Extra,Nome_Feriado\n'
+                                  'Santos,26/01/2024,1,Aniversário\n', True),
+    ('cabeçalho com BOM', '﻿' + CABECALHO + '01/01/2024,Ano novo,NACIONAL,,,\n', True),
+    ('quebra de linha no campo', CABECALHO + '01/01/2024,Ano novo,NACIONAL,"linha 1\nlinha 2, com vírgula",,\n'
+                                             '21/04/2024,"Tiradentes ""herói""",NACIONAL,,,\n', True),
+    ('linhas em branco', CABECALHO + '\n01/01/2024,Ano novo,NACIONAL,,,\n\n'
+                                     ',,,,,\n , , , , , \n""\n07/09/2024,Independência,NACIONAL,,,\n\n', True),
+    ('linhas só com espaços', CABECALHO + '01/01/2024,Ano novo,NACIONAL,,,\n   \n\t\n', False),
+    ('espaços entre aspas', CABECALHO + '01/01/2024,Ano novo,NACIONAL,,,\n"  "\n', False),
+    ('sem linhas', CABECALHO, True),
+    ('coluna numérica', CABECALHO + '01/01/2024,Ano novo,NACIONAL,,,3550308\n'
+                                    '02/01/2024,Outro,MUNICIPAL,,,\n', False),
+    ('coluna booleana', CABECALHO + '01/01/2024,Ano novo,NACIONAL,True,,\n', False),
+    ('coluna mista continua texto', CABECALHO + '01/01/2024,Ano novo,NACIONAL,,,3550308\n'
+                                                '02/01/2024,Outro,MUNICIPAL,,,Santos\n', True),
+]
+
+
+class TestProjecaoFeriados(unittest.TestCase):
+
+    def test_projecao_igual_ao_pandas(self):
+        """Testa bytes e registros da projeção direta contra pd.read_csv + fillna + to_csv"""
+        for caso, texto, compativel in CASOS:
+            with self.subTest(caso=caso):
+                dados = texto.encode('utf-8')
+                destino = io.BytesIO()
+                origem = io.TextIOWrapper(io.BytesIO(dados), encoding='utf-8-sig', newline='')
+                estado = transformar_csv(origem, destino, COLUNAS)
+
+                self.assertEqual(estado['compativel'], compativel)
+                if compativel:
+                    esperado, registros = csv_via_pandas(io.BytesIO(dados), COLUNAS)
+                    self.assertEqual(destino.getvalue(), esperado)
+                    self.assertEqual(estado['registros'], registros)
+
+    def test_linha_com_campos_a_mais(self):
+        """Testa que linhas com campos a mais desviam para o caminho pandas"""
+        origem = io.StringIO(CABECALHO + '01/01/2024,Ano novo,NACIONAL,,,,sobra\n', newline='')
+        self.assertFalse(transformar_csv(origem, io.BytesIO(), COLUNAS)['compativel'])
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,99 @@
+"""
+Testes da transferência de feriados entre buckets (script 2) com o S3 emulado
+"""
+
+import io
+import os
+import unittest
+from unittest import mock
+import pandas as pd
+import src.scripts.script2_transfer_s3_to_s3 as script2
+from src.utils.carga_lambdas import (BUCKET_PROCESSADO, BUCKET_RAW, criar_s3_emulado, evento_s3,
+                                     gerar_csv_feriados, objetos_raw)
+
+
+class TestTransferenciaFeriados(unittest.TestCase):
+
+    def setUp(self):
+        self.s3 = criar_s3_emulado(objetos=objetos_raw(3, 60))
+        patchers = [mock.patch.object(script2, 'cliente_s3', lambda: self.s3),
+                    mock.patch.object(script2, 'ESPERA_CONFLITO_S', 0),
+                    mock.patch.dict(os.environ, {'S3_BUCKET_ORIGEM': BUCKET_RAW,
+                                                 'S3_BUCKET_DESTINO': BUCKET_PROCESSADO})]
+        for patcher in patchers:
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def _consolidado(self):
+        corpo = self.s3.estado['objetos'][(BUCKET_PROCESSADO, script2.CHAVE_CONSOLIDADO)]
+        return pd.read_csv(io.BytesIO(corpo))
+
+    def _gravar_raw(self, nome, linhas):
+        self.s3.put_object(Bucket=BUCKET_RAW, Key=f'feriados-raw/{nome}',
+                           Body=gerar_csv_feriados(nome.split('_')[0], 2000, linhas))
+
+    def test_chaves_do_evento(self):
+        """Testa ações por chave: prefixo e extensão filtrados, chave decodificada, última vence"""
+        self.assertIsNone(script2.chaves_do_evento({}))
+        self.assertIsNone(script2.chaves_do_evento({'Records': [{'eventSource': 'aws:sqs'}]}))
+        evento = evento_s3(['feriados-raw/nacional+2024.csv', 'outro/x.csv', 'feriados-raw/leia.txt',
+                            'feriados-raw/estadual_2024.CSV'])
+        evento['Records'].append({'eventName': 'ObjectRemoved:Delete',
+                                  's3': {'object': {'key': 'feriados-raw/nacional+2024.csv'}}})
+        self.assertEqual(script2.chaves_do_evento(evento),
+                         [('feriados-raw/nacional 2024.csv', 'remover'),
+                          ('feriados-raw/estadual_2024.CSV', 'processar')])
+
+    def test_substituicao_e_remocao(self):
+        """Testa evento que troca só as linhas do arquivo alterado e remoção de um arquivo"""
+        self.assertEqual(script2.lambda_handler({}, None)['statusCode'], 200)
+        inicial = self._consolidado()
+        self.assertEqual(inicial['Arquivo_Origem'].nunique(), 3)
+
+        self._gravar_raw('nacional_2000.csv', 10)
+        resposta = script2.lambda_handler(evento_s3(['feriados-raw/nacional_2000.csv']), None)
+        self.assertEqual(resposta['statusCode'], 200)
+        atualizado = self._consolidado()
+        por_arquivo = atualizado['Arquivo_Origem'].value_counts()
+        self.assertEqual(por_arquivo['feriados-raw/nacional_2000.csv'], 10)
+        outros = inicial[inicial['Arquivo_Origem'] != 'feriados-raw/nacional_2000.csv']
+        pd.testing.assert_frame_equal(atualizado.iloc[:len(outros)], outros.reset_index(drop=True))
+
+        evento = {'Records': [{'eventName': 'ObjectRemoved:Delete',
+                               's3': {'object': {'key': 'feriados-raw/estadual_2000.csv'}}}]}
+        self.assertEqual(script2.lambda_handler(evento, None)['statusCode'], 200)
+        self.assertNotIn('feriados-raw/estadual_2000.csv', set(self._consolidado()['Arquivo_Origem']))
+        self.assertNotIn((BUCKET_PROCESSADO, 'feriados-processados/estadual_2000.csv'),
+                         self.s3.estado['objetos'])
+
+    def test_invocacoes_concorrentes(self):
+        """Testa que uma gravação concorrente do consolidado não perde o arquivo da outra invocação"""
+        script2.lambda_handler({}, None)
+        self._gravar_raw('facultativo_2000.csv', 20)
+        self._gravar_raw('nacional_2001.csv', 20)
+
+        put_object = self.s3.put_object
+        concorrente = {}
+
+        def put_com_concorrente(**kwargs):
+            # Outra invocação grava o consolidado entre a leitura e a escrita desta
+            if kwargs['Key'] == script2.CHAVE_CONSOLIDADO and 'resposta' not in concorrente:
+                concorrente['resposta'] = None
+                concorrente['resposta'] = script2.lambda_handler(
+                    evento_s3(['feriados-raw/nacional_2001.csv']), None)
+            return put_object(**kwargs)
+
+        with mock.patch.object(self.s3, 'put_object', put_com_concorrente):
+            resposta = script2.lambda_handler(evento_s3(['feriados-raw/facultativo_2000.csv']), None)
+
+        self.assertEqual(concorrente['resposta']['statusCode'], 200)
+        self.assertEqual(resposta['statusCode'], 200)
+        # Varredura (consolidado + 3 arquivos), 2 leituras por invocação e a releitura após o 412
+        self.assertEqual(self.s3.estado['requisicoes']['GetObject'], 4 + 2 + 2 + 1)
+        arquivos = ('nacional_2000', 'estadual_2000', 'municipal_2000', 'facultativo_2000', 'nacional_2001')
+        self.assertEqual(set(self._consolidado()['Arquivo_Origem']),
+                         {f'feriados-raw/{nome}.csv' for nome in arquivos})
+
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,89 @@
+"""
+Testes do serviço HTTP assíncrono das camadas gold e IPCA
+"""
+
+import asyncio
+import json
+import os
+import tempfile
+import unittest
+import pandas as pd
+from src.utils.servico_dados import iniciar_servico
+
+
+async def requisitar(porta, alvo, cabecalhos=None):
+    """Faz um GET HTTP/1.1 e retorna (status, cabeçalhos, corpo)"""
+    leitor, escritor = await asyncio.open_connection('127.0.0.1', porta)
+    linhas = [f"GET {alvo} HTTP/1.1", "Host: teste", "Connection: close"]
+    linhas += [f"{nome}: {valor}" for nome, valor in (cabecalhos or {}).items()]
+    escritor.write(('\r\n'.join(linhas) + '\r\n\r\n').encode())
+    await escritor.drain()
+    resposta = await leitor.read()
+    escritor.close()
+    cabecalho, corpo = resposta.split(b'\r\n\r\n', 1)
+    linhas = cabecalho.decode().split('\r\n')
+    campos = dict(linha.split(': ', 1) for linha in linhas[1:])
+    return int(linhas[0].split()[1]), campos, corpo
+
+
+class TestServicoDados(unittest.IsolatedAsyncioTestCase):
+
+    async def asyncSetUp(self):
+        self.pasta = tempfile.TemporaryDirectory()
+        self.gold = pd.DataFrame({
+            'Ano_Mes': [202403, 202401, 202402, 202404],
+            'variacao_mensal': [0.16, 0.42, 0.83, 0.38],
+            'Valor_Total_Mes': [300.0, 100.0, 200.0, 400.0]
+        })
+        self.caminho = os.path.join(self.pasta.name, 'tabela_gold_ipca_vendas.csv')
+        self.gold.to_csv(self.caminho, index=False)
+        self.servidor, self.estado = await iniciar_servico('127.0.0.1', 0, self.pasta.name,
+                                                           intervalo_verificacao=0)
+        self.porta = self.servidor.sockets[0].getsockname()[1]
+
+    async def asyncTearDown(self):
+        self.servidor.close()
+        await self.servidor.wait_closed()
+        self.pasta.cleanup()
+
+    async def test_faixa_json_e_csv(self):
+        """Testa consulta por faixa de Ano_Mes em JSON e CSV"""
+        status, _, corpo = await requisitar(self.porta, '/gold?inicio=202402&fim=202403')
+        self.assertEqual(status, 200)
+        self.assertEqual([r['Ano_Mes'] for r in json.loads(corpo)], [202402, 202403])
+
+        status, campos, corpo = await requisitar(self.porta, '/gold?inicio=202404&formato=csv')
+        self.assertTrue(campos['Content-Type'].startswith('text/csv'))
+        self.assertEqual(corpo.decode().splitlines()[1], '202404,0.38,400.0')
+
+        status, _, _ = await requisitar(self.porta, '/inexistente')
+        self.assertEqual(status, 404)
+        status, _, _ = await requisitar(self.porta, '/gold?inicio=abc')
+        self.assertEqual(status, 400)
+
+    async def test_etag_e_recarga(self):
+        """Testa 304 com If-None-Match e nova versão quando o arquivo muda"""
+        _, campos, _ = await requisitar(self.porta, '/gold')
+        etag = campos['ETag']
+        status, _, corpo = await requisitar(self.porta, '/gold', {'If-None-Match': etag})
+        self.assertEqual((status, corpo), (304, b''))
+
+        self.gold.assign(Valor_Total_Mes=0.0).to_csv(self.caminho, index=False)
+        mtime = os.stat(self.caminho).st_mtime_ns + 10 ** 9
+        os.utime(self.caminho, ns=(mtime, mtime))
+
+        status, campos, corpo = await requisitar(self.porta, '/gold', {'If-None-Match': etag})
+        self.assertEqual(status, 200)
+        self.assertNotEqual(campos['ETag'], etag)
+        self.assertEqual({r['Valor_Total_Mes'] for r in json.loads(corpo)}, {0.0})
+
+    async def test_requisicoes_concorrentes(self):
+        """Testa centenas de requisições simultâneas"""
+        respostas = await asyncio.gather(*[
+            requisitar(self.porta, f'/gold?inicio=20240{1 + i % 4}') for i in range(200)])
+        self.assertTrue(all(status == 200 for status, _, _ in respostas))
+        self.assertEqual(len(json.loads(respostas[0][2])), 4)
+
+
+if __name__ == '__main__':
+    unittest.main()
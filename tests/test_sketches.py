@@ -0,0 +1,59 @@
+"""
+Testes dos sketches de quantis mergeáveis
+"""
+
+import unittest
+import numpy as np
+import pandas as pd
+from src.utils.sketches import ALFA_PADRAO, construir_sketch, mesclar_sketches, quantis_sketch
+
+
+class TestSketches(unittest.TestCase):
+
+    def setUp(self):
+        rng = np.random.default_rng(7)
+        self.meses = np.repeat([202401, 202402, 202403], [5000, 3000, 1])
+        self.valores = rng.lognormal(mean=3.5, sigma=0.8, size=len(self.meses))
+
+    def test_quantis_com_erro_relativo_limitado(self):
+        """Testa P50/P90/P99 por mês contra os quantis exatos"""
+        sketch = construir_sketch(self.meses, self.valores)
+        quantis = quantis_sketch(sketch).set_index('Ano_Mes')
+
+        self.assertEqual(list(quantis.columns), ['P50', 'P90', 'P99'])
+        for mes in (202401, 202402):
+            valores_mes = np.sort(self.valores[self.meses == mes])
+            for q in (0.5, 0.9, 0.99):
+                exato = valores_mes[int(np.floor(q * (len(valores_mes) - 1)))]
+                estimado = quantis.loc[mes, f"P{round(q * 100)}"]
+                self.assertLessEqual(abs(estimado - exato) / exato, ALFA_PADRAO + 1e-9)
+
+        # mês com uma única venda: todos os quantis são o próprio valor
+        unico = self.valores[self.meses == 202403][0]
+        self.assertAlmostEqual(quantis.loc[202403, 'P99'] / unico, 1, delta=ALFA_PADRAO)
+
+    def test_mesclar_chunks_equivale_a_passada_unica(self):
+        """Testa que sketches de chunks mesclados são idênticos ao sketch completo"""
+        completo = construir_sketch(self.meses, self.valores)
+        partes = [construir_sketch(self.meses[i:i + 1000], self.valores[i:i + 1000])
+                  for i in range(0, len(self.meses), 1000)]
+        mesclado = mesclar_sketches(partes)
+
+        pd.testing.assert_frame_equal(completo, mesclado, check_dtype=False)
+
+    def test_zeros_e_nulos(self):
+        """Testa valores zero (bucket especial) e NaN (ignorados)"""
+        sketch = construir_sketch([1, 1, 1, 1], [0.0, 0.0, 0.0, np.nan])
+        self.assertEqual(int(sketch['contagem'].sum()), 3)
+        self.assertEqual(quantis_sketch(sketch)['P50'].iloc[0], 0.0)
+
+    def test_sketch_vazio(self):
+        """Testa que um sketch sem contagens gera uma tabela de quantis vazia"""
+        for sketch in (mesclar_sketches([]), construir_sketch([202401], [np.nan])):
+            quantis = quantis_sketch(sketch, prefixo='Ticket_P')
+            self.assertEqual(list(quantis.columns), ['Ano_Mes', 'Ticket_P50', 'Ticket_P90', 'Ticket_P99'])
+            self.assertTrue(quantis.empty)
+
+
+if __name__ == '__main__':
+    unittest.main()